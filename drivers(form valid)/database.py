@@ -1,17 +1,37 @@
+import os
 import sqlite3
+import sys
+import threading
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.db_connection import (
+    get_connection as get_shared_connection,
+    transaction, initialize_once
+)
 
 DB_NAME = "drivers.db"
+PAGE_SIZE = 200
+BULK_CHUNK_SIZE = 500
+ID_BLOCK_SIZE = 20
 
+INSERT_DRIVER_SQL = """
+    INSERT INTO drivers (name, dob, age, gender, phone, email)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
 
-def get_connection():
-    return sqlite3.connect(DB_NAME)
+# Driver IDs reserved for this session but not used yet
+_reserved_ids = deque()
+_reserve_lock = threading.Lock()
 
 
-def initialize_db():
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_connection():
+    return get_shared_connection(DB_NAME)
 
-    cursor.execute("""
+
+def _create_schema(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS drivers (
             driver_id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -23,52 +43,149 @@ def initialize_db():
         )
     """)
 
-    conn.commit()
-    conn.close()
-
 
-def get_next_driver_id():
-    conn = get_connection()
-    cursor = conn.cursor()
+def initialize_db():
+    initialize_once(_create_schema, DB_NAME)
+
+
+def reserve_driver_ids(count=ID_BLOCK_SIZE):
+    """
+    Atomically reserve the next `count` driver IDs.
+
+    The AUTOINCREMENT counter in sqlite_sequence is moved forward under a
+    write lock, so no other session or AUTOINCREMENT insert can hand out
+    the same IDs. Unused IDs are simply left as gaps.
+    """
+    with transaction(DB_NAME, immediate=True) as conn:
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'drivers'"
+        ).fetchone()
+
+        if row is None:
+            last = 0
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('drivers', ?)",
+                (count,)
+            )
+        else:
+            last = row[0]
+            conn.execute(
+                "UPDATE sqlite_sequence SET seq = ? WHERE name = 'drivers'",
+                (last + count,)
+            )
+
+    return range(last + 1, last + count + 1)
 
-    cursor.execute("SELECT MAX(driver_id) FROM drivers")
-    row = cursor.fetchone()
 
-    next_id = 1 if row[0] is None else row[0] + 1
-    conn.close()
-    return next_id
+def get_next_driver_id():
+    """Return the ID the next insert_driver() call will use"""
+    with _reserve_lock:
+        if not _reserved_ids:
+            _reserved_ids.extend(reserve_driver_ids())
+        return _reserved_ids[0]
 
 
 def insert_driver(name, dob, age, gender, phone, email):
-    conn = get_connection()
-    cursor = conn.cursor()
+    """
+    Insert a driver under the ID shown by get_next_driver_id().
 
+    The reserved ID is only used up when the insert succeeds, so a
+    rejected row keeps its number for the next attempt.
+    """
+    driver_id = get_next_driver_id()
     try:
-        cursor.execute("""
-            INSERT INTO drivers (name, dob, age, gender, phone, email)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, dob, age, gender, phone, email))
+        with transaction(DB_NAME) as conn:
+            conn.execute("""
+                INSERT INTO drivers (driver_id, name, dob, age, gender, phone, email)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (driver_id, name, dob, age, gender, phone, email))
+
+        with _reserve_lock:
+            if _reserved_ids and _reserved_ids[0] == driver_id:
+                _reserved_ids.popleft()
 
-        conn.commit()
         return True, None
 
     except sqlite3.IntegrityError as e:
         return False, str(e)
 
-    finally:
-        conn.close()
+
+def bulk_insert_drivers(rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Insert many (name, dob, age, gender, phone, email) rows.
+
+    Rows are written with executemany, one transaction per chunk. If a
+    chunk hits a UNIQUE violation it is replayed row by row so only the
+    offending rows are skipped.
+
+    Returns (inserted_count, errors) where errors is a list of
+    (row_index, message) for the rows that were rejected.
+    """
+    rows = list(rows)
+    inserted = 0
+    errors = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+
+        with transaction(DB_NAME) as conn:
+            try:
+                with transaction(DB_NAME):
+                    conn.executemany(INSERT_DRIVER_SQL, chunk)
+                inserted += len(chunk)
+                continue
+            except sqlite3.IntegrityError:
+                pass
+
+            for offset, row in enumerate(chunk):
+                try:
+                    with transaction(DB_NAME):
+                        conn.execute(INSERT_DRIVER_SQL, row)
+                    inserted += 1
+                except sqlite3.IntegrityError as e:
+                    errors.append((start + offset, str(e)))
+
+    return inserted, errors
 
 
 def fetch_all_drivers():
-    conn = get_connection()
-    cursor = conn.cursor()
+    return list(iter_drivers())
+
+
+def fetch_drivers_page(after_id=0, limit=PAGE_SIZE, ids=None):
+    """
+    Return up to `limit` drivers with driver_id greater than `after_id`,
+    or just the drivers in `ids`
+    """
+    cursor = get_connection().cursor()
+
+    if ids is not None:
+        placeholders = ", ".join("?" * len(ids)) or "NULL"
+        cursor.execute(f"""
+            SELECT driver_id, name, dob, age, gender, phone, email
+            FROM drivers
+            WHERE driver_id IN ({placeholders})
+            ORDER BY driver_id
+        """, list(ids))
+        return cursor.fetchall()
 
     cursor.execute("""
         SELECT driver_id, name, dob, age, gender, phone, email
         FROM drivers
+        WHERE driver_id > ?
         ORDER BY driver_id
-    """)
+        LIMIT ?
+    """, (after_id, limit))
+
+    return cursor.fetchall()
+
 
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+def iter_drivers(page_size=PAGE_SIZE):
+    """Yield every driver in driver_id order, one page at a time"""
+    after_id = 0
+    while True:
+        page = fetch_drivers_page(after_id, page_size)
+        if not page:
+            return
+        yield from page
+        after_id = page[-1][0]
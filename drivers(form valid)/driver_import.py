@@ -0,0 +1,49 @@
+import csv
+
+from database import bulk_insert_drivers
+from validators import validate_driver, describe_insert_error
+
+# Expected CSV header; dob is DD-MM-YYYY like the form
+CSV_COLUMNS = ["name", "dob", "gender", "phone", "email"]
+
+
+def import_drivers_csv(path):
+    """
+    Import drivers from a CSV file.
+
+    Every row goes through the same validation as the form. Valid rows are
+    inserted in bulk; rows that fail validation or hit a duplicate phone or
+    email are reported back without stopping the import.
+
+    Returns (inserted_count, errors) where errors is a list of
+    (csv_line_number, message) tuples.
+    """
+    errors = []
+    rows = []
+    line_numbers = []
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            return 0, [(1, f"Missing column(s): {', '.join(missing)}")]
+
+        for record in reader:
+            line = reader.line_num
+            values = [(record.get(c) or "").strip() for c in CSV_COLUMNS]
+            name, dob_text, gender, phone, email = values
+
+            valid, result = validate_driver(name, dob_text, gender.capitalize(), phone, email)
+            if not valid:
+                errors.append((line, result))
+                continue
+
+            rows.append(result)
+            line_numbers.append(line)
+
+    inserted, insert_errors = bulk_insert_drivers(rows)
+    for index, message in insert_errors:
+        errors.append((line_numbers[index], describe_insert_error(message)))
+
+    errors.sort()
+    return inserted, errors
@@ -1,17 +1,37 @@
+import os
 import sys
-import re
-from datetime import date, datetime
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLineEdit, QPushButton,
     QVBoxLayout, QFormLayout, QMessageBox, QComboBox,
-    QTableWidget, QTableWidgetItem
+    QTableView, QFileDialog
 )
 
+import validators
+from driver_import import import_drivers_csv
+
 from database import (
     initialize_db, get_next_driver_id,
-    insert_driver, fetch_all_drivers
+    insert_driver, fetch_drivers_page, PAGE_SIZE
 )
+from models.db_connection import close_all
+
+# The worker pool and table models are shared with the main application
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend"
+))
+from workers import wait_for_all
+from table_models import Column, RecordTableModel
+
+DRIVER_COLUMNS = [
+    Column("ID", 'driver_id'),
+    Column("Name", 'name'),
+    Column("DOB", 'dob'),
+    Column("Age", 'age'),
+    Column("Gender", 'gender'),
+    Column("Phone", 'phone'),
+    Column("Email", 'email'),
+]
 
 
 class DriverForm(QWidget):
@@ -57,6 +77,9 @@ class DriverForm(QWidget):
         self.view_btn = QPushButton("View Drivers")
         self.view_btn.clicked.connect(self.open_driver_list)
 
+        self.import_btn = QPushButton("Import CSV")
+        self.import_btn.clicked.connect(self.import_csv)
+
         form_layout.addRow("Driver ID:", self.driver_id_input)
         form_layout.addRow("Full Name:", self.name_input)
         form_layout.addRow("Date of Birth:", self.dob_input)
@@ -69,6 +92,7 @@ class DriverForm(QWidget):
         layout.addLayout(form_layout)
         layout.addWidget(self.submit_btn)
         layout.addWidget(self.view_btn)
+        layout.addWidget(self.import_btn)
 
         self.setLayout(layout)
 
@@ -76,50 +100,18 @@ class DriverForm(QWidget):
     def load_driver_id(self):
         self.driver_id_input.setText(str(get_next_driver_id()))
 
-    # VALIDATIONS
+    # VALIDATIONS (shared with the CSV import, see validators.py)
     def validate_name(self, name):
-        return bool(re.fullmatch(r"[A-Za-z ]{1,100}", name))
+        return validators.validate_name(name)
 
     def validate_email(self, email):
-        # ONLY gmail.com allowed
-        pattern = r"^[a-zA-Z0-9._%+-]+@gmail\.com$"
-        return re.fullmatch(pattern, email)
+        return validators.validate_email(email)
 
     def validate_phone(self, phone):
-        return re.fullmatch(r"[6-9]\d{9}", phone)
+        return validators.validate_phone(phone)
 
     def validate_and_calculate_age(self, dob_text):
-        try:
-            day, month, year = map(int, dob_text.split("-"))
-            today = date.today()
-
-            if year < 1960 or year > today.year:
-                return False, f"Year must be between 1950 and {today.year}"
-
-            if month < 1 or month > 12:
-                return False, "Invalid month"
-
-            if month in [4, 6, 9, 11]:
-                max_days = 30
-            elif month == 2:
-                max_days = 29 if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0) else 28
-            else:
-                max_days = 31
-
-            if day < 1 or day > max_days:
-                return False, "Invalid day"
-
-            age = today.year - year - (
-                (today.month, today.day) < (month, day)
-            )
-
-            if age < 18:
-                return False, "Driver must be at least 18 years old"
-
-            return True, age
-
-        except:
-            return False, "Invalid DOB format (DD-MM-YYYY)"
+        return validators.validate_and_calculate_age(dob_text)
 
     # LIVE AGE UPDATE
     def update_age(self):
@@ -139,48 +131,43 @@ class DriverForm(QWidget):
         phone = self.phone_input.text().strip()
         email = self.email_input.text().strip()
 
-        if not all([name, dob_text, phone, email]):
-            QMessageBox.warning(self, "Error", "All fields are required")
-            return
-
-        if not self.validate_name(name):
-            QMessageBox.warning(self, "Error", "Invalid name")
-            return
-
-        valid, age = self.validate_and_calculate_age(dob_text)
+        valid, result = validators.validate_driver(name, dob_text, gender, phone, email)
         if not valid:
-            QMessageBox.warning(self, "Error", age)
-            return
-
-        if gender == "Select":
-            QMessageBox.warning(self, "Error", "Select gender")
+            QMessageBox.warning(self, "Error", result)
             return
 
-        if not self.validate_phone(phone):
-            QMessageBox.warning(self, "Error", "Invalid phone number")
-            return
+        success, error = insert_driver(*result)
 
-        if not self.validate_email(email):
-            QMessageBox.warning(self, "Error", "Only @gmail.com emails allowed")
+        if not success:
+            QMessageBox.warning(self, "Error", validators.describe_insert_error(error))
             return
 
-        dob_db = datetime.strptime(dob_text, "%d-%m-%Y").strftime("%Y-%m-%d")
+        QMessageBox.information(self, "Success", "Driver saved successfully")
+        self.clear_form()
+        self.load_driver_id()
 
-        success, error = insert_driver(
-            name, dob_db, age, gender, phone, email
+    # BULK IMPORT
+    def import_csv(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Drivers", "", "CSV Files (*.csv)"
         )
+        if not path:
+            return
 
-        if not success:
-            if "phone" in error:
-                QMessageBox.warning(self, "Error", "Phone already exists")
-            elif "email" in error:
-                QMessageBox.warning(self, "Error", "Email already exists")
-            else:
-                QMessageBox.warning(self, "Error", "Database error")
+        try:
+            inserted, errors = import_drivers_csv(path)
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.warning(self, "Error", f"Could not read file: {e}")
             return
 
-        QMessageBox.information(self, "Success", "Driver saved successfully")
-        self.clear_form()
+        message = f"Imported {inserted} driver(s)."
+        if errors:
+            shown = "\n".join(f"Line {line}: {error}" for line, error in errors[:10])
+            if len(errors) > 10:
+                shown += f"\n... and {len(errors) - 10} more"
+            message += f"\n\n{len(errors)} row(s) skipped:\n{shown}"
+
+        QMessageBox.information(self, "Import Complete", message)
         self.load_driver_id()
 
     # CLEAR FORM
@@ -198,6 +185,18 @@ class DriverForm(QWidget):
         self.driver_window.show()
 
 
+class DriverPageModel(RecordTableModel):
+    """Saved drivers, paged by driver_id (keyset) rather than OFFSET"""
+
+    def __init__(self, parent=None):
+        super().__init__(DRIVER_COLUMNS, fetch_drivers_page,
+                         id_key='driver_id', page_size=PAGE_SIZE, parent=parent)
+
+    def page_arguments(self):
+        last_id = self.last_paged['driver_id'] if self.last_paged else 0
+        return {"after_id": last_id, "limit": self.page_size}
+
+
 class DriverListWindow(QWidget):
     def __init__(self):
         super().__init__()
@@ -205,30 +204,28 @@ class DriverListWindow(QWidget):
         self.setGeometry(200, 200, 850, 400)
 
         layout = QVBoxLayout()
-        self.table = QTableWidget()
+        self.model = DriverPageModel(self)
+        self.model.load_failed.connect(self.show_load_error)
+        self.model.loaded.connect(self.table_loaded)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         layout.addWidget(self.table)
         self.setLayout(layout)
 
-        self.load_data()
-
-    def load_data(self):
-        drivers = fetch_all_drivers()
-
-        self.table.setRowCount(len(drivers))
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Name", "DOB", "Age", "Gender", "Phone", "Email"]
-        )
+        # Further pages are fetched by the view as it scrolls
+        self.model.reload()
 
-        for r, row in enumerate(drivers):
-            for c, value in enumerate(row):
-                self.table.setItem(r, c, QTableWidgetItem(str(value)))
+    def show_load_error(self, message):
+        QMessageBox.warning(self, "Error", f"Could not load drivers:\n{message}")
 
+    def table_loaded(self):
         self.table.resizeColumnsToContents()
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(wait_for_all)
+    app.aboutToQuit.connect(close_all)
     window = DriverForm()
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,91 @@
+import re
+from datetime import date, datetime
+
+GENDERS = ["Male", "Female", "Other"]
+
+
+def validate_name(name):
+    return bool(re.fullmatch(r"[A-Za-z ]{1,100}", name))
+
+
+def validate_email(email):
+    # ONLY gmail.com allowed
+    pattern = r"^[a-zA-Z0-9._%+-]+@gmail\.com$"
+    return re.fullmatch(pattern, email)
+
+
+def validate_phone(phone):
+    return re.fullmatch(r"[6-9]\d{9}", phone)
+
+
+def validate_and_calculate_age(dob_text):
+    try:
+        day, month, year = map(int, dob_text.split("-"))
+        today = date.today()
+
+        if year < 1960 or year > today.year:
+            return False, f"Year must be between 1950 and {today.year}"
+
+        if month < 1 or month > 12:
+            return False, "Invalid month"
+
+        if month in [4, 6, 9, 11]:
+            max_days = 30
+        elif month == 2:
+            max_days = 29 if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0) else 28
+        else:
+            max_days = 31
+
+        if day < 1 or day > max_days:
+            return False, "Invalid day"
+
+        age = today.year - year - (
+            (today.month, today.day) < (month, day)
+        )
+
+        if age < 18:
+            return False, "Driver must be at least 18 years old"
+
+        return True, age
+
+    except:
+        return False, "Invalid DOB format (DD-MM-YYYY)"
+
+
+def validate_driver(name, dob_text, gender, phone, email):
+    """
+    Run every field check used by the form.
+
+    Returns (True, row) with the row ready for insert_driver, or
+    (False, message) with the first problem found.
+    """
+    if not all([name, dob_text, phone, email]):
+        return False, "All fields are required"
+
+    if not validate_name(name):
+        return False, "Invalid name"
+
+    valid, age = validate_and_calculate_age(dob_text)
+    if not valid:
+        return False, age
+
+    if gender not in GENDERS:
+        return False, "Select gender"
+
+    if not validate_phone(phone):
+        return False, "Invalid phone number"
+
+    if not validate_email(email):
+        return False, "Only @gmail.com emails allowed"
+
+    dob_db = datetime.strptime(dob_text, "%d-%m-%Y").strftime("%Y-%m-%d")
+    return True, (name, dob_db, age, gender, phone, email)
+
+
+def describe_insert_error(error):
+    """Turn an IntegrityError message into the text shown to the user"""
+    if "phone" in error:
+        return "Phone already exists"
+    if "email" in error:
+        return "Email already exists"
+    return "Database error"
@@ -2,12 +2,18 @@ import sys
 from PyQt5.QtWidgets import QApplication
 from login_window import LoginWindow
 from main_application import MainApplication
+from models.db_connection import close_all
+from models.schema import initialize_database
+from workers import wait_for_all
 
 class ApplicationController:
     """Controls the flow between Login and Main Application"""
     
     def __init__(self):
         self.app = QApplication(sys.argv)
+        self.app.aboutToQuit.connect(wait_for_all)
+        self.app.aboutToQuit.connect(close_all)
+        initialize_database()
         self.login_window = None
         self.main_window = None
         
@@ -1,89 +1,94 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
+    QTableView, QLineEdit, QComboBox,
     QDateEdit, QSpinBox, QDoubleSpinBox, QFrame, QGroupBox,
     QTabWidget, QTextEdit, QHeaderView, QMessageBox,
     QCheckBox, QFileDialog, QStackedWidget, QListWidget,
-    QListWidgetItem, QFormLayout, QDialog, QGridLayout
+    QListWidgetItem, QFormLayout, QDialog, QGridLayout, QInputDialog
 )
 from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt, QDate
+import csv
 import datetime
 
-# Mock data for buses
-MOCK_BUSES = [
-    {
-        'id': 1,
-        'registration_number': 'MH-01-AB-1234',
-        'bus_number': 'BUS-001',
-        'model': 'Tata Starbus',
-        'capacity': 40,
-        'year': 2020,
-        'color': 'White',
-        'status': 'Active',
-        'policy_number': 'INS-2023-001',
-        'provider': 'ICICI Lombard',
-        'coverage_amount': 5000000,
-        'premium_amount': 75000,
-        'start_date': '2023-01-15',
-        'expiry_date': '2024-01-14',
-        'insurance_status': 'Active',
-        'days_remaining': 45
-    },
-    {
-        'id': 2,
-        'registration_number': 'MH-01-CD-5678',
-        'bus_number': 'BUS-002',
-        'model': 'Ashok Leyland',
-        'capacity': 45,
-        'year': 2019,
-        'color': 'Blue',
-        'status': 'Active',
-        'policy_number': 'INS-2023-002',
-        'provider': 'New India Assurance',
-        'coverage_amount': 4500000,
-        'premium_amount': 68000,
-        'start_date': '2023-03-10',
-        'expiry_date': '2024-03-09',
-        'insurance_status': 'Expiring Soon',
-        'days_remaining': 10
-    },
-    {
-        'id': 3,
-        'registration_number': 'MH-01-EF-9012',
-        'bus_number': 'BUS-003',
-        'model': 'Volvo B7R',
-        'capacity': 50,
-        'year': 2021,
-        'color': 'Red',
-        'status': 'Maintenance',
-        'policy_number': 'INS-2022-015',
-        'provider': 'Bajaj Allianz',
-        'coverage_amount': 6000000,
-        'premium_amount': 85000,
-        'start_date': '2022-06-20',
-        'expiry_date': '2023-06-19',
-        'insurance_status': 'Expired',
-        'days_remaining': -200
-    },
-    {
-        'id': 4,
-        'registration_number': 'MH-01-GH-3456',
-        'bus_number': 'BUS-004',
-        'model': 'Force Traveller',
-        'capacity': 26,
-        'year': 2022,
-        'color': 'Yellow',
-        'status': 'Active',
-        'policy_number': 'INS-2023-045',
-        'provider': 'HDFC Ergo',
-        'coverage_amount': 3500000,
-        'premium_amount': 52000,
-        'start_date': '2023-11-01',
-        'expiry_date': '2024-10-31',
-        'insurance_status': 'Active',
-        'days_remaining': 280
-    }
+from models.buses import (
+    fetch_buses, fetch_insurance_counts, fetch_policies, renew_policies, set_bus_status
+)
+from change_notifier import notifier
+from search_controller import SearchController
+from table_models import (
+    Column, RecordTableModel, selected_ids, selected_record, GOOD, WARNING, BAD
+)
+from workers import submit, submit_job
+
+
+def export_policies(token, file_path, policy_ids):
+    """Write the policies to a CSV file (runs on a worker thread)"""
+    policies = fetch_policies(policy_ids)
+    token.check()
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(policies[0]) if policies else [])
+        writer.writeheader()
+        writer.writerows(policies)
+    return len(policies)
+
+
+def bus_status_colors(bus):
+    if bus['status'] == 'Active':
+        return GOOD
+    if bus['status'] == 'Maintenance':
+        return WARNING
+    return BAD
+
+
+def insurance_status_colors(bus):
+    if bus['insurance_status'] == 'Active':
+        return GOOD
+    if bus['insurance_status'] == 'Expiring Soon':
+        return WARNING
+    return BAD
+
+
+def days_remaining_text(bus):
+    days = bus['days_remaining']
+    return "Expired" if days < 0 else f"{days} days"
+
+
+def days_remaining_colors(bus):
+    days = bus['days_remaining']
+    if days < 0:
+        return BAD
+    if days <= 30:
+        return WARNING
+    return GOOD
+
+
+BUS_COLUMNS = [
+    Column("Registration", 'registration_number'),
+    Column("Bus No.", 'bus_number'),
+    Column("Model", 'model'),
+    Column("Capacity", 'capacity', align=Qt.AlignCenter),
+    Column("Year", 'year', align=Qt.AlignCenter),
+    Column("Status", 'status', colors=bus_status_colors, align=Qt.AlignCenter),
+    Column("Policy No.", 'policy_number'),
+    Column("Provider", 'provider'),
+    Column("Expiry Date", 'expiry_date'),
+    Column("Ins. Status", 'insurance_status', colors=insurance_status_colors,
+           align=Qt.AlignCenter),
+]
+
+# Rows are buses; the Select column ticks their current policy_id
+POLICY_COLUMNS = [
+    Column("Select", lambda bus: "", checkable=True),
+    Column("Bus Registration", 'registration_number'),
+    Column("Policy Number", 'policy_number'),
+    Column("Provider", 'provider'),
+    Column("Coverage Amount", lambda bus: f"₹ {bus['coverage_amount']:,}"),
+    Column("Premium", lambda bus: f"₹ {bus['premium_amount']:,}"),
+    Column("Start Date", 'start_date'),
+    Column("Expiry Date", 'expiry_date'),
+    Column("Days Remaining", days_remaining_text, colors=days_remaining_colors,
+           align=Qt.AlignCenter),
 ]
 
 
@@ -144,8 +149,13 @@ class BusListTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.bus_model = RecordTableModel(BUS_COLUMNS, fetch_buses)
+        self.bus_model.load_failed.connect(self.show_load_error)
         self.init_ui()
         self.load_buses()
+        notifier().changed.connect(self.on_data_changed)
+        # Insurance status and days remaining move on at midnight
+        notifier().day_changed.connect(self.load_buses)
         
     def init_ui(self):
         """Initialize the UI"""
@@ -160,6 +170,7 @@ class BusListTab(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search buses...")
         self.search_input.setFixedWidth(250)
+        self.search_controller = SearchController(self.search_input, self.search_buses)
         filter_layout.addWidget(self.search_input)
         
         # Status filter
@@ -200,14 +211,11 @@ class BusListTab(QWidget):
         layout.addWidget(filter_widget)
         
         # Bus table
-        self.bus_table = QTableWidget()
-        self.bus_table.setColumnCount(10)
-        self.bus_table.setHorizontalHeaderLabels([
-            "Registration", "Bus No.", "Model", "Capacity", 
-            "Year", "Status", "Policy No.", "Provider", "Expiry Date", "Ins. Status"
-        ])
+        self.bus_table = QTableView()
+        self.bus_table.setModel(self.bus_model)
         self.bus_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.bus_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.bus_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.bus_table.setSelectionBehavior(QTableView.SelectRows)
         
         layout.addWidget(self.bus_table)
         
@@ -248,91 +256,52 @@ class BusListTab(QWidget):
         
         layout.addWidget(action_widget)
         
+    def current_filters(self):
+        """Return the fetch_buses arguments for the filter widgets"""
+        return {
+            'search': self.search_input.text(),
+            'status': self.status_filter.currentText(),
+            'insurance': self.insurance_filter.currentText()
+        }
+        
     def load_buses(self):
-        """Load buses into the table"""
-        self.bus_table.setRowCount(len(MOCK_BUSES))
+        """Query buses matching the current filters in the background"""
+        self.bus_model.set_filters(**self.current_filters())
+        
+    def show_load_error(self, message):
+        QMessageBox.warning(self, "Error", f"Could not load buses:\n{message}")
+        
+    def on_data_changed(self, entity, entity_id, operation):
+        """Patch the row of a bus that was changed elsewhere"""
+        if entity == 'bus':
+            self.bus_model.refresh(entity_id)
+        
+    def search_buses(self, text, narrow):
+        """Run the search box query, re-checking only the shown rows if it narrows"""
+        filters = self.current_filters()
+        # The status and insurance filters only take effect on Apply, so the
+        # shown rows are a valid starting point only if they are unchanged
+        unchanged = all(self.bus_model.filters.get(key) == value
+                        for key, value in filters.items() if key != 'search')
+        if narrow and unchanged:
+            self.bus_model.narrow(**filters)
+        else:
+            self.load_buses()
         
-        for row, bus in enumerate(MOCK_BUSES):
-            # Registration
-            item = QTableWidgetItem(bus['registration_number'])
-            self.bus_table.setItem(row, 0, item)
-            
-            # Bus Number
-            item = QTableWidgetItem(bus['bus_number'])
-            self.bus_table.setItem(row, 1, item)
-            
-            # Model
-            item = QTableWidgetItem(bus['model'])
-            self.bus_table.setItem(row, 2, item)
-            
-            # Capacity
-            item = QTableWidgetItem(str(bus['capacity']))
-            item.setTextAlignment(Qt.AlignCenter)
-            self.bus_table.setItem(row, 3, item)
-            
-            # Year
-            item = QTableWidgetItem(str(bus['year']))
-            item.setTextAlignment(Qt.AlignCenter)
-            self.bus_table.setItem(row, 4, item)
-            
-            # Status with color coding
-            status_item = QTableWidgetItem(bus['status'])
-            if bus['status'] == 'Active':
-                status_item.setBackground(QColor(220, 255, 220))
-                status_item.setForeground(QColor(0, 100, 0))
-            elif bus['status'] == 'Maintenance':
-                status_item.setBackground(QColor(255, 255, 200))
-                status_item.setForeground(QColor(153, 102, 0))
-            else:
-                status_item.setBackground(QColor(255, 220, 220))
-                status_item.setForeground(QColor(139, 0, 0))
-            status_item.setTextAlignment(Qt.AlignCenter)
-            self.bus_table.setItem(row, 5, status_item)
-            
-            # Policy Number
-            item = QTableWidgetItem(bus['policy_number'])
-            self.bus_table.setItem(row, 6, item)
-            
-            # Provider
-            item = QTableWidgetItem(bus['provider'])
-            self.bus_table.setItem(row, 7, item)
-            
-            # Expiry Date
-            item = QTableWidgetItem(bus['expiry_date'])
-            self.bus_table.setItem(row, 8, item)
-            
-            # Insurance Status with color coding
-            ins_item = QTableWidgetItem(bus['insurance_status'])
-            if bus['insurance_status'] == 'Active':
-                ins_item.setBackground(QColor(220, 255, 220))
-                ins_item.setForeground(QColor(0, 100, 0))
-            elif bus['insurance_status'] == 'Expiring Soon':
-                ins_item.setBackground(QColor(255, 255, 200))
-                ins_item.setForeground(QColor(153, 102, 0))
-            else:
-                ins_item.setBackground(QColor(255, 220, 220))
-                ins_item.setForeground(QColor(139, 0, 0))
-            ins_item.setTextAlignment(Qt.AlignCenter)
-            self.bus_table.setItem(row, 9, ins_item)
-            
     def apply_filters(self):
         """Apply filters to the table"""
-        QMessageBox.information(self, "Filters Applied", 
-                              "Filters have been applied (demo mode)")
+        self.search_controller.restart()
         
     def clear_filters(self):
         """Clear all filters"""
         self.search_input.clear()
         self.status_filter.setCurrentIndex(0)
         self.insurance_filter.setCurrentIndex(0)
+        self.search_controller.restart()
         
     def get_selected_bus(self):
         """Get the currently selected bus"""
-        selected_items = self.bus_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            return MOCK_BUSES[row] if row < len(MOCK_BUSES) else None
-        return None
+        return selected_record(self.bus_table)
         
     def view_details(self):
         """View details of selected bus"""
@@ -387,8 +356,24 @@ class BusListTab(QWidget):
     def apply_bulk_operation(self):
         """Apply bulk operation"""
         operation = self.bulk_action.currentText()
-        QMessageBox.information(self, "Bulk Operation", 
-                              f"{operation} applied to selected buses (demo mode)")
+        bus_ids = selected_ids(self.bus_table)
+        if not bus_ids:
+            QMessageBox.warning(self, "No Selection", 
+                              "Please select one or more buses first")
+            return
+        
+        if operation == "Update Status":
+            status, ok = QInputDialog.getItem(self, "Update Status", 
+                                            "Select new status:", ["Active", "Inactive", "Maintenance"], 0, False)
+            if ok and status:
+                task = submit(set_bus_status, bus_ids, status)
+                task.finished.connect(lambda _result: QMessageBox.information(
+                    self, "Bulk Update", f"Updated status to {status} for {len(bus_ids)} buses"))
+                task.failed.connect(lambda error: QMessageBox.warning(
+                    self, "Bulk Update", f"{error}\n\nNo statuses were changed."))
+        else:
+            QMessageBox.information(self, "Bulk Operation", 
+                                  f"{operation} applied to {len(bus_ids)} selected buses (demo mode)")
         
     def export_to_excel(self):
         """Export to Excel"""
@@ -664,7 +649,13 @@ class InsuranceTrackerTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.policy_model = RecordTableModel(POLICY_COLUMNS, fetch_buses, check_key='policy_id')
+        self.counts_task = None
+        # (from, to) ISO dates set by Apply Date Filter, or None
+        self.expiry_range = None
         self.init_ui()
+        notifier().changed.connect(self.on_data_changed)
+        notifier().day_changed.connect(self.on_day_changed)
         
     def init_ui(self):
         """Initialize the UI"""
@@ -701,6 +692,10 @@ class InsuranceTrackerTab(QWidget):
         apply_date_btn.clicked.connect(self.filter_by_date)
         filter_layout.addWidget(apply_date_btn)
         
+        clear_date_btn = QPushButton("Clear Dates")
+        clear_date_btn.clicked.connect(self.clear_date_filter)
+        filter_layout.addWidget(clear_date_btn)
+        
         filter_layout.addStretch()
         
         # Bulk renew button
@@ -711,13 +706,10 @@ class InsuranceTrackerTab(QWidget):
         layout.addWidget(filter_widget)
         
         # Insurance table
-        self.insurance_table = QTableWidget()
-        self.insurance_table.setColumnCount(9)
-        self.insurance_table.setHorizontalHeaderLabels([
-            "Select", "Bus Registration", "Policy Number", "Provider",
-            "Coverage Amount", "Premium", "Start Date", "Expiry Date", "Days Remaining"
-        ])
+        self.insurance_table = QTableView()
+        self.insurance_table.setModel(self.policy_model)
         self.insurance_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.insurance_table.setEditTriggers(QTableView.NoEditTriggers)
         
         # Load data
         self.load_insurance_data()
@@ -745,26 +737,37 @@ class InsuranceTrackerTab(QWidget):
         widget = QWidget()
         layout = QHBoxLayout(widget)
         
-        # Calculate stats
-        total = len(MOCK_BUSES)
-        active = len([b for b in MOCK_BUSES if b['insurance_status'] == 'Active'])
-        expiring = len([b for b in MOCK_BUSES if b['insurance_status'] == 'Expiring Soon'])
-        expired = len([b for b in MOCK_BUSES if b['insurance_status'] == 'Expired'])
-        
         # Create stat cards
         cards = [
-            ("Total Insured", total, QColor(52, 152, 219)),
-            ("Active", active, QColor(46, 204, 113)),
-            ("Expiring Soon", expiring, QColor(241, 196, 15)),
-            ("Expired", expired, QColor(231, 76, 60))
+            ("Total Insured", QColor(52, 152, 219)),
+            ("Active", QColor(46, 204, 113)),
+            ("Expiring Soon", QColor(241, 196, 15)),
+            ("Expired", QColor(231, 76, 60))
         ]
         
-        for title, value, color in cards:
-            card = self.create_stat_card(title, value, color)
+        self.stat_labels = {}
+        for title, color in cards:
+            card = self.create_stat_card(title, 0, color)
+            self.stat_labels[title] = card.value_label
             layout.addWidget(card)
         
+        self.update_stats_cards()
         return widget
         
+    def update_stats_cards(self):
+        """Recount the statistics cards in the background"""
+        if self.counts_task is not None:
+            self.counts_task.cancel()
+        self.counts_task = submit(fetch_insurance_counts)
+        self.counts_task.finished.connect(self.show_stats_counts)
+        
+    def show_stats_counts(self, counts):
+        """Show the counts returned by fetch_insurance_counts"""
+        self.counts_task = None
+        self.stat_labels["Total Insured"].setText(str(counts['total']))
+        for title in ("Active", "Expiring Soon", "Expired"):
+            self.stat_labels[title].setText(str(counts[title]))
+        
     def create_stat_card(self, title, value, color):
         """Create a single stat card"""
         card = QFrame()
@@ -788,85 +791,78 @@ class InsuranceTrackerTab(QWidget):
         layout.addWidget(value_label)
         layout.addWidget(title_label)
         
+        card.value_label = value_label
         return card
         
+    def current_filters(self):
+        """Return the fetch_buses arguments for the status and date filters"""
+        filters = {
+            'insured_only': True,
+            'insurance': self.status_filter.currentText().replace(" (30 days)", ""),
+        }
+        if self.expiry_range:
+            filters['expiring_from'], filters['expiring_to'] = self.expiry_range
+        return filters
+        
     def load_insurance_data(self):
-        """Load insurance data into table"""
-        self.insurance_table.setRowCount(len(MOCK_BUSES))
-        
-        for row, bus in enumerate(MOCK_BUSES):
-            # Checkbox for selection
-            checkbox = QCheckBox()
-            checkbox_widget = QWidget()
-            checkbox_layout = QHBoxLayout(checkbox_widget)
-            checkbox_layout.addWidget(checkbox)
-            checkbox_layout.setAlignment(Qt.AlignCenter)
-            self.insurance_table.setCellWidget(row, 0, checkbox_widget)
-            
-            # Bus Registration
-            item = QTableWidgetItem(bus['registration_number'])
-            self.insurance_table.setItem(row, 1, item)
-            
-            # Policy Number
-            item = QTableWidgetItem(bus['policy_number'])
-            self.insurance_table.setItem(row, 2, item)
-            
-            # Provider
-            item = QTableWidgetItem(bus['provider'])
-            self.insurance_table.setItem(row, 3, item)
-            
-            # Coverage Amount
-            item = QTableWidgetItem(f"₹ {bus['coverage_amount']:,}")
-            self.insurance_table.setItem(row, 4, item)
-            
-            # Premium
-            item = QTableWidgetItem(f"₹ {bus['premium_amount']:,}")
-            self.insurance_table.setItem(row, 5, item)
-            
-            # Start Date
-            item = QTableWidgetItem(bus['start_date'])
-            self.insurance_table.setItem(row, 6, item)
-            
-            # Expiry Date
-            item = QTableWidgetItem(bus['expiry_date'])
-            self.insurance_table.setItem(row, 7, item)
-            
-            # Days Remaining with color coding
-            days = bus['days_remaining']
-            days_item = QTableWidgetItem(str(days))
-            
-            if days < 0:
-                days_item.setText("Expired")
-                days_item.setBackground(QColor(255, 220, 220))
-                days_item.setForeground(QColor(139, 0, 0))
-            elif days <= 30:
-                days_item.setText(f"{days} days")
-                days_item.setBackground(QColor(255, 255, 200))
-                days_item.setForeground(QColor(153, 102, 0))
-            else:
-                days_item.setText(f"{days} days")
-                days_item.setBackground(QColor(220, 255, 220))
-                days_item.setForeground(QColor(0, 100, 0))
-            
-            days_item.setTextAlignment(Qt.AlignCenter)
-            self.insurance_table.setItem(row, 8, days_item)
-            
+        """Load insured buses matching the filters into the table"""
+        self.policy_model.set_filters(**self.current_filters())
+        
+    def on_data_changed(self, entity, entity_id, operation):
+        """Patch the row of a bus whose policy changed elsewhere"""
+        if entity != 'bus':
+            return
+        self.update_stats_cards()
+        self.policy_model.refresh(entity_id)
+        
+    def on_day_changed(self):
+        """Recount and reload after midnight, when policy statuses move on"""
+        self.update_stats_cards()
+        self.load_insurance_data()
+        
     def filter_table(self):
         """Filter table by status"""
-        QMessageBox.information(self, "Filter Applied", 
-                              f"Showing {self.status_filter.currentText()} policies")
+        self.load_insurance_data()
         
     def filter_by_date(self):
-        """Filter by date range"""
+        """Show only policies expiring within the chosen date range"""
         from_date = self.date_from.date().toString("yyyy-MM-dd")
         to_date = self.date_to.date().toString("yyyy-MM-dd")
-        QMessageBox.information(self, "Date Filter", 
-                              f"Showing policies expiring between {from_date} and {to_date}")
+        if from_date > to_date:
+            QMessageBox.warning(self, "Date Filter", 
+                              "The start date must not be after the end date")
+            return
+        self.expiry_range = (from_date, to_date)
+        self.load_insurance_data()
+        
+    def clear_date_filter(self):
+        """Show policies whatever their expiry date"""
+        self.expiry_range = None
+        self.load_insurance_data()
         
     def bulk_renew(self):
-        """Bulk renew selected policies"""
-        QMessageBox.information(self, "Bulk Renew", 
-                              "Selected policies will be renewed (demo mode)")
+        """Renew every ticked policy for another year"""
+        policy_ids = sorted(self.policy_model.checked)
+        if not policy_ids:
+            QMessageBox.warning(self, "No Selection", 
+                              "Please tick the policies to renew")
+            return
+            
+        reply = QMessageBox.question(self, "Bulk Renew",
+                                   f"Renew {len(policy_ids)} selected policies for another year?",
+                                   QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            task = submit(renew_policies, policy_ids)
+            task.finished.connect(lambda renewed: self.on_policies_renewed(len(policy_ids), renewed))
+            task.failed.connect(lambda error: QMessageBox.warning(
+                self, "Bulk Renew", f"{error}\n\nNo policies were renewed."))
+            
+    def on_policies_renewed(self, selected, renewed):
+        self.policy_model.clear_checked()
+        message = f"{renewed} policies renewed"
+        if renewed < selected:
+            message += f"\n\n{selected - renewed} had already been renewed and were skipped"
+        QMessageBox.information(self, "Bulk Renew", message)
         
     def generate_report(self):
         """Generate insurance report"""
@@ -879,9 +875,23 @@ class InsuranceTrackerTab(QWidget):
                               "Calendar view would show here (demo mode)")
         
     def export_data(self):
-        """Export data"""
-        QMessageBox.information(self, "Export", 
-                              "Data exported (demo mode)")
+        """Export the ticked policies to a CSV file"""
+        policy_ids = sorted(self.policy_model.checked)
+        if not policy_ids:
+            QMessageBox.warning(self, "No Selection", 
+                              "Please tick the policies to export")
+            return
+            
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Policies", "insurance_policies.csv", "CSV Files (*.csv);;All Files (*)"
+        )
+        
+        if file_path:
+            task = submit_job(export_policies, file_path, policy_ids)
+            task.finished.connect(lambda count: QMessageBox.information(
+                self, "Export", f"{count} policies exported"))
+            task.failed.connect(lambda error: QMessageBox.warning(
+                self, "Export", f"Could not export the policies:\n{error}"))
 
 
 class InsuranceRenewalTab(QWidget):
@@ -908,9 +918,9 @@ class InsuranceRenewalTab(QWidget):
         
         select_layout.addWidget(QLabel("Select Bus:"))
         self.bus_combo = QComboBox()
-        for bus in MOCK_BUSES:
-            self.bus_combo.addItem(f"{bus['registration_number']} - {bus['bus_number']}", bus)
         self.bus_combo.currentIndexChanged.connect(self.bus_selected)
+        self.buses_task = submit(fetch_buses)
+        self.buses_task.finished.connect(self.fill_bus_combo)
         select_layout.addWidget(self.bus_combo)
         
         layout.addWidget(select_widget)
@@ -1011,10 +1021,6 @@ class InsuranceRenewalTab(QWidget):
         self.status_label = QLabel("")
         self.status_label.setFont(QFont("Segoe UI", 9))
         layout.addWidget(self.status_label)
-        
-        # Load first bus by default
-        if MOCK_BUSES:
-            self.load_bus_data(MOCK_BUSES[0])
             
     def load_bus_data(self, bus_data):
         """Load bus data into form"""
@@ -1036,6 +1042,18 @@ class InsuranceRenewalTab(QWidget):
         expiry_date = QDate.fromString(bus_data['expiry_date'], 'yyyy-MM-dd')
         self.start_date.setDate(expiry_date.addDays(1))
         
+    def fill_bus_combo(self, buses):
+        """Add the buses to the selector"""
+        self.buses_task = None
+        self.bus_combo.blockSignals(True)
+        for bus in buses:
+            self.bus_combo.addItem(f"{bus['registration_number']} - {bus['bus_number']}", bus)
+        self.bus_combo.blockSignals(False)
+        
+        # Load first bus by default, unless one was opened from the list
+        if buses and self.current_bus is None:
+            self.load_bus_data(buses[0])
+        
     def bus_selected(self):
         """Handle bus selection from combo box"""
         index = self.bus_combo.currentIndex()
@@ -0,0 +1,100 @@
+"""
+Qt side of the data layer's change events (models/events.py).
+
+Views connect to notifier().changed instead of reloading everything
+after a write. The signal carries (entity, entity_id, operation) and is
+always delivered on the GUI thread, even when the write happened on a
+worker thread.
+
+day_changed is emitted just after midnight, for views showing values
+derived from today's date (days remaining, insurance status).
+
+The notifier also keeps bus timetables current: changes to their inputs
+are batched for REFRESH_DELAY_MS and then regenerated together on the
+worker pool, never on the thread that committed the write.
+"""
+import datetime
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from models import events
+from models.timetable import INPUT_ENTITIES, has_stale, refresh_stale
+from workers import submit
+
+# Quiet period after the last change before timetables are regenerated
+REFRESH_DELAY_MS = 300
+# Wait before trying again after a failed regeneration (e.g. a locked database)
+RETRY_DELAY_MS = 5000
+
+
+def _ms_until_midnight():
+    now = datetime.datetime.now()
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1),
+                                         datetime.time())
+    # A second late, so today() has already rolled over
+    return int((midnight - now).total_seconds() * 1000) + 1000
+
+
+class ChangeNotifier(QObject):
+    changed = pyqtSignal(str, int, str)
+    day_changed = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        events.subscribe(self.changed.emit)
+
+        self._midnight = QTimer(self)
+        self._midnight.setSingleShot(True)
+        self._midnight.timeout.connect(self._on_midnight)
+        self._midnight.start(_ms_until_midnight())
+
+        self.timetables = TimetableRefresher(self)
+        self.changed.connect(self.timetables.on_change)
+
+    def _on_midnight(self):
+        self._midnight.start(_ms_until_midnight())
+        self.day_changed.emit()
+
+
+class TimetableRefresher(QObject):
+    """Regenerates stale timetables once changes have settled, one run at a time"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.task = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run)
+
+    def on_change(self, entity, _entity_id, _operation):
+        if entity in INPUT_ENTITIES:
+            self._timer.start(REFRESH_DELAY_MS)
+
+    def _run(self):
+        if self.task is not None:
+            # Picked up again when the running refresh finishes
+            return
+        self.task = submit(refresh_stale)
+        self.task.finished.connect(self._on_finished)
+        self.task.failed.connect(self._on_failed)
+
+    def _on_finished(self, _count):
+        self.task = None
+        if has_stale() and not self._timer.isActive():
+            self._timer.start(REFRESH_DELAY_MS)
+
+    def _on_failed(self, _message):
+        # refresh_stale() kept the changes; try them again later
+        self.task = None
+        self._timer.start(RETRY_DELAY_MS)
+
+
+_notifier = None
+
+
+def notifier():
+    """Return the application-wide ChangeNotifier (created on first use)"""
+    global _notifier
+    if _notifier is None:
+        _notifier = ChangeNotifier()
+    return _notifier
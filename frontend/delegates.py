@@ -0,0 +1,110 @@
+"""
+Item delegates shared by the table views.
+
+ActionButtonDelegate draws a row of push buttons in a column instead of
+placing a widget with real QPushButtons in every cell. The buttons are
+only painted; clicks are hit-tested in editorEvent and reported by the
+record id stored under ID_ROLE, so handlers never hold on to row numbers
+that go stale when rows are inserted or removed:
+
+    delegate = ActionButtonDelegate(["Edit", "Delete"], self.users_table)
+    delegate.clicked.connect(self.on_user_action)
+    self.users_table.setItemDelegateForColumn(7, delegate)
+
+The view must keep a reference to the delegate (passing it as parent is
+enough), and the column's cells must return the record id for ID_ROLE.
+"""
+from PyQt5.QtCore import Qt, QEvent, QRect, QSize, pyqtSignal
+from PyQt5.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton,
+    QStyleOptionViewItem
+)
+
+from table_models import ID_ROLE
+
+BUTTON_SPACING = 4
+BUTTON_PADDING = 16
+CELL_MARGIN = 3
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """Paints one button per action and emits clicked(action, record_id)"""
+
+    clicked = pyqtSignal(str, object)
+
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        self.actions = list(actions)
+        # (row, column, action) of the button held down, drawn sunken
+        self._pressed = None
+
+    def _style(self, option):
+        widget = option.widget
+        return widget.style() if widget is not None else QApplication.style()
+
+    def _button_rects(self, option):
+        """Return (action, QRect) for each button laid out in the cell"""
+        metrics = option.fontMetrics
+        rect = option.rect.adjusted(CELL_MARGIN, CELL_MARGIN, -CELL_MARGIN, -CELL_MARGIN)
+        x = rect.left()
+        rects = []
+        for action in self.actions:
+            width = metrics.horizontalAdvance(action) + BUTTON_PADDING
+            rects.append((action, QRect(x, rect.top(), width, rect.height())))
+            x += width + BUTTON_SPACING
+        return rects
+
+    def _action_at(self, option, pos):
+        for action, rect in self._button_rects(option):
+            if rect.contains(pos):
+                return action
+        return None
+
+    def paint(self, painter, option, index):
+        # Draw the cell background (selection, alternating colours) only
+        item_option = QStyleOptionViewItem(option)
+        self.initStyleOption(item_option, index)
+        item_option.text = ""
+        style = self._style(option)
+        style.drawControl(QStyle.CE_ItemViewItem, item_option, painter, option.widget)
+
+        for action, rect in self._button_rects(option):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = action
+            button.state = QStyle.State_Enabled
+            if self._pressed == (index.row(), index.column(), action):
+                button.state |= QStyle.State_Sunken
+            else:
+                button.state |= QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        metrics = option.fontMetrics
+        width = sum(metrics.horizontalAdvance(a) + BUTTON_PADDING for a in self.actions)
+        width += BUTTON_SPACING * (len(self.actions) - 1) + 2 * CELL_MARGIN
+        return QSize(width, metrics.height() + 10 + 2 * CELL_MARGIN)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                                QEvent.MouseButtonDblClick):
+            return super().editorEvent(event, model, option, index)
+        if event.button() != Qt.LeftButton:
+            return False
+
+        action = self._action_at(option, event.pos())
+        if event.type() == QEvent.MouseButtonRelease:
+            pressed, self._pressed = self._pressed, None
+            if option.widget is not None:
+                option.widget.update(index)
+            if action is not None and pressed == (index.row(), index.column(), action):
+                self.clicked.emit(action, index.data(ID_ROLE))
+                return True
+            return False
+
+        if action is None:
+            return False
+        self._pressed = (index.row(), index.column(), action)
+        if option.widget is not None:
+            option.widget.update(index)
+        return True
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
+    QTableView, QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
     QDateEdit, QSpinBox, QDoubleSpinBox, QFrame, QGroupBox,
     QTabWidget, QTextEdit, QHeaderView, QMessageBox,
     QCheckBox, QFileDialog, QFormLayout, QDialog, QGridLayout,
@@ -11,102 +11,46 @@ from PyQt5.QtGui import QFont, QColor, QPixmap
 from PyQt5.QtCore import Qt, QDate
 import datetime
 
-# Mock data for drivers
-MOCK_DRIVERS = [
-    {
-        'id': 1,
-        'name': 'Rajesh Kumar',
-        'phone': '9876543210',
-        'license_number': 'DL-0420150001234',
-        'license_expiry': '2024-12-31',
-        'status': 'Active',
-        'salary': 25000,
-        'salary_status': 'Paid',
-        'bus_assigned': 'BUS-001',
-        'joining_date': '2020-05-15',
-        'bank_account': '123456789012',
-        'ifsc_code': 'SBIN0000123',
-        'address': '123 Main Street, Mumbai',
-        'emergency_contact': '9876543211',
-        'experience_years': 5,
-        'rating': 4.5
-    },
-    {
-        'id': 2,
-        'name': 'Suresh Patel',
-        'phone': '9876543211',
-        'license_number': 'MH-0120150005678',
-        'license_expiry': '2023-11-30',
-        'status': 'Active',
-        'salary': 28000,
-        'salary_status': 'Pending',
-        'bus_assigned': 'BUS-002',
-        'joining_date': '2019-08-22',
-        'bank_account': '234567890123',
-        'ifsc_code': 'HDFC0000456',
-        'address': '456 Park Avenue, Delhi',
-        'emergency_contact': '9876543212',
-        'experience_years': 7,
-        'rating': 4.2
-    },
-    {
-        'id': 3,
-        'name': 'Amit Sharma',
-        'phone': '9876543212',
-        'license_number': 'GJ-0120160009012',
-        'license_expiry': '2025-06-15',
-        'status': 'Active',
-        'salary': 23000,
-        'salary_status': 'Paid',
-        'bus_assigned': 'BUS-003',
-        'joining_date': '2021-03-10',
-        'bank_account': '345678901234',
-        'ifsc_code': 'ICIC0000789',
-        'address': '789 Lake Road, Ahmedabad',
-        'emergency_contact': '9876543213',
-        'experience_years': 3,
-        'rating': 4.7
-    },
-    {
-        'id': 4,
-        'name': 'Vikram Singh',
-        'phone': '9876543213',
-        'license_number': 'UP-0120170003456',
-        'license_expiry': '2023-09-30',
-        'status': 'Inactive',
-        'salary': 27000,
-        'salary_status': 'Overdue',
-        'bus_assigned': 'BUS-004',
-        'joining_date': '2018-11-05',
-        'bank_account': '456789012345',
-        'ifsc_code': 'AXIS0000912',
-        'address': '101 Hill View, Lucknow',
-        'emergency_contact': '9876543214',
-        'experience_years': 6,
-        'rating': 4.0
-    },
-    {
-        'id': 5,
-        'name': 'Anil Gupta',
-        'phone': '9876543214',
-        'license_number': 'RJ-0120180007890',
-        'license_expiry': '2024-08-20',
-        'status': 'Active',
-        'salary': 26000,
-        'salary_status': 'Pending',
-        'bus_assigned': 'BUS-005',
-        'joining_date': '2022-01-18',
-        'bank_account': '567890123456',
-        'ifsc_code': 'PNB0000345',
-        'address': '202 Green Park, Jaipur',
-        'emergency_contact': '9876543215',
-        'experience_years': 2,
-        'rating': 4.3
-    }
-]
+from models.buses import fetch_bus_numbers
+from models.drivers import fetch_drivers, assign_bus, set_driver_status
+from models.roster import propose_roster, apply_roster
+from models.schedule_conflicts import clock
+from models.timetable import DAY_MINUTES
+from change_notifier import notifier
+from search_controller import SearchController
+from table_models import (
+    Column, RecordTableModel, selected_ids, selected_record, GOOD, WARNING, BAD
+)
+from workers import submit
 
-# Available buses for assignment
-AVAILABLE_BUSES = ['BUS-001', 'BUS-002', 'BUS-003', 'BUS-004', 'BUS-005', 'BUS-006', 'BUS-007', 'BUS-008']
+# First choice of the bulk Assign Bus operation
+WEEKLY_ROSTER = "Weekly roster (automatic)"
+
+
+def license_expiry_colors(driver):
+    """Red for an expired license, yellow when it expires within 30 days"""
+    days_to_expiry = driver['license_days_remaining']
+    if days_to_expiry is None:
+        return None
+    if days_to_expiry < 0:
+        return BAD
+    if days_to_expiry <= 30:
+        return WARNING
+    return None
+
+
+# Driver table columns (salary-related columns removed)
+DRIVER_COLUMNS = [
+    Column("Name", 'name'),
+    Column("Phone", 'phone'),
+    Column("License No.", 'license_number'),
+    Column("License Expiry", 'license_expiry', colors=license_expiry_colors),
+    Column("Status", 'status', align=Qt.AlignCenter,
+           colors=lambda d: GOOD if d['status'] == 'Active' else BAD),
+    Column("Bus Assigned", 'bus_assigned'),
+    Column("Joining Date", 'joining_date'),
+    Column("Experience", lambda d: f"{d['experience_years']} years"),
+]
 
 
 class DriverManagementPage(QWidget):
@@ -162,8 +106,17 @@ class DriverListTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.driver_model = RecordTableModel(DRIVER_COLUMNS, fetch_drivers)
+        self.driver_model.load_failed.connect(self.show_load_error)
+        # Bus numbers for the filter and the assign dialogs, loaded in the background
+        self.bus_numbers = []
+        self.bus_numbers_task = None
         self.init_ui()
         self.load_drivers()
+        self.load_bus_numbers()
+        notifier().changed.connect(self.on_data_changed)
+        # Licence expiry colours move on at midnight
+        notifier().day_changed.connect(self.load_drivers)
         
     def init_ui(self):
         """Initialize the UI"""
@@ -178,7 +131,7 @@ class DriverListTab(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by name, phone, license...")
         self.search_input.setFixedWidth(250)
-        self.search_input.textChanged.connect(self.filter_drivers)
+        self.search_controller = SearchController(self.search_input, self.search_drivers)
         filter_layout.addWidget(self.search_input)
         
         # Status filter
@@ -200,7 +153,7 @@ class DriverListTab(QWidget):
         # Bus assignment filter
         filter_layout.addWidget(QLabel("Bus Assigned:"))
         self.bus_filter = QComboBox()
-        self.bus_filter.addItems(["All"] + AVAILABLE_BUSES)
+        self.bus_filter.addItem("All")
         self.bus_filter.currentTextChanged.connect(self.filter_drivers)
         self.bus_filter.setFixedWidth(120)
         filter_layout.addWidget(self.bus_filter)
@@ -219,14 +172,11 @@ class DriverListTab(QWidget):
         layout.addWidget(filter_widget)
         
         # Driver table - remove salary-related columns
-        self.driver_table = QTableWidget()
-        self.driver_table.setColumnCount(8)  # Reduced from 10
-        self.driver_table.setHorizontalHeaderLabels([
-            "Name", "Phone", "License No.", "License Expiry", 
-            "Status", "Bus Assigned", "Joining Date", "Experience"
-        ])
+        self.driver_table = QTableView()
+        self.driver_table.setModel(self.driver_model)
         self.driver_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.driver_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.driver_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.driver_table.setSelectionBehavior(QTableView.SelectRows)
         
         layout.addWidget(self.driver_table)
         
@@ -242,9 +192,9 @@ class DriverListTab(QWidget):
         self.bulk_action.addItems(["Update Status", "Assign Bus", "Export Selected", "Print Details"])
         action_layout.addWidget(self.bulk_action)
         
-        bulk_apply_btn = QPushButton("Apply")
-        bulk_apply_btn.clicked.connect(self.apply_bulk_operation)
-        action_layout.addWidget(bulk_apply_btn)
+        self.bulk_apply_btn = QPushButton("Apply")
+        self.bulk_apply_btn.clicked.connect(self.apply_bulk_operation)
+        action_layout.addWidget(self.bulk_apply_btn)
         
         action_layout.addStretch()
         
@@ -272,103 +222,62 @@ class DriverListTab(QWidget):
         
         layout.addWidget(action_widget)
         
+    def current_filters(self):
+        """Return the fetch_drivers arguments for the filter widgets"""
+        return {
+            'search': self.search_input.text(),
+            'status': self.status_filter.currentText(),
+            'bus_number': self.bus_filter.currentText()
+        }
+        
     def load_drivers(self):
-        """Load drivers into the table (without salary columns)"""
-        self.driver_table.setRowCount(len(MOCK_DRIVERS))
+        """Query drivers matching the current filters in the background"""
+        self.driver_model.set_filters(**self.current_filters())
+        
+    def show_load_error(self, message):
+        QMessageBox.warning(self, "Error", f"Could not load drivers:\n{message}")
+        
+    def load_bus_numbers(self):
+        """Query the bus numbers in the background, dropping any older query"""
+        if self.bus_numbers_task:
+            self.bus_numbers_task.cancel()
+        self.bus_numbers_task = submit(fetch_bus_numbers)
+        self.bus_numbers_task.finished.connect(self.set_bus_numbers)
+        
+    def set_bus_numbers(self, bus_numbers):
+        """Refill the bus filter, keeping the bus it was set to"""
+        self.bus_numbers_task = None
+        self.bus_numbers = bus_numbers
+        current = self.bus_filter.currentText()
+        self.bus_filter.blockSignals(True)
+        self.bus_filter.clear()
+        self.bus_filter.addItems(["All"] + bus_numbers)
+        self.bus_filter.setCurrentText(current)
+        self.bus_filter.blockSignals(False)
+        if self.bus_filter.currentText() != current:
+            self.filter_drivers()
+        
+    def on_data_changed(self, entity, entity_id, operation):
+        """Patch the row of a driver that was changed elsewhere"""
+        if entity == 'driver':
+            self.driver_model.refresh(entity_id)
+        elif entity == 'bus':
+            self.load_bus_numbers()
+        
+    def search_drivers(self, text, narrow):
+        """Run the search box query, re-checking only the shown rows if it narrows"""
+        if narrow:
+            self.driver_model.narrow(**self.current_filters())
+        else:
+            self.load_drivers()
         
-        for row, driver in enumerate(MOCK_DRIVERS):
-            # Name
-            item = QTableWidgetItem(driver['name'])
-            self.driver_table.setItem(row, 0, item)
-            
-            # Phone
-            item = QTableWidgetItem(driver['phone'])
-            self.driver_table.setItem(row, 1, item)
-            
-            # License Number
-            item = QTableWidgetItem(driver['license_number'])
-            self.driver_table.setItem(row, 2, item)
-            
-            # License Expiry with color coding
-            expiry_date = driver['license_expiry']
-            expiry_item = QTableWidgetItem(expiry_date)
-            
-            # Check if license is expired or expiring soon
-            expiry_qdate = QDate.fromString(expiry_date, 'yyyy-MM-dd')
-            days_to_expiry = QDate.currentDate().daysTo(expiry_qdate)
-            
-            if days_to_expiry < 0:
-                expiry_item.setBackground(QColor(255, 220, 220))  # Red for expired
-                expiry_item.setForeground(QColor(139, 0, 0))
-            elif days_to_expiry <= 30:
-                expiry_item.setBackground(QColor(255, 255, 200))  # Yellow for expiring soon
-                expiry_item.setForeground(QColor(153, 102, 0))
-            
-            self.driver_table.setItem(row, 3, expiry_item)
-            
-            # Status with color coding
-            status_item = QTableWidgetItem(driver['status'])
-            if driver['status'] == 'Active':
-                status_item.setBackground(QColor(220, 255, 220))
-                status_item.setForeground(QColor(0, 100, 0))
-            else:
-                status_item.setBackground(QColor(255, 220, 220))
-                status_item.setForeground(QColor(139, 0, 0))
-            status_item.setTextAlignment(Qt.AlignCenter)
-            self.driver_table.setItem(row, 4, status_item)
-            
-            # Bus Assigned
-            item = QTableWidgetItem(driver['bus_assigned'])
-            self.driver_table.setItem(row, 5, item)
-            
-            # Joining Date
-            item = QTableWidgetItem(driver['joining_date'])
-            self.driver_table.setItem(row, 6, item)
-            
-            # Experience
-            item = QTableWidgetItem(f"{driver['experience_years']} years")
-            self.driver_table.setItem(row, 7, item)
-            
     def filter_drivers(self):
-        """Filter drivers based on search and filter criteria"""
-        search_text = self.search_input.text().lower()
-        status_filter = self.status_filter.currentText()
-        bus_filter = self.bus_filter.currentText()
-        
-        for row in range(self.driver_table.rowCount()):
-            show_row = True
-            
-            # Search filter
-            if search_text:
-                row_text = ''
-                for col in range(self.driver_table.columnCount()):
-                    item = self.driver_table.item(row, col)
-                    if item:
-                        row_text += item.text().lower() + ' '
-                if search_text not in row_text:
-                    show_row = False
-            
-            # Status filter
-            if status_filter != 'All':
-                status_item = self.driver_table.item(row, 4)
-                if status_item and status_item.text() != status_filter:
-                    show_row = False
-            
-            # Bus filter
-            if bus_filter != 'All':
-                bus_item = self.driver_table.item(row, 5)
-                if bus_item and bus_item.text() != bus_filter:
-                    show_row = False
-            
-            self.driver_table.setRowHidden(row, not show_row)
+        """Reload the table with only the drivers matching the filters"""
+        self.search_controller.restart()
             
     def get_selected_driver(self):
         """Get the currently selected driver"""
-        selected_items = self.driver_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            return MOCK_DRIVERS[row] if row < len(MOCK_DRIVERS) else None
-        return None
+        return selected_record(self.driver_table)
         
     def view_details(self):
         """View details of selected driver"""
@@ -397,11 +306,14 @@ class DriverListTab(QWidget):
         """Assign/reassign bus to selected driver"""
         driver = self.get_selected_driver()
         if driver:
-            dialog = AssignBusDialog(driver, AVAILABLE_BUSES)
+            dialog = AssignBusDialog(driver, self.bus_numbers)
             if dialog.exec_() == QDialog.Accepted:
-                QMessageBox.information(self, "Success", 
-                                      f"Bus assigned to {driver['name']} (demo mode)")
-                self.load_drivers()
+                bus_number = dialog.bus_combo.currentText()
+                task = submit(assign_bus, driver['id'], bus_number)
+                # The table row is patched by on_data_changed
+                task.finished.connect(lambda _result: QMessageBox.information(
+                    self, "Success", f"Bus {bus_number} assigned to {driver['name']}"))
+                task.failed.connect(lambda error: QMessageBox.warning(self, "Error", error))
         else:
             QMessageBox.warning(self, "No Selection", 
                               "Please select a driver first")
@@ -423,22 +335,63 @@ class DriverListTab(QWidget):
     def apply_bulk_operation(self):
         """Apply bulk operation"""
         operation = self.bulk_action.currentText()
+        driver_ids = selected_ids(self.driver_table)
+        if not driver_ids:
+            QMessageBox.warning(self, "No Selection", 
+                              "Please select one or more drivers first")
+            return
         
         if operation == "Update Status":
             status, ok = QInputDialog.getItem(self, "Update Status", 
                                             "Select new status:", ["Active", "Inactive"], 0, False)
             if ok and status:
-                QMessageBox.information(self, "Bulk Update", 
-                                      f"Updated status to {status} for selected drivers (demo mode)")
+                task = submit(set_driver_status, driver_ids, status)
+                task.finished.connect(lambda _result: QMessageBox.information(
+                    self, "Bulk Update", f"Updated status to {status} for {len(driver_ids)} drivers"))
+                task.failed.connect(lambda error: QMessageBox.warning(
+                    self, "Bulk Update", f"{error}\n\nNo statuses were changed."))
         elif operation == "Assign Bus":
             bus, ok = QInputDialog.getItem(self, "Assign Bus", 
-                                         "Select bus:", AVAILABLE_BUSES, 0, False)
-            if ok and bus:
+                                         "Select bus:", [WEEKLY_ROSTER] + self.bus_numbers, 0, False)
+            if ok and bus == WEEKLY_ROSTER:
+                task = submit(propose_roster, driver_ids)
+                task.finished.connect(self.review_roster)
+                task.failed.connect(lambda error: QMessageBox.warning(self, "Weekly Roster", error))
+            elif ok and bus:
                 QMessageBox.information(self, "Bulk Assignment", 
-                                      f"Assigned {bus} to selected drivers (demo mode)")
+                                      f"Assigned {bus} to {len(driver_ids)} selected drivers (demo mode)")
         else:
             QMessageBox.information(self, "Bulk Operation", 
-                                  f"{operation} applied to selected drivers (demo mode)")
+                                  f"{operation} applied to {len(driver_ids)} selected drivers (demo mode)")
+        
+    def review_roster(self, roster):
+        """Show the proposed roster and apply it if the operator accepts"""
+        if not roster:
+            QMessageBox.information(self, "Weekly Roster", 
+                                  "None of the selected drivers can take a bus shift this week")
+            return
+            
+        dialog = RosterDialog(roster, self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+            
+        # Writing a week of shifts can wait on other writers; keep it off the GUI thread
+        self.bulk_apply_btn.setEnabled(False)
+        task = submit(apply_roster, roster)
+        task.finished.connect(lambda _: self.on_roster_applied(roster))
+        task.failed.connect(self.on_roster_failed)
+        
+    def on_roster_applied(self, roster):
+        self.bulk_apply_btn.setEnabled(True)
+        # The table rows are patched by on_data_changed
+        QMessageBox.information(self, "Weekly Roster", 
+                              f"{len(roster)} shifts rostered for "
+                              f"{sum(1 for d in roster.drivers if d['shifts'])} drivers")
+        
+    def on_roster_failed(self, error):
+        self.bulk_apply_btn.setEnabled(True)
+        QMessageBox.warning(self, "Weekly Roster", 
+                          f"{error}\n\nThe roster was not applied. Please roster again.")
         
     def export_to_excel(self):
         """Export to Excel"""
@@ -608,7 +561,9 @@ class DriverFormTab(QWidget):
         
         # Assigned Bus
         self.bus_assigned = QComboBox()
-        self.bus_assigned.addItems([""] + AVAILABLE_BUSES)
+        self.bus_assigned.addItem("")
+        self.bus_numbers_task = submit(fetch_bus_numbers)
+        self.bus_numbers_task.finished.connect(self.fill_bus_numbers)
         layout.addRow("Assigned Bus:", self.bus_assigned)
         
         return tab
@@ -685,6 +640,13 @@ class DriverFormTab(QWidget):
         
         return tab
         
+    def fill_bus_numbers(self, bus_numbers):
+        """Add the bus numbers, then reselect the loaded driver's bus"""
+        self.bus_numbers_task = None
+        self.bus_assigned.addItems(bus_numbers)
+        if self.current_driver:
+            self.bus_assigned.setCurrentText(self.current_driver['bus_assigned'])
+        
     def load_driver_data(self, driver_data):
         """Load existing driver data into form"""
         self.current_driver = driver_data
@@ -837,4 +799,60 @@ class AssignBusDialog(QDialog):
         button_layout.addWidget(cancel_btn)
         layout.addLayout(button_layout)
         
-        self.setLayout(layout)
\ No newline at end of file
+        self.setLayout(layout)
+
+
+class RosterDialog(QDialog):
+    """Review a proposed weekly roster before applying it"""
+    
+    def __init__(self, roster, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Weekly Roster")
+        self.resize(700, 500)
+        layout = QVBoxLayout()
+        
+        first, last = roster.days[0], roster.days[-1]
+        summary = QLabel(f"{len(roster)} shifts rostered from {first:%d %b} to {last:%d %b}, "
+                         f"{len(roster.unfilled)} shifts without a driver")
+        summary.setFont(QFont("Arial", 10, QFont.Bold))
+        layout.addWidget(summary)
+        
+        drivers_table = QTableWidget(len(roster.drivers), 5)
+        drivers_table.setHorizontalHeaderLabels(["Driver", "Status", "Shifts", "Hours", "Main Bus"])
+        for row, driver in enumerate(roster.drivers):
+            values = [driver['name'], driver['status'], driver['shifts'],
+                      f"{driver['minutes'] / 60:.1f}", driver['main_bus_number']]
+            for col, value in enumerate(values):
+                drivers_table.setItem(row, col, QTableWidgetItem(str(value)))
+            if not driver['shifts']:
+                drivers_table.item(row, 2).setBackground(QColor(255, 243, 205))
+        drivers_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        drivers_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(drivers_table)
+        
+        if roster.unfilled:
+            layout.addWidget(QLabel("Shifts without a driver:"))
+            unfilled_table = QTableWidget(len(roster.unfilled), 3)
+            unfilled_table.setHorizontalHeaderLabels(["Bus Number", "Day", "Hours"])
+            for row, shift in enumerate(roster.unfilled):
+                offset = shift.day * DAY_MINUTES
+                values = [shift.bus_number, f"{roster.days[shift.day]:%a %d %b}",
+                          f"{clock(shift.start - offset)}-{clock(shift.end - offset)}"]
+                for col, value in enumerate(values):
+                    unfilled_table.setItem(row, col, QTableWidgetItem(value))
+            unfilled_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+            unfilled_table.setEditTriggers(QTableWidget.NoEditTriggers)
+            layout.addWidget(unfilled_table)
+        
+        button_layout = QHBoxLayout()
+        apply_btn = QPushButton("Apply Roster")
+        apply_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        
+        button_layout.addStretch()
+        button_layout.addWidget(apply_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
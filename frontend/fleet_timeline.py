@@ -0,0 +1,468 @@
+"""
+Fleet timeline: every bus's timetable over the planning horizon as one
+Gantt chart.
+
+Scene x is minutes from midnight of the first day and scene y is the bus
+row, so the whole horizon is HORIZON_DAYS * 1440 units wide. The scene
+holds one BusRow item per bus rather than one item per block, which keeps
+it at a few hundred items for a 500 bus fleet. A row paints only the
+blocks inside the exposed rectangle (a binary search over their start
+times) and draws less the further out the view is zoomed:
+
+    under DETAIL_PPM pixels per minute   flat bars; neighbours closer
+                                         than a pixel merge into one
+    from DETAIL_PPM                      outlines, duty bands
+    from LABEL_PPM                       stop ticks and block labels
+
+Conflicts (runs overlapping another run or maintenance) are marked at
+every zoom level. Bus numbers and the time ruler are painted in the
+view's margins, so they stay in place while the chart scrolls.
+"""
+import bisect
+
+from PyQt5.QtCore import Qt, QEvent, QPointF, QRectF, QTimer
+from PyQt5.QtGui import QBrush, QColor, QFont, QPainter, QPen
+from PyQt5.QtWidgets import (
+    QGraphicsItem, QGraphicsScene, QGraphicsView, QHBoxLayout, QLabel,
+    QPushButton, QToolTip, QVBoxLayout, QWidget
+)
+
+from models.timetable import (
+    DAY_MINUTES, DROP_RUN, DUTY, HORIZON_DAYS, MAINTENANCE, PICKUP_RUN, STOP,
+    fetch_fleet_timeline, horizon
+)
+from models.events import UPDATE
+from models.schedule_conflicts import clock
+from change_notifier import notifier
+from workers import submit
+
+ROW_HEIGHT = 22
+LABEL_WIDTH = 90
+HEADER_HEIGHT = 34
+
+# Pixels per minute at which rows start drawing more detail
+DETAIL_PPM = 0.25
+LABEL_PPM = 2.0
+MIN_PPM = 0.05
+MAX_PPM = 12.0
+
+# More timetable events than this at once reload the whole chart
+ROW_RELOAD_LIMIT = 50
+
+BLOCK_COLORS = {
+    DUTY: QColor(214, 228, 245),
+    PICKUP_RUN: QColor(46, 160, 67),
+    DROP_RUN: QColor(230, 150, 30),
+    MAINTENANCE: QColor(120, 120, 120),
+}
+CONFLICT_COLOR = QColor(214, 39, 40)
+WEEKEND_COLOR = QColor(245, 245, 245)
+GRID_COLOR = QColor(225, 225, 225)
+DAY_LINE_COLOR = QColor(150, 150, 150)
+
+
+def _pixels_per_minute(painter):
+    return painter.worldTransform().m11()
+
+
+class BusRow(QGraphicsItem):
+    """One bus's blocks over the horizon, painted as a single item"""
+
+    def __init__(self, row, entries=(), conflicts=()):
+        super().__init__()
+        self.setPos(0, row * ROW_HEIGHT)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+        self._rect = QRectF(0, 0, HORIZON_DAYS * DAY_MINUTES, ROW_HEIGHT)
+        self.set_entries(entries, conflicts)
+
+    def set_entries(self, entries, conflicts):
+        """Replace the row's (start, end, kind, description) entries"""
+        self.duties = [e for e in entries if e[2] == DUTY]
+        self.blocks = [e for e in entries if e[2] not in (DUTY, STOP)]
+        self.stops = [e[0] for e in entries if e[2] == STOP]
+        self.conflicts = list(conflicts)
+        self._starts = [e[0] for e in self.blocks]
+        # Blocks starting this long before the exposed area can still reach it
+        self._longest = max((e[1] - e[0] for e in self.blocks), default=0)
+        self.update()
+
+    def boundingRect(self):
+        return self._rect
+
+    def visible(self, left, right):
+        """The blocks overlapping minutes [left, right)"""
+        first = bisect.bisect_left(self._starts, left - self._longest)
+        last = bisect.bisect_left(self._starts, right)
+        return [e for e in self.blocks[first:last] if e[1] > left]
+
+    def entry_at(self, minute):
+        """The block (or, failing that, the duty) under `minute`"""
+        for entries in (self.visible(minute, minute + 1), self.duties):
+            for entry in entries:
+                if entry[0] <= minute < entry[1]:
+                    return entry
+        return None
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect
+        left, right = exposed.left(), exposed.right()
+        ppm = _pixels_per_minute(painter)
+        blocks = self.visible(left, right)
+        top, height = 4, ROW_HEIGHT - 8
+
+        if ppm < DETAIL_PPM:
+            self._paint_merged(painter, blocks, 1 / ppm, top, height)
+        else:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(BLOCK_COLORS[DUTY])
+            for start, end, _kind, _description in self.duties:
+                if end > left and start < right:
+                    painter.drawRect(QRectF(start, 2, end - start, ROW_HEIGHT - 4))
+            for start, end, kind, _description in blocks:
+                color = BLOCK_COLORS.get(kind, DAY_LINE_COLOR)
+                painter.setPen(QPen(color.darker(130), 0))
+                painter.setBrush(color)
+                painter.drawRect(QRectF(start, top, end - start, height))
+
+        if ppm >= LABEL_PPM:
+            painter.setPen(QPen(Qt.white, 0))
+            first = bisect.bisect_left(self.stops, left)
+            for minute in self.stops[first:bisect.bisect_right(self.stops, right)]:
+                painter.drawLine(QPointF(minute, top + height - 4), QPointF(minute, top + height))
+            self._paint_labels(painter, blocks, top, height)
+
+        pen = QPen(CONFLICT_COLOR, 2 if ppm >= DETAIL_PPM else 0)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setBrush(QBrush(CONFLICT_COLOR, Qt.BDiagPattern))
+        for start, end in self.conflicts:
+            if end > left and start < right:
+                painter.drawRect(QRectF(start, 1, max(end - start, 1 / ppm), ROW_HEIGHT - 2))
+
+    def _paint_merged(self, painter, blocks, pixel, top, height):
+        """Flat bars, merging blocks of a kind that are less than a pixel apart"""
+        painter.setPen(Qt.NoPen)
+        merged = {}
+        for start, end, kind, _description in blocks:
+            spans = merged.setdefault(kind, [])
+            if spans and start - spans[-1][1] < pixel:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        for kind, spans in merged.items():
+            painter.setBrush(BLOCK_COLORS.get(kind, DAY_LINE_COLOR))
+            for start, end in spans:
+                painter.drawRect(QRectF(start, top, max(end - start, pixel), height))
+
+    def _paint_labels(self, painter, blocks, top, height):
+        """Block descriptions, drawn unscaled in device pixels"""
+        transform = painter.worldTransform()
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(Qt.white)
+        painter.setFont(QFont("Arial", 7))
+        for start, end, _kind, description in blocks:
+            rect = transform.mapRect(QRectF(start, top, end - start, height)).adjusted(3, 0, -2, 0)
+            # Blocks scrolled partly out of view keep their label in view
+            rect.setLeft(max(rect.left(), 3))
+            if rect.width() > 30:
+                text = painter.fontMetrics().elidedText(description, Qt.ElideRight, int(rect.width()))
+                painter.drawText(rect, Qt.AlignVCenter | Qt.AlignLeft, text)
+        painter.restore()
+
+
+class _Margin(QWidget):
+    """A margin of the view painted by one of the view's methods"""
+
+    def __init__(self, paint, parent):
+        super().__init__(parent)
+        self._paint = paint
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self._paint(painter, self.rect())
+
+
+class FleetTimelineView(QGraphicsView):
+    """
+    Pans by dragging and scrolls with the wheel. Ctrl+wheel zooms the time
+    axis around the mouse and Ctrl+Shift+wheel the row height.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.days = horizon()
+        self.buses = []
+        self.rows = {}
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.setOptimizationFlag(QGraphicsView.DontAdjustForAntialiasing)
+        self.setViewportMargins(LABEL_WIDTH, HEADER_HEIGHT, 0, 0)
+        self.header = _Margin(self.paint_header, self)
+        self.labels = _Margin(self.paint_labels, self)
+        # Keep the whole horizon in view until the user zooms
+        self._fit = True
+
+    def set_timeline(self, days, timeline):
+        """Replace every row with the result of fetch_fleet_timeline"""
+        self.days = days
+        self.scene().clear()
+        self.buses = list(timeline['buses'])
+        self.rows = {}
+        for row, (bus_id, _number) in enumerate(self.buses):
+            item = BusRow(row, timeline['entries'].get(bus_id, ()),
+                          timeline['conflicts'].get(bus_id, ()))
+            self.scene().addItem(item)
+            self.rows[bus_id] = item
+        self.scene().setSceneRect(0, 0, len(days) * DAY_MINUTES, len(self.buses) * ROW_HEIGHT)
+        if self._fit:
+            self.fit_horizon()
+        self.update_margins()
+
+    def update_rows(self, timeline):
+        """
+        Replace the rows of the buses in a partial fetch_fleet_timeline
+        result. Returns False if a bus has no row yet or was renumbered,
+        which may move it to another row.
+        """
+        numbers = dict(self.buses)
+        for bus_id, number in timeline['buses']:
+            item = self.rows.get(bus_id)
+            if item is None or numbers[bus_id] != number:
+                return False
+            item.set_entries(timeline['entries'].get(bus_id, ()),
+                             timeline['conflicts'].get(bus_id, ()))
+        return True
+
+    def conflict_count(self):
+        return sum(1 for item in self.rows.values() if item.conflicts)
+
+    def pixels_per_minute(self):
+        return self.transform().m11()
+
+    def zoom(self, time_factor, row_factor=1.0):
+        time_factor = min(max(time_factor, MIN_PPM / self.transform().m11()),
+                          MAX_PPM / self.transform().m11())
+        row_factor = min(max(row_factor, 0.5 / self.transform().m22()), 3 / self.transform().m22())
+        self.scale(time_factor, row_factor)
+        self._fit = False
+        self.update_margins()
+
+    def fit_horizon(self):
+        """Show the whole horizon across the width of the view"""
+        width = max(self.viewport().width(), 1)
+        self.resetTransform()
+        self.scale(max(width / (len(self.days) * DAY_MINUTES), MIN_PPM), 1)
+        self._fit = True
+        self.update_margins()
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier:
+            factor = 1.25 ** (event.angleDelta().y() / 120)
+            if event.modifiers() & Qt.ShiftModifier:
+                self.zoom(1, factor)
+            else:
+                self.zoom(factor)
+            event.accept()
+        else:
+            super().wheelEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        rect = self.viewport().geometry()
+        self.header.setGeometry(rect.left(), rect.top() - HEADER_HEIGHT, rect.width(), HEADER_HEIGHT)
+        self.labels.setGeometry(rect.left() - LABEL_WIDTH, rect.top(), LABEL_WIDTH, rect.height())
+        if self._fit:
+            self.fit_horizon()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self.update_margins()
+
+    def update_margins(self):
+        self.header.update()
+        self.labels.update()
+
+    def _visible_scene_rect(self):
+        return self.mapToScene(self.viewport().rect()).boundingRect()
+
+    def drawBackground(self, painter, rect):
+        painter.fillRect(rect, Qt.white)
+        ppm = self.pixels_per_minute()
+        for index, day in enumerate(self.days):
+            start = index * DAY_MINUTES
+            if start + DAY_MINUTES < rect.left() or start > rect.right():
+                continue
+            if day.weekday() >= 5:
+                painter.fillRect(QRectF(start, rect.top(), DAY_MINUTES, rect.height()), WEEKEND_COLOR)
+            if ppm * 60 >= 12:
+                painter.setPen(QPen(GRID_COLOR, 0))
+                for hour in range(1, 24):
+                    x = start + hour * 60
+                    painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+            painter.setPen(QPen(DAY_LINE_COLOR, 0))
+            painter.drawLine(QPointF(start, rect.top()), QPointF(start, rect.bottom()))
+
+    def paint_header(self, painter, rect):
+        painter.fillRect(rect, QColor(236, 240, 241))
+        painter.setPen(DAY_LINE_COLOR)
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        ppm = self.pixels_per_minute()
+        visible = self._visible_scene_rect()
+        offset = self.mapFromScene(QPointF(0, 0)).x()
+        painter.setFont(QFont("Arial", 8, QFont.Bold))
+        for index, day in enumerate(self.days):
+            start = index * DAY_MINUTES
+            if start + DAY_MINUTES < visible.left() or start > visible.right():
+                continue
+            x = offset + start * ppm
+            painter.setPen(DAY_LINE_COLOR)
+            painter.drawLine(int(x), 0, int(x), rect.height())
+            painter.setPen(Qt.black)
+            label = day.strftime("%a %d %b")
+            painter.drawText(QRectF(max(x, 0) + 4, 2, max(DAY_MINUTES * ppm - 8, 0), 14),
+                             Qt.AlignLeft | Qt.AlignVCenter, label)
+
+        # Hour marks, as dense as the zoom allows
+        step = next((s for s in (15, 30, 60, 120, 180, 360, 720) if s * ppm >= 40), None)
+        if step is None:
+            return
+        painter.setFont(QFont("Arial", 7))
+        painter.setPen(QColor(90, 90, 90))
+        first = int(max(visible.left(), 0) // step) * step
+        for minute in range(first, int(visible.right()) + step, step):
+            if minute % DAY_MINUTES == 0:
+                continue
+            x = offset + minute * ppm
+            if x < 20:
+                continue
+            painter.drawText(QRectF(x - 20, 17, 40, 14), Qt.AlignCenter, clock(minute % DAY_MINUTES))
+
+    def paint_labels(self, painter, rect):
+        painter.fillRect(rect, QColor(236, 240, 241))
+        painter.setPen(DAY_LINE_COLOR)
+        painter.drawLine(rect.topRight(), rect.bottomRight())
+        visible = self._visible_scene_rect()
+        row_height = ROW_HEIGHT * self.transform().m22()
+        offset = self.mapFromScene(QPointF(0, 0)).y()
+        first = max(int(visible.top() // ROW_HEIGHT), 0)
+        last = min(int(visible.bottom() // ROW_HEIGHT) + 1, len(self.buses))
+        painter.setFont(QFont("Arial", 8))
+        for row in range(first, last):
+            bus_id, number = self.buses[row]
+            painter.setPen(CONFLICT_COLOR if self.rows[bus_id].conflicts else Qt.black)
+            painter.drawText(QRectF(6, offset + row * row_height, LABEL_WIDTH - 10, row_height),
+                             Qt.AlignLeft | Qt.AlignVCenter, number)
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.ToolTip:
+            point = self.mapToScene(event.pos())
+            row = int(point.y() // ROW_HEIGHT)
+            entry = None
+            if 0 <= row < len(self.buses) and point.y() >= 0:
+                bus_id, number = self.buses[row]
+                entry = self.rows[bus_id].entry_at(point.x())
+            if entry is None:
+                QToolTip.hideText()
+            else:
+                start, end, kind, description = entry
+                day = self.days[min(int(start // DAY_MINUTES), len(self.days) - 1)]
+                QToolTip.showText(event.globalPos(), (
+                    f"{number} - {day.strftime('%a %d %b')}\n{description}\n"
+                    f"{clock(start % DAY_MINUTES)}-{clock(end % DAY_MINUTES or DAY_MINUTES)}"
+                ), self)
+            return True
+        return super().viewportEvent(event)
+
+
+class FleetTimelineTab(QWidget):
+    """Gantt chart of every bus's timetable over the planning horizon"""
+
+    def __init__(self):
+        super().__init__()
+        self.task = None
+        self.row_task = None
+        self.pending = set()
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(200)
+        self.reload_timer.timeout.connect(self.reload_pending)
+        self.init_ui()
+        notifier().changed.connect(self.on_data_changed)
+        notifier().day_changed.connect(self.load_timeline)
+        self.load_timeline()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        for text, slot in (("Zoom In", lambda: self.view.zoom(2)),
+                           ("Zoom Out", lambda: self.view.zoom(0.5)),
+                           ("Fit Week", lambda: self.view.fit_horizon()),
+                           ("Refresh", self.load_timeline)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            controls.addWidget(button)
+        controls.addSpacing(20)
+        for kind in (PICKUP_RUN, DROP_RUN, MAINTENANCE, DUTY):
+            controls.addWidget(self._legend(BLOCK_COLORS[kind], kind))
+        controls.addWidget(self._legend(CONFLICT_COLOR, "Conflict"))
+        controls.addStretch()
+        self.summary_label = QLabel("Loading...")
+        controls.addWidget(self.summary_label)
+        layout.addLayout(controls)
+
+        self.view = FleetTimelineView()
+        layout.addWidget(self.view)
+
+        hint = QLabel("Drag to pan, Ctrl+wheel to zoom the time axis, Ctrl+Shift+wheel to zoom rows")
+        hint.setStyleSheet("color: #7f8c8d;")
+        layout.addWidget(hint)
+
+    def _legend(self, color, text):
+        return QLabel(f"<span style='color:{color.name()}'>&#9632;</span> {text}")
+
+    def load_timeline(self):
+        if self.task is not None:
+            self.task.cancel()
+        days = horizon()
+        self.pending.clear()
+        self.task = submit(fetch_fleet_timeline, days)
+        self.task.finished.connect(lambda timeline: self.show_timeline(days, timeline))
+
+    def show_timeline(self, days, timeline):
+        self.view.set_timeline(days, timeline)
+        self.update_summary()
+
+    def update_summary(self):
+        self.summary_label.setText(
+            f"{len(self.view.buses)} buses, {self.view.conflict_count()} with conflicts"
+        )
+
+    def on_data_changed(self, entity, entity_id, operation):
+        if entity == 'timetable':
+            self.pending.add(entity_id)
+            self.reload_timer.start()
+        elif entity == 'bus':
+            # Only an added or deleted bus changes the rows; an edited one
+            # is reloaded on its own
+            self.pending.add(entity_id if operation == UPDATE else None)
+            self.reload_timer.start()
+
+    def reload_pending(self):
+        """Reload the rows of the buses whose timetables changed"""
+        bus_ids, self.pending = self.pending, set()
+        if None in bus_ids or len(bus_ids) > ROW_RELOAD_LIMIT or not self.view.buses:
+            self.load_timeline()
+            return
+        self.row_task = submit(fetch_fleet_timeline, self.view.days, sorted(bus_ids))
+        self.row_task.finished.connect(self.show_rows)
+
+    def show_rows(self, timeline):
+        if self.view.update_rows(timeline):
+            self.view.update_margins()
+            self.update_summary()
+        else:
+            self.load_timeline()
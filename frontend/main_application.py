@@ -19,6 +19,9 @@ from school_management import SchoolManagementPage
 from reports_dashboard import ReportsDashboard  # Integrated reports dashboard
 from system_admin import UserManagement
 from system_settings import SystemSettings
+from change_notifier import notifier
+from models.dashboard import fetch_dashboard_counts
+from workers import submit
 
 class MainApplication(QMainWindow):
     """
@@ -341,12 +344,19 @@ class MainApplication(QMainWindow):
             ("System Users", "8", QColor(230, 126, 34))
         ]
         
+        self.stat_labels = {}
         for i, (title, value, color) in enumerate(stats_data):
             card = self.create_stat_card(title, value, color)
+            self.stat_labels[title] = card.value_label
             stats_grid.addWidget(card, i // 3, i % 3)
         
         layout.addLayout(stats_grid)
         
+        # Keep the counts live: recount whenever a counted table changes
+        self.counts_task = None
+        self.refresh_stat_cards()
+        notifier().changed.connect(self.on_data_changed)
+        
         # Quick access buttons
         quick_access_label = QLabel("Quick Access")
         quick_access_label.setFont(QFont("Segoe UI", 16, QFont.Bold))
@@ -428,9 +438,28 @@ class MainApplication(QMainWindow):
         
         layout.addWidget(title_label)
         layout.addWidget(value_label)
+        card.value_label = value_label
         
         return card
         
+    def on_data_changed(self, entity, entity_id, operation):
+        """Recount the dashboard cards after a driver, bus, school or user change"""
+        if entity in ('driver', 'bus', 'school', 'user'):
+            self.refresh_stat_cards()
+            
+    def refresh_stat_cards(self):
+        """Load the dashboard counts in the background"""
+        if self.counts_task is not None:
+            self.counts_task.cancel()
+        self.counts_task = submit(fetch_dashboard_counts)
+        self.counts_task.finished.connect(self.show_stat_counts)
+        
+    def show_stat_counts(self, counts):
+        """Update the value label of each card that has a live count"""
+        for title, count in counts.items():
+            if title in self.stat_labels:
+                self.stat_labels[title].setText(str(count))
+        
     def create_help_page(self):
         """Create help page"""
         page = QWidget()
@@ -14,6 +14,13 @@ from PyQt5.QtCore import Qt, QDate, QSize, pyqtSignal
 import datetime
 import json
 
+from workers import submit_job
+from table_models import ID_ROLE
+from delegates import ActionButtonDelegate
+
+# Buttons painted in the Actions column of the recent reports table
+REPORT_ACTIONS = ["View", "Export", "Delete"]
+
 # ============================================================================
 # BASE REPORT GENERATOR CLASS
 # ============================================================================
@@ -28,6 +35,7 @@ class ReportGenerator(QWidget):
         self.report_type = report_type
         self.report_data = {}
         self.filters = {}
+        self.generate_task = None
         
     def create_basic_controls(self):
         """Create basic report controls"""
@@ -109,6 +117,50 @@ class ReportGenerator(QWidget):
             return False
             
         return True
+    
+    def collect_report(self):
+        """Read the report settings from the form (runs on the GUI thread)"""
+        subtype = self.report_subtype.currentText() if hasattr(self, 'report_subtype') else ''
+        return {
+            'name': self.report_name.text() or f"{self.report_type.capitalize()} Report - {subtype}",
+            'type': self.report_type,
+            'subtype': subtype,
+            'date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+            'period': f"{self.start_date.date().toString('dd-MMM-yyyy')} to {self.end_date.date().toString('dd-MMM-yyyy')}",
+            'filters': self.filters,
+            'format': self.format_combo.currentText()
+        }
+    
+    def generate_report(self, token, report):
+        """Fill in the report data (runs on a worker thread) - to be overridden"""
+        report['data'] = []
+        report['summary'] = {}
+        return report
+    
+    def on_generate(self):
+        """Handle generate button click"""
+        if self.generate_task or not self.validate_filters():
+            return
+        
+        self.generate_task = submit_job(self.generate_report, self.collect_report())
+        self.generate_task.finished.connect(self.on_report_ready)
+        self.generate_task.failed.connect(self.on_report_failed)
+        self.destroyed.connect(self.generate_task.cancel)
+        
+    def on_report_ready(self, report):
+        """Emit the finished report and confirm to the user"""
+        self.generate_task = None
+        self.report_generated.emit(report)
+        
+        QMessageBox.information(self, "Success", 
+                              f"{self.report_type.capitalize()} report generated!\n\n"
+                              f"Name: {report['name']}\n"
+                              f"Type: {report['subtype']}\n"
+                              f"Format: {report['format']}")
+        
+    def on_report_failed(self, message):
+        self.generate_task = None
+        QMessageBox.warning(self, "Error", f"Report generation failed:\n{message}")
 
 # ============================================================================
 # FINANCIAL REPORT GENERATOR
@@ -283,9 +335,8 @@ COMMENTS: {self.comments.toPlainText() or 'No comments added'}
 """
         self.preview_text.setText(preview_text)
     
-    def generate_report(self):
-        """Generate financial report"""
-        # Get filters
+    def collect_report(self):
+        """Read the financial report settings from the form"""
         categories_selected = [name for name, cb in self.categories.items() if cb.isChecked()]
         
         self.filters = {
@@ -300,21 +351,18 @@ COMMENTS: {self.comments.toPlainText() or 'No comments added'}
             'comments': self.comments.toPlainText()
         }
         
+        report = super().collect_report()
+        report['name'] = self.report_name.text() or f"Financial Report - {self.report_subtype.currentText()}"
+        return report
+    
+    def generate_report(self, token, report):
+        """Generate financial report"""
         # Simulate data fetching
         mock_data = self.get_financial_data()
+        token.check()
         
-        report = {
-            'name': self.report_name.text() or f"Financial Report - {self.report_subtype.currentText()}",
-            'type': 'financial',
-            'subtype': self.report_subtype.currentText(),
-            'date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-            'period': f"{self.start_date.date().toString('dd-MMM-yyyy')} to {self.end_date.date().toString('dd-MMM-yyyy')}",
-            'filters': self.filters,
-            'data': mock_data,
-            'summary': self.generate_summary(mock_data),
-            'format': self.format_combo.currentText()
-        }
-        
+        report['data'] = mock_data
+        report['summary'] = self.generate_summary(mock_data)
         return report
     
     def get_financial_data(self):
@@ -342,19 +390,6 @@ COMMENTS: {self.comments.toPlainText() or 'No comments added'}
             'profit_margin': (net_profit / total_income * 100) if total_income > 0 else 0
         }
     
-    def on_generate(self):
-        """Handle generate button click"""
-        if self.validate_filters():
-            report = self.generate_report()
-            self.report_generated.emit(report)
-            
-            # Show success message
-            QMessageBox.information(self, "Success", 
-                                  f"Financial report generated!\n\n"
-                                  f"Name: {report['name']}\n"
-                                  f"Type: {report['subtype']}\n"
-                                  f"Format: {report['format']}")
-    
     def save_template(self):
         """Save report as template"""
         template = {
@@ -564,9 +599,8 @@ CHARTS INCLUDED: {'Yes' if self.include_charts.isChecked() else 'No'}
 """
         self.preview_text.setText(preview_text)
     
-    def generate_report(self):
-        """Generate bus report"""
-        # Collect metrics
+    def collect_report(self):
+        """Read the bus report settings from the form"""
         selected_metrics = [cb.text() for cb in self.metrics.values() if cb.isChecked()]
         
         self.filters = {
@@ -580,21 +614,16 @@ CHARTS INCLUDED: {'Yes' if self.include_charts.isChecked() else 'No'}
             'detail_level': self.detail_level.currentText()
         }
         
+        return super().collect_report()
+    
+    def generate_report(self, token, report):
+        """Generate bus report"""
         # Simulate data fetching
         mock_data = self.get_bus_data()
+        token.check()
         
-        report = {
-            'name': self.report_name.text() or f"Bus Report - {self.report_subtype.currentText()}",
-            'type': 'bus',
-            'subtype': self.report_subtype.currentText(),
-            'date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-            'period': f"{self.start_date.date().toString('dd-MMM-yyyy')} to {self.end_date.date().toString('dd-MMM-yyyy')}",
-            'filters': self.filters,
-            'data': mock_data,
-            'summary': self.generate_bus_summary(mock_data),
-            'format': self.format_combo.currentText()
-        }
-        
+        report['data'] = mock_data
+        report['summary'] = self.generate_bus_summary(mock_data)
         return report
     
     def get_bus_data(self):
@@ -626,18 +655,6 @@ CHARTS INCLUDED: {'Yes' if self.include_charts.isChecked() else 'No'}
             'avg_maintenance_per_bus': f"₹ {total_maintenance/total_buses:,.0f}" if total_buses > 0 else "₹ 0"
         }
     
-    def on_generate(self):
-        """Handle generate button click"""
-        if self.validate_filters():
-            report = self.generate_report()
-            self.report_generated.emit(report)
-            
-            QMessageBox.information(self, "Success", 
-                                  f"Bus report generated!\n\n"
-                                  f"Name: {report['name']}\n"
-                                  f"Type: {report['subtype']}\n"
-                                  f"Format: {report['format']}")
-    
     def save_template(self):
         """Save template"""
         if not self.report_name.text().strip():
@@ -829,18 +846,6 @@ CHARTS INCLUDED: {'Yes' if self.include_charts.isChecked() else 'No'}
 """
         self.preview_text.setText(preview_text)
     
-    def on_generate(self):
-        """Handle generate button click"""
-        if self.validate_filters():
-            report = self.generate_report()
-            self.report_generated.emit(report)
-            
-            QMessageBox.information(self, "Success", 
-                                  f"School report generated!\n\n"
-                                  f"Name: {report['name']}\n"
-                                  f"Type: {report['subtype']}\n"
-                                  f"Format: {report['format']}")
-    
     def reset_form(self):
         """Reset form"""
         self.report_name.clear()
@@ -1023,18 +1028,6 @@ CHARTS INCLUDED: {'Yes' if self.include_charts.isChecked() else 'No'}
 """
         self.preview_text.setText(preview_text)
     
-    def on_generate(self):
-        """Handle generate button click"""
-        if self.validate_filters():
-            report = self.generate_report()
-            self.report_generated.emit(report)
-            
-            QMessageBox.information(self, "Success", 
-                                  f"Driver report generated!\n\n"
-                                  f"Name: {report['name']}\n"
-                                  f"Type: {report['subtype']}\n"
-                                  f"Format: {report['format']}")
-    
     def reset_form(self):
         """Reset form"""
         self.report_name.clear()
@@ -1207,18 +1200,6 @@ ADDITIONAL OPTIONS:
 """
         self.preview_text.setText(preview_text)
     
-    def on_generate(self):
-        """Handle generate button click"""
-        if self.validate_filters():
-            report = self.generate_report()
-            self.report_generated.emit(report)
-            
-            QMessageBox.information(self, "Success", 
-                                  f"System report generated!\n\n"
-                                  f"Name: {report['name']}\n"
-                                  f"Type: {report['subtype']}\n"
-                                  f"Format: {report['format']}")
-    
     def reset_form(self):
         """Reset form"""
         self.report_name.clear()
@@ -1251,6 +1232,9 @@ class ReportsDashboard(QWidget):
     def __init__(self):
         super().__init__()
         self.setMinimumSize(1000, 600)
+        # Reports listed in the recent reports table, by report id
+        self.recent_reports = {}
+        self.next_report_id = 1
         self.setup_ui()
         self.load_sample_data()
 
@@ -1533,6 +1517,11 @@ class ReportsDashboard(QWidget):
         
         self.reports_table.setAlternatingRowColors(True)
         self.reports_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.reports_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        
+        actions = ActionButtonDelegate(REPORT_ACTIONS, self.reports_table)
+        actions.clicked.connect(self.on_report_action)
+        self.reports_table.setItemDelegateForColumn(5, actions)
         
         layout.addWidget(header_widget)
         layout.addWidget(self.reports_table, 1)
@@ -1596,42 +1585,42 @@ class ReportsDashboard(QWidget):
             ["System Activity Log", "System", "2024-01-16 09:30", "admin", "4.2 MB"]
         ]
         
-        self.reports_table.setRowCount(len(sample_reports))
+        self.reports_table.setRowCount(0)
+        self.recent_reports.clear()
         
-        for row, report in enumerate(sample_reports):
-            for col, data in enumerate(report):
-                item = QTableWidgetItem(data)
-                
-                # Make type column bold
-                if col == 1:
-                    item_font = QFont("Segoe UI", 9, QFont.Bold)
-                    item.setFont(item_font)
-                    
-                self.reports_table.setItem(row, col, item)
-            
-            # Add action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(2, 2, 2, 2)
-            
-            view_btn = QPushButton("View")
-            view_btn.setFixedWidth(50)
-            view_btn.clicked.connect(lambda checked, r=row: self.view_report_details(r))
+        for name, report_type, date, generated_by, size in sample_reports:
+            report = {'name': name, 'type': report_type.lower(), 'date': date}
+            self.add_report_row(report, generated_by, size)
             
-            export_btn = QPushButton("Export")
-            export_btn.setFixedWidth(50)
-            export_btn.clicked.connect(lambda checked, r=row: self.export_report(r))
-            
-            delete_btn = QPushButton("Delete")
-            delete_btn.setFixedWidth(50)
-            delete_btn.clicked.connect(lambda checked, r=row: self.delete_report(r))
+    def add_report_row(self, report, generated_by, size):
+        """Append a report to the recent reports table and return its id"""
+        report_id = self.next_report_id
+        self.next_report_id += 1
+        self.recent_reports[report_id] = report
+        
+        row = self.reports_table.rowCount()
+        self.reports_table.insertRow(row)
+        
+        cells = [report['name'], report['type'].capitalize(), report['date'], generated_by, size, ""]
+        for col, text in enumerate(cells):
+            item = QTableWidgetItem(text)
+            item.setData(ID_ROLE, report_id)
             
-            action_layout.addWidget(view_btn)
-            action_layout.addWidget(export_btn)
-            action_layout.addWidget(delete_btn)
-            action_layout.addStretch()
+            # Make type column bold
+            if col == 1:
+                item_font = QFont("Segoe UI", 9, QFont.Bold)
+                item.setFont(item_font)
+                
+            self.reports_table.setItem(row, col, item)
             
-            self.reports_table.setCellWidget(row, 5, action_widget)
+        return report_id
+        
+    def report_row(self, report_id):
+        """Return the table row showing a report id, or None"""
+        for row in range(self.reports_table.rowCount()):
+            if self.reports_table.item(row, 0).data(ID_ROLE) == report_id:
+                return row
+        return None
             
     def on_category_clicked(self, report_type):
         """Handle category click"""
@@ -1770,39 +1759,7 @@ class ReportsDashboard(QWidget):
     
     def add_to_recent_reports(self, report_data):
         """Add generated report to recent reports table"""
-        row = self.reports_table.rowCount()
-        self.reports_table.insertRow(row)
-        
-        # Add report data
-        self.reports_table.setItem(row, 0, QTableWidgetItem(report_data['name']))
-        self.reports_table.setItem(row, 1, QTableWidgetItem(report_data['type'].capitalize()))
-        self.reports_table.setItem(row, 2, QTableWidgetItem(report_data['date']))
-        self.reports_table.setItem(row, 3, QTableWidgetItem("admin"))
-        self.reports_table.setItem(row, 4, QTableWidgetItem("1.5 MB"))
-        
-        # Add action buttons
-        action_widget = QWidget()
-        action_layout = QHBoxLayout(action_widget)
-        action_layout.setContentsMargins(2, 2, 2, 2)
-        
-        view_btn = QPushButton("View")
-        view_btn.setFixedWidth(50)
-        view_btn.clicked.connect(lambda: self.view_generated_report(report_data))
-        
-        export_btn = QPushButton("Export")
-        export_btn.setFixedWidth(50)
-        export_btn.clicked.connect(lambda: self.export_generated_report(report_data))
-        
-        delete_btn = QPushButton("Delete")
-        delete_btn.setFixedWidth(50)
-        delete_btn.clicked.connect(lambda: self.delete_report(row))
-        
-        action_layout.addWidget(view_btn)
-        action_layout.addWidget(export_btn)
-        action_layout.addWidget(delete_btn)
-        action_layout.addStretch()
-        
-        self.reports_table.setCellWidget(row, 5, action_widget)
+        self.add_report_row(report_data, "admin", "1.5 MB")
     
     def view_generated_report(self, report_data):
         """View a generated report"""
@@ -1874,26 +1831,46 @@ FILTERS APPLIED:
             QMessageBox.information(self, "Exported", 
                                   f"Report exported to:\n{file_path}")
             
-    def view_report_details(self, row):
+    def on_report_action(self, action, report_id):
+        """Run the action button clicked in a recent report row"""
+        if report_id not in self.recent_reports:
+            return
+        if action == "View":
+            self.view_report_details(report_id)
+        elif action == "Export":
+            self.export_report(report_id)
+        elif action == "Delete":
+            self.delete_report(report_id)
+            
+    def view_report_details(self, report_id):
         """View report details"""
-        report_name = self.reports_table.item(row, 0).text()
-        QMessageBox.information(self, "View Report", f"Viewing: {report_name}")
+        report = self.recent_reports[report_id]
+        if 'data' in report:
+            self.view_generated_report(report)
+        else:
+            QMessageBox.information(self, "View Report", f"Viewing: {report['name']}")
         
-    def export_report(self, row):
+    def export_report(self, report_id):
         """Export a report"""
-        report_name = self.reports_table.item(row, 0).text()
-        QMessageBox.information(self, "Export", f"Exporting: {report_name}")
+        report = self.recent_reports[report_id]
+        if 'data' in report:
+            self.export_generated_report(report)
+        else:
+            QMessageBox.information(self, "Export", f"Exporting: {report['name']}")
         
-    def delete_report(self, row):
+    def delete_report(self, report_id):
         """Delete a report"""
-        report_name = self.reports_table.item(row, 0).text()
+        report_name = self.recent_reports[report_id]['name']
         
         reply = QMessageBox.question(self, "Delete",
                                    f"Delete '{report_name}'?",
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.reports_table.removeRow(row)
+            row = self.report_row(report_id)
+            if row is not None:
+                self.reports_table.removeRow(row)
+            del self.recent_reports[report_id]
             QMessageBox.information(self, "Deleted", "Report deleted")
 
 # ============================================================================
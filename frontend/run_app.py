@@ -1,6 +1,10 @@
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
 
+# Make the shared models package importable when run from this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Import your classes
 from login_window import LoginWindow
 from main_application import MainApplication
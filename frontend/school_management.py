@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
+    QTableWidget, QTableWidgetItem, QTableView, QLineEdit, QComboBox,
     QDateEdit, QSpinBox, QDoubleSpinBox, QFrame, QGroupBox,
     QTabWidget, QTextEdit, QHeaderView, QMessageBox,
     QCheckBox, QFileDialog, QFormLayout, QDialog, QGridLayout,
@@ -11,138 +11,53 @@ from PyQt5.QtGui import QFont, QColor, QPixmap
 from PyQt5.QtCore import Qt, QDate
 import datetime
 
-# Mock data for schools
-MOCK_SCHOOLS = [
-    {
-        'id': 1,
-        'name': 'Delhi Public School',
-        'school_code': 'DPS001',
-        'type': 'Private',
-        'address': '123 Education Lane, Delhi',
-        'city': 'Delhi',
-        'phone': '011-23456789',
-        'email': 'contact@dpsdelhi.edu.in',
-        'principal_name': 'Dr. Ramesh Sharma',
-        'contact_person': 'Mr. Anil Kumar',
-        'contact_person_phone': '9876543210',
-        'student_count': 2500,
-        'contract_status': 'Active',
-        'contract_start': '2023-01-01',
-        'contract_end': '2024-12-31',
-        'monthly_fee': 150000,
-        'payment_status': 'Paid',
-        'assigned_buses': ['BUS-001', 'BUS-002'],
-        'pickup_time': '07:30',
-        'drop_time': '14:30',
-        'billing_address': 'Same as school address',
-        'gst_number': '07AABCD1234E1Z5'
-    },
-    {
-        'id': 2,
-        'name': 'Kendriya Vidyalaya',
-        'school_code': 'KV001',
-        'type': 'Government',
-        'address': '456 Government Road, Delhi',
-        'city': 'Delhi',
-        'phone': '011-34567890',
-        'email': 'kvdelhi@kvs.gov.in',
-        'principal_name': 'Dr. Sunita Verma',
-        'contact_person': 'Mr. Rajesh Singh',
-        'contact_person_phone': '9876543211',
-        'student_count': 1800,
-        'contract_status': 'Active',
-        'contract_start': '2023-03-01',
-        'contract_end': '2025-02-28',
-        'monthly_fee': 120000,
-        'payment_status': 'Pending',
-        'assigned_buses': ['BUS-003', 'BUS-004'],
-        'pickup_time': '08:00',
-        'drop_time': '15:00',
-        'billing_address': 'Kendriya Vidyalaya, Delhi',
-        'gst_number': '07BABCD1234E1Z6'
-    },
-    {
-        'id': 3,
-        'name': 'Modern Public School',
-        'school_code': 'MPS001',
-        'type': 'Private',
-        'address': '789 Modern Road, Gurgaon',
-        'city': 'Gurgaon',
-        'phone': '0124-4567890',
-        'email': 'info@modernschool.edu.in',
-        'principal_name': 'Mrs. Priya Kapoor',
-        'contact_person': 'Mr. Vikas Gupta',
-        'contact_person_phone': '9876543212',
-        'student_count': 3000,
-        'contract_status': 'Active',
-        'contract_start': '2023-06-01',
-        'contract_end': '2024-05-31',
-        'monthly_fee': 200000,
-        'payment_status': 'Paid',
-        'assigned_buses': ['BUS-005'],
-        'pickup_time': '07:45',
-        'drop_time': '14:45',
-        'billing_address': 'Modern School Accounts Dept, Gurgaon',
-        'gst_number': '06CABCD1234E1Z7'
-    },
-    {
-        'id': 4,
-        'name': 'Little Angels School',
-        'school_code': 'LAS001',
-        'type': 'Private',
-        'address': '101 Children Street, Noida',
-        'city': 'Noida',
-        'phone': '0120-5678901',
-        'email': 'contact@littleangels.edu.in',
-        'principal_name': 'Mrs. Anjali Mehta',
-        'contact_person': 'Mr. Sanjay Patel',
-        'contact_person_phone': '9876543213',
-        'student_count': 1200,
-        'contract_status': 'Expiring Soon',
-        'contract_start': '2022-04-01',
-        'contract_end': '2023-12-31',
-        'monthly_fee': 80000,
-        'payment_status': 'Overdue',
-        'assigned_buses': ['BUS-006'],
-        'pickup_time': '08:15',
-        'drop_time': '15:15',
-        'billing_address': 'Little Angels School, Noida',
-        'gst_number': '09DABCD1234E1Z8'
-    },
-    {
-        'id': 5,
-        'name': 'Government Senior Secondary School',
-        'school_code': 'GSSS001',
-        'type': 'Government',
-        'address': '202 Public Sector, Faridabad',
-        'city': 'Faridabad',
-        'phone': '0129-6789012',
-        'email': 'gsss.fbd@edu.gov.in',
-        'principal_name': 'Mr. Harish Yadav',
-        'contact_person': 'Mr. Rakesh Kumar',
-        'contact_person_phone': '9876543214',
-        'student_count': 2200,
-        'contract_status': 'Inactive',
-        'contract_start': '2022-09-01',
-        'contract_end': '2023-08-31',
-        'monthly_fee': 100000,
-        'payment_status': 'Paid',
-        'assigned_buses': ['BUS-007', 'BUS-008'],
-        'pickup_time': '07:15',
-        'drop_time': '14:15',
-        'billing_address': 'GSSS Faridabad',
-        'gst_number': '06EABCD1234E1Z9'
-    }
-]
-
-# Available buses for assignment
-AVAILABLE_BUSES = ['BUS-001', 'BUS-002', 'BUS-003', 'BUS-004', 'BUS-005', 'BUS-006', 'BUS-007', 'BUS-008', 'BUS-009', 'BUS-010']
+from models.assignment_optimizer import propose_plan, apply_plan
+from models.assignments import (
+    ASSIGNMENTS, fetch_school_assignments, assign_bus_to_school, remove_bus_from_school
+)
+from models.bitmap_index import BitmapIndex, has
+from models.routing import build_routes
+from models.schedule_conflicts import SCHEDULE, describe
+from models.buses import fetch_assignable_buses
+from models.schools import fetch_schools, set_contract_status
+from models.timetable import HORIZON_DAYS, ensure_horizon, fetch_timetable
+from change_notifier import notifier
+from fleet_timeline import FleetTimelineTab
+from search_controller import SearchController
+from table_models import (
+    Column, RecordTableModel, selected_ids, selected_record, GOOD, WARNING, BAD, MUTED
+)
+from workers import submit
 
 # School types
 SCHOOL_TYPES = ['Private', 'Government', 'International', 'CBSE', 'ICSE', 'State Board']
 CONTRACT_STATUSES = ['Active', 'Inactive', 'Expiring Soon', 'Negotiation', 'Terminated']
 PAYMENT_STATUSES = ['Paid', 'Pending', 'Overdue', 'Partially Paid']
 
+CONTRACT_STATUS_COLORS = {'Active': GOOD, 'Expiring Soon': WARNING, 'Inactive': BAD}
+
+# Capacities matched by each entry of the available buses capacity combo
+CAPACITY_FILTERS = {
+    "12 Seater": lambda capacity: capacity == 12,
+    "20 Seater": lambda capacity: capacity == 20,
+    "30 Seater": lambda capacity: capacity == 30,
+    "40+ Seater": lambda capacity: capacity >= 40,
+}
+
+SCHOOL_COLUMNS = [
+    Column("School Name", 'name'),
+    Column("Code", 'school_code'),
+    Column("Type", 'type'),
+    Column("Location", 'city'),
+    Column("Contact Person", 'contact_person'),
+    Column("Phone", 'phone'),
+    Column("Contract Status", 'contract_status', align=Qt.AlignCenter,
+           colors=lambda s: CONTRACT_STATUS_COLORS.get(s['contract_status'], MUTED)),
+    Column("Monthly Fee", lambda s: f"₹ {s['monthly_fee']:,}", align=Qt.AlignRight),
+    Column("Assigned Buses", lambda s: ", ".join(s['assigned_buses']) or "None"),
+    Column("Students", lambda s: f"{s['student_count']:,}", align=Qt.AlignCenter),
+]
+
 
 class SchoolManagementPage(QWidget):
     """
@@ -179,11 +94,13 @@ class SchoolManagementPage(QWidget):
         self.school_list_tab = SchoolListTab()
         self.school_form_tab = SchoolFormTab()
         self.school_bus_assignment_tab = SchoolBusAssignmentTab()
+        self.fleet_timeline_tab = FleetTimelineTab()
         
         # Add tabs
         self.tab_widget.addTab(self.school_list_tab, "School List")
         self.tab_widget.addTab(self.school_form_tab, "Add/Edit School")
         self.tab_widget.addTab(self.school_bus_assignment_tab, "Bus Assignment")
+        self.tab_widget.addTab(self.fleet_timeline_tab, "Fleet Timeline")
         
         main_layout.addWidget(self.tab_widget)
         
@@ -199,8 +116,11 @@ class SchoolListTab(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.school_model = RecordTableModel(SCHOOL_COLUMNS, fetch_schools)
+        self.school_model.load_failed.connect(self.show_load_error)
         self.init_ui()
         self.load_schools()
+        notifier().changed.connect(self.on_data_changed)
         
     def init_ui(self):
         """Initialize the UI"""
@@ -215,7 +135,7 @@ class SchoolListTab(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search by name, location, code...")
         self.search_input.setFixedWidth(250)
-        self.search_input.textChanged.connect(self.filter_schools)
+        self.search_controller = SearchController(self.search_input, self.search_schools)
         filter_layout.addWidget(self.search_input)
         
         # Contract status filter
@@ -256,15 +176,11 @@ class SchoolListTab(QWidget):
         layout.addWidget(filter_widget)
         
         # School table
-        self.school_table = QTableWidget()
-        self.school_table.setColumnCount(10)
-        self.school_table.setHorizontalHeaderLabels([
-            "School Name", "Code", "Type", "Location", 
-            "Contact Person", "Phone", "Contract Status", 
-            "Monthly Fee", "Assigned Buses", "Students"
-        ])
+        self.school_table = QTableView()
+        self.school_table.setModel(self.school_model)
         self.school_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.school_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.school_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.school_table.setSelectionBehavior(QTableView.SelectRows)
         
         layout.addWidget(self.school_table)
         
@@ -309,114 +225,41 @@ class SchoolListTab(QWidget):
         
         layout.addWidget(action_widget)
         
+    def current_filters(self):
+        """Return the fetch_schools arguments for the filter widgets"""
+        return {
+            'search': self.search_input.text(),
+            'contract_status': self.contract_filter.currentText(),
+            'school_type': self.type_filter.currentText(),
+            'city': self.city_filter.currentText()
+        }
+        
     def load_schools(self):
-        """Load schools into the table"""
-        self.school_table.setRowCount(len(MOCK_SCHOOLS))
+        """Query schools matching the current filters in the background"""
+        self.school_model.set_filters(**self.current_filters())
+        
+    def show_load_error(self, message):
+        QMessageBox.warning(self, "Error", f"Could not load schools:\n{message}")
+        
+    def on_data_changed(self, entity, entity_id, operation):
+        """Patch the row of a school that was changed elsewhere"""
+        if entity == 'school':
+            self.school_model.refresh(entity_id)
+        
+    def search_schools(self, text, narrow):
+        """Run the search box query, re-checking only the shown rows if it narrows"""
+        if narrow:
+            self.school_model.narrow(**self.current_filters())
+        else:
+            self.load_schools()
         
-        for row, school in enumerate(MOCK_SCHOOLS):
-            # School Name
-            item = QTableWidgetItem(school['name'])
-            self.school_table.setItem(row, 0, item)
-            
-            # School Code
-            item = QTableWidgetItem(school['school_code'])
-            self.school_table.setItem(row, 1, item)
-            
-            # School Type
-            item = QTableWidgetItem(school['type'])
-            self.school_table.setItem(row, 2, item)
-            
-            # Location (City)
-            item = QTableWidgetItem(school['city'])
-            self.school_table.setItem(row, 3, item)
-            
-            # Contact Person
-            item = QTableWidgetItem(school['contact_person'])
-            self.school_table.setItem(row, 4, item)
-            
-            # Phone
-            item = QTableWidgetItem(school['phone'])
-            self.school_table.setItem(row, 5, item)
-            
-            # Contract Status with color coding
-            contract_item = QTableWidgetItem(school['contract_status'])
-            if school['contract_status'] == 'Active':
-                contract_item.setBackground(QColor(220, 255, 220))
-                contract_item.setForeground(QColor(0, 100, 0))
-            elif school['contract_status'] == 'Expiring Soon':
-                contract_item.setBackground(QColor(255, 255, 200))
-                contract_item.setForeground(QColor(153, 102, 0))
-            elif school['contract_status'] == 'Inactive':
-                contract_item.setBackground(QColor(255, 220, 220))
-                contract_item.setForeground(QColor(139, 0, 0))
-            else:
-                contract_item.setBackground(QColor(230, 230, 230))
-                contract_item.setForeground(QColor(100, 100, 100))
-            contract_item.setTextAlignment(Qt.AlignCenter)
-            self.school_table.setItem(row, 6, contract_item)
-            
-            # Monthly Fee
-            item = QTableWidgetItem(f"₹ {school['monthly_fee']:,}")
-            item.setTextAlignment(Qt.AlignRight)
-            self.school_table.setItem(row, 7, item)
-            
-            # Assigned Buses
-            buses_text = ", ".join(school['assigned_buses']) if school['assigned_buses'] else "None"
-            item = QTableWidgetItem(buses_text)
-            self.school_table.setItem(row, 8, item)
-            
-            # Students
-            item = QTableWidgetItem(f"{school['student_count']:,}")
-            item.setTextAlignment(Qt.AlignCenter)
-            self.school_table.setItem(row, 9, item)
-            
     def filter_schools(self):
-        """Filter schools based on search and filter criteria"""
-        search_text = self.search_input.text().lower()
-        contract_filter = self.contract_filter.currentText()
-        type_filter = self.type_filter.currentText()
-        city_filter = self.city_filter.currentText()
-        
-        for row in range(self.school_table.rowCount()):
-            show_row = True
-            
-            # Search filter
-            if search_text:
-                row_text = ''
-                for col in range(self.school_table.columnCount()):
-                    item = self.school_table.item(row, col)
-                    if item:
-                        row_text += item.text().lower() + ' '
-                if search_text not in row_text:
-                    show_row = False
-            
-            # Contract status filter
-            if contract_filter != 'All':
-                contract_item = self.school_table.item(row, 6)
-                if contract_item and contract_item.text() != contract_filter:
-                    show_row = False
-            
-            # School type filter
-            if type_filter != 'All':
-                type_item = self.school_table.item(row, 2)
-                if type_item and type_item.text() != type_filter:
-                    show_row = False
-            
-            # City filter
-            if city_filter != 'All':
-                city_item = self.school_table.item(row, 3)
-                if city_item and city_item.text() != city_filter:
-                    show_row = False
-            
-            self.school_table.setRowHidden(row, not show_row)
+        """Reload the table with only the schools matching the filters"""
+        self.search_controller.restart()
             
     def get_selected_school(self):
         """Get the currently selected school"""
-        selected_items = self.school_table.selectedItems()
-        if selected_items:
-            row = selected_items[0].row()
-            return MOCK_SCHOOLS[row] if row < len(MOCK_SCHOOLS) else None
-        return None
+        return selected_record(self.school_table)
         
     def view_details(self):
         """View details of selected school"""
@@ -483,13 +326,22 @@ class SchoolListTab(QWidget):
     def apply_bulk_operation(self):
         """Apply bulk operation"""
         operation = self.bulk_action.currentText()
+        school_ids = selected_ids(self.school_table)
+        if not school_ids:
+            QMessageBox.warning(self, "No Selection", 
+                              "Please select one or more schools first")
+            return
         
         if operation == "Update Contract Status":
             status, ok = QInputDialog.getItem(self, "Update Contract Status", 
                                             "Select new status:", CONTRACT_STATUSES, 0, False)
             if ok and status:
-                QMessageBox.information(self, "Bulk Update", 
-                                      f"Updated contract status to {status} for selected schools (demo mode)")
+                task = submit(set_contract_status, school_ids, status)
+                task.finished.connect(lambda _result: QMessageBox.information(
+                    self, "Bulk Update",
+                    f"Updated contract status to {status} for {len(school_ids)} schools"))
+                task.failed.connect(lambda error: QMessageBox.warning(
+                    self, "Bulk Update", f"{error}\n\nNo contract statuses were changed."))
         elif operation == "Generate Invoices":
             month, ok = QInputDialog.getItem(self, "Generate Invoices", 
                                            "Select month:", ["January", "February", "March", "April", 
@@ -497,10 +349,10 @@ class SchoolListTab(QWidget):
                                                            "September", "October", "November", "December"], 0, False)
             if ok and month:
                 QMessageBox.information(self, "Invoice Generation", 
-                                      f"Invoices generated for {month} (demo mode)")
+                                      f"Invoices for {len(school_ids)} schools generated for {month} (demo mode)")
         else:
             QMessageBox.information(self, "Bulk Operation", 
-                                  f"{operation} applied to selected schools (demo mode)")
+                                  f"{operation} applied to {len(school_ids)} selected schools (demo mode)")
         
     def export_to_excel(self):
         """Export to Excel"""
@@ -886,8 +738,18 @@ class SchoolBusAssignmentTab(QWidget):
     def __init__(self):
         super().__init__()
         self.current_school = None
+        self.available_buses = []
+        self.assigned_buses = []
+        self.available_task = None
+        self.assigned_task = None
+        # Bitmaps of the available buses by type, capacity and status
+        self.available_index = BitmapIndex(["type", "capacity", "status"])
         self.init_ui()
         self.load_available_buses()
+        notifier().changed.connect(self.on_data_changed)
+        # Timetables for the week ahead; a new day is added after midnight
+        notifier().day_changed.connect(lambda: submit(ensure_horizon))
+        submit(ensure_horizon)
         
     def init_ui(self):
         """Initialize the UI"""
@@ -982,7 +844,8 @@ class SchoolBusAssignmentTab(QWidget):
         
         self.search_available = QLineEdit()
         self.search_available.setPlaceholderText("Search bus number...")
-        self.search_available.textChanged.connect(self.filter_available_buses)
+        self.available_search = SearchController(self.search_available,
+                                                 self.search_available_buses)
         self.search_available.setFixedWidth(180)
         filter_layout.addWidget(self.search_available)
         
@@ -1112,12 +975,13 @@ class SchoolBusAssignmentTab(QWidget):
         layout.addWidget(bulk_label)
         
         self.bulk_action = QComboBox()
-        self.bulk_action.addItems(["Assign Multiple Buses", "Transfer All", "Generate Assignment Report", "Optimize Assignments"])
+        self.bulk_action.addItems(["Assign Multiple Buses", "Transfer All", "Generate Assignment Report",
+                                   "Optimize Assignments", "Plan Routes"])
         layout.addWidget(self.bulk_action)
         
-        bulk_apply_btn = QPushButton("Apply")
-        bulk_apply_btn.clicked.connect(self.apply_bulk_operation)
-        layout.addWidget(bulk_apply_btn)
+        self.bulk_apply_btn = QPushButton("Apply")
+        self.bulk_apply_btn.clicked.connect(self.apply_bulk_operation)
+        layout.addWidget(self.bulk_apply_btn)
         
         layout.addStretch()
         
@@ -1145,69 +1009,97 @@ class SchoolBusAssignmentTab(QWidget):
         self.required_buses_label.setText(str(buses_required))
         
         # Load assigned buses for this school
-        self.load_assigned_buses(school_data.get('assigned_buses', []))
+        self.load_assigned_buses()
         
         # Update status
         self.status_label.setText(f"Loaded school: {school_data['name']}")
         
     def load_available_buses(self):
+        """Query the available buses in the background"""
+        if self.available_task:
+            self.available_task.cancel()
+        self.available_task = submit(fetch_assignable_buses)
+        self.available_task.finished.connect(self.show_available_buses)
+        self.available_task.failed.connect(lambda error: QMessageBox.warning(
+            self, "Error", f"Could not load the available buses:\n{error}"))
+        
+    def show_available_buses(self, buses):
         """Load available buses into the table"""
-        # Mock data for available buses
-        available_buses = [
-            {"number": "BUS-001", "type": "AC", "capacity": 40, "driver": "Rajesh Kumar", "status": "Available"},
-            {"number": "BUS-002", "type": "Non-AC", "capacity": 30, "driver": "Suresh Singh", "status": "Available"},
-            {"number": "BUS-003", "type": "AC", "capacity": 40, "driver": "Amit Sharma", "status": "Available"},
-            {"number": "BUS-004", "type": "Mini", "capacity": 20, "driver": "Vikram Patel", "status": "Maintenance"},
-            {"number": "BUS-005", "type": "Standard", "capacity": 30, "driver": "Manoj Yadav", "status": "Available"},
-            {"number": "BUS-006", "type": "Non-AC", "capacity": 30, "driver": "Prakash Singh", "status": "Assigned"},
-            {"number": "BUS-007", "type": "AC", "capacity": 40, "driver": "Ravi Kumar", "status": "Available"},
-            {"number": "BUS-008", "type": "Mini", "capacity": 20, "driver": "Dinesh Gupta", "status": "Available"},
-            {"number": "BUS-009", "type": "Standard", "capacity": 30, "driver": "Sanjay Mishra", "status": "Available"},
-            {"number": "BUS-010", "type": "AC", "capacity": 40, "driver": "Sunil Verma", "status": "Maintenance"},
-        ]
+        self.available_task = None
+        self.available_buses = buses
         
-        self.available_table.setRowCount(len(available_buses))
+        self.available_table.setRowCount(len(self.available_buses))
+        self.available_index.clear()
         
-        for row, bus in enumerate(available_buses):
-            self.available_table.setItem(row, 0, QTableWidgetItem(bus["number"]))
-            self.available_table.setItem(row, 1, QTableWidgetItem(bus["type"]))
-            self.available_table.setItem(row, 2, QTableWidgetItem(str(bus["capacity"])))
-            self.available_table.setItem(row, 3, QTableWidgetItem(bus["driver"]))
+        for row, bus in enumerate(self.available_buses):
+            self.set_available_row(row, bus)
+        self.available_index.add_many((bus['id'], bus) for bus in self.available_buses)
+        self.filter_available_buses()
             
-            status_item = QTableWidgetItem(bus["status"])
-            if bus["status"] == "Available":
-                status_item.setBackground(QColor(220, 255, 220))
-                status_item.setForeground(QColor(0, 100, 0))
-            elif bus["status"] == "Maintenance":
-                status_item.setBackground(QColor(255, 220, 220))
-                status_item.setForeground(QColor(139, 0, 0))
-            elif bus["status"] == "Assigned":
-                status_item.setBackground(QColor(255, 255, 200))
-                status_item.setForeground(QColor(153, 102, 0))
-            status_item.setTextAlignment(Qt.AlignCenter)
-            self.available_table.setItem(row, 4, status_item)
+    def on_data_changed(self, entity, entity_id, operation):
+        """Patch the bus and assignment tables after a change elsewhere"""
+        if entity == 'bus':
+            task = submit(fetch_assignable_buses, bus_id=entity_id)
+            task.finished.connect(lambda rows: self.patch_available_bus(entity_id, rows))
+        elif entity == 'school' and self.current_school and entity_id == self.current_school['id']:
+            self.load_assigned_buses()
             
-    def load_assigned_buses(self, assigned_buses):
+    def patch_available_bus(self, bus_id, rows):
+        """Update, add or remove one bus's row in the available table"""
+        row = next((i for i, b in enumerate(self.available_buses) if b['id'] == bus_id), None)
+        if not rows:
+            if row is not None:
+                del self.available_buses[row]
+                self.available_table.removeRow(row)
+            self.available_index.remove(bus_id)
+        elif row is None:
+            self.available_buses.append(rows[0])
+            self.available_table.insertRow(len(self.available_buses) - 1)
+            self.set_available_row(len(self.available_buses) - 1, rows[0])
+            self.available_index.add(bus_id, rows[0])
+        else:
+            self.available_buses[row] = rows[0]
+            self.set_available_row(row, rows[0])
+            self.available_index.add(bus_id, rows[0])
+        self.filter_available_buses()
+            
+    def set_available_row(self, row, bus):
+        """Fill one row of the available buses table"""
+        self.available_table.setItem(row, 0, QTableWidgetItem(bus["number"]))
+        self.available_table.setItem(row, 1, QTableWidgetItem(bus["type"]))
+        self.available_table.setItem(row, 2, QTableWidgetItem(str(bus["capacity"])))
+        self.available_table.setItem(row, 3, QTableWidgetItem(bus["driver"]))
+        
+        status_item = QTableWidgetItem(bus["status"])
+        if bus["status"] == "Available":
+            status_item.setBackground(QColor(220, 255, 220))
+            status_item.setForeground(QColor(0, 100, 0))
+        elif bus["status"] == "Maintenance":
+            status_item.setBackground(QColor(255, 220, 220))
+            status_item.setForeground(QColor(139, 0, 0))
+        elif bus["status"] == "Assigned":
+            status_item.setBackground(QColor(255, 255, 200))
+            status_item.setForeground(QColor(153, 102, 0))
+        status_item.setTextAlignment(Qt.AlignCenter)
+        self.available_table.setItem(row, 4, status_item)
+        
+    def load_assigned_buses(self):
+        """Query the current school's buses in the background, dropping any older query"""
+        if self.assigned_task:
+            self.assigned_task.cancel()
+        self.assigned_task = submit(fetch_school_assignments, self.current_school['id'])
+        self.assigned_task.finished.connect(self.show_assigned_buses)
+        self.assigned_task.failed.connect(lambda error: QMessageBox.warning(
+            self, "Error", f"Could not load the assigned buses:\n{error}"))
+        
+    def show_assigned_buses(self, buses):
         """Load assigned buses for current school"""
-        # Mock data for assigned buses
-        mock_assignments = []
-        for bus_number in assigned_buses:
-            # Find bus details from available buses
-            for row in range(self.available_table.rowCount()):
-                if self.available_table.item(row, 0).text() == bus_number:
-                    mock_assignments.append({
-                        "number": bus_number,
-                        "type": self.available_table.item(row, 1).text(),
-                        "capacity": self.available_table.item(row, 2).text(),
-                        "driver": self.available_table.item(row, 3).text(),
-                        "assigned_date": datetime.datetime.now().strftime("%Y-%m-%d"),
-                        "status": "Active"
-                    })
-                    break
-        
-        self.assigned_table.setRowCount(len(mock_assignments))
-        
-        for row, bus in enumerate(mock_assignments):
+        self.assigned_task = None
+        self.assigned_buses = buses
+        
+        self.assigned_table.setRowCount(len(self.assigned_buses))
+        
+        for row, bus in enumerate(self.assigned_buses):
             self.assigned_table.setItem(row, 0, QTableWidgetItem(bus["number"]))
             self.assigned_table.setItem(row, 1, QTableWidgetItem(bus["type"]))
             self.assigned_table.setItem(row, 2, QTableWidgetItem(str(bus["capacity"])))
@@ -1221,7 +1113,7 @@ class SchoolBusAssignmentTab(QWidget):
             self.assigned_table.setItem(row, 5, status_item)
         
         # Update total assigned count
-        self.total_assigned_label.setText(str(len(mock_assignments)))
+        self.total_assigned_label.setText(str(len(self.assigned_buses)))
         
         # Load history
         self.load_assignment_history()
@@ -1254,43 +1146,39 @@ class SchoolBusAssignmentTab(QWidget):
             self.history_table.setItem(row, 4, QTableWidgetItem(record["notes"]))
             
     def filter_available_buses(self):
+        """Filter every available bus again after a filter or the table changes"""
+        self.available_search.restart()
+        
+    def search_available_buses(self, text, narrow):
         """Filter available buses based on search and filters"""
-        search_text = self.search_available.text().lower()
+        rows = range(self.available_table.rowCount())
+        if narrow:
+            # Rows hidden by the shorter search text stay hidden
+            rows = [row for row in rows if not self.available_table.isRowHidden(row)]
+        
+        search_text = text.lower()
         bus_type = self.bus_type_filter.currentText()
         capacity = self.capacity_filter.currentText()
         
-        for row in range(self.available_table.rowCount()):
-            show_row = True
+        # Type, capacity and status are combined as bitmaps; only the
+        # search text is checked bus by bus
+        criteria = {'status': "Available"}
+        if bus_type != "All Types":
+            criteria['type'] = bus_type
+        if capacity in CAPACITY_FILTERS:
+            criteria['capacity'] = self.available_index.values_where(
+                'capacity', CAPACITY_FILTERS[capacity]
+            )
+        matching = self.available_index.match(**criteria)
+        
+        for row in rows:
+            bus = self.available_buses[row]
+            show_row = has(matching, bus['id'])
             
             # Search filter
-            if search_text:
-                bus_number = self.available_table.item(row, 0).text().lower()
-                driver = self.available_table.item(row, 3).text().lower()
-                if search_text not in bus_number and search_text not in driver:
-                    show_row = False
-            
-            # Type filter
-            if bus_type != "All Types":
-                row_type = self.available_table.item(row, 1).text()
-                if row_type != bus_type:
-                    show_row = False
-            
-            # Capacity filter
-            if capacity != "All Capacities":
-                row_capacity = int(self.available_table.item(row, 2).text())
-                if capacity == "12 Seater" and row_capacity != 12:
-                    show_row = False
-                elif capacity == "20 Seater" and row_capacity != 20:
+            if show_row and search_text:
+                if search_text not in bus['number'].lower() and search_text not in bus['driver'].lower():
                     show_row = False
-                elif capacity == "30 Seater" and row_capacity != 30:
-                    show_row = False
-                elif capacity == "40+ Seater" and row_capacity < 40:
-                    show_row = False
-            
-            # Only show available buses
-            status = self.available_table.item(row, 4).text()
-            if status != "Available":
-                show_row = False
                 
             self.available_table.setRowHidden(row, not show_row)
             
@@ -1306,54 +1194,33 @@ class SchoolBusAssignmentTab(QWidget):
             return
             
         row = selected_items[0].row()
-        bus_number = self.available_table.item(row, 0).text()
-        bus_type = self.available_table.item(row, 1).text()
-        bus_capacity = self.available_table.item(row, 2).text()
-        bus_driver = self.available_table.item(row, 3).text()
+        bus = self.available_buses[row]
+        bus_number = bus['number']
+        school_id = self.current_school['id']
         
         # Check if already assigned
-        for assigned_row in range(self.assigned_table.rowCount()):
-            if self.assigned_table.item(assigned_row, 0).text() == bus_number:
-                QMessageBox.warning(self, "Already Assigned", 
-                                  f"Bus {bus_number} is already assigned to this school")
-                return
+        if ASSIGNMENTS.is_assigned(bus['id'], school_id):
+            QMessageBox.warning(self, "Already Assigned", 
+                              f"Bus {bus_number} is already assigned to this school")
+            return
                 
-        # Check conflict
-        conflict = self.check_bus_conflict(bus_number)
+        # Check conflict; only the schools whose runs overlap give the bus up
+        conflict = self.check_bus_conflict(bus['id'])
         if conflict:
             reply = QMessageBox.question(self, "Conflict Detected", 
-                                       f"Bus {bus_number} is currently assigned to another school. "
+                                       f"Bus {bus_number} is already booked for the {conflict}. "
                                        "Do you want to transfer it?",
                                        QMessageBox.Yes | QMessageBox.No)
             if reply != QMessageBox.Yes:
                 return
         
-        # Add to assigned table
-        current_row = self.assigned_table.rowCount()
-        self.assigned_table.insertRow(current_row)
-        
-        self.assigned_table.setItem(current_row, 0, QTableWidgetItem(bus_number))
-        self.assigned_table.setItem(current_row, 1, QTableWidgetItem(bus_type))
-        self.assigned_table.setItem(current_row, 2, QTableWidgetItem(bus_capacity))
-        self.assigned_table.setItem(current_row, 3, QTableWidgetItem(bus_driver))
-        self.assigned_table.setItem(current_row, 4, QTableWidgetItem(datetime.datetime.now().strftime("%Y-%m-%d")))
-        
-        status_item = QTableWidgetItem("Active")
-        status_item.setBackground(QColor(220, 255, 220))
-        status_item.setForeground(QColor(0, 100, 0))
-        status_item.setTextAlignment(Qt.AlignCenter)
-        self.assigned_table.setItem(current_row, 5, status_item)
-        
-        # Update bus status in available table
-        status_item = QTableWidgetItem("Assigned")
-        status_item.setBackground(QColor(255, 255, 200))
-        status_item.setForeground(QColor(153, 102, 0))
-        status_item.setTextAlignment(Qt.AlignCenter)
-        self.available_table.setItem(row, 4, status_item)
-        
-        # Update counts
-        self.total_assigned_label.setText(str(self.assigned_table.rowCount()))
+        task = submit(assign_bus_to_school, school_id, bus_number, transfer=bool(conflict),
+                      from_schools=self.conflicting_schools(bus['id']))
+        task.finished.connect(lambda _assignment_id: self.on_bus_assigned(bus_number))
+        task.failed.connect(lambda error: QMessageBox.warning(self, "Assignment Failed", error))
         
+    def on_bus_assigned(self, bus_number):
+        """Record and confirm an assignment; the tables are patched by on_data_changed"""
         # Add to history
         self.add_to_history(bus_number, "Assigned", "Manual assignment")
         
@@ -1392,53 +1259,50 @@ class SchoolBusAssignmentTab(QWidget):
                                    QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            # Remove from assigned table
-            self.assigned_table.removeRow(row)
-            
-            # Update bus status in available table
-            for avail_row in range(self.available_table.rowCount()):
-                if self.available_table.item(avail_row, 0).text() == bus_number:
-                    status_item = QTableWidgetItem("Available")
-                    status_item.setBackground(QColor(220, 255, 220))
-                    status_item.setForeground(QColor(0, 100, 0))
-                    status_item.setTextAlignment(Qt.AlignCenter)
-                    self.available_table.setItem(avail_row, 4, status_item)
-                    break
-            
-            # Update counts
-            self.total_assigned_label.setText(str(self.assigned_table.rowCount()))
+            task = submit(remove_bus_from_school, self.current_school['id'], bus_number)
+            task.finished.connect(lambda _result: self.on_bus_removed(bus_number))
+            task.failed.connect(lambda error: QMessageBox.warning(self, "Removal Failed", error))
             
-            # Add to history
-            self.add_to_history(bus_number, "Removed", "Assignment removed")
-            
-            QMessageBox.information(self, "Success", f"Bus {bus_number} removed from assignment")
+    def on_bus_removed(self, bus_number):
+        # Add to history
+        self.add_to_history(bus_number, "Removed", "Assignment removed")
+        
+        QMessageBox.information(self, "Success", f"Bus {bus_number} removed from assignment")
             
-    def check_bus_conflict(self, bus_number):
-        """Check if bus is already assigned to another school"""
-        # In a real app, this would query the database
-        # Mock conflict detection
-        conflict_buses = ["BUS-003", "BUS-006"]  # Example buses already assigned elsewhere
-        return bus_number in conflict_buses
+    def check_bus_conflict(self, bus_id):
+        """Describe the runs that would overlap the current school's, or ''"""
+        if not self.current_school:
+            return ""
+        overlapping = SCHEDULE.overlapping(bus_id, self.current_school)
+        return ", ".join(describe(run) for run in sorted({run for _proposed, run in overlapping}))
+        
+    def conflicting_schools(self, bus_id):
+        """Ids of the schools whose runs overlap the current school's"""
+        overlapping = SCHEDULE.overlapping(bus_id, self.current_school)
+        return {run.school_id for _proposed, run in overlapping}
         
     def check_conflicts(self):
-        """Check for assignment conflicts"""
+        """Check the whole fleet for buses booked into overlapping runs"""
         conflicts = []
+        conflict_buses = set()
+        school_id = self.current_school['id'] if self.current_school else None
         
-        # Check each assigned bus for conflicts
-        for row in range(self.assigned_table.rowCount()):
-            bus_number = self.assigned_table.item(row, 0).text()
-            if self.check_bus_conflict(bus_number):
-                conflicts.append(bus_number)
+        for conflict in SCHEDULE.find_conflicts():
+            conflicts.append(f"{conflict.bus_number}: {describe(conflict.first)} "
+                             f"overlaps {describe(conflict.second)}")
+            if school_id in (conflict.first.school_id, conflict.second.school_id):
+                conflict_buses.add(conflict.bus_id)
+        conflict_rows = [row for row, bus in enumerate(self.assigned_buses)
+                         if bus['bus_id'] in conflict_buses]
         
         if conflicts:
-            conflict_list = ", ".join(conflicts)
+            conflict_list = "\n".join(conflicts)
             QMessageBox.warning(self, "Conflicts Detected", 
-                              f"The following buses have scheduling conflicts: {conflict_list}")
+                              f"The following buses have scheduling conflicts:\n\n{conflict_list}")
             
             # Highlight conflicting rows
             for row in range(self.assigned_table.rowCount()):
-                bus_number = self.assigned_table.item(row, 0).text()
-                if bus_number in conflicts:
+                if row in conflict_rows:
                     for col in range(self.assigned_table.columnCount()):
                         item = self.assigned_table.item(row, col)
                         if item:
@@ -1471,18 +1335,24 @@ class SchoolBusAssignmentTab(QWidget):
         if not selected_items:
             return
             
-        row = selected_items[0].row()
-        bus_number = self.assigned_table.item(row, 0).text()
+        bus = self.assigned_buses[selected_items[0].row()]
+        BusScheduleDialog(bus['bus_id'], bus['number'], self).exec_()
+        
+    def plan_routes(self):
+        """Plan the pickup routes of every school's buses"""
+        self.status_label.setText("Planning routes...")
+        task = submit(build_routes)
+        task.finished.connect(self.on_routes_planned)
+        task.failed.connect(lambda error: QMessageBox.warning(self, "Plan Routes", error))
+        
+    def on_routes_planned(self, result):
+        count, unserved = result
+        message = f"Planned {count} routes."
+        if unserved:
+            message += f"\n\n{len(unserved)} stops could not be given a bus; assign more buses and plan again."
+        QMessageBox.information(self, "Plan Routes", message)
+        self.status_label.setText(f"Routes planned at {datetime.datetime.now().strftime('%H:%M:%S')}")
         
-        QMessageBox.information(self, "Bus Schedule", 
-                              f"Schedule for bus {bus_number} would be displayed here.\n\n"
-                              "This is a demo - the full schedule view would include:\n"
-                              "• Morning pickup times\n"
-                              "• Afternoon drop times\n"
-                              "• Route details\n"
-                              "• Driver duty hours\n"
-                              "• Maintenance schedule")
-                              
     def on_assigned_selection_changed(self):
         """Enable/disable buttons based on selection"""
         has_selection = len(self.assigned_table.selectedItems()) > 0
@@ -1538,14 +1408,48 @@ class SchoolBusAssignmentTab(QWidget):
                                       "All buses transferred (demo mode)")
         elif operation == "Generate Assignment Report":
             self.generate_assignment_report()
+        elif operation == "Plan Routes":
+            self.plan_routes()
         elif operation == "Optimize Assignments":
+            self.status_label.setText("Planning assignments...")
+            task = submit(propose_plan)
+            task.finished.connect(self.review_assignment_plan)
+            task.failed.connect(lambda error: QMessageBox.warning(self, "Optimize Assignments", error))
+            
+    def review_assignment_plan(self, plan):
+        """Show the proposed plan and apply it if the operator accepts"""
+        if not plan:
+            self.status_label.setText("Ready")
             QMessageBox.information(self, "Optimize Assignments", 
-                                  "Assignment optimization would:\n"
-                                  "• Balance bus loads\n"
-                                  "• Minimize travel time\n"
-                                  "• Reduce fuel costs\n"
-                                  "• Suggest optimal routes")
-                                  
+                                  "No free buses can be assigned to schools that still need seats")
+            return
+            
+        dialog = AssignmentPlanDialog(plan, self)
+        if dialog.exec_() != QDialog.Accepted:
+            self.status_label.setText("Assignment plan discarded")
+            return
+            
+        # Writing the plan can wait on other writers; keep it off the GUI thread
+        self.status_label.setText("Applying assignment plan...")
+        self.bulk_apply_btn.setEnabled(False)
+        task = submit(apply_plan, plan)
+        task.finished.connect(lambda _: self.on_plan_applied(plan))
+        task.failed.connect(self.on_plan_failed)
+        
+    def on_plan_applied(self, plan):
+        self.bulk_apply_btn.setEnabled(True)
+        for assignment in plan.assignments:
+            if self.current_school and assignment['school_id'] == self.current_school['id']:
+                self.add_to_history(assignment['bus_number'], "Assigned", "Optimized assignment")
+        self.status_label.setText(f"{len(plan)} buses assigned at {datetime.datetime.now().strftime('%H:%M:%S')}")
+        
+    def on_plan_failed(self, error):
+        self.bulk_apply_btn.setEnabled(True)
+        self.status_label.setText("Assignment plan not applied")
+        QMessageBox.warning(self, "Optimize Assignments", 
+                          f"{error}\n\nNo assignments were made. Please optimize again.")
+        
+
     def generate_assignment_report(self):
         """Generate assignment report"""
         QMessageBox.information(self, "Generate Report", 
@@ -1557,4 +1461,146 @@ class SchoolBusAssignmentTab(QWidget):
                               "• Assignment History\n"
                               "• Driver Details\n\n"
                               "Report saved as PDF (demo mode)")
-        self.status_label.setText("Report generated at " + datetime.datetime.now().strftime("%H:%M:%S"))
\ No newline at end of file
+        self.status_label.setText("Report generated at " + datetime.datetime.now().strftime("%H:%M:%S"))
+
+
+class AssignmentPlanDialog(QDialog):
+    """Review an optimized assignment plan before applying it"""
+    
+    def __init__(self, plan, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Optimized Assignment Plan")
+        self.resize(700, 500)
+        layout = QVBoxLayout()
+        
+        summary = QLabel(f"{len(plan)} buses for {sum(1 for s in plan.schools if s['buses'])} schools, "
+                         f"{plan.empty_seats} empty seats, {plan.short} seats still short")
+        summary.setFont(QFont("Arial", 10, QFont.Bold))
+        layout.addWidget(summary)
+        
+        schools_table = QTableWidget(len(plan.schools), 6)
+        schools_table.setHorizontalHeaderLabels(
+            ["School", "Students", "Assigned Seats", "Planned Buses", "Empty Seats", "Short"]
+        )
+        for row, school in enumerate(plan.schools):
+            values = [school['name'], school['students'], school['assigned_seats'],
+                      school['buses'], school['empty_seats'], school['short']]
+            for col, value in enumerate(values):
+                schools_table.setItem(row, col, QTableWidgetItem(str(value)))
+            if school['short']:
+                schools_table.item(row, 5).setBackground(QColor(255, 220, 220))
+        schools_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        schools_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(schools_table)
+        
+        plan_table = QTableWidget(len(plan), 4)
+        plan_table.setHorizontalHeaderLabels(["School", "Bus Number", "Type", "Capacity"])
+        for row, assignment in enumerate(plan.assignments):
+            values = [assignment['school_name'], assignment['bus_number'],
+                      assignment['bus_type'], assignment['capacity']]
+            for col, value in enumerate(values):
+                plan_table.setItem(row, col, QTableWidgetItem(str(value)))
+        plan_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        plan_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(plan_table)
+        
+        button_layout = QHBoxLayout()
+        apply_btn = QPushButton("Apply Plan")
+        apply_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.reject)
+        
+        button_layout.addStretch()
+        button_layout.addWidget(apply_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+
+
+class BusScheduleDialog(QDialog):
+    """A bus's timetable for one day of the planning horizon"""
+    
+    KIND_COLORS = {
+        "Duty": QColor(230, 240, 255),
+        "Pickup run": QColor(220, 255, 220),
+        "Drop run": QColor(255, 245, 210),
+        "Maintenance": QColor(255, 220, 220),
+    }
+    
+    def __init__(self, bus_id, bus_number, parent=None):
+        super().__init__(parent)
+        self.bus_id = bus_id
+        self.task = None
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"Schedule - {bus_number}")
+        self.resize(650, 500)
+        layout = QVBoxLayout()
+        
+        day_layout = QHBoxLayout()
+        day_layout.addWidget(QLabel("Day:"))
+        self.day_edit = QDateEdit()
+        self.day_edit.setCalendarPopup(True)
+        today = QDate.currentDate()
+        self.day_edit.setDateRange(today, today.addDays(HORIZON_DAYS - 1))
+        self.day_edit.setDate(today)
+        self.day_edit.dateChanged.connect(self.load_day)
+        day_layout.addWidget(self.day_edit)
+        day_layout.addStretch()
+        layout.addLayout(day_layout)
+        
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["From", "To", "Activity"])
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+        
+        self.empty_label = QLabel("Nothing is scheduled for this bus on this day.")
+        self.empty_label.setVisible(False)
+        layout.addWidget(self.empty_label)
+        
+        button_layout = QHBoxLayout()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+        notifier().changed.connect(self.on_data_changed)
+        self.load_day()
+        
+    def done(self, result):
+        # The notifier outlives the dialog; stop it calling back into a closed one
+        notifier().changed.disconnect(self.on_data_changed)
+        if self.task is not None:
+            self.task.cancel()
+        super().done(result)
+        
+    def on_data_changed(self, entity, entity_id, operation):
+        if entity == 'timetable' and entity_id == self.bus_id:
+            self.load_day()
+            
+    def load_day(self):
+        """Read the timetable of the selected day"""
+        if self.task is not None:
+            self.task.cancel()
+        self.task = submit(fetch_timetable, self.bus_id, self.day_edit.date().toPyDate())
+        self.task.finished.connect(self.show_entries)
+        
+    def show_entries(self, entries):
+        self.table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            activity = entry['description']
+            if entry['kind'] == "Stop":
+                activity = "    " + activity
+            values = [entry['start_time'], entry['end_time'], activity]
+            color = self.KIND_COLORS.get(entry['kind'])
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if color is not None:
+                    item.setBackground(color)
+                self.table.setItem(row, col, item)
+        self.table.setVisible(bool(entries))
+        self.empty_label.setVisible(not entries)
@@ -0,0 +1,77 @@
+"""
+Search-as-you-type for list tabs and pickers.
+
+SearchController watches a QLineEdit and runs the search once typing has
+paused for `delay_ms`, rather than on every keystroke:
+
+    self.search = SearchController(self.search_input, self.search_drivers)
+
+    def search_drivers(self, text, narrow):
+        if narrow:
+            self.driver_model.narrow(**self.current_filters())
+        else:
+            self.driver_model.set_filters(**self.current_filters())
+
+`narrow` is True when the text extends the text of the previous search
+(e.g. "rav" -> "ravi"). Both the FTS prefix queries and substring
+filters can then only match a subset of the previous result, so only
+those rows need to be checked again.
+
+If the search function returns a Task, it is cancelled as soon as a
+newer search starts, so a slow query never overwrites a newer one.
+"""
+from PyQt5.QtCore import QObject, QTimer
+
+SEARCH_DELAY_MS = 250
+
+
+def extends(previous, text):
+    """Return True if `text` can only match a subset of what `previous` matched"""
+    previous = previous.strip().lower()
+    return bool(previous) and text.lower().startswith(previous)
+
+
+class SearchController(QObject):
+    """Debounces a search box and narrows or restarts the search"""
+
+    def __init__(self, line_edit, search, delay_ms=SEARCH_DELAY_MS, parent=None):
+        super().__init__(parent or line_edit)
+        self.line_edit = line_edit
+        self.search = search
+        # Text of the last search that ran, None before the first one
+        self.last_text = None
+        self._task = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.search_now)
+
+        line_edit.textChanged.connect(self._on_text_changed)
+        line_edit.returnPressed.connect(self.search_now)
+
+    def set_delay(self, delay_ms):
+        self._timer.setInterval(delay_ms)
+
+    def _on_text_changed(self, _text):
+        # Restarting the timer drops the search for the previous keystroke
+        self._timer.start()
+
+    def search_now(self):
+        """Run the search for the current text without waiting"""
+        text = self.line_edit.text()
+        if text == self.last_text:
+            self._timer.stop()
+            return
+        self._run(text, self.last_text is not None and extends(self.last_text, text))
+
+    def restart(self):
+        """Run a full search now (call when the other filters change)"""
+        self._run(self.line_edit.text(), False)
+
+    def _run(self, text, narrow):
+        self._timer.stop()
+        self.last_text = text
+        if self._task is not None:
+            self._task.cancel()
+        self._task = self.search(text, narrow)
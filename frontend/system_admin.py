@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
-    QTableWidget, QTableWidgetItem, QLineEdit, QComboBox, QGroupBox,
+    QTableView, QLineEdit, QComboBox, QGroupBox,
     QFormLayout, QMessageBox, QTabWidget, QCheckBox, QDialog, QDialogButtonBox,
     QDateEdit, QTextEdit, QTreeWidget, QTreeWidgetItem, QHeaderView,
     QInputDialog, QSplitter, QScrollArea, QToolBar, QAction, QMenu, QGridLayout
@@ -9,6 +9,51 @@ from PyQt5.QtGui import QFont, QIcon, QColor, QBrush
 from PyQt5.QtCore import Qt, QDate, QSize, pyqtSignal  # ← QSize is here!
 import datetime
 
+from models.users import fetch_users, fetch_activity_logs
+from table_models import Column, RecordTableModel
+from delegates import ActionButtonDelegate
+from search_controller import SearchController
+
+USER_STATUS_COLORS = {
+    "Active": (None, QColor("#4CAF50")),
+    "Inactive": (None, QColor("#FF9800")),
+    "Locked": (None, QColor("#F44336")),
+}
+ADMIN_COLORS = (None, QColor("#2196F3"))
+ADMIN_FONT = QFont("Segoe UI", 9, QFont.Bold)
+
+ACTION_COLORS = {
+    "Login": (None, QColor("#4CAF50")),
+    "Logout": (None, QColor("#FF9800")),
+    "Create": (None, QColor("#2196F3")),
+    "Delete": (None, QColor("#F44336")),
+}
+
+# The Actions column is painted with these buttons by ActionButtonDelegate
+USER_ACTIONS = ["Edit", "Reset PW", "Toggle"]
+
+USER_COLUMNS = [
+    Column("ID", 'id'),
+    Column("Username", 'username'),
+    Column("Full Name", 'full_name'),
+    Column("Email", 'email'),
+    Column("Role", 'role',
+           colors=lambda u: ADMIN_COLORS if u['role'] == "Admin" else None,
+           font=lambda u: ADMIN_FONT if u['role'] == "Admin" else None),
+    Column("Status", 'status', colors=lambda u: USER_STATUS_COLORS.get(u['status'])),
+    Column("Last Login", 'last_login'),
+    Column("Actions", lambda u: ""),
+]
+
+ACTIVITY_COLUMNS = [
+    Column("Timestamp", 'timestamp'),
+    Column("User", 'username'),
+    Column("IP Address", 'ip_address'),
+    Column("Action", 'action', colors=lambda log: ACTION_COLORS.get(log['action'])),
+    Column("Module", 'module'),
+    Column("Details", 'details'),
+]
+
 class UserManagement(QWidget):
     """
     7.1 User Management Module
@@ -96,25 +141,30 @@ class UserManagement(QWidget):
         filter_widget = QWidget()
         filter_layout = QHBoxLayout(filter_widget)
         
-        search_input = QLineEdit()
-        search_input.setPlaceholderText("Search users by name, email, or role...")
-        search_input.setFixedWidth(300)
+        self.user_search_input = QLineEdit()
+        self.user_search_input.setPlaceholderText("Search users by name, email, or role...")
+        self.user_search_input.setFixedWidth(300)
+        self.user_search = SearchController(self.user_search_input, self.search_users)
         
-        role_combo = QComboBox()
-        role_combo.addItems(["All Roles", "Admin", "Manager", "Accountant", "Driver", "Viewer"])
+        self.role_combo = QComboBox()
+        self.role_combo.addItems(["All Roles", "Admin", "Manager", "Accountant", "Driver", "Viewer"])
+        self.role_combo.currentTextChanged.connect(self.user_search.restart)
         
-        status_combo = QComboBox()
-        status_combo.addItems(["All Status", "Active", "Inactive", "Locked"])
+        self.user_status_combo = QComboBox()
+        self.user_status_combo.addItems(["All Status", "Active", "Inactive", "Locked"])
+        self.user_status_combo.currentTextChanged.connect(self.user_search.restart)
         
         search_btn = QPushButton("Search")
+        search_btn.clicked.connect(self.user_search.search_now)
         clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear_user_filters)
         
         filter_layout.addWidget(QLabel("Search:"))
-        filter_layout.addWidget(search_input)
+        filter_layout.addWidget(self.user_search_input)
         filter_layout.addWidget(QLabel("Role:"))
-        filter_layout.addWidget(role_combo)
+        filter_layout.addWidget(self.role_combo)
         filter_layout.addWidget(QLabel("Status:"))
-        filter_layout.addWidget(status_combo)
+        filter_layout.addWidget(self.user_status_combo)
         filter_layout.addWidget(search_btn)
         filter_layout.addWidget(clear_btn)
         filter_layout.addStretch()
@@ -122,11 +172,14 @@ class UserManagement(QWidget):
         layout.addWidget(filter_widget)
         
         # Users table
-        self.users_table = QTableWidget()
-        self.users_table.setColumnCount(8)
-        self.users_table.setHorizontalHeaderLabels([
-            "ID", "Username", "Full Name", "Email", "Role", "Status", "Last Login", "Actions"
-        ])
+        self.users_model = RecordTableModel(USER_COLUMNS, fetch_users)
+        self.users_table = QTableView()
+        self.users_table.setModel(self.users_model)
+        self.users_table.setEditTriggers(QTableView.NoEditTriggers)
+        
+        actions = ActionButtonDelegate(USER_ACTIONS, self.users_table)
+        actions.clicked.connect(self.on_user_action)
+        self.users_table.setItemDelegateForColumn(7, actions)
         
         header = self.users_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
@@ -139,7 +192,7 @@ class UserManagement(QWidget):
         header.setSectionResizeMode(7, QHeaderView.ResizeToContents)
         
         self.users_table.setAlternatingRowColors(True)
-        self.users_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.users_table.setSelectionBehavior(QTableView.SelectRows)
         
         layout.addWidget(self.users_table, 1)
         
@@ -201,11 +254,10 @@ class UserManagement(QWidget):
         layout.addWidget(filter_widget)
         
         # Activity logs table
-        self.activity_table = QTableWidget()
-        self.activity_table.setColumnCount(6)
-        self.activity_table.setHorizontalHeaderLabels([
-            "Timestamp", "User", "IP Address", "Action", "Module", "Details"
-        ])
+        self.activity_model = RecordTableModel(ACTIVITY_COLUMNS, fetch_activity_logs)
+        self.activity_table = QTableView()
+        self.activity_table.setModel(self.activity_model)
+        self.activity_table.setEditTriggers(QTableView.NoEditTriggers)
         
         header = self.activity_table.horizontalHeader()
         header.setSectionResizeMode(5, QHeaderView.Stretch)
@@ -217,97 +269,38 @@ class UserManagement(QWidget):
         
         return tab_widget
         
+    def current_user_filters(self):
+        """Return the fetch_users arguments for the filter widgets"""
+        role = self.role_combo.currentText()
+        status = self.user_status_combo.currentText()
+        return {
+            'search': self.user_search_input.text(),
+            'role': None if role == "All Roles" else role,
+            'status': None if status == "All Status" else status,
+        }
+        
     def load_sample_users(self):
-        """Load sample users data"""
-        users = [
-            [1, "admin", "System Administrator", "admin@company.com", "Admin", "Active", "2024-01-20 10:30", ""],
-            [2, "manager1", "John Manager", "john@company.com", "Manager", "Active", "2024-01-19 14:15", ""],
-            [3, "accountant1", "Sarah Accountant", "sarah@company.com", "Accountant", "Active", "2024-01-18 11:45", ""],
-            [4, "driver1", "Michael Driver", "michael@company.com", "Driver", "Active", "2024-01-17 09:20", ""],
-            [5, "viewer1", "Lisa Viewer", "lisa@company.com", "Viewer", "Inactive", "2024-01-10 16:40", ""],
-            [6, "manager2", "Robert Manager", "robert@company.com", "Manager", "Active", "2024-01-15 13:10", ""]
-        ]
-        
-        self.users_table.setRowCount(len(users))
-        
-        for row, user in enumerate(users):
-            for col, data in enumerate(user[:7]):  # Skip actions column
-                item = QTableWidgetItem(str(data))
-                
-                # Style based on status
-                if col == 5:  # Status column
-                    if data == "Active":
-                        item.setForeground(QColor("#4CAF50"))
-                    elif data == "Inactive":
-                        item.setForeground(QColor("#FF9800"))
-                    elif data == "Locked":
-                        item.setForeground(QColor("#F44336"))
-                        
-                # Style admin users
-                if col == 4 and data == "Admin":
-                    item.setFont(QFont("Segoe UI", 9, QFont.Bold))
-                    item.setForeground(QColor("#2196F3"))
-                    
-                self.users_table.setItem(row, col, item)
-                
-            # Add action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(5, 2, 5, 2)
-            
-            edit_btn = QPushButton("Edit")
-            edit_btn.setFixedWidth(60)
-            edit_btn.clicked.connect(lambda checked, r=row: self.edit_user(r))
-            
-            reset_btn = QPushButton("Reset PW")
-            reset_btn.setFixedWidth(70)
-            reset_btn.clicked.connect(lambda checked, r=row: self.reset_password(r))
-            
-            toggle_btn = QPushButton("Toggle")
-            toggle_btn.setFixedWidth(60)
-            toggle_btn.clicked.connect(lambda checked, r=row: self.toggle_user(r))
-            
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(reset_btn)
-            action_layout.addWidget(toggle_btn)
-            action_layout.addStretch()
-            
-            self.users_table.setCellWidget(row, 7, action_widget)
-            
+        """Load users matching the filters from the database"""
+        self.users_model.set_filters(**self.current_user_filters())
+        
+    def search_users(self, text, narrow):
+        """Run the search box query, re-checking only the shown rows if it narrows"""
+        if narrow:
+            self.users_model.narrow(**self.current_user_filters())
+        else:
+            self.load_sample_users()
+        
+    def clear_user_filters(self):
+        """Clear the search box and filters and show every user"""
+        self.user_search_input.clear()
+        self.role_combo.setCurrentIndex(0)
+        self.user_status_combo.setCurrentIndex(0)
+        self.user_search.restart()
+        
     def load_sample_activity_logs(self):
-        """Load sample activity logs"""
-        logs = [
-            ["2024-01-20 10:30:15", "admin", "192.168.1.100", "Login", "System", "Successful login"],
-            ["2024-01-20 10:35:22", "admin", "192.168.1.100", "Create", "User Management", "Created new user: manager2"],
-            ["2024-01-20 11:15:45", "manager1", "192.168.1.101", "Login", "System", "Successful login"],
-            ["2024-01-20 11:20:30", "manager1", "192.168.1.101", "View", "Financial Reports", "Viewed monthly report"],
-            ["2024-01-20 12:05:18", "accountant1", "192.168.1.102", "Login", "System", "Successful login"],
-            ["2024-01-20 12:10:45", "accountant1", "192.168.1.102", "Export", "Salary Reports", "Exported salary register"],
-            ["2024-01-20 13:45:22", "admin", "192.168.1.100", "Edit", "System Settings", "Updated company information"],
-            ["2024-01-20 14:30:15", "driver1", "192.168.1.103", "Login", "System", "Successful login"],
-            ["2024-01-20 15:20:33", "manager1", "192.168.1.101", "Logout", "System", "User logged out"],
-            ["2024-01-20 16:45:12", "admin", "192.168.1.100", "Backup", "Database", "Created system backup"]
-        ]
-        
-        self.activity_table.setRowCount(len(logs))
-        
-        for row, log in enumerate(logs):
-            for col, data in enumerate(log):
-                item = QTableWidgetItem(str(data))
-                
-                # Color code actions
-                if col == 3:  # Action column
-                    if data == "Login":
-                        item.setForeground(QColor("#4CAF50"))
-                    elif data == "Logout":
-                        item.setForeground(QColor("#FF9800"))
-                    elif data == "Create":
-                        item.setForeground(QColor("#2196F3"))
-                    elif data == "Delete":
-                        item.setForeground(QColor("#F44336"))
-                        
-                self.activity_table.setItem(row, col, item)
-                
+        """Load activity logs from the database, newest first"""
+        self.activity_model.reload()
+        
     def load_role_permissions(self, role):
         """Load permissions for selected role"""
         print(f"Loading permissions for role: {role}")
@@ -319,14 +312,25 @@ class UserManagement(QWidget):
             QMessageBox.information(self, "Success", "New user added successfully!")
             self.load_sample_users()
             
-    def edit_user(self, row):
+    def on_user_action(self, action, user_id):
+        """Run the action button clicked in a user row"""
+        if self.users_model.record_by_id(user_id) is None:
+            return
+        if action == "Edit":
+            self.edit_user(user_id)
+        elif action == "Reset PW":
+            self.reset_password(user_id)
+        elif action == "Toggle":
+            self.toggle_user(user_id)
+            
+    def edit_user(self, user_id):
         """Edit user information"""
-        username = self.users_table.item(row, 1).text()
+        username = self.users_model.record_by_id(user_id)['username']
         QMessageBox.information(self, "Edit User", f"Editing user: {username}")
         
-    def reset_password(self, row):
+    def reset_password(self, user_id):
         """Reset user password"""
-        username = self.users_table.item(row, 1).text()
+        username = self.users_model.record_by_id(user_id)['username']
         
         reply = QMessageBox.question(
             self, "Reset Password",
@@ -338,10 +342,11 @@ class UserManagement(QWidget):
             QMessageBox.information(self, "Password Reset", 
                                   f"Password reset link sent to user '{username}'")
             
-    def toggle_user(self, row):
+    def toggle_user(self, user_id):
         """Toggle user active/inactive status"""
-        username = self.users_table.item(row, 1).text()
-        current_status = self.users_table.item(row, 5).text()
+        user = dict(self.users_model.record_by_id(user_id))
+        username = user['username']
+        current_status = user['status']
         
         new_status = "Inactive" if current_status == "Active" else "Active"
         
@@ -352,13 +357,8 @@ class UserManagement(QWidget):
         )
         
         if reply == QMessageBox.Yes:
-            self.users_table.item(row, 5).setText(new_status)
-            
-            # Update color
-            if new_status == "Active":
-                self.users_table.item(row, 5).setForeground(QColor("#4CAF50"))
-            else:
-                self.users_table.item(row, 5).setForeground(QColor("#FF9800"))
+            user['status'] = new_status
+            self.users_model.patch([user['id']], [user])
                 
             QMessageBox.information(self, "Status Changed", 
                                   f"User '{username}' is now '{new_status}'")
@@ -10,6 +10,20 @@ from PyQt5.QtGui import QFont, QIcon, QColor, QPixmap
 from PyQt5.QtCore import Qt, QDate, pyqtSignal
 import datetime
 import json
+import os
+
+from models.db_connection import backup_database
+from workers import submit_job
+
+
+def run_backup(token, path):
+    """Back up the main database to `path`, reporting progress to the token"""
+    def on_progress(copied, total):
+        token.check()
+        token.report_progress(copied * 100 // total if total else 100)
+    
+    return backup_database(path, progress=on_progress)
+
 
 class SystemSettings(QWidget):
     """
@@ -20,6 +34,7 @@ class SystemSettings(QWidget):
     
     def __init__(self):
         super().__init__()
+        self.backup_task = None
         self.setup_ui()
         self.load_sample_settings()
         
@@ -668,18 +683,40 @@ class SystemSettings(QWidget):
         )
         
         if reply == QMessageBox.Yes:
-            # Simulate backup process
-            progress_dialog = QProgressDialog("Creating backup...", "Cancel", 0, 100, self)
-            progress_dialog.setWindowModality(Qt.WindowModal)
+            if self.backup_task:
+                return
             
-            for i in range(101):
-                progress_dialog.setValue(i)
-                QApplication.processEvents()
-                import time
-                time.sleep(0.02)
-                
-            progress_dialog.setValue(100)
-            QMessageBox.information(self, "Backup Complete", "System backup created successfully!")
+            file_name = f"bus_management_{datetime.datetime.now():%Y%m%d_%H%M%S}.db"
+            path = os.path.join(self.backup_path_input.text() or ".", file_name)
+            
+            self.backup_dialog = QProgressDialog("Creating backup...", "Cancel", 0, 100, self)
+            self.backup_dialog.setWindowModality(Qt.WindowModal)
+            self.backup_dialog.setValue(0)
+            
+            self.backup_task = submit_job(run_backup, path)
+            self.backup_task.progress.connect(self.backup_dialog.setValue)
+            self.backup_task.finished.connect(self.on_backup_finished)
+            self.backup_task.failed.connect(self.on_backup_failed)
+            self.backup_task.cancelled.connect(self.on_backup_cancelled)
+            self.backup_dialog.canceled.connect(self.backup_task.cancel)
+            
+    def end_backup(self):
+        self.backup_task = None
+        self.backup_dialog.canceled.disconnect()
+        self.backup_dialog.close()
+        
+    def on_backup_finished(self, path):
+        self.end_backup()
+        QMessageBox.information(self, "Backup Complete", 
+                              f"System backup created successfully!\n\n{path}")
+        
+    def on_backup_failed(self, message):
+        self.end_backup()
+        QMessageBox.warning(self, "Backup Failed", f"Could not create backup:\n{message}")
+        
+    def on_backup_cancelled(self):
+        self.end_backup()
+        QMessageBox.information(self, "Backup Cancelled", "The backup was cancelled.")
             
     def restore_backup(self):
         """Restore from backup"""
@@ -0,0 +1,474 @@
+"""
+Table models shared by the list tabs.
+
+Each list tab shows a QTableView over a RecordTableModel instead of
+filling a QTableWidget. The model keeps one record (a dict or tuple from
+the data layer) per row and works out cell text and colours from its
+Column definitions when the view asks, so no per-cell items or colours
+are allocated. Rows are fetched one page at a time on the thread pool as
+the view scrolls (canFetchMore/fetchMore):
+
+    model = RecordTableModel(DRIVER_COLUMNS, fetch_drivers)
+    self.driver_table.setModel(model)
+    model.set_filters(search="ravi", status="Active")
+
+The fetch function is called as fetch(limit=..., offset=..., after=...,
+**filters) and must return a list of records; `after` is the last record
+of the previous page, so the query can seek past it (keyset paging)
+rather than skip `offset` rows. It must also accept ids=[...] to
+re-query just those records, which is how changed rows are refreshed.
+
+The model keeps every row's id but only the last CACHE_SIZE records
+shown. Rows evicted from that cache are read back by id when the view
+reaches them again, so memory stays flat however far a table is scrolled.
+
+Every cell returns its record's id under ID_ROLE, and the model keeps an
+id -> row index, so selections resolve to records by id rather than by
+row number, even for rows whose records have left the cache.
+
+Checkable columns are drawn by the view's default delegate from
+Qt.CheckStateRole; the model only keeps the set of checked keys, so no
+checkbox widgets are created per row.
+"""
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor
+
+from workers import submit
+
+PAGE_SIZE = 200
+
+# Records kept in memory per table; rows scrolled out of it are read again
+CACHE_SIZE = 20 * PAGE_SIZE
+
+# Largest loaded result narrow() will re-check by id instead of re-querying
+NARROW_LIMIT = 5000
+
+# Item data role holding the record id of a row
+ID_ROLE = Qt.UserRole + 1
+
+# (background, foreground) pairs used for status cells
+GOOD = (QColor(220, 255, 220), QColor(0, 100, 0))
+WARNING = (QColor(255, 255, 200), QColor(153, 102, 0))
+BAD = (QColor(255, 220, 220), QColor(139, 0, 0))
+MUTED = (QColor(230, 230, 230), QColor(100, 100, 100))
+
+
+class Column:
+    """
+    How one table column is shown.
+
+    `value` is the record key to display, or a function of the record
+    returning the text. `colors` is a function of the record returning a
+    (background, foreground) pair, either of which may be None, or None
+    for no colouring. `font` is a function returning a QFont or None.
+    A `checkable` column shows a checkbox bound to the model's checked set.
+    """
+
+    def __init__(self, title, value, colors=None, align=None, font=None,
+                 checkable=False):
+        self.title = title
+        self.value = value
+        self.colors = colors
+        self.align = align
+        self.font = font
+        self.checkable = checkable
+
+    def text(self, record):
+        if callable(self.value):
+            return self.value(record)
+        value = record[self.value]
+        return "" if value is None else str(value)
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Read-only table of data-layer records, loaded a page at a time"""
+
+    # Emitted when the first page of a new query has arrived
+    loaded = pyqtSignal()
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, columns, fetch, id_key="id", check_key=None,
+                 page_size=PAGE_SIZE, cache_size=CACHE_SIZE, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.fetch = fetch
+        self.id_key = id_key
+        self.page_size = page_size
+        self.cache_size = cache_size
+
+        # Keys (record[check_key]) of the rows ticked in checkable columns.
+        # They are kept across reloads and are not limited to loaded rows.
+        self.check_key = check_key or id_key
+        self.checked = set()
+        self.filters = {}
+        # The id shown in each row; the records themselves are cached
+        self.ids = []
+        self._rows = {}
+        self._cache = OrderedDict()
+        # The last record of the last page, which the next page seeks past
+        self.last_paged = None
+        self._offset = 0
+        self._has_more = False
+        self._task = None
+        # Bumped on every new query so late refresh results are dropped
+        self._generation = 0
+
+        # Ids waiting to be re-queried, batched per event loop pass
+        self._stale = set()
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self._refresh_stale)
+
+        # Evicted rows the view asked for, and those being read back
+        self._missing = set()
+        self._loading = set()
+        self._load_timer = QTimer(self)
+        self._load_timer.setSingleShot(True)
+        self._load_timer.timeout.connect(self._load_missing)
+
+    # Loading
+
+    def set_filters(self, **filters):
+        """Drop the loaded rows and start loading the query again"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.filters = filters
+        self._generation += 1
+        self._stale.clear()
+        self._missing.clear()
+        self._loading.clear()
+        self.beginResetModel()
+        self.ids = []
+        self._rows = {}
+        self._cache.clear()
+        self.last_paged = None
+        self._offset = 0
+        self._has_more = True
+        self.endResetModel()
+        self._request_page()
+
+    def reload(self):
+        """Reload with the current filters"""
+        self.set_filters(**self.filters)
+
+    def narrow(self, **filters):
+        """
+        Switch to filters that match a subset of the current query.
+
+        When every row of the current query is loaded, only those records
+        are re-checked (fetch(ids=...)) instead of searching the whole
+        table; otherwise this is the same as set_filters().
+        """
+        if self._has_more or self._task is not None or len(self.ids) > NARROW_LIMIT:
+            self.set_filters(**filters)
+            return
+        self.filters = filters
+        self._generation += 1
+        self._stale.clear()
+        self._missing.clear()
+        self._loading.clear()
+        generation = self._generation
+        self._task = submit(self.fetch, ids=list(self.ids), **filters)
+        self._task.finished.connect(
+            lambda records: self._apply_narrow(generation, records)
+        )
+        self._task.failed.connect(self._on_failed)
+
+    def _apply_narrow(self, generation, records):
+        if generation != self._generation:
+            return
+        self._task = None
+        self.beginResetModel()
+        self.ids = [r[self.id_key] for r in records]
+        self._rows = {record_id: i for i, record_id in enumerate(self.ids)}
+        self._cache.clear()
+        self._store(records)
+        self.last_paged = records[-1] if records else None
+        self._offset = len(self.ids)
+        self._has_more = False
+        self.endResetModel()
+        self.loaded.emit()
+
+    def page_arguments(self):
+        """
+        Keyword arguments that tell fetch which page to return next: the
+        last record already paged in (`after`, for keyset paging) and the
+        number of rows paged in (`offset`, for relevance-ordered searches)
+        """
+        return {"limit": self.page_size, "offset": self._offset, "after": self.last_paged}
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and self._task is None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._request_page()
+
+    def _request_page(self):
+        self._task = submit(self.fetch, **self.page_arguments(), **self.filters)
+        self._task.finished.connect(self._append_page)
+        self._task.failed.connect(self._on_failed)
+
+    def _append_page(self, records):
+        first_page = self.last_paged is None and self._offset == 0
+        self._task = None
+        self._offset += len(records)
+        self._has_more = len(records) == self.page_size
+        if records:
+            self.last_paged = records[-1]
+
+        # A row patched in since the query started may show up again
+        records = [r for r in records if r[self.id_key] not in self._rows]
+        if records:
+            self._append(records)
+
+        if first_page:
+            self.loaded.emit()
+
+    def _on_failed(self, message):
+        self._task = None
+        self._has_more = False
+        self.load_failed.emit(message)
+
+    # Records
+
+    def record(self, row):
+        """
+        Return the record shown in a row, or None. A row whose record was
+        evicted from the cache returns None until it has been read back.
+        """
+        if not 0 <= row < len(self.ids):
+            return None
+        record_id = self.ids[row]
+        record = self._cache.get(record_id)
+        if record is None:
+            self._request_missing(record_id)
+        else:
+            self._cache.move_to_end(record_id)
+        return record
+
+    def row_of(self, record_id):
+        """Return the row showing a record id, or None if it is not loaded"""
+        return self._rows.get(record_id)
+
+    def record_by_id(self, record_id):
+        """
+        Return the record shown with this id, or None if no row shows it.
+
+        A selected row may have been scrolled out of the cache before an
+        action asks for its record, so an evicted record is read back
+        there and then; that is one lookup by primary key.
+        """
+        record = self._cache.get(record_id)
+        if record is not None or record_id not in self._rows:
+            return record
+        records = self.fetch(ids=[record_id], **self.filters)
+        if not records:
+            return None
+        self._store(records)
+        return records[0]
+
+    def _store(self, records):
+        """Cache records, evicting the least recently shown beyond cache_size"""
+        for record in records:
+            self._cache[record[self.id_key]] = record
+            self._cache.move_to_end(record[self.id_key])
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _request_missing(self, record_id):
+        if record_id in self._loading:
+            return
+        self._missing.add(record_id)
+        if not self._load_timer.isActive():
+            self._load_timer.start(0)
+
+    def _load_missing(self):
+        record_ids = sorted(self._missing - self._loading)
+        self._missing.clear()
+        if not record_ids:
+            return
+        self._loading.update(record_ids)
+        generation = self._generation
+        task = submit(self.fetch, ids=record_ids, **self.filters)
+        task.finished.connect(
+            lambda records: self._apply_loaded(generation, record_ids, records)
+        )
+        task.failed.connect(
+            lambda message: self._on_update_failed(generation, record_ids, message)
+        )
+
+    def _apply_loaded(self, generation, record_ids, records):
+        if generation != self._generation:
+            return
+        self._loading.difference_update(record_ids)
+        self.patch(record_ids, records)
+
+    def refresh(self, record_id):
+        """
+        Re-query a record that changed and update, add or remove its row.
+
+        Calls made in the same event loop pass are batched into one query.
+        """
+        self._stale.add(record_id)
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start(0)
+
+    def _refresh_stale(self):
+        record_ids = sorted(self._stale)
+        self._stale.clear()
+        generation = self._generation
+        task = submit(self.fetch, ids=record_ids, **self.filters)
+        task.finished.connect(
+            lambda records: self._apply_refresh(generation, record_ids, records)
+        )
+        task.failed.connect(
+            lambda message: self._on_update_failed(generation, record_ids, message)
+        )
+
+    def _apply_refresh(self, generation, record_ids, records):
+        if generation == self._generation:
+            self.patch(record_ids, records)
+
+    def _on_update_failed(self, generation, record_ids, message):
+        # The rows keep what they showed; the next change or scroll retries
+        if generation != self._generation:
+            return
+        self._loading.difference_update(record_ids)
+        self.load_failed.emit(message)
+
+    def patch(self, record_ids, records):
+        """
+        Update, add or remove rows without reloading the table.
+
+        `records` is the result of re-running the query for `record_ids`:
+        ids missing from it no longer match the filters and are removed.
+        """
+        found = {r[self.id_key]: r for r in records}
+        removed = []
+        added = []
+        for record_id in record_ids:
+            row = self._rows.get(record_id)
+            record = found.get(record_id)
+            if record is None:
+                if row is not None:
+                    removed.append(row)
+                self._cache.pop(record_id, None)
+            elif row is None:
+                added.append(record)
+            else:
+                self._store([record])
+                self.dataChanged.emit(
+                    self.index(row, 0), self.index(row, len(self.columns) - 1)
+                )
+
+        for row in sorted(removed, reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.ids[row]
+            self.endRemoveRows()
+        if removed:
+            self._offset = max(0, self._offset - len(removed))
+            self._rows = {record_id: i for i, record_id in enumerate(self.ids)}
+
+        if added:
+            self._append(added)
+
+    def _append(self, records):
+        start = len(self.ids)
+        self.beginInsertRows(QModelIndex(), start, start + len(records) - 1)
+        for row, record in enumerate(records, start):
+            self.ids.append(record[self.id_key])
+            self._rows[record[self.id_key]] = row
+        self._store(records)
+        self.endInsertRows()
+
+    # Check state
+
+    def clear_checked(self):
+        """Untick every row"""
+        self.checked.clear()
+        for col, column in enumerate(self.columns):
+            if column.checkable and self.ids:
+                self.dataChanged.emit(
+                    self.index(0, col), self.index(len(self.ids) - 1, col),
+                    [Qt.CheckStateRole]
+                )
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.columns[section].title
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == ID_ROLE:
+            return self.ids[index.row()]
+        record = self.record(index.row())
+        if record is None:
+            # Shown blank until the evicted record has been read back
+            return None
+        column = self.columns[index.column()]
+
+        if role == Qt.DisplayRole:
+            return column.text(record)
+        if role == Qt.CheckStateRole and column.checkable:
+            return Qt.Checked if record[self.check_key] in self.checked else Qt.Unchecked
+        if role in (Qt.BackgroundRole, Qt.ForegroundRole) and column.colors:
+            colors = column.colors(record)
+            if colors:
+                return colors[0] if role == Qt.BackgroundRole else colors[1]
+        elif role == Qt.TextAlignmentRole and column.align is not None:
+            return column.align
+        elif role == Qt.FontRole and column.font:
+            return column.font(record)
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and self.columns[index.column()].checkable:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not (index.isValid() and role == Qt.CheckStateRole
+                and self.columns[index.column()].checkable):
+            return False
+        record = self.record(index.row())
+        if record is None:
+            return False
+        key = record[self.check_key]
+        if value == Qt.Checked:
+            self.checked.add(key)
+        else:
+            self.checked.discard(key)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+
+def selected_ids(view):
+    """Return the record ids of the rows selected in a view, top to bottom"""
+    rows = view.selectionModel().selectedRows()
+    return [index.data(ID_ROLE) for index in sorted(rows, key=lambda i: i.row())]
+
+
+def selected_record(view):
+    """Return the record of the current selected row in a view, or None"""
+    ids = selected_ids(view)
+    if not ids:
+        return None
+    current = view.currentIndex()
+    if current.isValid() and current.data(ID_ROLE) in ids:
+        return view.model().record_by_id(current.data(ID_ROLE))
+    return view.model().record_by_id(ids[0])
@@ -0,0 +1,131 @@
+"""
+Background workers for database queries, reports and backups.
+
+Pages hand slow work to submit() or submit_job() instead of running it on
+the GUI thread. Both return a Task whose signals are delivered back on the
+GUI thread:
+
+    task = submit(fetch_drivers, search="ravi")
+    task.finished.connect(self.show_drivers)
+    task.failed.connect(self.show_error)
+
+Jobs started with submit_job() receive a CancellationToken as their first
+argument so they can report progress and stop early. Cancelling a task
+also drops its result, so a page that starts a new query can cancel the
+old one and never see a stale response.
+"""
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class Cancelled(Exception):
+    """Raised inside a job when its task has been cancelled"""
+
+
+class CancellationToken:
+    """Passed to jobs so they can check for cancellation and report progress"""
+
+    def __init__(self, report_progress):
+        self._event = threading.Event()
+        self._report_progress = report_progress
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raise Cancelled if the task has been cancelled"""
+        if self._event.is_set():
+            raise Cancelled()
+
+    def report_progress(self, percent, message=""):
+        self._report_progress.emit(int(percent), message)
+
+
+class Task(QObject):
+    """Handle for a piece of work running on the thread pool"""
+
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, str)
+    cancelled = pyqtSignal()
+
+    # Emitted from the worker thread; queued back to the GUI thread
+    _done = pyqtSignal(str, object)
+
+    def __init__(self):
+        super().__init__()
+        self.token = CancellationToken(self.progress)
+        self._done.connect(self._deliver)
+
+    def cancel(self):
+        """Stop the job (if it checks its token) and discard its result"""
+        self.token.cancel()
+
+    @property
+    def is_cancelled(self):
+        return self.token.is_cancelled
+
+    def _deliver(self, outcome, value):
+        _active_tasks.discard(self)
+        if outcome == "cancelled" or self.token.is_cancelled:
+            self.cancelled.emit()
+        elif outcome == "failed":
+            self.failed.emit(value)
+        else:
+            self.finished.emit(value)
+
+
+class _Runnable(QRunnable):
+    def __init__(self, task, fn, args, kwargs):
+        super().__init__()
+        self.task = task
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        task = self.task
+        if task.is_cancelled:
+            task._done.emit("cancelled", None)
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Cancelled:
+            task._done.emit("cancelled", None)
+        except Exception as e:
+            traceback.print_exc()
+            task._done.emit("failed", str(e))
+        else:
+            task._done.emit("finished", result)
+
+
+# Tasks are kept alive here until their result has been delivered
+_active_tasks = set()
+
+
+def _start(task, fn, args, kwargs):
+    _active_tasks.add(task)
+    QThreadPool.globalInstance().start(_Runnable(task, fn, args, kwargs))
+    return task
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on the thread pool and return its Task"""
+    return _start(Task(), fn, args, kwargs)
+
+
+def submit_job(fn, *args, **kwargs):
+    """Run fn(token, *args, **kwargs) on the thread pool and return its Task"""
+    task = Task()
+    return _start(task, fn, (task.token,) + args, kwargs)
+
+
+def wait_for_all(timeout_ms=-1):
+    """Block until every queued job has run (used on shutdown)"""
+    return QThreadPool.globalInstance().waitForDone(timeout_ms)
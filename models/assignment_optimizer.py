@@ -0,0 +1,178 @@
+"""
+Plans which available buses should serve which schools.
+
+propose_plan() takes the schools under contract and the buses that are
+on the road and not assigned yet, and gives every school buses until its
+students are seated. It uses as few buses as it can and, after that,
+leaves as few seats empty as it can:
+
+    plan = propose_plan()
+    apply_plan(plan)
+
+A school's need is its student_count less the seats of the buses already
+assigned to it. Buses in the workshop are never planned, and TYPE_COST
+makes the dearer bus types the last choice when a cheaper bus fits as
+well. Every seeded type (Standard, Non-AC, Mini, AC) has an entry;
+only AC costs extra.
+
+The planner is a greedy min-cost matching on a NumPy cost matrix with
+one row per school and one column per bus. Each step takes the cheapest
+(school, bus) pair, then recomputes only that school's row and closes
+that bus's column, so a 500 bus x 200 school plan takes milliseconds.
+"""
+import numpy as np
+
+from models.assignments import assign_buses
+from models.db_connection import transaction
+from models.schema import connect
+
+# Extra cost of running each bus type, counted in empty seats. A Mini
+# costs nothing extra: its few seats already keep it for the small needs
+# it seats with fewer empty seats than a full-size bus, and a cost would
+# push those needs onto half-empty full-size buses instead.
+TYPE_COST = {'Standard': 0, 'Non-AC': 0, 'Mini': 0, 'AC': 5}
+
+SCHOOL_NEED_SELECT = """
+    SELECT s.id, s.name, s.student_count,
+           COALESCE(SUM(b.capacity), 0) AS assigned_seats
+    FROM schools s
+    LEFT JOIN assignments a ON a.school_id = s.id AND a.status = 'Active'
+    LEFT JOIN buses b ON b.id = a.bus_id
+    WHERE s.contract_status IN ('Active', 'Expiring Soon')
+    GROUP BY s.id
+    ORDER BY s.name
+"""
+
+FREE_BUS_SELECT = """
+    SELECT b.id, b.bus_number, b.bus_type, b.capacity
+    FROM buses b
+    WHERE b.status = 'Active' AND b.capacity > 0
+      AND NOT EXISTS (SELECT 1 FROM assignments a
+                      WHERE a.bus_id = b.id AND a.status = 'Active')
+    ORDER BY b.bus_number
+"""
+
+
+def _row_costs(need, capacity, extra, bus_cost, largest):
+    """
+    Cost of giving each bus to schools still needing `need` seats.
+
+    A bus that seats everyone costs one bus plus its empty seats. A bus
+    that does not costs one bus plus the buses the rest will still need.
+    """
+    left = np.subtract.outer(need, capacity)
+    more_buses = np.ceil(np.maximum(left, 0) / largest)
+    empty = np.maximum(-left, 0)
+    return bus_cost * (1 + more_buses) + empty + extra
+
+
+def plan_buses(need, capacity, extra=None):
+    """
+    Match buses to schools and return (school index, bus index) pairs.
+
+    `need` holds the seats each school still needs and `capacity` the
+    seats of each free bus; `extra` is an optional per-bus cost in seats.
+    """
+    need = np.asarray(need, dtype=np.float64).copy()
+    capacity = np.asarray(capacity, dtype=np.float64)
+    extra = np.zeros(len(capacity)) if extra is None else np.asarray(extra, dtype=np.float64)
+    if not len(need) or not len(capacity):
+        return []
+
+    largest = capacity.max()
+    # One bus fewer always outweighs the empty seats of any one bus
+    bus_cost = largest + 1 + extra.max()
+    costs = _row_costs(need, capacity, extra, bus_cost, largest)
+    costs[need <= 0] = np.inf
+
+    pairs = []
+    for _ in range(len(capacity)):
+        school, bus = np.unravel_index(np.argmin(costs), costs.shape)
+        if not np.isfinite(costs[school, bus]):
+            break
+        pairs.append((int(school), int(bus)))
+        need[school] -= capacity[bus]
+        costs[:, bus] = np.inf
+        if need[school] <= 0:
+            costs[school] = np.inf
+        else:
+            open_buses = np.isfinite(costs[school])
+            costs[school, open_buses] = _row_costs(
+                need[school:school + 1], capacity[open_buses], extra[open_buses],
+                bus_cost, largest
+            )[0]
+    return pairs
+
+
+class AssignmentPlan:
+    """Proposed assignments with a per-school summary"""
+
+    def __init__(self, assignments, schools):
+        # Dicts with school_id, school_name, bus_id, bus_number, bus_type, capacity
+        self.assignments = assignments
+        # Dicts with id, name, students, assigned_seats, planned_seats,
+        # buses, empty_seats and short (seats still missing)
+        self.schools = schools
+
+    def __len__(self):
+        return len(self.assignments)
+
+    @property
+    def empty_seats(self):
+        return sum(school['empty_seats'] for school in self.schools)
+
+    @property
+    def short(self):
+        return sum(school['short'] for school in self.schools)
+
+    def pairs(self):
+        return [(a['school_id'], a['bus_id']) for a in self.assignments]
+
+
+def propose_plan(schools=None, buses=None):
+    """
+    Plan assignments for the free buses. `schools` and `buses` default to
+    the rows of SCHOOL_NEED_SELECT and FREE_BUS_SELECT.
+    """
+    if schools is None or buses is None:
+        conn = connect()
+        schools = schools if schools is not None else conn.execute(SCHOOL_NEED_SELECT).fetchall()
+        buses = buses if buses is not None else conn.execute(FREE_BUS_SELECT).fetchall()
+
+    need = [max(s['student_count'] - s['assigned_seats'], 0) for s in schools]
+    capacity = [b['capacity'] for b in buses]
+    extra = [TYPE_COST.get(b['bus_type'], 0) for b in buses]
+
+    summary = [{
+        'id': s['id'], 'name': s['name'], 'students': s['student_count'],
+        'assigned_seats': s['assigned_seats'], 'planned_seats': 0, 'buses': 0,
+    } for s in schools]
+    assignments = []
+    for school, bus in plan_buses(need, capacity, extra):
+        row = summary[school]
+        row['planned_seats'] += buses[bus]['capacity']
+        row['buses'] += 1
+        assignments.append({
+            'school_id': row['id'], 'school_name': row['name'],
+            'bus_id': buses[bus]['id'], 'bus_number': buses[bus]['bus_number'],
+            'bus_type': buses[bus]['bus_type'], 'capacity': buses[bus]['capacity'],
+        })
+    for row, seats_needed in zip(summary, need):
+        row['empty_seats'] = max(row['planned_seats'] - seats_needed, 0)
+        row['short'] = max(seats_needed - row['planned_seats'], 0)
+    assignments.sort(key=lambda a: (a['school_name'], a['bus_number']))
+    return AssignmentPlan(assignments, summary)
+
+
+def apply_plan(plan):
+    """
+    Make every assignment in the plan in one transaction. Raises
+    ValueError, assigning nothing, if a planned bus is no longer free.
+    """
+    connect()
+    with transaction() as conn:
+        free = {row['id'] for row in conn.execute(FREE_BUS_SELECT)}
+        taken = [a['bus_number'] for a in plan.assignments if a['bus_id'] not in free]
+        if taken:
+            raise ValueError(f"Buses no longer free: {', '.join(taken)}")
+        return assign_buses(plan.pairs())
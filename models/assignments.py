@@ -0,0 +1,230 @@
+"""
+Bus-to-school assignments.
+
+Assigning or removing a bus publishes change events for the assignment,
+the school (its assigned bus list) and the bus (its Assigned/Available
+status), so every open view can patch just those rows.
+
+The assignments table is the record of which bus serves which school.
+ASSIGNMENTS mirrors its active rows in hash maps (bus -> schools,
+school -> buses) so conflict checks and lookups do not query or scan.
+"""
+import datetime
+import threading
+
+from models import events
+from models.db_connection import transaction
+from models.events import publish, INSERT, UPDATE, DELETE
+from models.schema import connect
+
+
+class AssignmentIndex:
+    """Active bus-to-school assignments, kept current by change events"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        # assignment id -> (bus_id, school_id), active assignments only
+        self._pairs = {}
+        self._schools_by_bus = {}
+        self._buses_by_school = {}
+        self._bus_ids = {}
+        events.subscribe(self._on_change)
+
+    def ensure_built(self):
+        with self._lock:
+            if self._built:
+                return
+            conn = connect()
+            for row in conn.execute("SELECT id, bus_number FROM buses"):
+                self._bus_ids[row['bus_number']] = row['id']
+            for row in conn.execute(
+                "SELECT id, bus_id, school_id FROM assignments WHERE status = 'Active'"
+            ):
+                self._add(row['id'], row['bus_id'], row['school_id'])
+            self._built = True
+
+    def _add(self, assignment_id, bus_id, school_id):
+        self._pairs[assignment_id] = (bus_id, school_id)
+        self._schools_by_bus.setdefault(bus_id, set()).add(school_id)
+        self._buses_by_school.setdefault(school_id, set()).add(bus_id)
+
+    def _discard(self, assignment_id):
+        pair = self._pairs.pop(assignment_id, None)
+        if pair is None:
+            return
+        bus_id, school_id = pair
+        for key, value, mapping in ((bus_id, school_id, self._schools_by_bus),
+                                    (school_id, bus_id, self._buses_by_school)):
+            values = mapping.get(key)
+            values.discard(value)
+            if not values:
+                del mapping[key]
+
+    def _on_change(self, entity, entity_id, operation):
+        with self._lock:
+            if not self._built:
+                return
+            conn = connect()
+            if entity == 'assignment':
+                self._discard(entity_id)
+                row = conn.execute(
+                    "SELECT bus_id, school_id, status FROM assignments WHERE id = ?",
+                    (entity_id,)
+                ).fetchone()
+                if row is not None and row['status'] == 'Active':
+                    self._add(entity_id, row['bus_id'], row['school_id'])
+            elif entity == 'bus':
+                self._bus_ids = {n: i for n, i in self._bus_ids.items() if i != entity_id}
+                row = conn.execute(
+                    "SELECT bus_number FROM buses WHERE id = ?", (entity_id,)
+                ).fetchone()
+                if row is not None:
+                    self._bus_ids[row['bus_number']] = entity_id
+                else:
+                    for assignment_id, (bus_id, _school) in list(self._pairs.items()):
+                        if bus_id == entity_id:
+                            self._discard(assignment_id)
+            elif entity == 'school' and operation == DELETE:
+                for assignment_id, (_bus, school_id) in list(self._pairs.items()):
+                    if school_id == entity_id:
+                        self._discard(assignment_id)
+
+    def bus_id(self, bus_number):
+        """Return the id of the bus with this number, or None"""
+        self.ensure_built()
+        return self._bus_ids.get(bus_number)
+
+    def schools_of_bus(self, bus_id):
+        self.ensure_built()
+        with self._lock:
+            return frozenset(self._schools_by_bus.get(bus_id, ()))
+
+    def buses_of_school(self, school_id):
+        self.ensure_built()
+        with self._lock:
+            return frozenset(self._buses_by_school.get(school_id, ()))
+
+    def is_assigned(self, bus_id, school_id):
+        self.ensure_built()
+        return school_id in self._schools_by_bus.get(bus_id, ())
+
+    def other_schools(self, bus_id, school_id):
+        """Ids of the other schools a bus is assigned to, sorted"""
+        return sorted(self.schools_of_bus(bus_id) - {school_id})
+
+    def shared_buses(self):
+        """Map each bus assigned to more than one school to its school ids"""
+        self.ensure_built()
+        with self._lock:
+            return {bus_id: frozenset(schools)
+                    for bus_id, schools in self._schools_by_bus.items() if len(schools) > 1}
+
+
+ASSIGNMENTS = AssignmentIndex()
+
+
+def fetch_school_assignments(school_id):
+    """Return the buses actively assigned to a school"""
+    rows = connect().execute("""
+        SELECT a.id, b.id AS bus_id, b.bus_number AS number, b.bus_type AS type,
+               b.capacity,
+               COALESCE((SELECT d.name FROM drivers d WHERE d.bus_id = b.id
+                         ORDER BY d.id LIMIT 1), '') AS driver,
+               a.assigned_date, a.status
+        FROM assignments a
+        JOIN buses b ON b.id = a.bus_id
+        WHERE a.school_id = ? AND a.status = 'Active'
+        ORDER BY b.bus_number
+    """, (school_id,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _bus_id(conn, bus_number):
+    row = conn.execute(
+        "SELECT id FROM buses WHERE bus_number = ?", (bus_number,)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Bus {bus_number} does not exist")
+    return row[0]
+
+
+def assign_bus_to_school(school_id, bus_number, transfer=False, from_schools=None):
+    """
+    Assign a bus to a school and return the assignment id.
+
+    With transfer=True the bus's assignments to other schools (only those
+    in `from_schools`, if given) are removed in the same transaction;
+    otherwise it serves both.
+    """
+    connect()
+    with transaction() as conn:
+        bus_id = _bus_id(conn, bus_number)
+        if transfer:
+            others = conn.execute(
+                "SELECT id, school_id FROM assignments"
+                " WHERE bus_id = ? AND school_id != ? AND status = 'Active'",
+                (bus_id, school_id)
+            ).fetchall()
+            for other in others:
+                if from_schools is not None and other['school_id'] not in from_schools:
+                    continue
+                conn.execute("DELETE FROM assignments WHERE id = ?", (other['id'],))
+                publish('assignment', other['id'], DELETE)
+                publish('school', other['school_id'], UPDATE)
+
+        return _assign(conn, school_id, bus_id)
+
+
+def assign_buses(pairs):
+    """
+    Assign each (school_id, bus_id) pair in one transaction and return the
+    assignment ids. Nothing is assigned if any bus or school is missing.
+    """
+    connect()
+    with transaction() as conn:
+        return [_assign(conn, school_id, bus_id) for school_id, bus_id in pairs]
+
+
+def _assign(conn, school_id, bus_id):
+    existing = conn.execute(
+        "SELECT id FROM assignments WHERE bus_id = ? AND school_id = ?",
+        (bus_id, school_id)
+    ).fetchone()
+
+    today = datetime.date.today().isoformat()
+    if existing:
+        assignment_id = existing[0]
+        conn.execute(
+            "UPDATE assignments SET status = 'Active', assigned_date = ? WHERE id = ?",
+            (today, assignment_id)
+        )
+        publish('assignment', assignment_id, UPDATE)
+    else:
+        assignment_id = conn.execute(
+            "INSERT INTO assignments (bus_id, school_id, assigned_date) VALUES (?, ?, ?)",
+            (bus_id, school_id, today)
+        ).lastrowid
+        publish('assignment', assignment_id, INSERT)
+
+    publish('school', school_id, UPDATE)
+    publish('bus', bus_id, UPDATE)
+    return assignment_id
+
+
+def remove_bus_from_school(school_id, bus_number):
+    """Remove a bus's assignment to a school"""
+    connect()
+    with transaction() as conn:
+        bus_id = _bus_id(conn, bus_number)
+        row = conn.execute(
+            "SELECT id FROM assignments WHERE bus_id = ? AND school_id = ?",
+            (bus_id, school_id)
+        ).fetchone()
+        if row is None:
+            return
+
+        conn.execute("DELETE FROM assignments WHERE id = ?", (row[0],))
+        publish('assignment', row[0], DELETE)
+        publish('school', school_id, UPDATE)
+        publish('bus', bus_id, UPDATE)
@@ -0,0 +1,206 @@
+"""
+In-memory bitmap indexes over low-cardinality columns.
+
+A BitmapIndex keeps one bitmap per distinct value of each indexed column,
+with bit n set when the row with id n has that value. Bitmaps are plain
+Python ints, so combining filters is a few big-integer AND/OR operations
+however many rows there are:
+
+    index.match(status="Active", bus_type=["AC", "Mini"])
+
+ANDs the columns together and ORs the values given for one column.
+
+TableIndex fills a BitmapIndex from a query on first use and keeps it up
+to date from the change events in models/events.py, so the list filters
+in models/drivers.py, buses.py and schools.py can resolve status, type,
+city and similar combos without scanning the table.
+"""
+import threading
+
+from models import events
+from models.filters import ALL
+
+
+def is_active(value):
+    """True if a filter value restricts anything (same rule as Filter.equals)"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return True
+    return bool(value) and value != ALL
+
+
+def ids(bitmap):
+    """Return the row ids whose bits are set, in ascending order"""
+    # One pass over the binary digits, least significant bit first
+    bits = bin(bitmap)[:1:-1]
+    return [row_id for row_id, bit in enumerate(bits) if bit == "1"]
+
+
+def bitmap_of(row_ids):
+    """Return the bitmap with the bits of `row_ids` set"""
+    # OR-ing into an int copies the whole bitmap for every id; set the
+    # bits in a byte buffer and convert it once instead
+    row_ids = list(row_ids)
+    if not row_ids:
+        return 0
+    buffer = bytearray(max(row_ids) // 8 + 1)
+    for row_id in row_ids:
+        buffer[row_id >> 3] |= 1 << (row_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def has(bitmap, row_id):
+    return bool(bitmap >> row_id & 1)
+
+
+class BitmapIndex:
+    """One bitmap per distinct value of each column, keyed by row id"""
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self._bitmaps = {column: {} for column in self.columns}
+        self._rows = {}
+        self.all = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def clear(self):
+        with self._lock:
+            for bitmaps in self._bitmaps.values():
+                bitmaps.clear()
+            self._rows.clear()
+            self.all = 0
+
+    def add(self, row_id, values):
+        """Index a row (dict or sqlite3.Row), replacing its previous values"""
+        with self._lock:
+            self.remove(row_id)
+            row = tuple(values[column] for column in self.columns)
+            bit = 1 << row_id
+            for column, value in zip(self.columns, row):
+                bitmaps = self._bitmaps[column]
+                bitmaps[value] = bitmaps.get(value, 0) | bit
+            self._rows[row_id] = row
+            self.all |= bit
+
+    def add_many(self, rows):
+        """Index many (row_id, values) pairs, building each bitmap once"""
+        with self._lock:
+            grouped = {column: {} for column in self.columns}
+            for row_id, values in rows:
+                self.remove(row_id)
+                row = tuple(values[column] for column in self.columns)
+                for column, value in zip(self.columns, row):
+                    grouped[column].setdefault(value, []).append(row_id)
+                self._rows[row_id] = row
+            for column, by_value in grouped.items():
+                bitmaps = self._bitmaps[column]
+                for value, row_ids in by_value.items():
+                    bitmaps[value] = bitmaps.get(value, 0) | bitmap_of(row_ids)
+            self.all = bitmap_of(self._rows)
+
+    def remove(self, row_id):
+        with self._lock:
+            row = self._rows.pop(row_id, None)
+            if row is None:
+                return
+            mask = ~(1 << row_id)
+            for column, value in zip(self.columns, row):
+                bitmaps = self._bitmaps[column]
+                bitmap = bitmaps[value] & mask
+                if bitmap:
+                    bitmaps[value] = bitmap
+                else:
+                    del bitmaps[value]
+            self.all &= mask
+
+    def values(self, column):
+        """Return the distinct values currently present in a column"""
+        with self._lock:
+            return sorted(self._bitmaps[column], key=str)
+
+    def values_where(self, column, predicate):
+        """Return the values of a column for which predicate(value) is true"""
+        return [value for value in self.values(column) if predicate(value)]
+
+    def bitmap(self, column, values):
+        """OR of the bitmaps for one value or a list of values"""
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            values = [values]
+        bitmaps = self._bitmaps[column]
+        result = 0
+        for value in values:
+            result |= bitmaps.get(value, 0)
+        return result
+
+    def match(self, **criteria):
+        """
+        Return the bitmap of rows matching every criterion.
+
+        Each criterion is a value or a list of values for one column;
+        None, empty and 'All' are ignored, as in Filter.equals.
+        """
+        with self._lock:
+            result = self.all
+            for column, value in criteria.items():
+                if is_active(value):
+                    result &= self.bitmap(column, value)
+            return result
+
+
+class TableIndex(BitmapIndex):
+    """
+    A BitmapIndex over one database table, kept current by change events.
+
+    `select` returns an `id` column plus one column per indexed column;
+    `id_column` is the expression used to re-read a single row.
+    """
+
+    def __init__(self, entity, columns, select, id_column, connect):
+        super().__init__(columns)
+        self.entity = entity
+        self.select = select
+        self.id_column = id_column
+        self.connect = connect
+        self._built = False
+        events.subscribe(self._on_change)
+
+    def ensure_built(self):
+        with self._lock:
+            if self._built:
+                return
+            self.add_many((row['id'], row) for row in self.connect().execute(self.select))
+            self._built = True
+
+    def _on_change(self, entity, entity_id, operation):
+        with self._lock:
+            if entity != self.entity or not self._built:
+                return
+            if operation == events.DELETE:
+                self.remove(entity_id)
+                return
+            row = self.connect().execute(
+                f"{self.select} WHERE {self.id_column} = ?", (entity_id,)
+            ).fetchone()
+            if row is None:
+                self.remove(entity_id)
+            else:
+                self.add(entity_id, row)
+
+    def match(self, **criteria):
+        self.ensure_built()
+        return super().match(**criteria)
+
+    def filter_ids(self, row_ids=None, **criteria):
+        """
+        Resolve the active criteria to a sorted id list, intersected with
+        `row_ids` if given. Returns `row_ids` unchanged when no criterion
+        is active, so it can go straight to Filter.one_of().
+        """
+        if not any(is_active(value) for value in criteria.values()):
+            return row_ids
+        bitmap = self.match(**criteria)
+        if row_ids is not None:
+            bitmap &= bitmap_of(row_ids)
+        return ids(bitmap)
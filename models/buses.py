@@ -0,0 +1,256 @@
+"""
+Bus and insurance policy queries.
+
+Rows come back as plain dicts with the same keys the bus pages used when
+the data was held in MOCK_BUSES, so the widgets did not need to change.
+"""
+import datetime
+import re
+
+from models.bitmap_index import TableIndex
+from models.db_connection import transaction
+from models.events import publish, INSERT, UPDATE, DELETE
+from models.expiry_index import ExpiryIndex
+from models.filters import Filter
+from models.insurance_snapshot import STATUS_LABELS, snapshot
+from models.schema import connect
+
+# Each bus is joined to its most recent policy; days_remaining and
+# insurance_status come from today's insurance snapshot.
+BUS_SELECT = """
+    SELECT b.id, b.registration_number, b.bus_number, b.model, b.bus_type,
+           b.capacity, b.year, b.color, b.status,
+           COALESCE(p.id, 0) AS policy_id,
+           COALESCE(p.policy_number, '') AS policy_number,
+           COALESCE(p.provider, '') AS provider,
+           COALESCE(p.coverage_amount, 0) AS coverage_amount,
+           COALESCE(p.premium_amount, 0) AS premium_amount,
+           COALESCE(p.start_date, '') AS start_date,
+           COALESCE(p.expiry_date, '') AS expiry_date,
+           COALESCE((SELECT d.name FROM drivers d WHERE d.bus_id = b.id
+                     ORDER BY d.id LIMIT 1), '') AS driver_name
+    FROM buses b
+    LEFT JOIN insurance_policies p ON p.id = (
+        SELECT id FROM insurance_policies
+        WHERE bus_id = b.id
+        ORDER BY expiry_date DESC
+        LIMIT 1
+    )
+"""
+
+# Bitmaps behind the status filter combo. Insurance status changes with
+# the date, so it is filtered through the insurance snapshot instead.
+BUS_INDEX = TableIndex('bus', ["status", "bus_type"], """
+    SELECT b.id, b.status, b.bus_type FROM buses b
+""", "b.id", connect)
+
+
+# Buses by the expiry date of their current policy
+POLICY_EXPIRY = ExpiryIndex('bus', """
+    SELECT b.id, p.expiry_date AS expiry
+    FROM buses b
+    JOIN insurance_policies p ON p.id = (
+        SELECT id FROM insurance_policies
+        WHERE bus_id = b.id
+        ORDER BY expiry_date DESC
+        LIMIT 1
+    )
+""", "b.id", connect)
+
+# "-R2025" or "-R2025-2" at the end of a renewed policy's number
+RENEWAL_SUFFIX = re.compile(r"-R\d{4}(-\d+)?$")
+
+
+def _to_bus(row, insurance):
+    bus = dict(row)
+    bus['insurance_status'] = insurance.status_of(bus['id'])
+    bus['days_remaining'] = insurance.days_remaining(bus['id']) or 0
+    return bus
+
+
+def fetch_buses(search="", status=None, insurance=None, ids=None,
+                insured_only=False, expiring_from=None, expiring_to=None,
+                limit=None, offset=0, after=None):
+    """
+    Return buses with their current insurance policy, ordered by bus
+    number or by relevance when searching.
+
+    `search` is matched against the full-text index, `status` is the bus
+    status and `insurance` one of the insurance snapshot's STATUS_LABELS
+    ('All' or empty means no filter). Pass `ids` to fetch only those buses,
+    `insured_only` to skip buses without a policy,
+    `expiring_from`/`expiring_to` to keep buses whose policy expires in
+    that range (either may be None) and `limit`/`offset` to fetch one
+    page. Passing the last bus of the previous page as `after` seeks past
+    it instead of skipping `offset` rows.
+    """
+    ids = POLICY_EXPIRY.filter_ids(ids, expiring_from, expiring_to)
+    insurance_today = snapshot()
+    if insurance in STATUS_LABELS:
+        with_status = insurance_today.ids_with_status(insurance)
+        ids = with_status if ids is None else sorted(set(ids).intersection(with_status))
+    ids = BUS_INDEX.filter_ids(ids, status=status)
+    query = (Filter("b.bus_number")
+             .search("buses_fts", "b.id", search)
+             .one_of("b.id", ids)
+             .page(limit, offset, after and (after['bus_number'],)))
+    if insured_only:
+        query.condition("p.id IS NOT NULL")
+    rows = connect().execute(query.sql(BUS_SELECT), query.params).fetchall()
+    return [_to_bus(row, insurance_today) for row in rows]
+
+
+def fetch_insurance_counts():
+    """Return the number of insured buses in total and per status label"""
+    return snapshot().counts()
+
+
+def fetch_bus_numbers():
+    """Return all bus numbers in order, for combo boxes"""
+    rows = connect().execute(
+        "SELECT bus_number FROM buses ORDER BY bus_number"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def fetch_assignable_buses(bus_id=None):
+    """
+    Return buses as shown on the school assignment tab.
+
+    Status is Maintenance for buses in the workshop, Assigned for buses
+    with an active school assignment and Available otherwise. Pass
+    `bus_id` to fetch a single bus.
+    """
+    query = Filter("b.bus_number").equals("b.id", bus_id)
+    rows = connect().execute(query.sql("""
+        SELECT b.id, b.bus_number AS number, b.bus_type AS type, b.capacity,
+               COALESCE((SELECT d.name FROM drivers d WHERE d.bus_id = b.id
+                         ORDER BY d.id LIMIT 1), '') AS driver,
+               CASE
+                   WHEN b.status = 'Maintenance' THEN 'Maintenance'
+                   WHEN EXISTS (SELECT 1 FROM assignments a
+                                WHERE a.bus_id = b.id AND a.status = 'Active')
+                       THEN 'Assigned'
+                   ELSE 'Available'
+               END AS status
+        FROM buses b
+    """), query.params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def set_bus_status(bus_ids, status):
+    """Set the status of many buses in one transaction"""
+    connect()
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE buses SET status = ? WHERE id = ?",
+            [(status, bus_id) for bus_id in bus_ids]
+        )
+        for bus_id in bus_ids:
+            publish('bus', bus_id, UPDATE)
+
+
+def fetch_policies(policy_ids):
+    """Return the given insurance policies with their bus, by expiry date"""
+    query = Filter("p.expiry_date, p.id").one_of("p.id", policy_ids)
+    rows = connect().execute(query.sql("""
+        SELECT p.id, b.registration_number, b.bus_number, p.policy_number,
+               p.provider, p.coverage_amount, p.premium_amount,
+               p.start_date, p.expiry_date, p.status
+        FROM insurance_policies p
+        JOIN buses b ON b.id = p.bus_id
+    """), query.params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _one_year_after(day):
+    try:
+        return day.replace(year=day.year + 1)
+    except ValueError:
+        # 29 February
+        return day.replace(year=day.year + 1, day=28)
+
+
+def _renewal_number(conn, policy_number, year):
+    """
+    The first free policy number of the form BASE-R<year>, BASE-R<year>-2,
+    ... where BASE is `policy_number` without its renewal suffix
+    """
+    base = RENEWAL_SUFFIX.sub("", policy_number)
+    number = f"{base}-R{year}"
+    sequence = 1
+    while conn.execute("SELECT 1 FROM insurance_policies WHERE policy_number = ?",
+                       (number,)).fetchone():
+        sequence += 1
+        number = f"{base}-R{year}-{sequence}"
+    return number
+
+
+def renew_policies(policy_ids):
+    """
+    Renew policies for another year on the same terms.
+
+    Each renewal is a new policy for the same bus starting the day after
+    the old one expires (or today, if it has already lapsed). Policies
+    already renewed are skipped. Returns the number of policies renewed.
+    """
+    connect()
+    today = datetime.date.today()
+    with transaction() as conn:
+        query = (Filter("p.id").one_of("p.id", policy_ids)
+                 .condition("p.status != 'Renewed'"))
+        policies = conn.execute(query.sql(
+            "SELECT p.* FROM insurance_policies p"
+        ), query.params).fetchall()
+
+        for policy in policies:
+            expiry = datetime.date.fromisoformat(policy['expiry_date'])
+            start = max(today, expiry + datetime.timedelta(days=1))
+            end = _one_year_after(start) - datetime.timedelta(days=1)
+            number = _renewal_number(conn, policy['policy_number'], start.year)
+            conn.execute("""
+                INSERT INTO insurance_policies
+                    (bus_id, policy_number, provider, coverage_amount,
+                     premium_amount, start_date, expiry_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (policy['bus_id'], number, policy['provider'],
+                  policy['coverage_amount'], policy['premium_amount'],
+                  start.isoformat(), end.isoformat()))
+            conn.execute(
+                "UPDATE insurance_policies SET status = 'Renewed' WHERE id = ?",
+                (policy['id'],)
+            )
+            publish('bus', policy['bus_id'], UPDATE)
+    return len(policies)
+
+
+def schedule_maintenance(bus_id, start_at, end_at, description=""):
+    """
+    Book a bus into the workshop from `start_at` to `end_at`
+    ('YYYY-MM-DD HH:MM') and return the window id.
+    """
+    if end_at <= start_at:
+        raise ValueError("Maintenance must end after it starts")
+    connect()
+    with transaction() as conn:
+        window_id = conn.execute("""
+            INSERT INTO maintenance_windows (bus_id, start_at, end_at, description)
+            VALUES (?, ?, ?, ?)
+        """, (bus_id, start_at, end_at, description)).lastrowid
+        publish('maintenance', window_id, INSERT)
+        publish('bus', bus_id, UPDATE)
+    return window_id
+
+
+def cancel_maintenance(window_id):
+    """Remove a maintenance window"""
+    connect()
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT bus_id FROM maintenance_windows WHERE id = ?", (window_id,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM maintenance_windows WHERE id = ?", (window_id,))
+        publish('maintenance', window_id, DELETE)
+        publish('bus', row['bus_id'], UPDATE)
@@ -0,0 +1,22 @@
+"""
+Summary counts for the dashboard's System Overview cards.
+"""
+from models.schema import connect
+
+
+def fetch_dashboard_counts():
+    """Return the live counts shown on the dashboard, keyed by card title"""
+    row = connect().execute("""
+        SELECT (SELECT COUNT(*) FROM buses) AS buses,
+               (SELECT COUNT(*) FROM drivers WHERE status = 'Active') AS drivers,
+               (SELECT COUNT(*) FROM schools) AS schools,
+               (SELECT COUNT(*) FROM schools WHERE contract_status = 'Active') AS contracts,
+               (SELECT COUNT(*) FROM users) AS users
+    """).fetchone()
+    return {
+        "Total Buses": row["buses"],
+        "Active Drivers": row["drivers"],
+        "Registered Schools": row["schools"],
+        "Active Contracts": row["contracts"],
+        "System Users": row["users"],
+    }
@@ -0,0 +1,226 @@
+"""
+Shared SQLite connection manager.
+
+Every module that touches the database goes through this file instead of
+calling sqlite3.connect() directly. Connections are opened once per
+(thread, database file) and kept open for the lifetime of that thread, so
+the cost of opening the file and applying PRAGMAs is paid only once.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, "database", "bus_management.db")
+
+# PRAGMAs applied to every new connection
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",      # ~16 MB page cache
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped I/O
+    "PRAGMA busy_timeout = 5000",
+]
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()
+_registry_lock = threading.RLock()
+_open_connections = []
+_initialized = set()
+
+
+def _resolve(db_path):
+    """Normalise a database path so the same file always maps to one key"""
+    if db_path is None:
+        db_path = DEFAULT_DB_PATH
+    if db_path == ":memory:":
+        return db_path
+    return os.path.abspath(db_path)
+
+
+def database_path(db_path=None):
+    """Return the absolute path of a database file (the default if None)"""
+    return _resolve(db_path)
+
+
+def _thread_connections():
+    if not hasattr(_local, "connections"):
+        _local.connections = {}
+        _local.depth = {}
+        _local.after_commit = {}
+    return _local.connections
+
+
+def _open(path):
+    """Open and configure a new connection"""
+    if path != ":memory:":
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    # isolation_level=None puts the driver in autocommit mode; transactions
+    # are opened explicitly by transaction() below.
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+    with _registry_lock:
+        _open_connections.append(conn)
+    return conn
+
+
+def get_connection(db_path=None):
+    """Return the long-lived connection for this thread and database file"""
+    path = _resolve(db_path)
+    connections = _thread_connections()
+    conn = connections.get(path)
+    if conn is None:
+        conn = _open(path)
+        connections[path] = conn
+    return conn
+
+
+@contextmanager
+def transaction(db_path=None, immediate=False):
+    """
+    Run a block inside a transaction on the shared connection.
+
+    Commits when the block finishes and rolls back if it raises. Nested
+    calls on the same thread become SAVEPOINTs, so helpers can open their
+    own transaction without caring whether the caller already has one.
+    Use immediate=True to take the write lock up front.
+    """
+    path = _resolve(db_path)
+    conn = get_connection(path)
+    depth = _local.depth.get(path, 0)
+
+    if depth == 0:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    else:
+        conn.execute(f"SAVEPOINT sp_{depth}")
+    _local.depth[path] = depth + 1
+
+    pending = _local.after_commit.setdefault(path, [])
+
+    try:
+        yield conn
+    except BaseException:
+        if depth == 0:
+            conn.execute("ROLLBACK")
+        else:
+            conn.execute(f"ROLLBACK TO sp_{depth}")
+            conn.execute(f"RELEASE sp_{depth}")
+        # Drop callbacks registered inside the block that was rolled back
+        pending[:] = [(level, cb) for level, cb in pending if level <= depth]
+        raise
+    else:
+        if depth == 0:
+            conn.execute("COMMIT")
+        else:
+            conn.execute(f"RELEASE sp_{depth}")
+    finally:
+        _local.depth[path] = depth
+
+    if depth == 0:
+        callbacks = [cb for _level, cb in pending]
+        pending.clear()
+        # The transaction has committed; a failing callback must not make
+        # the write look failed or keep the other callbacks from running
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                log.exception("Commit callback %r failed", callback)
+
+
+def on_commit(callback, db_path=None):
+    """
+    Run callback once the current transaction on this thread commits.
+
+    Callbacks registered inside a block that rolls back are dropped. With
+    no transaction open the callback runs immediately.
+    """
+    path = _resolve(db_path)
+    _thread_connections()
+    depth = _local.depth.get(path, 0)
+    if depth == 0:
+        callback()
+    else:
+        _local.after_commit.setdefault(path, []).append((depth, callback))
+
+
+def initialize_once(initializer, db_path=None):
+    """
+    Run a schema initializer once per process for a database file.
+
+    Later calls return immediately, so forms and list windows can call
+    their initialize function on every open without re-running DDL.
+    """
+    path = _resolve(db_path)
+    key = (path, initializer.__module__, initializer.__qualname__)
+    if key in _initialized:
+        return
+
+    with _registry_lock:
+        if key in _initialized:
+            return
+        with transaction(path) as conn:
+            initializer(conn)
+        _initialized.add(key)
+
+
+def backup_database(dest_path, db_path=None, pages=256, progress=None):
+    """
+    Copy a database to dest_path using SQLite's online backup API.
+
+    The copy is taken in steps of `pages` pages so other connections keep
+    working meanwhile. progress(copied, total) is called after each step;
+    if it raises, the backup stops and the partial file is removed.
+    """
+    source = get_connection(db_path)
+    directory = os.path.dirname(os.path.abspath(dest_path))
+    os.makedirs(directory, exist_ok=True)
+
+    def on_step(_status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+
+    dest = sqlite3.connect(dest_path)
+    try:
+        source.backup(dest, pages=pages, progress=on_step)
+    except BaseException:
+        dest.close()
+        os.remove(dest_path)
+        raise
+    dest.close()
+    return dest_path
+
+
+def close_connection(db_path=None):
+    """Close this thread's connection to a database file"""
+    path = _resolve(db_path)
+    conn = _thread_connections().pop(path, None)
+    if conn is not None:
+        with _registry_lock:
+            if conn in _open_connections:
+                _open_connections.remove(conn)
+        conn.close()
+
+
+def close_all():
+    """Close every connection opened by any thread (used on shutdown)"""
+    with _registry_lock:
+        connections = list(_open_connections)
+        _open_connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _thread_connections().clear()
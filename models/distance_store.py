@@ -0,0 +1,280 @@
+"""
+Pairwise distances and travel times between depots, schools and stops,
+kept on disk.
+
+Every location is a node keyed by kind and id ('depot:1', 'school:3',
+'stop:12'). Node n's distances are row n of a square float32 matrix of
+km, and its travel times row n of a matrix of minutes at
+AVERAGE_SPEED_KMPH. Both are memory-mapped from files next to the
+database (bus_management.distances.f32 and .min.f32), and the node list
+is kept beside them in a .json file. Opening the store costs nothing,
+however large the matrices.
+
+The store is brought up to date lazily. On first use, and after a
+depot, school or stop event, it compares the locations in the database
+with its nodes. New or moved nodes get their rows and columns computed;
+the rest of the matrices is never touched. Nodes whose location was
+deleted are dropped by compacting the files. Depots come first, then
+schools, then stops. A school without coordinates is placed at the
+centre of its city when the city is in CITY_CENTRES.
+
+Lookups take lists of keys and return NumPy arrays, in km or, with
+minutes=True, in minutes:
+
+    DISTANCES.matrix(['school:1', 'stop:4', 'stop:9'])
+    DISTANCES.between(['depot:1'], stop_keys, minutes=True)
+    DISTANCES.legs(['stop:4', 'stop:9', 'school:1'])
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from models import events
+from models.db_connection import database_path
+from models.schema import connect
+
+EARTH_RADIUS_KM = 6371.0
+
+# Average road speed of a bus in town, which turns km into minutes
+AVERAGE_SPEED_KMPH = 25
+
+# Rows reserved when the files are created; they double when full
+INITIAL_CAPACITY = 256
+
+# Rows copied at a time when the files are grown or compacted
+COPY_ROWS = 1024
+
+# File suffixes of the km and the minutes matrices
+MATRIX_FILES = (".f32", ".min.f32")
+
+# City centres (latitude, longitude) for schools without coordinates;
+# there is no geocoder, so the address itself is not looked up
+CITY_CENTRES = {
+    'Delhi': (28.6139, 77.2090),
+    'New Delhi': (28.6139, 77.2090),
+    'Gurgaon': (28.4595, 77.0266),
+    'Gurugram': (28.4595, 77.0266),
+    'Noida': (28.5355, 77.3910),
+    'Faridabad': (28.4089, 77.3178),
+    'Ghaziabad': (28.6692, 77.4538),
+}
+
+LOCATION_ENTITIES = ('depot', 'school', 'stop')
+
+
+def node_key(kind, row_id):
+    return f"{kind}:{row_id}"
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle km between points (broadcasts over arrays)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64))
+                              for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def locations(conn):
+    """Return (key, latitude, longitude) for every locatable depot, school and stop"""
+    rows = [(node_key('depot', r['id']), r['latitude'], r['longitude'])
+            for r in conn.execute("SELECT id, latitude, longitude FROM depots ORDER BY id")]
+    for school in conn.execute("SELECT id, city, latitude, longitude FROM schools ORDER BY id"):
+        point = ((school['latitude'], school['longitude'])
+                 if school['latitude'] is not None else CITY_CENTRES.get(school['city']))
+        if point is not None:
+            rows.append((node_key('school', school['id']), *point))
+    rows.extend((node_key('stop', r['id']), r['latitude'], r['longitude'])
+                for r in conn.execute("SELECT id, latitude, longitude FROM stops ORDER BY id"))
+    return rows
+
+
+class DistanceStore:
+    """Memory-mapped float32 distance and travel time matrices over location nodes"""
+
+    def __init__(self, connect=connect, path=None):
+        self.connect = connect
+        self._path = path
+        self._lock = threading.RLock()
+        self._synced = False
+        self._matrix = None
+        self._minutes = None
+        self._capacity = 0
+        self._keys = []
+        self._points = np.empty((0, 2))
+        self._index = {}
+        events.subscribe(self._on_change)
+
+    @property
+    def path(self):
+        """Base path of the store files (without extension)"""
+        if self._path:
+            return self._path
+        return os.path.splitext(database_path())[0] + ".distances"
+
+    def __len__(self):
+        self.sync()
+        return len(self._keys)
+
+    def _on_change(self, entity, _entity_id, _operation):
+        if entity in LOCATION_ENTITIES:
+            self._synced = False
+
+    def _open(self):
+        """Map the matrix files and read the node list, if they exist"""
+        try:
+            with open(self.path + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            self._capacity = meta['capacity']
+            self._map()
+            self._set_nodes(meta['keys'], meta['points'])
+        except (OSError, ValueError, KeyError):
+            self._matrix = self._minutes = None
+            self._create(INITIAL_CAPACITY)
+            self._set_nodes([], [])
+
+    def _map(self):
+        self._matrix, self._minutes = (
+            np.memmap(self.path + suffix, dtype=np.float32, mode="r+",
+                      shape=(self._capacity, self._capacity))
+            for suffix in MATRIX_FILES
+        )
+
+    def _create(self, capacity, keep=()):
+        """
+        Create the matrix files with room for `capacity` nodes, carrying
+        over the old nodes at positions `keep` as nodes 0, 1, ...
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        for suffix, old in zip(MATRIX_FILES, (self._matrix, self._minutes)):
+            temp = self.path + suffix + ".tmp"
+            matrix = np.memmap(temp, dtype=np.float32, mode="w+", shape=(capacity, capacity))
+            for start in range(0, len(keep), COPY_ROWS):
+                rows = keep[start:start + COPY_ROWS]
+                matrix[start:start + len(rows), :len(keep)] = old[rows][:, keep]
+            matrix.flush()
+            del matrix
+        self._matrix = self._minutes = None
+        for suffix in MATRIX_FILES:
+            os.replace(self.path + suffix + ".tmp", self.path + suffix)
+        self._capacity = capacity
+        self._map()
+
+    def _set_nodes(self, keys, points):
+        self._keys = list(keys)
+        self._points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._index = {key: n for n, key in enumerate(self._keys)}
+
+    def _save_nodes(self):
+        temp = self.path + ".json.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({'capacity': self._capacity, 'keys': self._keys,
+                       'points': self._points.tolist()}, f)
+        os.replace(temp, self.path + ".json")
+
+    def sync(self):
+        """Drop deleted locations, add new ones and recompute moved ones"""
+        with self._lock:
+            if self._synced:
+                return
+            if self._matrix is None:
+                self._open()
+            current = locations(self.connect())
+
+            found = {key for key, _latitude, _longitude in current}
+            keep = [n for n, key in enumerate(self._keys) if key in found]
+            if len(keep) < len(self._keys):
+                self._compact(keep)
+
+            keys = list(self._keys)
+            points = self._points.tolist()
+            changed = []
+            for key, latitude, longitude in current:
+                n = self._index.get(key)
+                if n is None:
+                    changed.append(len(keys))
+                    keys.append(key)
+                    points.append([latitude, longitude])
+                elif points[n] != [latitude, longitude]:
+                    points[n] = [latitude, longitude]
+                    changed.append(n)
+
+            if changed:
+                self._update(keys, points, changed)
+            self._synced = True
+
+    def _compact(self, keep):
+        """Rewrite the files with only the nodes at positions `keep`"""
+        # Without a node list the store is rebuilt, so a crash part way
+        # through never pairs the old keys with the moved rows
+        try:
+            os.remove(self.path + ".json")
+        except FileNotFoundError:
+            pass
+        self._create(self._capacity, keep)
+        self._set_nodes([self._keys[n] for n in keep], self._points[keep])
+        self._save_nodes()
+
+    def _update(self, keys, points, changed):
+        """Compute the rows and columns of the `changed` nodes"""
+        count = len(keys)
+        if count > self._capacity:
+            capacity = self._capacity
+            while capacity < count:
+                capacity *= 2
+            self._create(capacity, range(len(self._keys)))
+
+        points = np.asarray(points, dtype=np.float64)
+        rows = np.asarray(changed)
+        block = haversine(points[rows, 0][:, None], points[rows, 1][:, None],
+                          points[None, :, 0], points[None, :, 1]).astype(np.float32)
+        times = block * np.float32(60 / AVERAGE_SPEED_KMPH)
+        for matrix, values in ((self._matrix, block), (self._minutes, times)):
+            matrix[rows, :count] = values
+            matrix[:count, rows] = values.T
+            matrix.flush()
+        # The node list is written last, so a crash never exposes a
+        # node whose distances were not stored
+        self._set_nodes(keys, points)
+        self._save_nodes()
+
+    def _values(self, minutes):
+        return self._minutes if minutes else self._matrix
+
+    def index(self, keys):
+        """Matrix positions of `keys`; raises KeyError for unknown keys"""
+        self.sync()
+        return np.fromiter((self._index[key] for key in keys), dtype=np.int64, count=len(keys))
+
+    def has(self, key):
+        self.sync()
+        return key in self._index
+
+    def matrix(self, keys, minutes=False):
+        """Square float32 matrix of the distances (or minutes) between `keys`"""
+        rows = self.index(keys)
+        with self._lock:
+            return np.asarray(self._values(minutes)[np.ix_(rows, rows)])
+
+    def between(self, from_keys, to_keys, minutes=False):
+        """Distances (or minutes) from each of `from_keys` (rows) to each of `to_keys`"""
+        rows, cols = self.index(from_keys), self.index(to_keys)
+        with self._lock:
+            return np.asarray(self._values(minutes)[np.ix_(rows, cols)])
+
+    def legs(self, keys, minutes=False):
+        """Distance (or minutes) of each consecutive pair along a path of keys"""
+        nodes = self.index(keys)
+        with self._lock:
+            return np.asarray(self._values(minutes)[nodes[:-1], nodes[1:]])
+
+    def close(self):
+        """Unmap the files; the next lookup opens them again"""
+        with self._lock:
+            self._matrix = self._minutes = None
+            self._synced = False
+
+
+DISTANCES = DistanceStore()
@@ -0,0 +1,105 @@
+"""
+Driver queries for the driver management pages.
+
+Rows are returned as dicts shaped like the old MOCK_DRIVERS entries, with
+bus_assigned holding the bus number rather than the bus id.
+"""
+from models.bitmap_index import TableIndex
+from models.db_connection import transaction
+from models.events import publish, UPDATE
+from models.expiry_index import ExpiryIndex
+from models.filters import Filter
+from models.schema import connect
+
+DRIVER_SELECT = """
+    SELECT d.id, d.name, d.phone, COALESCE(d.email, '') AS email,
+           d.license_number, d.license_expiry,
+           CAST(julianday(d.license_expiry)
+                - julianday('now', 'localtime', 'start of day') AS INTEGER)
+                AS license_days_remaining,
+           d.status,
+           COALESCE(d.salary, 0) AS salary, d.salary_status,
+           COALESCE(b.bus_number, '') AS bus_assigned, d.joining_date,
+           d.bank_account, d.ifsc_code, d.address, d.emergency_contact,
+           d.experience_years, COALESCE(d.rating, 0) AS rating
+    FROM drivers d
+    LEFT JOIN buses b ON b.id = d.bus_id
+"""
+
+# Bitmaps behind the status and bus filter combos
+DRIVER_INDEX = TableIndex('driver', ["status", "bus_number"], """
+    SELECT d.id, d.status, COALESCE(b.bus_number, '') AS bus_number
+    FROM drivers d
+    LEFT JOIN buses b ON b.id = d.bus_id
+""", "d.id", connect)
+
+# Drivers by licence expiry date
+LICENSE_EXPIRY = ExpiryIndex('driver', """
+    SELECT d.id, d.license_expiry AS expiry FROM drivers d
+""", "d.id", connect)
+
+
+def fetch_drivers(search="", status=None, bus_number=None, ids=None,
+                  expiring_from=None, expiring_to=None, limit=None, offset=0,
+                  after=None):
+    """
+    Return drivers ordered by name, or by relevance when searching.
+
+    `search` is matched against the full-text index; `status` and
+    `bus_number` are exact filters ('All' or empty means no filter).
+    Pass `ids` to check which of those drivers match,
+    `expiring_from`/`expiring_to` to keep licences expiring in that range
+    (either may be None), or `limit`/`offset` to fetch one page. Passing
+    the last driver of the previous page as `after` seeks past it instead
+    of skipping `offset` rows.
+    """
+    ids = LICENSE_EXPIRY.filter_ids(ids, expiring_from, expiring_to)
+    ids = DRIVER_INDEX.filter_ids(ids, status=status, bus_number=bus_number)
+    query = (Filter("d.name, d.id")
+             .search("drivers_fts", "d.id", search)
+             .one_of("d.id", ids)
+             .page(limit, offset, after and (after['name'], after['id'])))
+    rows = connect().execute(query.sql(DRIVER_SELECT), query.params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def assign_bus(driver_id, bus_number):
+    """Assign the bus with `bus_number` to a driver (empty to unassign)"""
+    connect()
+    with transaction() as conn:
+        row = conn.execute(
+            "SELECT bus_id FROM drivers WHERE id = ?", (driver_id,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Driver {driver_id} does not exist")
+        old_bus_id = row[0]
+
+        new_bus_id = None
+        if bus_number:
+            bus = conn.execute(
+                "SELECT id FROM buses WHERE bus_number = ?", (bus_number,)
+            ).fetchone()
+            if bus is None:
+                raise ValueError(f"Bus {bus_number} does not exist")
+            new_bus_id = bus[0]
+
+        conn.execute(
+            "UPDATE drivers SET bus_id = ? WHERE id = ?", (new_bus_id, driver_id)
+        )
+
+        publish('driver', driver_id, UPDATE)
+        # The bus lists show each bus's driver
+        for bus_id in {old_bus_id, new_bus_id} - {None}:
+            publish('bus', bus_id, UPDATE)
+
+
+def set_driver_status(driver_ids, status):
+    """Set the status of many drivers in one transaction"""
+    connect()
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE drivers SET status = ? WHERE id = ?",
+            [(status, driver_id) for driver_id in driver_ids]
+        )
+        for driver_id in driver_ids:
+            publish('driver', driver_id, UPDATE)
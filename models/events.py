@@ -0,0 +1,54 @@
+"""
+Change notifications published by the data layer.
+
+Every write function in models/ publishes one event per affected row as
+(entity, entity_id, operation), e.g. ('driver', 12, 'update'). Events
+are delivered only after the surrounding transaction commits, and are
+dropped if it rolls back, so listeners never see uncommitted changes.
+
+Listeners are called on the thread that committed; GUI code should go
+through frontend/change_notifier.py, which forwards them to the GUI
+thread. The write has already committed when a listener runs, so a
+listener that raises is logged and the remaining listeners still run.
+"""
+import logging
+import threading
+
+from models.db_connection import on_commit
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+log = logging.getLogger(__name__)
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def subscribe(listener):
+    """Call listener(entity, entity_id, operation) for every committed change"""
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def unsubscribe(listener):
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def _dispatch(entity, entity_id, operation):
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(entity, entity_id, operation)
+        except Exception:
+            log.exception("Change listener %r failed on %s %s %s",
+                          listener, entity, entity_id, operation)
+
+
+def publish(entity, entity_id, operation, db_path=None):
+    """Announce a change to one row once the current transaction commits"""
+    on_commit(lambda: _dispatch(entity, entity_id, operation), db_path)
@@ -0,0 +1,123 @@
+"""
+Sorted expiry-date indexes for policies, licences and contracts.
+
+An ExpiryIndex keeps (expiry_date, id) pairs in date order, so the
+questions the morning checks ask are a binary search plus a slice:
+
+    POLICY_EXPIRY.between("2026-01-01", "2026-03-31")
+    POLICY_EXPIRY.expired_as_of(datetime.date.today())
+    POLICY_EXPIRY.next_to_expire(10)
+
+Dates are ISO 'YYYY-MM-DD' strings (date objects are accepted too), which
+sort the same way as the dates they stand for. Like the bitmap indexes in
+models/bitmap_index.py, an ExpiryIndex is loaded from a query on first
+use and kept up to date from the change events in models/events.py.
+"""
+import bisect
+import datetime
+import threading
+
+from models import events
+
+# Sorts after every id, for the upper bound of a date range
+_LAST = float("inf")
+
+
+def _iso(day):
+    return day.isoformat() if isinstance(day, datetime.date) else day
+
+
+class ExpiryIndex:
+    """Record ids ordered by expiry date"""
+
+    def __init__(self, entity, select, id_column, connect):
+        """
+        `select` returns `id` and `expiry` columns; rows with an empty
+        expiry are left out. `id_column` is the expression used to re-read
+        a single row when `entity` changes.
+        """
+        self.entity = entity
+        self.select = select
+        self.id_column = id_column
+        self.connect = connect
+        self._entries = []
+        self._expiry = {}
+        self._built = False
+        self._lock = threading.RLock()
+        events.subscribe(self._on_change)
+
+    def __len__(self):
+        self.ensure_built()
+        return len(self._entries)
+
+    def ensure_built(self):
+        with self._lock:
+            if self._built:
+                return
+            rows = self.connect().execute(self.select).fetchall()
+            self._expiry = {row['id']: row['expiry'] for row in rows if row['expiry']}
+            self._entries = sorted((expiry, row_id) for row_id, expiry in self._expiry.items())
+            self._built = True
+
+    def _set(self, row_id, expiry):
+        old = self._expiry.pop(row_id, None)
+        if old is not None:
+            del self._entries[bisect.bisect_left(self._entries, (old, row_id))]
+        if expiry:
+            bisect.insort(self._entries, (expiry, row_id))
+            self._expiry[row_id] = expiry
+
+    def _on_change(self, entity, entity_id, operation):
+        with self._lock:
+            if entity != self.entity or not self._built:
+                return
+            row = None
+            if operation != events.DELETE:
+                row = self.connect().execute(
+                    f"{self.select} WHERE {self.id_column} = ?", (entity_id,)
+                ).fetchone()
+            self._set(entity_id, row['expiry'] if row else None)
+
+    def expiry_of(self, row_id):
+        """Return the expiry date of a record, or None"""
+        self.ensure_built()
+        return self._expiry.get(row_id)
+
+    def between(self, start=None, end=None):
+        """Ids expiring from `start` to `end` inclusive, soonest first"""
+        self.ensure_built()
+        with self._lock:
+            lo = 0 if start is None else bisect.bisect_left(self._entries, (_iso(start),))
+            hi = (len(self._entries) if end is None
+                  else bisect.bisect_right(self._entries, (_iso(end), _LAST)))
+            return [row_id for _expiry, row_id in self._entries[lo:hi]]
+
+    def expired_as_of(self, day=None):
+        """Ids whose expiry date is before `day` (default today), oldest first"""
+        self.ensure_built()
+        day = _iso(day or datetime.date.today())
+        with self._lock:
+            hi = bisect.bisect_left(self._entries, (day,))
+            return [row_id for _expiry, row_id in self._entries[:hi]]
+
+    def next_to_expire(self, n, as_of=None):
+        """The `n` ids expiring soonest on or after `as_of` (default today)"""
+        self.ensure_built()
+        day = _iso(as_of or datetime.date.today())
+        with self._lock:
+            lo = bisect.bisect_left(self._entries, (day,))
+            return [row_id for _expiry, row_id in self._entries[lo:lo + n]]
+
+    def filter_ids(self, row_ids=None, start=None, end=None):
+        """
+        Ids expiring between `start` and `end`, intersected with `row_ids`
+        if given. Returns `row_ids` unchanged when both bounds are None, so
+        it can go straight to Filter.one_of().
+        """
+        if start is None and end is None:
+            return row_ids
+        expiring = self.between(start, end)
+        if row_ids is None:
+            return expiring
+        wanted = set(row_ids)
+        return [row_id for row_id in expiring if row_id in wanted]
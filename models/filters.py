@@ -0,0 +1,142 @@
+"""
+Helpers for turning list-tab filter widgets into SQL.
+
+A filter is built up as a list of WHERE fragments plus their parameters,
+so every value reaches SQLite as a bound parameter and equality filters
+can use the column indexes. Free-text search goes through the FTS5
+indexes in models/search.py and orders the rows by relevance.
+"""
+import json
+
+from models.search import build_match_query
+
+ALL = "All"
+
+# Longer IN lists are passed as a single JSON parameter
+MAX_INLINE_VALUES = 500
+
+
+class Filter:
+    """Collects JOIN/WHERE clauses, their parameters and the ordering"""
+
+    def __init__(self, order_by):
+        self.joins = []
+        self.join_params = []
+        self.conditions = []
+        self.where_params = []
+        self.order_by = order_by
+        self.ranked = False
+        self.limit = None
+        self.offset = 0
+        self.after = None
+
+    @property
+    def params(self):
+        params = self.join_params + self.where_params
+        if self._seeking():
+            params += list(self.after) + [self.limit]
+        elif self.limit is not None:
+            params += [self.limit, self.offset]
+        return params
+
+    def equals(self, column, value):
+        """Add `column = value` unless the value is empty or 'All'"""
+        if value and value != ALL:
+            self.conditions.append(f"{column} = ?")
+            self.where_params.append(value)
+        return self
+
+    def one_of(self, column, values):
+        """Add `column IN (values)` unless values is None"""
+        if values is not None:
+            values = list(values)
+            if len(values) > MAX_INLINE_VALUES:
+                # Stays within SQLite's bound-parameter limit at any size
+                self.conditions.append(f"{column} IN (SELECT value FROM json_each(?))")
+                self.where_params.append(json.dumps(values))
+                return self
+            placeholders = ", ".join("?" * len(values)) or "NULL"
+            self.conditions.append(f"{column} IN ({placeholders})")
+            self.where_params.extend(values)
+        return self
+
+    def contains(self, columns, text):
+        """
+        Keep rows where any of `columns` contains `text` (case-insensitive).
+
+        For small tables without a search index; blank text adds nothing.
+        """
+        text = (text or "").strip()
+        if text:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            matches = " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns)
+            self.conditions.append(f"({matches})")
+            self.where_params.extend([f"%{escaped}%"] * len(columns))
+        return self
+
+    def condition(self, sql, *params):
+        """Add a raw condition with its parameters"""
+        self.conditions.append(sql)
+        self.where_params.extend(params)
+        return self
+
+    def search(self, fts_table, id_column, text):
+        """
+        Keep only rows whose FTS entry matches `text`, best match first.
+
+        `fts_table` is one of the search index tables and `id_column` the
+        base-table column its rowid mirrors.
+        """
+        query = build_match_query(text)
+        if query:
+            self.joins.append(
+                f" JOIN (SELECT rowid AS match_id, rank AS match_rank"
+                f" FROM {fts_table} WHERE {fts_table} MATCH ?) m"
+                f" ON m.match_id = {id_column}"
+            )
+            self.join_params.append(query)
+            self.order_by = "m.match_rank, " + self.order_by
+            self.ranked = True
+        return self
+
+    def page(self, limit, offset=0, after=None):
+        """
+        Return only `limit` rows (None for all rows).
+
+        `after` holds the ORDER BY values of the last row of the previous
+        page; the page then seeks past that row on the index instead of
+        skipping `offset` rows. Relevance-ordered searches have no such
+        key and always use `offset`.
+        """
+        self.limit = limit
+        self.offset = offset
+        self.after = after
+        return self
+
+    def _seeking(self):
+        return self.limit is not None and self.after is not None and not self.ranked
+
+    def _seek_condition(self):
+        """`(a, b) > (?, ?)` over the ORDER BY columns, `<` if they are descending"""
+        terms = [term.split() for term in self.order_by.split(",")]
+        columns = ", ".join(term[0] for term in terms)
+        descending = {len(term) > 1 and term[1].upper() == "DESC" for term in terms}
+        if len(descending) > 1:
+            raise ValueError(f"Cannot seek on mixed sort directions: {self.order_by}")
+        placeholders = ", ".join("?" * len(terms))
+        return f"({columns}) {'<' if descending.pop() else '>'} ({placeholders})"
+
+    def sql(self, select):
+        """Return `select` with the joins, WHERE clause, ORDER BY and LIMIT added"""
+        conditions = list(self.conditions)
+        if self._seeking():
+            conditions.append(self._seek_condition())
+        where = ""
+        if conditions:
+            where = " WHERE " + " AND ".join(conditions)
+        sql = select + "".join(self.joins) + where + " ORDER BY " + self.order_by
+        if self._seeking():
+            sql += " LIMIT ?"
+        elif self.limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+        return sql
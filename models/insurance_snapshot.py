@@ -0,0 +1,156 @@
+"""
+Fleet-wide insurance status, computed for one day at a time.
+
+Days remaining and the Active/Expiring Soon/Expired label depend on the
+date they are looked at, so they are not stored. snapshot() reads every
+bus's current policy expiry date once, then derives the days remaining
+and the status for the whole fleet in one NumPy pass. The result is
+cached per as-of date. A new day therefore gets a fresh snapshot on first
+use, and the bus list, insurance tracker and statistics cards all read
+the same numbers.
+
+Cached snapshots are patched in place when a bus event arrives (a
+renewed policy, a new bus), so they never go stale between rebuilds.
+"""
+import datetime
+import threading
+
+import numpy as np
+
+from models import events
+from models.schema import connect
+
+EXPIRING_SOON_DAYS = 30
+
+NOT_INSURED = 'Not Insured'
+EXPIRED = 'Expired'
+EXPIRING_SOON = 'Expiring Soon'
+ACTIVE = 'Active'
+
+# Index into STATUS_LABELS is the status code stored in the snapshot
+STATUS_LABELS = (NOT_INSURED, EXPIRED, EXPIRING_SOON, ACTIVE)
+
+# Each bus with the expiry date of its most recent policy (NULL if none)
+EXPIRY_SELECT = """
+    SELECT b.id,
+           (SELECT MAX(expiry_date) FROM insurance_policies
+            WHERE bus_id = b.id) AS expiry
+    FROM buses b
+"""
+
+# Snapshots kept for recent as-of dates
+CACHE_SIZE = 4
+
+
+def _status_codes(days, insured):
+    codes = np.select(
+        [~insured, days < 0, days <= EXPIRING_SOON_DAYS], [0, 1, 2], default=3
+    )
+    return codes.astype(np.int8)
+
+
+def _to_days(expiry_dates):
+    return np.array([e or "NaT" for e in expiry_dates], dtype="datetime64[D]")
+
+
+class InsuranceSnapshot:
+    """Days remaining and status of every bus's policy as of one date"""
+
+    def __init__(self, as_of, bus_ids, expiry_dates):
+        self.as_of = as_of
+        self._today = np.datetime64(as_of, "D")
+        self.bus_ids = np.asarray(bus_ids, dtype=np.int64)
+        self._rows = {int(bus_id): row for row, bus_id in enumerate(self.bus_ids)}
+        self._compute(_to_days(expiry_dates))
+
+    def _compute(self, expiry):
+        self.expiry = expiry
+        self.insured = ~np.isnat(expiry)
+        # NaT days are meaningless; they are masked out by `insured`
+        self.days = np.where(self.insured, (expiry - self._today).astype(np.int64), 0)
+        self.status = _status_codes(self.days, self.insured)
+
+    def _update(self, bus_id, expiry_date):
+        row = self._rows.get(bus_id)
+        expiry = _to_days([expiry_date])
+        if row is None:
+            self._rows[bus_id] = len(self.bus_ids)
+            self.bus_ids = np.append(self.bus_ids, bus_id)
+            self._compute(np.concatenate([self.expiry, expiry]))
+            return
+        self.expiry[row] = expiry[0]
+        self.insured[row] = not np.isnat(expiry[0])
+        self.days[row] = (expiry[0] - self._today).astype(np.int64) if self.insured[row] else 0
+        self.status[row] = _status_codes(self.days[row:row + 1], self.insured[row:row + 1])[0]
+
+    def _remove(self, bus_id):
+        row = self._rows.get(bus_id)
+        if row is not None:
+            self.expiry[row] = np.datetime64("NaT")
+            self.insured[row] = False
+            self.status[row] = -1
+
+    def days_remaining(self, bus_id):
+        """Days until the bus's policy expires (negative once expired), or None"""
+        row = self._rows.get(bus_id)
+        if row is None or not self.insured[row]:
+            return None
+        return int(self.days[row])
+
+    def status_of(self, bus_id):
+        row = self._rows.get(bus_id)
+        if row is None or self.status[row] < 0:
+            return NOT_INSURED
+        return STATUS_LABELS[self.status[row]]
+
+    def ids_with_status(self, label):
+        """Ids of the buses with a status label, in ascending order"""
+        code = STATUS_LABELS.index(label)
+        return sorted(self.bus_ids[self.status == code].tolist())
+
+    def counts(self):
+        """Number of insured buses in total and per status label"""
+        counts = np.bincount(self.status[self.status >= 0], minlength=len(STATUS_LABELS))
+        result = {label: int(counts[code]) for code, label in enumerate(STATUS_LABELS)
+                  if label != NOT_INSURED}
+        result['total'] = sum(result.values())
+        return result
+
+
+_cache = {}
+_lock = threading.RLock()
+
+
+def snapshot(as_of=None):
+    """Return the insurance snapshot for `as_of` (default today)"""
+    as_of = as_of or datetime.date.today()
+    with _lock:
+        snap = _cache.get(as_of)
+        if snap is None:
+            rows = connect().execute(EXPIRY_SELECT).fetchall()
+            snap = InsuranceSnapshot(as_of, [r['id'] for r in rows], [r['expiry'] for r in rows])
+            _cache[as_of] = snap
+            for old in sorted(_cache)[:-CACHE_SIZE]:
+                del _cache[old]
+        return snap
+
+
+def _on_change(entity, entity_id, operation):
+    if entity != 'bus':
+        return
+    with _lock:
+        if not _cache:
+            return
+        row = None
+        if operation != events.DELETE:
+            row = connect().execute(
+                f"{EXPIRY_SELECT} WHERE b.id = ?", (entity_id,)
+            ).fetchone()
+        for snap in _cache.values():
+            if row is None:
+                snap._remove(entity_id)
+            else:
+                snap._update(entity_id, row['expiry'])
+
+
+events.subscribe(_on_change)
@@ -0,0 +1,304 @@
+"""
+Pickup routes for the buses assigned to each school.
+
+A school's stops (table `stops`, or a CSV loaded with import_stops) are
+split into runs with the Clarke-Wright savings heuristic. Each run is
+then shortened with 2-opt and handed to one of the school's assigned
+buses. A run visits its stops in order and ends at the school.
+
+    build_routes()               # every school with stops and buses
+    fetch_bus_routes(bus_id)     # what the schedule view shows
+
+Distances are great-circle kilometres read from the distance store in
+models/distance_store.py. The routes are stored in
+bus_routes and route_stops so that opening a schedule is a read. They
+are rebuilt only when build_routes() runs.
+"""
+import csv
+import datetime
+
+import numpy as np
+
+from models.db_connection import transaction
+from models.distance_store import DISTANCES, haversine, node_key
+from models.events import publish, INSERT, UPDATE
+from models.schema import connect
+
+STOP_COLUMNS = ('school_code', 'name', 'latitude', 'longitude', 'students')
+
+
+def distance_matrix(latitudes, longitudes):
+    """Great-circle distances in km between every pair of points"""
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    return haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+def savings_routes(dist, demand, capacity):
+    """
+    Split nodes 1..n into runs with the Clarke-Wright savings heuristic.
+
+    Node 0 is the school. `demand[i]` is the number of students at node
+    i, and no run carries more than `capacity`. Each run is returned in
+    pickup order, with the stop farthest from the school first.
+    """
+    n = len(dist) - 1
+    if n <= 0:
+        return []
+    routes = {i: [i] for i in range(1, n + 1)}
+    route_of = list(range(n + 1))
+    load = {i: int(demand[i]) for i in range(1, n + 1)}
+
+    # Joining i and j in one run saves driving back to the school in between
+    savings = dist[0, 1:, None] + dist[0, None, 1:] - dist[1:, 1:]
+    first, second = np.triu_indices(n, k=1)
+    values = savings[first, second]
+    order = np.argsort(-values, kind='stable')
+
+    for pair in order:
+        if values[pair] <= 0:
+            break
+        i, j = int(first[pair]) + 1, int(second[pair]) + 1
+        ri, rj = route_of[i], route_of[j]
+        if ri == rj or load[ri] + load[rj] > capacity:
+            continue
+        a, b = routes[ri], routes[rj]
+        # i and j must both sit at an end of their runs
+        if a[-1] != i:
+            if a[0] != i:
+                continue
+            a.reverse()
+        if b[0] != j:
+            if b[-1] != j:
+                continue
+            b.reverse()
+        a.extend(b)
+        load[ri] += load.pop(rj)
+        del routes[rj]
+        for node in b:
+            route_of[node] = ri
+
+    runs = []
+    for route in routes.values():
+        # Start from the end farther from the school, so the run ends nearby
+        if dist[0, route[0]] < dist[0, route[-1]]:
+            route.reverse()
+        runs.append(route)
+    return runs
+
+
+def two_opt(route, dist):
+    """
+    Shorten an open run that ends at the school (node 0) with 2-opt.
+
+    Reversing path[i..k] swaps the edges around it. The first stop has
+    no edge before it, so reversing a prefix costs only the edge after.
+    """
+    path = list(route) + [0]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(path) - 2):
+            ks = np.arange(i + 1, len(path) - 1)
+            nodes = np.asarray(path)
+            b, c, d = path[i], nodes[ks], nodes[ks + 1]
+            delta = dist[b, d] - dist[c, d]
+            if i:
+                a = path[i - 1]
+                delta += dist[a, c] - dist[a, b]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                k = int(ks[best])
+                path[i:k + 1] = path[i:k + 1][::-1]
+                improved = True
+    return path[:-1]
+
+
+def route_length(route, dist):
+    """Length in km of a run through `route` that ends at the school"""
+    path = list(route) + [0]
+    return float(sum(dist[a, b] for a, b in zip(path, path[1:])))
+
+
+def plan_school_routes(school, stops, buses, dist=None):
+    """
+    Plan the runs of one school's buses.
+
+    `school` has latitude and longitude, `stops` have id, latitude,
+    longitude and students, and `buses` have id and capacity. `dist` is
+    the distance matrix over the school and its stops, computed from
+    the coordinates if not given. Returns
+    (routes, unserved): routes are dicts with bus_id, stops (stop ids in
+    pickup order), legs (km from the previous point; the last leg ends
+    at the school), students and distance_km; unserved lists the stops
+    of runs left without a bus.
+    """
+    if not stops or not buses:
+        return [], [stop['id'] for stop in stops]
+
+    if dist is None:
+        dist = distance_matrix(
+            [school['latitude']] + [s['latitude'] for s in stops],
+            [school['longitude']] + [s['longitude'] for s in stops],
+        )
+    demand = [0] + [s['students'] for s in stops]
+    capacity = max(bus['capacity'] for bus in buses)
+    runs = [two_opt(run, dist) for run in savings_routes(dist, demand, capacity)]
+
+    # Fullest run first; each takes the smallest free bus it fits in. A
+    # run too full for every free bus is split: the largest bus takes the
+    # stops nearest the school and the rest queue up as a new run.
+    free = sorted(buses, key=lambda bus: bus['capacity'])
+    routes, unserved = [], []
+    while runs:
+        runs.sort(key=lambda run: sum(demand[i] for i in run))
+        run = runs.pop()
+        if not free:
+            unserved.extend(stops[i - 1]['id'] for i in run)
+            continue
+        students = sum(demand[i] for i in run)
+        bus = next((b for b in free if b['capacity'] >= students), free[-1])
+        if students > bus['capacity']:
+            split = len(run)
+            seats = bus['capacity']
+            while split and demand[run[split - 1]] <= seats:
+                split -= 1
+                seats -= demand[run[split]]
+            if split == len(run):
+                # Not even the last stop fits the largest free bus. It
+                # goes unserved and the bus stays free for the others.
+                unserved.append(stops[run[-1] - 1]['id'])
+                if len(run) > 1:
+                    runs.append(two_opt(run[:-1], dist))
+                continue
+            runs.append(two_opt(run[:split], dist))
+            run = run[split:]
+            students = sum(demand[i] for i in run)
+        free.remove(bus)
+        path = run + [0]
+        legs = [0.0] + [float(dist[a, b]) for a, b in zip(path, path[1:])]
+        routes.append({
+            'bus_id': bus['id'],
+            'stops': [stops[i - 1]['id'] for i in run],
+            'legs': legs,
+            'students': students,
+            'distance_km': float(sum(legs)),
+        })
+    return routes, unserved
+
+
+def build_routes(school_ids=None):
+    """
+    Plan and store the routes of every school with a location, stops and
+    assigned buses (or just `school_ids`). Returns the number of routes
+    and the ids of the stops no bus could take.
+    """
+    conn = connect()
+    schools = conn.execute(
+        "SELECT id, latitude, longitude FROM schools WHERE latitude IS NOT NULL"
+    ).fetchall()
+    if school_ids is not None:
+        wanted = set(school_ids)
+        schools = [s for s in schools if s['id'] in wanted]
+
+    planned = {}
+    unserved = []
+    for school in schools:
+        stops = conn.execute(
+            "SELECT id, latitude, longitude, students FROM stops WHERE school_id = ? ORDER BY id",
+            (school['id'],)
+        ).fetchall()
+        buses = conn.execute("""
+            SELECT b.id, b.capacity FROM assignments a
+            JOIN buses b ON b.id = a.bus_id
+            WHERE a.school_id = ? AND a.status = 'Active' AND b.status != 'Maintenance'
+        """, (school['id'],)).fetchall()
+        dist = None
+        if stops:
+            keys = [node_key('school', school['id'])] + [node_key('stop', s['id']) for s in stops]
+            dist = DISTANCES.matrix(keys).astype(np.float64)
+        routes, missed = plan_school_routes(school, stops, buses, dist)
+        planned[school['id']] = routes
+        unserved.extend(missed)
+
+    save_routes(planned)
+    return sum(len(routes) for routes in planned.values()), unserved
+
+
+def save_routes(planned):
+    """Replace the stored routes of each school in `planned` in one transaction"""
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    with transaction() as conn:
+        for school_id, routes in planned.items():
+            old = [row['bus_id'] for row in conn.execute(
+                "SELECT bus_id FROM bus_routes WHERE school_id = ?", (school_id,)
+            )]
+            conn.execute("DELETE FROM bus_routes WHERE school_id = ?", (school_id,))
+            for route in routes:
+                conn.execute("""
+                    INSERT INTO bus_routes (bus_id, school_id, students, distance_km, generated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (route['bus_id'], school_id, route['students'],
+                      round(route['distance_km'], 2), now))
+                conn.executemany("""
+                    INSERT INTO route_stops (bus_id, school_id, sequence, stop_id, leg_km)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [(route['bus_id'], school_id, sequence, stop_id, round(leg, 2))
+                      for sequence, (stop_id, leg) in enumerate(zip(route['stops'], route['legs']))])
+            for bus_id in set(old) | {route['bus_id'] for route in routes}:
+                publish('route', bus_id, UPDATE)
+
+
+def fetch_bus_routes(bus_id):
+    """Return a bus's routes, one per school, with their stops in order"""
+    conn = connect()
+    routes = [dict(row) for row in conn.execute("""
+        SELECT r.school_id, s.name AS school_name, s.pickup_time, s.drop_time,
+               r.students, r.distance_km, r.generated_at,
+               ROUND(r.distance_km - COALESCE(
+                   (SELECT SUM(leg_km) FROM route_stops rs
+                    WHERE rs.bus_id = r.bus_id AND rs.school_id = r.school_id), 0), 2)
+                   AS final_leg_km
+        FROM bus_routes r
+        JOIN schools s ON s.id = r.school_id
+        WHERE r.bus_id = ?
+        ORDER BY s.pickup_time
+    """, (bus_id,))]
+    for route in routes:
+        route['stops'] = [dict(row) for row in conn.execute("""
+            SELECT rs.sequence, st.id, st.name, st.students, rs.leg_km
+            FROM route_stops rs
+            JOIN stops st ON st.id = rs.stop_id
+            WHERE rs.bus_id = ? AND rs.school_id = ?
+            ORDER BY rs.sequence
+        """, (bus_id, route['school_id']))]
+    return routes
+
+
+def import_stops(path):
+    """
+    Load pickup stops from a CSV file with the columns in STOP_COLUMNS.
+    Returns the number of stops added. Unknown school codes raise
+    ValueError and nothing is imported.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    missing = [c for c in STOP_COLUMNS if rows and c not in rows[0]]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    connect()
+    with transaction() as conn:
+        school_ids = {row['school_code']: row['id']
+                      for row in conn.execute("SELECT id, school_code FROM schools")}
+        for row in rows:
+            school_id = school_ids.get(row['school_code'])
+            if school_id is None:
+                raise ValueError(f"Unknown school code: {row['school_code']}")
+            stop_id = conn.execute("""
+                INSERT INTO stops (school_id, name, latitude, longitude, students)
+                VALUES (?, ?, ?, ?, ?)
+            """, (school_id, row['name'], float(row['latitude']),
+                  float(row['longitude']), int(row['students'] or 0))).lastrowid
+            publish('stop', stop_id, INSERT)
+    return len(rows)
@@ -0,0 +1,257 @@
+"""
+Time-window conflicts between a bus's school runs.
+
+Every school a bus is assigned to occupies it twice a day: the morning
+run starting at the school's pickup_time and the afternoon run starting
+at its drop_time, each lasting RUN_MINUTES. A bus is double-booked when
+two of its runs overlap. Runs are half-open, so one run may start the
+minute the previous one ends.
+
+SCHEDULE keeps each bus's runs sorted by start time together with the
+running maximum of their end times. Whether a proposed run overlaps any
+of them is then a binary search plus one comparison:
+
+    SCHEDULE.overlapping(bus_id, school)
+
+and find_conflicts() reports every double booking in the fleet with one
+sort and a sweep per bus. Like the other indexes in models/, SCHEDULE is
+loaded on first use and kept up to date from the change events.
+"""
+import bisect
+import heapq
+import threading
+from collections import namedtuple
+
+from models import events
+from models.schema import connect
+
+RUN_MINUTES = 45
+
+MORNING = 'Morning'
+AFTERNOON = 'Afternoon'
+
+# One run of a bus for a school; start and end are minutes after midnight
+Run = namedtuple('Run', 'start end run school_id school_name assignment_id')
+
+# Two runs of the same bus that overlap
+Conflict = namedtuple('Conflict', 'bus_id bus_number first second')
+
+SCHEDULE_SELECT = """
+    SELECT a.id AS assignment_id, a.bus_id, b.bus_number, s.id AS school_id,
+           s.name AS school_name, s.pickup_time, s.drop_time
+    FROM assignments a
+    JOIN buses b ON b.id = a.bus_id
+    JOIN schools s ON s.id = a.school_id
+    WHERE a.status = 'Active'
+"""
+
+
+def minutes(hhmm):
+    """Convert 'HH:MM' to minutes after midnight"""
+    hours, mins = hhmm.split(':')[:2]
+    return int(hours) * 60 + int(mins)
+
+
+def clock(mins):
+    """Convert minutes after midnight to 'HH:MM'"""
+    return f"{mins // 60:02d}:{mins % 60:02d}"
+
+
+def school_runs(school, assignment_id=None):
+    """Return the morning and afternoon runs of a school (dict or Row)"""
+    school_id = school['school_id'] if 'school_id' in school.keys() else school['id']
+    school_name = school['school_name'] if 'school_name' in school.keys() else school['name']
+    runs = []
+    for run, column in ((MORNING, 'pickup_time'), (AFTERNOON, 'drop_time')):
+        start = minutes(school[column])
+        runs.append(Run(start, start + RUN_MINUTES, run, school_id, school_name, assignment_id))
+    return runs
+
+
+def describe(run):
+    return f"{run.school_name} {run.run.lower()} run {clock(run.start)}-{clock(run.end)}"
+
+
+class BusSchedule:
+    """The runs of one bus sorted by start, with the running maximum end"""
+
+    def __init__(self, runs=()):
+        self.runs = sorted(runs)
+        self._reindex()
+
+    def _reindex(self):
+        self.starts = [run.start for run in self.runs]
+        self.max_end = []
+        latest = -1
+        for run in self.runs:
+            latest = max(latest, run.end)
+            self.max_end.append(latest)
+
+    def add(self, runs):
+        self.runs = sorted(self.runs + list(runs))
+        self._reindex()
+
+    def remove(self, predicate):
+        """Drop the runs matching `predicate` and return them"""
+        removed = [run for run in self.runs if predicate(run)]
+        if removed:
+            self.runs = [run for run in self.runs if not predicate(run)]
+            self._reindex()
+        return removed
+
+    def overlaps(self, start, end):
+        """True if any run overlaps [start, end), in O(log n)"""
+        # Runs starting before `end` are a prefix; one of them overlaps
+        # exactly when the latest end in that prefix is after `start`
+        count = bisect.bisect_left(self.starts, end)
+        return count > 0 and self.max_end[count - 1] > start
+
+    def overlapping(self, start, end):
+        """Return the runs overlapping [start, end)"""
+        if not self.overlaps(start, end):
+            return []
+        count = bisect.bisect_left(self.starts, end)
+        return [run for run in self.runs[:count] if run.end > start]
+
+
+class ScheduleIndex:
+    """
+    Per-bus interval index of the runs of every active assignment.
+
+    An event only touches the buses it concerns: the bus of the changed
+    assignment, or the buses serving the changed school.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._buses = {}
+        self._bus_numbers = {}
+        # assignment id -> bus id, and school id -> ids of the buses serving it
+        self._bus_of_assignment = {}
+        self._buses_of_school = {}
+        events.subscribe(self._on_change)
+
+    def ensure_built(self):
+        with self._lock:
+            if self._built:
+                return
+            for row in connect().execute(SCHEDULE_SELECT):
+                self._add(row)
+            self._built = True
+
+    def _add(self, row):
+        bus_id = row['bus_id']
+        self._bus_numbers[bus_id] = row['bus_number']
+        self._bus_of_assignment[row['assignment_id']] = bus_id
+        self._buses_of_school.setdefault(row['school_id'], set()).add(bus_id)
+        schedule = self._buses.setdefault(bus_id, BusSchedule())
+        schedule.add(school_runs(row, row['assignment_id']))
+
+    def _remove(self, bus_ids, predicate):
+        """Drop the runs matching `predicate` from the given buses only"""
+        for bus_id in bus_ids:
+            schedule = self._buses.get(bus_id)
+            if schedule is None:
+                continue
+            for run in schedule.remove(predicate):
+                self._bus_of_assignment.pop(run.assignment_id, None)
+                if not any(other.school_id == run.school_id for other in schedule.runs):
+                    self._discard_school_bus(run.school_id, bus_id)
+            if not schedule.runs:
+                del self._buses[bus_id]
+                del self._bus_numbers[bus_id]
+
+    def _discard_school_bus(self, school_id, bus_id):
+        buses = self._buses_of_school.get(school_id)
+        if buses is not None:
+            buses.discard(bus_id)
+            if not buses:
+                del self._buses_of_school[school_id]
+
+    def _reload(self, where, entity_id):
+        for row in connect().execute(f"{SCHEDULE_SELECT} AND {where} = ?", (entity_id,)):
+            self._add(row)
+
+    def _on_change(self, entity, entity_id, operation):
+        with self._lock:
+            if not self._built:
+                return
+            if entity == 'assignment':
+                bus_id = self._bus_of_assignment.get(entity_id)
+                if bus_id is not None:
+                    self._remove([bus_id], lambda run: run.assignment_id == entity_id)
+                self._reload("a.id", entity_id)
+            elif entity == 'school':
+                bus_ids = list(self._buses_of_school.get(entity_id, ()))
+                self._remove(bus_ids, lambda run: run.school_id == entity_id)
+                self._reload("s.id", entity_id)
+            elif entity == 'bus' and operation == events.DELETE:
+                self._remove([entity_id], lambda run: True)
+            elif entity == 'bus' and entity_id in self._bus_numbers:
+                row = connect().execute(
+                    "SELECT bus_number FROM buses WHERE id = ?", (entity_id,)
+                ).fetchone()
+                if row is not None:
+                    self._bus_numbers[entity_id] = row['bus_number']
+
+    def runs_of_bus(self, bus_id):
+        self.ensure_built()
+        with self._lock:
+            schedule = self._buses.get(bus_id)
+            return list(schedule.runs) if schedule else []
+
+    def overlapping(self, bus_id, school):
+        """
+        Return (proposed run, existing run) pairs that would overlap if the
+        bus were assigned to `school` (a dict with id, name, pickup_time
+        and drop_time). The school's own runs are ignored.
+        """
+        self.ensure_built()
+        with self._lock:
+            schedule = self._buses.get(bus_id)
+            if schedule is None:
+                return []
+            conflicts = []
+            for proposed in school_runs(school):
+                conflicts.extend(
+                    (proposed, run) for run in schedule.overlapping(proposed.start, proposed.end)
+                    if run.school_id != proposed.school_id
+                )
+            return conflicts
+
+    def find_conflicts(self):
+        """Return every pair of overlapping runs in the fleet"""
+        self.ensure_built()
+        with self._lock:
+            runs = [(bus_id, run) for bus_id, schedule in self._buses.items()
+                    for run in schedule.runs]
+            bus_numbers = dict(self._bus_numbers)
+        return sweep(runs, bus_numbers)
+
+
+def sweep(runs, bus_numbers=None):
+    """
+    Report the overlapping pairs among (bus_id, Run) items.
+
+    Sorting by bus and start time is O(n log n); the sweep then keeps a
+    heap of the runs still in progress, so each run is compared only with
+    the runs it actually overlaps.
+    """
+    bus_numbers = bus_numbers or {}
+    conflicts = []
+    active = []
+    current_bus = None
+    ordered = sorted(runs, key=lambda item: (item[0], item[1]))
+    for order, (bus_id, run) in enumerate(ordered):
+        if bus_id != current_bus:
+            current_bus, active = bus_id, []
+        while active and active[0][0] <= run.start:
+            heapq.heappop(active)
+        for _end, _position, other in active:
+            conflicts.append(Conflict(bus_id, bus_numbers.get(bus_id, ""), other, run))
+        heapq.heappush(active, (run.end, order, run))
+    return conflicts
+
+
+SCHEDULE = ScheduleIndex()
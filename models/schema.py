@@ -0,0 +1,518 @@
+"""
+Versioned schema for the main bus management database.
+
+Each entry in MIGRATIONS moves the database one version forward. The
+current version is stored in PRAGMA user_version, so opening an existing
+database only applies the migrations it has not seen yet. Add new
+migrations to the end of the list; never edit one that has shipped.
+"""
+import hashlib
+
+from models.db_connection import get_connection, initialize_once
+from models.seed_data import (
+    SEED_BUSES, SEED_DRIVERS, SEED_SCHOOLS, SEED_USERS, SEED_ACTIVITY_LOGS,
+    SEED_SCHOOL_LOCATIONS, SEED_STOPS, SEED_DEPOTS
+)
+
+
+SCHEMA_V1 = [
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash TEXT,
+        full_name TEXT NOT NULL DEFAULT '',
+        email TEXT NOT NULL DEFAULT '',
+        role TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'Active',
+        last_login TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX idx_users_status ON users(status)",
+
+    """
+    CREATE TABLE buses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        registration_number TEXT NOT NULL UNIQUE,
+        bus_number TEXT NOT NULL UNIQUE,
+        model TEXT NOT NULL DEFAULT '',
+        bus_type TEXT NOT NULL DEFAULT 'Standard',
+        capacity INTEGER NOT NULL,
+        year INTEGER,
+        color TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL DEFAULT 'Active'
+    )
+    """,
+    "CREATE INDEX idx_buses_status ON buses(status)",
+    "CREATE INDEX idx_buses_type ON buses(bus_type)",
+
+    """
+    CREATE TABLE drivers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL UNIQUE,
+        email TEXT UNIQUE,
+        dob TEXT,
+        gender TEXT,
+        address TEXT NOT NULL DEFAULT '',
+        license_number TEXT NOT NULL UNIQUE,
+        license_type TEXT NOT NULL DEFAULT '',
+        license_expiry TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'Active',
+        salary INTEGER,
+        salary_status TEXT NOT NULL DEFAULT '',
+        bus_id INTEGER REFERENCES buses(id) ON DELETE SET NULL,
+        joining_date TEXT NOT NULL DEFAULT '',
+        bank_account TEXT NOT NULL DEFAULT '',
+        ifsc_code TEXT NOT NULL DEFAULT '',
+        emergency_contact TEXT NOT NULL DEFAULT '',
+        experience_years INTEGER NOT NULL DEFAULT 0,
+        rating REAL
+    )
+    """,
+    "CREATE INDEX idx_drivers_status ON drivers(status)",
+    "CREATE INDEX idx_drivers_license_expiry ON drivers(license_expiry)",
+    "CREATE INDEX idx_drivers_bus ON drivers(bus_id)",
+
+    """
+    CREATE TABLE schools (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        school_code TEXT NOT NULL UNIQUE,
+        type TEXT NOT NULL DEFAULT '',
+        address TEXT NOT NULL DEFAULT '',
+        city TEXT NOT NULL DEFAULT '',
+        phone TEXT NOT NULL DEFAULT '',
+        email TEXT NOT NULL DEFAULT '',
+        principal_name TEXT NOT NULL DEFAULT '',
+        contact_person TEXT NOT NULL DEFAULT '',
+        contact_person_phone TEXT NOT NULL DEFAULT '',
+        student_count INTEGER NOT NULL DEFAULT 0,
+        contract_status TEXT NOT NULL DEFAULT 'Active',
+        contract_start TEXT NOT NULL DEFAULT '',
+        contract_end TEXT NOT NULL DEFAULT '',
+        monthly_fee INTEGER NOT NULL DEFAULT 0,
+        payment_status TEXT NOT NULL DEFAULT '',
+        pickup_time TEXT NOT NULL DEFAULT '07:30',
+        drop_time TEXT NOT NULL DEFAULT '14:30',
+        billing_address TEXT NOT NULL DEFAULT '',
+        gst_number TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX idx_schools_city ON schools(city)",
+    "CREATE INDEX idx_schools_contract_status ON schools(contract_status)",
+    "CREATE INDEX idx_schools_type ON schools(type)",
+    "CREATE INDEX idx_schools_contract_end ON schools(contract_end)",
+
+    """
+    CREATE TABLE insurance_policies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        policy_number TEXT NOT NULL UNIQUE,
+        provider TEXT NOT NULL DEFAULT '',
+        coverage_amount INTEGER NOT NULL DEFAULT 0,
+        premium_amount INTEGER NOT NULL DEFAULT 0,
+        start_date TEXT NOT NULL,
+        expiry_date TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'Current'
+    )
+    """,
+    "CREATE INDEX idx_policies_bus_expiry ON insurance_policies(bus_id, expiry_date)",
+    "CREATE INDEX idx_policies_expiry_date ON insurance_policies(expiry_date)",
+    "CREATE INDEX idx_policies_status ON insurance_policies(status)",
+
+    """
+    CREATE TABLE assignments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        school_id INTEGER NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+        assigned_date TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'Active',
+        UNIQUE (bus_id, school_id)
+    )
+    """,
+    "CREATE INDEX idx_assignments_school ON assignments(school_id)",
+    "CREATE INDEX idx_assignments_status ON assignments(status)",
+
+    """
+    CREATE TABLE activity_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+        username TEXT NOT NULL,
+        ip_address TEXT NOT NULL DEFAULT '',
+        action TEXT NOT NULL,
+        module TEXT NOT NULL,
+        details TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX idx_activity_logs_timestamp ON activity_logs(timestamp)",
+    "CREATE INDEX idx_activity_logs_user ON activity_logs(user_id)",
+]
+
+
+# Full-text search (migration 3). Each entity gets a contentless FTS5 table
+# whose rowid is the base row id, with columns:
+#   title  the name or registration shown in lists (weighted highest)
+#   body   phones, licence numbers, codes, addresses and contact persons
+#   key    identifiers with separators removed, so "MH01AB" or "98765"
+#          matches "MH-01-AB-1234" or "98765 43210"
+# Triggers on the base tables keep the indexes in sync.
+SEARCH_TABLES = {
+    "driver": "drivers_fts",
+    "bus": "buses_fts",
+    "school": "schools_fts",
+}
+
+# bm25 weights for (title, body, key)
+SEARCH_RANK = "bm25(10.0, 1.0, 5.0)"
+
+_SEPARATORS = ["-", " ", "/", ".", "+", "(", ")"]
+
+
+def _compact(expr):
+    """SQL expression for `expr` with separators removed"""
+    for sep in _SEPARATORS:
+        expr = f"REPLACE({expr}, '{sep}', '')"
+    return expr
+
+
+def _text(*exprs):
+    return " || ' ' || ".join(f"COALESCE({e}, '')" for e in exprs)
+
+
+# base table -> (title, body, key) expressions over the row alias {r}
+_SEARCH_COLUMNS = {
+    "drivers": (
+        _text("{r}.name"),
+        _text("{r}.phone", "{r}.license_number", "{r}.address"),
+        _text(_compact("{r}.phone"), _compact("{r}.license_number")),
+    ),
+    "buses": (
+        _text("{r}.registration_number", "{r}.bus_number"),
+        _text("{r}.model", "{r}.bus_type"),
+        _text(_compact("{r}.registration_number"), _compact("{r}.bus_number")),
+    ),
+    "schools": (
+        _text("{r}.name"),
+        _text("{r}.school_code", "{r}.address", "{r}.city",
+              "{r}.contact_person", "{r}.phone", "{r}.contact_person_phone"),
+        _text("{r}.school_code", _compact("{r}.phone"),
+              _compact("{r}.contact_person_phone")),
+    ),
+}
+
+
+def _search_schema():
+    statements = []
+    for base, columns in _SEARCH_COLUMNS.items():
+        fts = f"{base}_fts"
+        new = ", ".join(c.format(r="new") for c in columns)
+        old = ", ".join(c.format(r="old") for c in columns)
+        current = ", ".join(c.format(r=base) for c in columns)
+
+        statements += [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5("
+            f"title, body, key, content='', prefix='2 3 4')",
+            f"INSERT INTO {fts} ({fts}, rank) VALUES ('rank', '{SEARCH_RANK}')",
+            f"""
+            CREATE TRIGGER {base}_fts_insert AFTER INSERT ON {base} BEGIN
+                INSERT INTO {fts} (rowid, title, body, key) VALUES (new.id, {new});
+            END
+            """,
+            f"""
+            CREATE TRIGGER {base}_fts_delete AFTER DELETE ON {base} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, title, body, key)
+                VALUES ('delete', old.id, {old});
+            END
+            """,
+            f"""
+            CREATE TRIGGER {base}_fts_update AFTER UPDATE ON {base} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, title, body, key)
+                VALUES ('delete', old.id, {old});
+                INSERT INTO {fts} (rowid, title, body, key) VALUES (new.id, {new});
+            END
+            """,
+            f"INSERT INTO {fts} (rowid, title, body, key) SELECT id, {current} FROM {base}",
+        ]
+    return statements
+
+
+SCHEMA_V3 = _search_schema()
+
+
+# Active assignments are looked up both by bus (conflict checks) and by
+# school (its bus list)
+SCHEMA_V4 = [
+    "CREATE INDEX idx_assignments_active_bus ON assignments(bus_id, school_id)"
+    " WHERE status = 'Active'",
+    "CREATE INDEX idx_assignments_active_school ON assignments(school_id, bus_id)"
+    " WHERE status = 'Active'",
+]
+
+
+# School locations, pickup stops and the routes planned over them.
+# route_stops lists a bus's stops for one school in pickup order; the
+# run ends at the school after the last stop.
+SCHEMA_V5 = [
+    "ALTER TABLE schools ADD COLUMN latitude REAL",
+    "ALTER TABLE schools ADD COLUMN longitude REAL",
+    """
+    CREATE TABLE stops (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        school_id INTEGER NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL,
+        students INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX idx_stops_school ON stops(school_id)",
+
+    """
+    CREATE TABLE bus_routes (
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        school_id INTEGER NOT NULL REFERENCES schools(id) ON DELETE CASCADE,
+        students INTEGER NOT NULL,
+        distance_km REAL NOT NULL,
+        generated_at TEXT NOT NULL,
+        PRIMARY KEY (bus_id, school_id)
+    )
+    """,
+    "CREATE INDEX idx_bus_routes_school ON bus_routes(school_id)",
+    """
+    CREATE TABLE route_stops (
+        bus_id INTEGER NOT NULL,
+        school_id INTEGER NOT NULL,
+        sequence INTEGER NOT NULL,
+        stop_id INTEGER NOT NULL REFERENCES stops(id) ON DELETE CASCADE,
+        leg_km REAL NOT NULL,
+        PRIMARY KEY (bus_id, school_id, sequence),
+        FOREIGN KEY (bus_id, school_id)
+            REFERENCES bus_routes(bus_id, school_id) ON DELETE CASCADE
+    )
+    """,
+]
+
+
+# Depots the buses start from and return to
+SCHEMA_V7 = [
+    """
+    CREATE TABLE depots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        address TEXT NOT NULL DEFAULT '',
+        city TEXT NOT NULL DEFAULT '',
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL
+    )
+    """,
+]
+
+
+# Workshop bookings, and each bus's materialised day-by-day timetable.
+# timetable_days records which (bus, day) timetables have been generated,
+# including days on which the bus has nothing to do.
+SCHEMA_V9 = [
+    """
+    CREATE TABLE maintenance_windows (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        start_at TEXT NOT NULL,
+        end_at TEXT NOT NULL,
+        description TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    "CREATE INDEX idx_maintenance_bus_start ON maintenance_windows(bus_id, start_at)",
+
+    """
+    CREATE TABLE bus_timetable (
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        day TEXT NOT NULL,
+        sequence INTEGER NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        description TEXT NOT NULL DEFAULT '',
+        school_id INTEGER,
+        stop_id INTEGER,
+        driver_id INTEGER,
+        PRIMARY KEY (bus_id, day, sequence)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX idx_bus_timetable_day ON bus_timetable(day, bus_id)",
+    """
+    CREATE TABLE timetable_days (
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        day TEXT NOT NULL,
+        generated_at TEXT NOT NULL,
+        PRIMARY KEY (bus_id, day)
+    ) WITHOUT ROWID
+    """,
+]
+
+SCHEMA_V10 = [
+    """
+    CREATE TABLE driver_roster (
+        bus_id INTEGER NOT NULL REFERENCES buses(id) ON DELETE CASCADE,
+        day TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        driver_id INTEGER NOT NULL REFERENCES drivers(id) ON DELETE CASCADE,
+        PRIMARY KEY (bus_id, day, start_time)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX idx_driver_roster_driver ON driver_roster(driver_id, day)",
+]
+
+
+def hash_password(password):
+    """Hash a password for storage in users.password_hash"""
+    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+def seed_sample_data(conn):
+    """Load the sample buses, drivers, schools and users"""
+    bus_ids = {}
+    for bus in SEED_BUSES:
+        cursor = conn.execute("""
+            INSERT INTO buses (registration_number, bus_number, model, bus_type,
+                               capacity, year, color, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (bus['registration_number'], bus['bus_number'], bus['model'],
+              bus['bus_type'], bus['capacity'], bus['year'], bus['color'],
+              bus['status']))
+        bus_ids[bus['bus_number']] = cursor.lastrowid
+
+        policy = bus.get('policy')
+        if policy:
+            conn.execute("""
+                INSERT INTO insurance_policies (bus_id, policy_number, provider,
+                    coverage_amount, premium_amount, start_date, expiry_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (cursor.lastrowid, policy['policy_number'], policy['provider'],
+                  policy['coverage_amount'], policy['premium_amount'],
+                  policy['start_date'], policy['expiry_date']))
+
+    for driver in SEED_DRIVERS:
+        conn.execute("""
+            INSERT INTO drivers (name, phone, license_number, license_expiry,
+                status, salary, salary_status, bus_id, joining_date,
+                bank_account, ifsc_code, address, emergency_contact,
+                experience_years, rating)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (driver['name'], driver['phone'], driver['license_number'],
+              driver['license_expiry'], driver['status'], driver['salary'],
+              driver['salary_status'], bus_ids.get(driver['bus_assigned']),
+              driver['joining_date'], driver['bank_account'],
+              driver['ifsc_code'], driver['address'],
+              driver['emergency_contact'], driver['experience_years'],
+              driver['rating']))
+
+    for school in SEED_SCHOOLS:
+        cursor = conn.execute("""
+            INSERT INTO schools (name, school_code, type, address, city, phone,
+                email, principal_name, contact_person, contact_person_phone,
+                student_count, contract_status, contract_start, contract_end,
+                monthly_fee, payment_status, pickup_time, drop_time,
+                billing_address, gst_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (school['name'], school['school_code'], school['type'],
+              school['address'], school['city'], school['phone'],
+              school['email'], school['principal_name'],
+              school['contact_person'], school['contact_person_phone'],
+              school['student_count'], school['contract_status'],
+              school['contract_start'], school['contract_end'],
+              school['monthly_fee'], school['payment_status'],
+              school['pickup_time'], school['drop_time'],
+              school['billing_address'], school['gst_number']))
+
+        conn.executemany("""
+            INSERT INTO assignments (bus_id, school_id, assigned_date)
+            VALUES (?, ?, ?)
+        """, [(bus_ids[number], cursor.lastrowid, school['contract_start'])
+              for number in school['assigned_buses']])
+
+    for username, full_name, email, role, status, last_login, password in SEED_USERS:
+        conn.execute("""
+            INSERT INTO users (username, password_hash, full_name, email, role,
+                               status, last_login)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (username, hash_password(password) if password else None,
+              full_name, email, role, status, last_login))
+
+    conn.executemany("""
+        INSERT INTO activity_logs (timestamp, user_id, username, ip_address,
+                                   action, module, details)
+        VALUES (?, (SELECT id FROM users WHERE username = ?), ?, ?, ?, ?, ?)
+    """, [(ts, user, user, ip, action, module, details)
+          for ts, user, ip, action, module, details in SEED_ACTIVITY_LOGS])
+
+
+def seed_sample_stops(conn):
+    """Locate the sample schools and load their pickup stops"""
+    for code, (latitude, longitude) in SEED_SCHOOL_LOCATIONS.items():
+        conn.execute(
+            "UPDATE schools SET latitude = ?, longitude = ? WHERE school_code = ?",
+            (latitude, longitude, code)
+        )
+    conn.executemany("""
+        INSERT INTO stops (school_id, name, latitude, longitude, students)
+        SELECT id, ?, ?, ?, ? FROM schools WHERE school_code = ?
+    """, [(name, latitude, longitude, students, code)
+          for code, name, latitude, longitude, students in SEED_STOPS])
+
+
+def seed_sample_depots(conn):
+    """Load the sample depot"""
+    conn.executemany("""
+        INSERT INTO depots (name, address, city, latitude, longitude)
+        VALUES (?, ?, ?, ?, ?)
+    """, SEED_DEPOTS)
+
+
+# (version, description, list of statements or a callable taking the connection)
+MIGRATIONS = [
+    (1, "Create core tables", SCHEMA_V1),
+    (2, "Load sample data", seed_sample_data),
+    (3, "Add full-text search indexes", SCHEMA_V3),
+    (4, "Index active assignments by bus and school", SCHEMA_V4),
+    (5, "Add stops and bus routes", SCHEMA_V5),
+    (6, "Load sample stops", seed_sample_stops),
+    (7, "Add depots", SCHEMA_V7),
+    (8, "Load sample depot", seed_sample_depots),
+    (9, "Add maintenance windows and bus timetables", SCHEMA_V9),
+    (10, "Add the weekly driver roster", SCHEMA_V10),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every migration newer than the database's user_version"""
+    current = get_schema_version(conn)
+
+    for version, _description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        if callable(steps):
+            steps(conn)
+        else:
+            for statement in steps:
+                conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {version}")
+
+    return get_schema_version(conn)
+
+
+def initialize_database(db_path=None):
+    """Bring the database up to the latest schema (once per process)"""
+    initialize_once(migrate, db_path)
+
+
+def connect(db_path=None):
+    """Return the shared connection, migrating the database first if needed"""
+    initialize_database(db_path)
+    return get_connection(db_path)
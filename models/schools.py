@@ -0,0 +1,78 @@
+"""
+School queries for the school management pages.
+
+Rows are returned as dicts shaped like the old MOCK_SCHOOLS entries;
+assigned_buses is the list of bus numbers with an active assignment.
+"""
+from models.bitmap_index import TableIndex
+from models.db_connection import transaction
+from models.events import publish, UPDATE
+from models.expiry_index import ExpiryIndex
+from models.filters import Filter
+from models.schema import connect
+
+SCHOOL_SELECT = """
+    SELECT s.*,
+           COALESCE((SELECT GROUP_CONCAT(bus_number, ',') FROM (
+                        SELECT b.bus_number FROM assignments a
+                        JOIN buses b ON b.id = a.bus_id
+                        WHERE a.school_id = s.id AND a.status = 'Active'
+                        ORDER BY b.bus_number)), '') AS assigned_bus_list
+    FROM schools s
+"""
+
+
+# Bitmaps behind the contract status, type and city filter combos
+SCHOOL_INDEX = TableIndex('school', ["contract_status", "type", "city"], """
+    SELECT id, contract_status, type, city FROM schools
+""", "id", connect)
+
+# Schools by contract end date
+CONTRACT_EXPIRY = ExpiryIndex('school', """
+    SELECT id, contract_end AS expiry FROM schools
+""", "id", connect)
+
+
+def _to_school(row):
+    school = dict(row)
+    buses = school.pop('assigned_bus_list')
+    school['assigned_buses'] = buses.split(',') if buses else []
+    return school
+
+
+def fetch_schools(search="", contract_status=None, school_type=None, city=None,
+                  ids=None, expiring_from=None, expiring_to=None, limit=None,
+                  offset=0, after=None):
+    """
+    Return schools with their assigned bus numbers, ordered by name or by
+    relevance when searching.
+
+    `search` is matched against the full-text index; the other arguments
+    are exact filters ('All' or empty means no filter). Pass `ids` to
+    check which of those schools match, `expiring_from`/`expiring_to` to
+    keep contracts ending in that range (either may be None), or
+    `limit`/`offset` to fetch one page. Passing the last school of the
+    previous page as `after` seeks past it instead of skipping `offset`
+    rows.
+    """
+    ids = CONTRACT_EXPIRY.filter_ids(ids, expiring_from, expiring_to)
+    ids = SCHOOL_INDEX.filter_ids(ids, contract_status=contract_status,
+                                  type=school_type, city=city)
+    query = (Filter("s.name, s.id")
+             .search("schools_fts", "s.id", search)
+             .one_of("s.id", ids)
+             .page(limit, offset, after and (after['name'], after['id'])))
+    rows = connect().execute(query.sql(SCHOOL_SELECT), query.params).fetchall()
+    return [_to_school(row) for row in rows]
+
+
+def set_contract_status(school_ids, status):
+    """Set the contract status of many schools in one transaction"""
+    connect()
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE schools SET contract_status = ? WHERE id = ?",
+            [(status, school_id) for school_id in school_ids]
+        )
+        for school_id in school_ids:
+            publish('school', school_id, UPDATE)
@@ -0,0 +1,56 @@
+"""
+Full-text search over drivers, buses and schools.
+
+The FTS5 tables are defined in models/schema.py and kept in sync by
+triggers. Their rowid is the id of the driver, bus or school, and rank
+is bm25 weighted towards the title (name or registration) column.
+"""
+import re
+
+from models.schema import SEARCH_TABLES, connect
+
+
+def build_match_query(text):
+    """
+    Turn search box text into an FTS5 MATCH expression.
+
+    Every word must match as a prefix, or the whole input with separators
+    removed must prefix-match an identifier. Returns None for blank input.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+
+    query = " AND ".join(f'"{w}"*' for w in words)
+    compact = "".join(words)
+    if len(words) > 1:
+        query = f'({query}) OR key : "{compact}"*'
+    return query
+
+
+def search(text, entities=None, limit=50):
+    """
+    Return ranked matches across drivers, buses and schools.
+
+    Each result is a dict with entity ('driver', 'bus' or 'school'), id
+    and rank (lower is better).
+    """
+    query = build_match_query(text)
+    if not query:
+        return []
+
+    selects = []
+    params = []
+    for entity in entities or SEARCH_TABLES:
+        fts = SEARCH_TABLES[entity]
+        selects.append(
+            f"SELECT '{entity}' AS entity, rowid AS id, rank"
+            f" FROM {fts} WHERE {fts} MATCH ?"
+        )
+        params.append(query)
+
+    rows = connect().execute(
+        " UNION ALL ".join(selects) + " ORDER BY rank LIMIT ?",
+        params + [limit]
+    ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,382 @@
+"""
+Sample records loaded into a fresh database by the seed migration.
+
+These used to live in the frontend modules as MOCK_BUSES, MOCK_DRIVERS and
+MOCK_SCHOOLS; they are kept here so a new installation still opens with
+something to look at.
+"""
+
+SEED_BUSES = [
+    {
+        'registration_number': 'MH-01-AB-1234',
+        'bus_number': 'BUS-001',
+        'model': 'Tata Starbus',
+        'bus_type': 'AC',
+        'capacity': 40,
+        'year': 2020,
+        'color': 'White',
+        'status': 'Active',
+        'policy': {
+            'policy_number': 'INS-2023-001',
+            'provider': 'ICICI Lombard',
+            'coverage_amount': 5000000,
+            'premium_amount': 75000,
+            'start_date': '2023-01-15',
+            'expiry_date': '2024-01-14',
+        },
+    },
+    {
+        'registration_number': 'MH-01-CD-5678',
+        'bus_number': 'BUS-002',
+        'model': 'Ashok Leyland',
+        'bus_type': 'Non-AC',
+        'capacity': 45,
+        'year': 2019,
+        'color': 'Blue',
+        'status': 'Active',
+        'policy': {
+            'policy_number': 'INS-2023-002',
+            'provider': 'New India Assurance',
+            'coverage_amount': 4500000,
+            'premium_amount': 68000,
+            'start_date': '2023-03-10',
+            'expiry_date': '2024-03-09',
+        },
+    },
+    {
+        'registration_number': 'MH-01-EF-9012',
+        'bus_number': 'BUS-003',
+        'model': 'Volvo B7R',
+        'bus_type': 'AC',
+        'capacity': 50,
+        'year': 2021,
+        'color': 'Red',
+        'status': 'Maintenance',
+        'policy': {
+            'policy_number': 'INS-2022-015',
+            'provider': 'Bajaj Allianz',
+            'coverage_amount': 6000000,
+            'premium_amount': 85000,
+            'start_date': '2022-06-20',
+            'expiry_date': '2023-06-19',
+        },
+    },
+    {
+        'registration_number': 'MH-01-GH-3456',
+        'bus_number': 'BUS-004',
+        'model': 'Force Traveller',
+        'bus_type': 'Mini',
+        'capacity': 26,
+        'year': 2022,
+        'color': 'Yellow',
+        'status': 'Active',
+        'policy': {
+            'policy_number': 'INS-2023-045',
+            'provider': 'HDFC Ergo',
+            'coverage_amount': 3500000,
+            'premium_amount': 52000,
+            'start_date': '2023-11-01',
+            'expiry_date': '2024-10-31',
+        },
+    },
+    {'registration_number': 'MH-01-JK-2201', 'bus_number': 'BUS-005', 'model': 'Tata Starbus',
+     'bus_type': 'Standard', 'capacity': 30, 'year': 2020, 'color': 'Yellow', 'status': 'Active'},
+    {'registration_number': 'MH-01-JK-2202', 'bus_number': 'BUS-006', 'model': 'Ashok Leyland',
+     'bus_type': 'Non-AC', 'capacity': 30, 'year': 2019, 'color': 'Yellow', 'status': 'Active'},
+    {'registration_number': 'MH-01-JK-2203', 'bus_number': 'BUS-007', 'model': 'Volvo B7R',
+     'bus_type': 'AC', 'capacity': 40, 'year': 2021, 'color': 'White', 'status': 'Active'},
+    {'registration_number': 'MH-01-JK-2204', 'bus_number': 'BUS-008', 'model': 'Force Traveller',
+     'bus_type': 'Mini', 'capacity': 20, 'year': 2022, 'color': 'Yellow', 'status': 'Active'},
+    {'registration_number': 'MH-01-JK-2205', 'bus_number': 'BUS-009', 'model': 'Tata Starbus',
+     'bus_type': 'Standard', 'capacity': 30, 'year': 2018, 'color': 'Yellow', 'status': 'Active'},
+    {'registration_number': 'MH-01-JK-2206', 'bus_number': 'BUS-010', 'model': 'Eicher Skyline',
+     'bus_type': 'AC', 'capacity': 40, 'year': 2023, 'color': 'White', 'status': 'Maintenance'},
+]
+
+SEED_DRIVERS = [
+    {
+        'name': 'Rajesh Kumar',
+        'phone': '9876543210',
+        'license_number': 'DL-0420150001234',
+        'license_expiry': '2024-12-31',
+        'status': 'Active',
+        'salary': 25000,
+        'salary_status': 'Paid',
+        'bus_assigned': 'BUS-001',
+        'joining_date': '2020-05-15',
+        'bank_account': '123456789012',
+        'ifsc_code': 'SBIN0000123',
+        'address': '123 Main Street, Mumbai',
+        'emergency_contact': '9876543211',
+        'experience_years': 5,
+        'rating': 4.5
+    },
+    {
+        'name': 'Suresh Patel',
+        'phone': '9876543211',
+        'license_number': 'MH-0120150005678',
+        'license_expiry': '2023-11-30',
+        'status': 'Active',
+        'salary': 28000,
+        'salary_status': 'Pending',
+        'bus_assigned': 'BUS-002',
+        'joining_date': '2019-08-22',
+        'bank_account': '234567890123',
+        'ifsc_code': 'HDFC0000456',
+        'address': '456 Park Avenue, Delhi',
+        'emergency_contact': '9876543212',
+        'experience_years': 7,
+        'rating': 4.2
+    },
+    {
+        'name': 'Amit Sharma',
+        'phone': '9876543212',
+        'license_number': 'GJ-0120160009012',
+        'license_expiry': '2025-06-15',
+        'status': 'Active',
+        'salary': 23000,
+        'salary_status': 'Paid',
+        'bus_assigned': 'BUS-003',
+        'joining_date': '2021-03-10',
+        'bank_account': '345678901234',
+        'ifsc_code': 'ICIC0000789',
+        'address': '789 Lake Road, Ahmedabad',
+        'emergency_contact': '9876543213',
+        'experience_years': 3,
+        'rating': 4.7
+    },
+    {
+        'name': 'Vikram Singh',
+        'phone': '9876543213',
+        'license_number': 'UP-0120170003456',
+        'license_expiry': '2023-09-30',
+        'status': 'Inactive',
+        'salary': 27000,
+        'salary_status': 'Overdue',
+        'bus_assigned': 'BUS-004',
+        'joining_date': '2018-11-05',
+        'bank_account': '456789012345',
+        'ifsc_code': 'AXIS0000912',
+        'address': '101 Hill View, Lucknow',
+        'emergency_contact': '9876543214',
+        'experience_years': 6,
+        'rating': 4.0
+    },
+    {
+        'name': 'Anil Gupta',
+        'phone': '9876543214',
+        'license_number': 'RJ-0120180007890',
+        'license_expiry': '2024-08-20',
+        'status': 'Active',
+        'salary': 26000,
+        'salary_status': 'Pending',
+        'bus_assigned': 'BUS-005',
+        'joining_date': '2022-01-18',
+        'bank_account': '567890123456',
+        'ifsc_code': 'PNB0000345',
+        'address': '202 Green Park, Jaipur',
+        'emergency_contact': '9876543215',
+        'experience_years': 2,
+        'rating': 4.3
+    }
+]
+
+SEED_SCHOOLS = [
+    {
+        'name': 'Delhi Public School',
+        'school_code': 'DPS001',
+        'type': 'Private',
+        'address': '123 Education Lane, Delhi',
+        'city': 'Delhi',
+        'phone': '011-23456789',
+        'email': 'contact@dpsdelhi.edu.in',
+        'principal_name': 'Dr. Ramesh Sharma',
+        'contact_person': 'Mr. Anil Kumar',
+        'contact_person_phone': '9876543210',
+        'student_count': 2500,
+        'contract_status': 'Active',
+        'contract_start': '2023-01-01',
+        'contract_end': '2024-12-31',
+        'monthly_fee': 150000,
+        'payment_status': 'Paid',
+        'assigned_buses': ['BUS-001', 'BUS-002'],
+        'pickup_time': '07:30',
+        'drop_time': '14:30',
+        'billing_address': 'Same as school address',
+        'gst_number': '07AABCD1234E1Z5'
+    },
+    {
+        'name': 'Kendriya Vidyalaya',
+        'school_code': 'KV001',
+        'type': 'Government',
+        'address': '456 Government Road, Delhi',
+        'city': 'Delhi',
+        'phone': '011-34567890',
+        'email': 'kvdelhi@kvs.gov.in',
+        'principal_name': 'Dr. Sunita Verma',
+        'contact_person': 'Mr. Rajesh Singh',
+        'contact_person_phone': '9876543211',
+        'student_count': 1800,
+        'contract_status': 'Active',
+        'contract_start': '2023-03-01',
+        'contract_end': '2025-02-28',
+        'monthly_fee': 120000,
+        'payment_status': 'Pending',
+        'assigned_buses': ['BUS-003', 'BUS-004'],
+        'pickup_time': '08:00',
+        'drop_time': '15:00',
+        'billing_address': 'Kendriya Vidyalaya, Delhi',
+        'gst_number': '07BABCD1234E1Z6'
+    },
+    {
+        'name': 'Modern Public School',
+        'school_code': 'MPS001',
+        'type': 'Private',
+        'address': '789 Modern Road, Gurgaon',
+        'city': 'Gurgaon',
+        'phone': '0124-4567890',
+        'email': 'info@modernschool.edu.in',
+        'principal_name': 'Mrs. Priya Kapoor',
+        'contact_person': 'Mr. Vikas Gupta',
+        'contact_person_phone': '9876543212',
+        'student_count': 3000,
+        'contract_status': 'Active',
+        'contract_start': '2023-06-01',
+        'contract_end': '2024-05-31',
+        'monthly_fee': 200000,
+        'payment_status': 'Paid',
+        'assigned_buses': ['BUS-005'],
+        'pickup_time': '07:45',
+        'drop_time': '14:45',
+        'billing_address': 'Modern School Accounts Dept, Gurgaon',
+        'gst_number': '06CABCD1234E1Z7'
+    },
+    {
+        'name': 'Little Angels School',
+        'school_code': 'LAS001',
+        'type': 'Private',
+        'address': '101 Children Street, Noida',
+        'city': 'Noida',
+        'phone': '0120-5678901',
+        'email': 'contact@littleangels.edu.in',
+        'principal_name': 'Mrs. Anjali Mehta',
+        'contact_person': 'Mr. Sanjay Patel',
+        'contact_person_phone': '9876543213',
+        'student_count': 1200,
+        'contract_status': 'Expiring Soon',
+        'contract_start': '2022-04-01',
+        'contract_end': '2023-12-31',
+        'monthly_fee': 80000,
+        'payment_status': 'Overdue',
+        'assigned_buses': ['BUS-006'],
+        'pickup_time': '08:15',
+        'drop_time': '15:15',
+        'billing_address': 'Little Angels School, Noida',
+        'gst_number': '09DABCD1234E1Z8'
+    },
+    {
+        'name': 'Government Senior Secondary School',
+        'school_code': 'GSSS001',
+        'type': 'Government',
+        'address': '202 Public Sector, Faridabad',
+        'city': 'Faridabad',
+        'phone': '0129-6789012',
+        'email': 'gsss.fbd@edu.gov.in',
+        'principal_name': 'Mr. Harish Yadav',
+        'contact_person': 'Mr. Rakesh Kumar',
+        'contact_person_phone': '9876543214',
+        'student_count': 2200,
+        'contract_status': 'Inactive',
+        'contract_start': '2022-09-01',
+        'contract_end': '2023-08-31',
+        'monthly_fee': 100000,
+        'payment_status': 'Paid',
+        'assigned_buses': ['BUS-007', 'BUS-008'],
+        'pickup_time': '07:15',
+        'drop_time': '14:15',
+        'billing_address': 'GSSS Faridabad',
+        'gst_number': '06EABCD1234E1Z9'
+    }
+]
+
+# (username, full name, email, role, status, last login, password)
+SEED_USERS = [
+    ("admin", "System Administrator", "admin@company.com", "Admin", "Active", "2024-01-20 10:30", "admin123"),
+    ("manager1", "John Manager", "john@company.com", "Manager", "Active", "2024-01-19 14:15", None),
+    ("accountant1", "Sarah Accountant", "sarah@company.com", "Accountant", "Active", "2024-01-18 11:45", None),
+    ("driver1", "Michael Driver", "michael@company.com", "Driver", "Active", "2024-01-17 09:20", None),
+    ("viewer1", "Lisa Viewer", "lisa@company.com", "Viewer", "Inactive", "2024-01-10 16:40", None),
+    ("manager2", "Robert Manager", "robert@company.com", "Manager", "Active", "2024-01-15 13:10", None),
+]
+
+# (timestamp, username, ip address, action, module, details)
+SEED_ACTIVITY_LOGS = [
+    ("2024-01-20 10:30:15", "admin", "192.168.1.100", "Login", "System", "Successful login"),
+    ("2024-01-20 10:35:22", "admin", "192.168.1.100", "Create", "User Management", "Created new user: manager2"),
+    ("2024-01-20 11:15:45", "manager1", "192.168.1.101", "Login", "System", "Successful login"),
+    ("2024-01-20 11:20:30", "manager1", "192.168.1.101", "View", "Financial Reports", "Viewed monthly report"),
+    ("2024-01-20 12:05:18", "accountant1", "192.168.1.102", "Login", "System", "Successful login"),
+    ("2024-01-20 12:10:45", "accountant1", "192.168.1.102", "Export", "Salary Reports", "Exported salary register"),
+    ("2024-01-20 13:45:22", "admin", "192.168.1.100", "Edit", "System Settings", "Updated company information"),
+    ("2024-01-20 14:30:15", "driver1", "192.168.1.103", "Login", "System", "Successful login"),
+    ("2024-01-20 15:20:33", "manager1", "192.168.1.101", "Logout", "System", "User logged out"),
+    ("2024-01-20 16:45:12", "admin", "192.168.1.100", "Backup", "Database", "Created system backup"),
+]
+
+# Bus depots: (name, address, city, latitude, longitude)
+SEED_DEPOTS = [
+    ('Main Depot', 'Plot 14, Transport Nagar, Delhi', 'Delhi', 28.6692, 77.2265),
+]
+
+# School locations by school_code (latitude, longitude)
+SEED_SCHOOL_LOCATIONS = {
+    'DPS001': (28.6139, 77.209),
+    'KV001': (28.5921, 77.229),
+    'MPS001': (28.4595, 77.0266),
+    'LAS001': (28.5355, 77.391),
+    'GSSS001': (28.4089, 77.3178),
+}
+
+# Pickup stops: (school_code, stop name, latitude, longitude, students)
+SEED_STOPS = [
+    ('DPS001', 'Sector 22', 28.6587, 77.1985, 4),
+    ('DPS001', 'Market Chowk 6', 28.6460, 77.1684, 13),
+    ('DPS001', 'Metro Gate 5', 28.6549, 77.1805, 5),
+    ('DPS001', 'Park Colony 29', 28.6057, 77.1831, 12),
+    ('DPS001', 'Temple Road 29', 28.5698, 77.2155, 7),
+    ('DPS001', 'Block 39', 28.6587, 77.2167, 10),
+    ('DPS001', 'Civil Lines 5', 28.6615, 77.1637, 17),
+    ('DPS001', 'Bus Stand 10', 28.5929, 77.1734, 5),
+    ('KV001', 'Sector 38', 28.5729, 77.2606, 6),
+    ('KV001', 'Market Chowk 8', 28.6003, 77.2429, 9),
+    ('KV001', 'Metro Gate 8', 28.5969, 77.1853, 4),
+    ('KV001', 'Park Colony 15', 28.5917, 77.2322, 16),
+    ('KV001', 'Temple Road 22', 28.5887, 77.2713, 9),
+    ('KV001', 'Block 21', 28.5669, 77.1970, 16),
+    ('KV001', 'Civil Lines 17', 28.5503, 77.2090, 11),
+    ('KV001', 'Bus Stand 23', 28.6150, 77.2078, 5),
+    ('MPS001', 'Sector 9', 28.4607, 76.9931, 9),
+    ('MPS001', 'Market Chowk 11', 28.5028, 77.0188, 14),
+    ('MPS001', 'Metro Gate 6', 28.4860, 77.0339, 18),
+    ('MPS001', 'Park Colony 22', 28.4435, 77.0116, 11),
+    ('MPS001', 'Temple Road 39', 28.4892, 76.9835, 5),
+    ('MPS001', 'Block 19', 28.4569, 77.0430, 4),
+    ('MPS001', 'Civil Lines 21', 28.4742, 77.0759, 17),
+    ('MPS001', 'Bus Stand 30', 28.4380, 77.0152, 14),
+    ('LAS001', 'Sector 24', 28.4878, 77.3872, 6),
+    ('LAS001', 'Market Chowk 9', 28.5349, 77.3628, 8),
+    ('LAS001', 'Metro Gate 10', 28.5593, 77.3808, 18),
+    ('LAS001', 'Park Colony 33', 28.4936, 77.3859, 12),
+    ('LAS001', 'Temple Road 19', 28.5738, 77.4229, 17),
+    ('LAS001', 'Block 37', 28.5133, 77.3825, 9),
+    ('LAS001', 'Civil Lines 26', 28.5813, 77.3561, 6),
+    ('LAS001', 'Bus Stand 11', 28.5087, 77.3643, 11),
+    ('GSSS001', 'Sector 39', 28.3771, 77.2960, 6),
+    ('GSSS001', 'Market Chowk 28', 28.4124, 77.3288, 9),
+    ('GSSS001', 'Metro Gate 10', 28.4279, 77.3193, 13),
+    ('GSSS001', 'Park Colony 5', 28.4046, 77.3549, 17),
+    ('GSSS001', 'Temple Road 37', 28.3981, 77.3077, 5),
+    ('GSSS001', 'Block 32', 28.4223, 77.2740, 5),
+    ('GSSS001', 'Civil Lines 15', 28.4030, 77.2788, 13),
+    ('GSSS001', 'Bus Stand 5', 28.3691, 77.3245, 12),
+]
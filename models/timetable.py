@@ -0,0 +1,452 @@
+"""
+Each bus's day-by-day timetable, kept in the bus_timetable table.
+
+A day's timetable is built from the bus's active assignments (each
+school's pickup_time and drop_time), its planned routes, its driver and
+its maintenance windows. It holds these kinds of entry:
+
+    Duty         the driver's hours, DUTY_MARGIN_MINUTES either side of
+                 the runs; the rostered driver (models/roster.py) where
+                 the day has a roster, else the bus's own driver
+    Pickup run   from pickup_time through the stops to the school
+    Drop run     from drop_time out through the stops in reverse order
+    Stop         each stop on a run, DWELL_MINUTES long
+    Maintenance  a workshop booking, or the whole day for a bus whose
+                 status is Maintenance
+
+Without a planned route, a run takes RUN_MINUTES, as in conflict
+checks. Timetables cover today and the next HORIZON_DAYS - 1 days.
+
+Change events only note what changed. refresh_stale() later works out
+which buses the changes touch (assignments, routes, driver, roster,
+maintenance, school hours) and regenerates them in one transaction,
+writing only the buses whose timetable actually differs. The GUI calls
+it on the worker pool shortly after the last change. Reading a
+schedule is a single query on the primary key:
+
+    fetch_timetable(bus_id, day)
+"""
+import datetime
+import math
+import threading
+
+from models import events
+from models.db_connection import transaction
+from models.distance_store import AVERAGE_SPEED_KMPH
+from models.events import publish, UPDATE
+from models.filters import Filter
+from models.schedule_conflicts import RUN_MINUTES, clock, minutes
+from models.schema import connect
+
+HORIZON_DAYS = 7
+
+# Monday to Friday
+SCHOOL_DAYS = (0, 1, 2, 3, 4)
+
+DWELL_MINUTES = 2
+DUTY_MARGIN_MINUTES = 30
+
+DUTY = 'Duty'
+PICKUP_RUN = 'Pickup run'
+DROP_RUN = 'Drop run'
+STOP = 'Stop'
+MAINTENANCE = 'Maintenance'
+
+# Entries starting at the same time are listed in this order
+KIND_ORDER = {DUTY: 0, MAINTENANCE: 1, PICKUP_RUN: 2, DROP_RUN: 2, STOP: 3}
+
+DAY_MINUTES = 24 * 60
+
+# Entities whose changes can alter a timetable. A bus event may only be
+# an insurance or similar edit; regenerate() then finds nothing to write.
+INPUT_ENTITIES = ('assignment', 'bus', 'driver', 'maintenance', 'roster', 'route',
+                  'school', 'stop')
+
+# (entity, entity_id) of the changes not yet applied by refresh_stale()
+_stale = set()
+_stale_lock = threading.Lock()
+
+
+def horizon(start=None):
+    """The days a timetable is kept for, starting today"""
+    start = start or datetime.date.today()
+    return [start + datetime.timedelta(days=n) for n in range(HORIZON_DAYS)]
+
+
+def _travel(km):
+    return math.ceil(km / AVERAGE_SPEED_KMPH * 60)
+
+
+def load_inputs(conn, bus_id, days):
+    """Read everything a bus's timetable depends on, or None if the bus is gone"""
+    bus = conn.execute(
+        "SELECT id, bus_number, status FROM buses WHERE id = ?", (bus_id,)
+    ).fetchone()
+    if bus is None:
+        return None
+
+    schools = conn.execute("""
+        SELECT s.id, s.name, s.pickup_time, s.drop_time, r.distance_km
+        FROM assignments a
+        JOIN schools s ON s.id = a.school_id
+        LEFT JOIN bus_routes r ON r.bus_id = a.bus_id AND r.school_id = s.id
+        WHERE a.bus_id = ? AND a.status = 'Active'
+        ORDER BY s.pickup_time
+    """, (bus_id,)).fetchall()
+
+    stops = {}
+    for row in conn.execute("""
+        SELECT rs.school_id, rs.stop_id, st.name, st.students, rs.leg_km
+        FROM route_stops rs
+        JOIN stops st ON st.id = rs.stop_id
+        WHERE rs.bus_id = ?
+        ORDER BY rs.school_id, rs.sequence
+    """, (bus_id,)):
+        stops.setdefault(row['school_id'], []).append(row)
+
+    driver = conn.execute("""
+        SELECT id, name FROM drivers
+        WHERE bus_id = ? AND status = 'Active'
+        ORDER BY id LIMIT 1
+    """, (bus_id,)).fetchone()
+
+    windows = conn.execute("""
+        SELECT start_at, end_at, description FROM maintenance_windows
+        WHERE bus_id = ? AND end_at > ? AND start_at < ?
+        ORDER BY start_at
+    """, (bus_id, f"{days[0].isoformat()} 00:00",
+          f"{(days[-1] + datetime.timedelta(days=1)).isoformat()} 00:00")).fetchall()
+
+    roster = {}
+    for row in conn.execute("""
+        SELECT r.day, r.start_time, r.end_time, d.id, d.name
+        FROM driver_roster r
+        JOIN drivers d ON d.id = r.driver_id
+        WHERE r.bus_id = ? AND r.day BETWEEN ? AND ?
+        ORDER BY r.day, r.start_time
+    """, (bus_id, days[0].isoformat(), days[-1].isoformat())):
+        roster.setdefault(row['day'], []).append(row)
+
+    return {'bus': bus, 'schools': schools, 'stops': stops,
+            'driver': driver, 'roster': roster, 'windows': windows}
+
+
+def _pickup_run(school, stops):
+    """Entries of a morning run: the run itself, then each stop"""
+    start = minutes(school['pickup_time'])
+    if not stops:
+        return [(start, start + RUN_MINUTES, PICKUP_RUN,
+                 f"{school['name']} morning run", school['id'], None)]
+
+    time = start
+    entries = []
+    for stop in stops:
+        time += _travel(stop['leg_km'])
+        entries.append((time, time + DWELL_MINUTES, STOP,
+                        f"Pick up {stop['students']} at {stop['name']}",
+                        school['id'], stop['stop_id']))
+        time += DWELL_MINUTES
+    final_leg = (school['distance_km'] or 0) - sum(stop['leg_km'] for stop in stops)
+    time += _travel(max(final_leg, 0))
+    run = (start, time, PICKUP_RUN,
+           f"{school['name']} morning run, {len(stops)} stops", school['id'], None)
+    return [run] + entries
+
+
+def _drop_run(school, stops):
+    """Entries of an afternoon run: out from the school, last stop first"""
+    start = minutes(school['drop_time'])
+    if not stops:
+        return [(start, start + RUN_MINUTES, DROP_RUN,
+                 f"{school['name']} afternoon run", school['id'], None)]
+
+    final_leg = (school['distance_km'] or 0) - sum(stop['leg_km'] for stop in stops)
+    # Leg into each stop when driving the route backwards
+    legs = [max(final_leg, 0)] + [stop['leg_km'] for stop in reversed(stops[1:])]
+    time = start
+    entries = []
+    for stop, leg in zip(reversed(stops), legs):
+        time += _travel(leg)
+        entries.append((time, time + DWELL_MINUTES, STOP,
+                        f"Drop off {stop['students']} at {stop['name']}",
+                        school['id'], stop['stop_id']))
+        time += DWELL_MINUTES
+    run = (start, time, DROP_RUN,
+           f"{school['name']} afternoon run, {len(stops)} stops", school['id'], None)
+    return [run] + entries
+
+
+def duty_blocks(runs):
+    """Merge the runs, padded by DUTY_MARGIN_MINUTES, into duty blocks"""
+    blocks = []
+    for start, end in sorted((run[0] - DUTY_MARGIN_MINUTES, run[1] + DUTY_MARGIN_MINUTES)
+                             for run in runs):
+        if blocks and start <= blocks[-1][1]:
+            blocks[-1][1] = max(blocks[-1][1], end)
+        else:
+            blocks.append([max(start, 0), end])
+    return blocks
+
+
+def day_entries(inputs, day):
+    """
+    Return a bus's timetable for one day as (start, end, kind,
+    description, school_id, stop_id, driver_id) tuples in time order,
+    with times in minutes after midnight.
+    """
+    entries = []
+    day_start = f"{day.isoformat()} 00:00"
+    day_end = f"{(day + datetime.timedelta(days=1)).isoformat()} 00:00"
+
+    in_workshop = inputs['bus']['status'] == 'Maintenance'
+    if in_workshop:
+        entries.append((0, DAY_MINUTES, MAINTENANCE, "In the workshop", None, None))
+    for window in inputs['windows']:
+        if window['end_at'] <= day_start or window['start_at'] >= day_end:
+            continue
+        start = 0 if window['start_at'] < day_start else minutes(window['start_at'][11:])
+        end = DAY_MINUTES if window['end_at'] >= day_end else minutes(window['end_at'][11:])
+        entries.append((start, end, MAINTENANCE, window['description'] or "Maintenance",
+                        None, None))
+
+    runs = []
+    if not in_workshop and day.weekday() in SCHOOL_DAYS:
+        for school in inputs['schools']:
+            stops = inputs['stops'].get(school['id'], [])
+            for run_entries in (_pickup_run(school, stops), _drop_run(school, stops)):
+                runs.append(run_entries[0])
+                entries.extend(run_entries)
+
+    driver = inputs['driver']
+    entries = [entry + (None,) for entry in entries]
+    rostered = inputs['roster'].get(day.isoformat())
+    if rostered and runs:
+        for shift in rostered:
+            entries.append((minutes(shift['start_time']), minutes(shift['end_time']), DUTY,
+                            f"{shift['name']} on duty", None, None, shift['id']))
+    elif driver is not None and runs:
+        for start, end in duty_blocks(runs):
+            entries.append((start, min(end, DAY_MINUTES), DUTY, f"{driver['name']} on duty",
+                            None, None, driver['id']))
+
+    entries.sort(key=lambda e: (e[0], KIND_ORDER[e[2]], -e[1]))
+    return entries
+
+
+def _generated_rows(conn, bus_id, days):
+    """The bus_timetable rows a bus should have over `days` (none if the bus is gone)"""
+    inputs = load_inputs(conn, bus_id, days)
+    if inputs is None:
+        return [], 0
+    return [(day.isoformat(), sequence, clock(start), clock(end), *rest)
+            for day in days
+            for sequence, (start, end, *rest) in enumerate(day_entries(inputs, day))], len(days)
+
+
+def _stored_rows(conn, bus_id, days):
+    """The bus_timetable rows a bus has over `days`, and how many of the days are generated"""
+    first, last = days[0].isoformat(), days[-1].isoformat()
+    rows = [tuple(row) for row in conn.execute("""
+        SELECT day, sequence, start_time, end_time, kind, description,
+               school_id, stop_id, driver_id
+        FROM bus_timetable
+        WHERE bus_id = ? AND day BETWEEN ? AND ?
+        ORDER BY day, sequence
+    """, (bus_id, first, last))]
+    generated = conn.execute(
+        "SELECT COUNT(*) FROM timetable_days WHERE bus_id = ? AND day BETWEEN ? AND ?",
+        (bus_id, first, last)
+    ).fetchone()[0]
+    return rows, generated
+
+
+def regenerate(bus_ids, days=None):
+    """
+    Rebuild the timetables of `bus_ids` for `days` (default the horizon).
+    Buses whose timetable comes out unchanged are not written. Returns
+    the number of buses rewritten.
+    """
+    days = days or horizon()
+    first, last = days[0].isoformat(), days[-1].isoformat()
+    conn = connect()
+    changed = {}
+    for bus_id in bus_ids:
+        rows = _generated_rows(conn, bus_id, days)
+        if rows != _stored_rows(conn, bus_id, days):
+            changed[bus_id] = rows
+    if not changed:
+        return 0
+
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    with transaction(immediate=True) as conn:
+        for bus_id, (rows, generated) in changed.items():
+            conn.execute("DELETE FROM bus_timetable WHERE bus_id = ? AND day BETWEEN ? AND ?",
+                         (bus_id, first, last))
+            conn.execute("DELETE FROM timetable_days WHERE bus_id = ? AND day BETWEEN ? AND ?",
+                         (bus_id, first, last))
+            conn.executemany("""
+                INSERT INTO bus_timetable (bus_id, day, sequence, start_time, end_time,
+                    kind, description, school_id, stop_id, driver_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(bus_id, *row) for row in rows])
+            if generated:
+                conn.executemany(
+                    "INSERT INTO timetable_days (bus_id, day, generated_at) VALUES (?, ?, ?)",
+                    [(bus_id, day.isoformat(), now) for day in days]
+                )
+            publish('timetable', bus_id, UPDATE)
+    return len(changed)
+
+
+def ensure_horizon():
+    """
+    Drop past days and generate the timetables still missing from the
+    horizon (all of them on first run, one new day after midnight).
+    Returns the number of buses regenerated.
+    """
+    days = horizon()
+    conn = connect()
+    with transaction():
+        conn.execute("DELETE FROM bus_timetable WHERE day < ?", (days[0].isoformat(),))
+        conn.execute("DELETE FROM timetable_days WHERE day < ?", (days[0].isoformat(),))
+        conn.execute("DELETE FROM driver_roster WHERE day < ?", (days[0].isoformat(),))
+    generated = {}
+    for row in conn.execute("SELECT bus_id, COUNT(*) FROM timetable_days GROUP BY bus_id"):
+        generated[row[0]] = row[1]
+    stale = [row[0] for row in conn.execute("SELECT id FROM buses")
+             if generated.get(row[0], 0) < len(days)]
+    if stale:
+        regenerate(stale, days)
+    return len(stale)
+
+
+def fetch_timetable(bus_id, day=None):
+    """Return a bus's timetable for `day` (default today) in time order"""
+    day = day or datetime.date.today()
+    rows = connect().execute("""
+        SELECT sequence, start_time, end_time, kind, description,
+               school_id, stop_id, driver_id
+        FROM bus_timetable
+        WHERE bus_id = ? AND day = ?
+        ORDER BY sequence
+    """, (bus_id, day.isoformat())).fetchall()
+    return [dict(row) for row in rows]
+
+
+def fetch_fleet_timeline(days=None, bus_ids=None):
+    """
+    Return the timetables of every bus (or `bus_ids`) over `days` for the
+    fleet view, as a dict with:
+
+        buses      [(bus_id, bus_number)] in bus number order
+        entries    {bus_id: [(start, end, kind, description)]} by start
+        conflicts  {bus_id: [(start, end)]} where runs or maintenance overlap
+
+    Times are minutes from midnight of the first day.
+    """
+    days = days or horizon()
+    first = days[0]
+    conn = connect()
+    query = Filter("b.bus_number").one_of("b.id", bus_ids)
+    buses = [(row['id'], row['bus_number']) for row in conn.execute(
+        query.sql("SELECT b.id, b.bus_number FROM buses b"), query.params
+    )]
+
+    query = Filter("t.bus_id, t.day, t.sequence").one_of("t.bus_id", bus_ids).condition(
+        "t.day BETWEEN ? AND ?", first.isoformat(), days[-1].isoformat()
+    )
+    entries = {bus_id: [] for bus_id, _number in buses}
+    offsets = {day.isoformat(): (day - first).days * DAY_MINUTES for day in days}
+    for row in conn.execute(query.sql("""
+        SELECT t.bus_id, t.day, t.start_time, t.end_time, t.kind, t.description
+        FROM bus_timetable t
+    """), query.params):
+        offset = offsets[row['day']]
+        entries.setdefault(row['bus_id'], []).append(
+            (offset + minutes(row['start_time']), offset + minutes(row['end_time']),
+             row['kind'], row['description'])
+        )
+
+    conflicts = {}
+    for bus_id, bus_entries in entries.items():
+        bus_entries.sort(key=lambda e: (e[0], KIND_ORDER[e[2]]))
+        overlaps = _overlaps([e for e in bus_entries if e[2] in (PICKUP_RUN, DROP_RUN, MAINTENANCE)])
+        if overlaps:
+            conflicts[bus_id] = overlaps
+    return {'buses': buses, 'entries': entries, 'conflicts': conflicts}
+
+
+def _overlaps(blocks):
+    """
+    Intervals where a run overlaps another run or maintenance, given
+    blocks sorted by start. Two maintenance blocks are not a conflict.
+    """
+    overlaps = []
+    latest, latest_is_run = None, False
+    for start, end, kind, *_rest in blocks:
+        is_run = kind != MAINTENANCE
+        if latest is not None and start < latest and (is_run or latest_is_run):
+            overlaps.append((start, min(end, latest)))
+        if latest is None or end > latest:
+            latest, latest_is_run = end, is_run
+    return overlaps
+
+
+def _affected_buses(conn, entity, entity_id):
+    if entity in ('bus', 'route', 'roster'):
+        return {entity_id}
+    if entity == 'assignment':
+        query = "SELECT bus_id FROM assignments WHERE id = ?"
+    elif entity == 'maintenance':
+        query = "SELECT bus_id FROM maintenance_windows WHERE id = ?"
+    elif entity == 'school':
+        query = "SELECT bus_id FROM assignments WHERE school_id = ? AND status = 'Active'"
+    elif entity == 'driver':
+        query = """
+            SELECT bus_id FROM drivers WHERE id = ?1 AND bus_id IS NOT NULL
+            UNION SELECT bus_id FROM bus_timetable WHERE driver_id = ?1
+            UNION SELECT bus_id FROM driver_roster WHERE driver_id = ?1
+        """
+    elif entity == 'stop':
+        query = "SELECT DISTINCT bus_id FROM route_stops WHERE stop_id = ?"
+    else:
+        return set()
+    return {row[0] for row in conn.execute(query, (entity_id,))}
+
+
+def _on_change(entity, entity_id, _operation):
+    if entity in INPUT_ENTITIES:
+        with _stale_lock:
+            _stale.add((entity, entity_id))
+
+
+def has_stale():
+    """True if changes are waiting for refresh_stale()"""
+    with _stale_lock:
+        return bool(_stale)
+
+
+def refresh_stale():
+    """
+    Regenerate, in one transaction, the buses touched by the changes
+    noted since the last call. Returns the number of buses rewritten. If
+    it fails the changes are kept, so the next call tries them again.
+    """
+    with _stale_lock:
+        changes = set(_stale)
+        _stale.clear()
+    if not changes:
+        return 0
+    try:
+        conn = connect()
+        buses = set()
+        for entity, entity_id in changes:
+            buses |= _affected_buses(conn, entity, entity_id)
+        return regenerate(sorted(buses))
+    except Exception:
+        with _stale_lock:
+            _stale.update(changes)
+        raise
+
+
+events.subscribe(_on_change)
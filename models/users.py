@@ -0,0 +1,47 @@
+"""
+User account and activity log queries for the system admin pages.
+"""
+from models.filters import Filter
+from models.schema import connect
+
+
+USER_SEARCH_COLUMNS = ("username", "full_name", "email", "role")
+
+
+def fetch_users(search="", role=None, status=None, ids=None, limit=None, offset=0,
+                after=None):
+    """
+    Return user accounts ordered by id.
+
+    `search` is matched anywhere in the username, name, email or role;
+    `role` and `status` are exact filters ('All' or empty means no
+    filter). Pass `ids` to fetch only those users, or `limit`/`offset`
+    to fetch one page (`after`, the previous page's last user, seeks
+    past it instead of skipping `offset` rows).
+    """
+    query = (Filter("id")
+             .equals("role", role)
+             .equals("status", status)
+             .contains(USER_SEARCH_COLUMNS, search)
+             .one_of("id", ids)
+             .page(limit, offset, after and (after['id'],)))
+    rows = connect().execute(query.sql("""
+        SELECT id, username, full_name, email, role, status, last_login
+        FROM users
+    """), query.params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def fetch_activity_logs(limit=None, offset=0, after=None, ids=None):
+    """
+    Return activity log entries, newest first, optionally one page
+    (`after` is the previous page's last entry) or only `ids`
+    """
+    query = (Filter("timestamp DESC, id DESC")
+             .one_of("id", ids)
+             .page(limit, offset, after and (after['timestamp'], after['id'])))
+    rows = connect().execute(query.sql("""
+        SELECT id, timestamp, username, ip_address, action, module, details
+        FROM activity_logs
+    """), query.params).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,94 @@
+"""
+Shared fixtures for the model tests.
+
+Every test that takes `db` gets its own database file, migrated and
+seeded with the sample data, and starts with empty in-memory indexes.
+`driver_form_db` does the same for the standalone driver form. Tests of
+the frontend take `qapp`, an offscreen QApplication, and `settle` to run
+queued jobs and deliver their signals.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# The standalone driver form, which keeps drivers.db in the working directory
+DRIVER_FORM_DIR = os.path.join(ROOT, "drivers(form valid)")
+# The Qt frontend, whose modules import each other by bare name
+FRONTEND_DIR = os.path.join(ROOT, "frontend")
+
+from models import db_connection, events  # noqa: E402
+
+
+def _reset_caches():
+    """Forget everything the module-level indexes loaded from the last database"""
+    from models import insurance_snapshot
+    from models.assignments import ASSIGNMENTS
+    from models.bitmap_index import TableIndex
+    from models.distance_store import DISTANCES
+    from models.expiry_index import ExpiryIndex
+    from models.schedule_conflicts import SCHEDULE
+    from models.timetable import _stale
+
+    for index in (ASSIGNMENTS, SCHEDULE):
+        events.unsubscribe(index._on_change)
+        index.__init__()
+    for listener in list(events._listeners):
+        index = getattr(listener, '__self__', None)
+        if isinstance(index, TableIndex):
+            index.clear()
+            index._built = False
+        elif isinstance(index, ExpiryIndex):
+            index._built = False
+    insurance_snapshot._cache.clear()
+    DISTANCES.close()
+    _stale.clear()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated database; yields its connection"""
+    monkeypatch.setattr(db_connection, "DEFAULT_DB_PATH", str(tmp_path / "bus_management.db"))
+    _reset_caches()
+    from models.schema import connect
+    yield connect()
+    _reset_caches()
+
+
+@pytest.fixture
+def driver_form_db(tmp_path, monkeypatch):
+    """The driver form's database module, on a fresh drivers.db in tmp_path"""
+    monkeypatch.syspath_prepend(DRIVER_FORM_DIR)
+    monkeypatch.chdir(tmp_path)
+    import database
+    database._reserved_ids.clear()
+    database.initialize_db()
+    yield database
+    database._reserved_ids.clear()
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """The QApplication for frontend tests, drawing offscreen"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    pytest.importorskip("PyQt5")
+    if FRONTEND_DIR not in sys.path:
+        sys.path.insert(0, FRONTEND_DIR)
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def settle(qapp):
+    """Call to wait for the queued jobs and deliver their results"""
+    from PyQt5.QtCore import QThreadPool
+
+    def run():
+        for _ in range(5):
+            QThreadPool.globalInstance().waitForDone()
+            qapp.processEvents()
+    return run
@@ -0,0 +1,69 @@
+import pytest
+
+from models.assignment_optimizer import TYPE_COST, apply_plan, plan_buses, propose_plan
+from models.assignments import ASSIGNMENTS, assign_bus_to_school, remove_bus_from_school
+
+
+def _school(school_id, students, assigned=0):
+    return {'id': school_id, 'name': f"School {school_id}", 'student_count': students,
+            'assigned_seats': assigned}
+
+
+def _bus(bus_id, capacity, bus_type='Standard'):
+    return {'id': bus_id, 'bus_number': f"BUS-{bus_id:03d}", 'bus_type': bus_type,
+            'capacity': capacity}
+
+
+def test_fewest_buses_then_fewest_empty_seats():
+    # One 60 seater beats two 30 seaters; 40 seats are enough for the second school
+    assert sorted(plan_buses([55, 35], [30, 30, 60, 40])) == [(0, 2), (1, 3)]
+    assert plan_buses([0], [40]) == []
+    assert plan_buses([10], []) == []
+
+
+def test_dearer_bus_types_come_last():
+    plan = propose_plan([_school(1, 30)], [_bus(1, 40, 'AC'), _bus(2, 40)])
+    assert [a['bus_id'] for a in plan.assignments] == [2]
+
+
+def test_mini_buses_take_the_small_needs():
+    buses = [_bus(1, 40), _bus(2, 20, 'Mini'), _bus(3, 40, 'AC')]
+    plan = propose_plan([_school(1, 18), _school(2, 35)], buses)
+    assert plan.pairs() == [(1, 2), (2, 1)]
+    assert plan.empty_seats == 7
+    # A need the Mini cannot seat alone still gets one full-size bus
+    plan = propose_plan([_school(1, 25)], buses)
+    assert plan.pairs() == [(1, 1)]
+    assert set(TYPE_COST) >= {b['bus_type'] for b in buses}
+
+
+def test_plan_summary_counts_short_and_empty_seats():
+    plan = propose_plan([_school(1, 100, assigned=30), _school(2, 10)], [_bus(1, 50)])
+    first, second = plan.schools
+    # The only bus seats all of school 2, but could not finish school 1
+    assert (second['buses'], second['planned_seats'], second['empty_seats']) == (1, 50, 40)
+    assert (first['buses'], first['short']) == (0, 70)
+    assert plan.empty_seats == 40 and plan.short == 70
+    assert plan.pairs() == [(2, 1)]
+
+
+def test_plan_uses_only_free_buses_on_the_road(db):
+    plan = propose_plan()
+    # Buses 1-8 are assigned and bus 10 is in maintenance
+    assert [a['bus_id'] for a in plan.assignments] == [9]
+    assert plan.short > 0
+
+
+def test_apply_plan_is_all_or_nothing(db):
+    plan = propose_plan()
+    assert [a['bus_id'] for a in plan.assignments] == [9]
+    school_id = plan.assignments[0]['school_id']
+
+    assign_bus_to_school(2, "BUS-009")
+    with pytest.raises(ValueError, match="BUS-009"):
+        apply_plan(plan)
+    assert ASSIGNMENTS.schools_of_bus(9) == {2}
+
+    remove_bus_from_school(2, "BUS-009")
+    assert len(apply_plan(plan)) == 1
+    assert ASSIGNMENTS.schools_of_bus(9) == {school_id}
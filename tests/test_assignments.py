@@ -0,0 +1,53 @@
+import pytest
+
+from models.assignments import (
+    ASSIGNMENTS, assign_bus_to_school, assign_buses, remove_bus_from_school
+)
+from models.db_connection import transaction
+from models.events import DELETE, publish
+
+
+def test_index_mirrors_active_assignments(db):
+    assert ASSIGNMENTS.bus_id("BUS-001") == 1
+    assert ASSIGNMENTS.schools_of_bus(1) == {1}
+    assert ASSIGNMENTS.buses_of_school(5) == {7, 8}
+    assert ASSIGNMENTS.shared_buses() == {}
+
+
+def test_assigning_without_transfer_shares_the_bus(db):
+    assign_bus_to_school(3, "BUS-001")
+    assert ASSIGNMENTS.schools_of_bus(1) == {1, 3}
+    assert ASSIGNMENTS.other_schools(1, 3) == [1]
+    assert ASSIGNMENTS.shared_buses() == {1: frozenset({1, 3})}
+
+
+def test_transfer_moves_the_bus_in_one_transaction(db):
+    assign_bus_to_school(3, "BUS-001")
+    assign_bus_to_school(4, "BUS-001", transfer=True, from_schools=[3])
+    assert ASSIGNMENTS.schools_of_bus(1) == {1, 4}
+    assign_bus_to_school(2, "BUS-001", transfer=True)
+    assert ASSIGNMENTS.schools_of_bus(1) == {2}
+    assert db.execute("SELECT school_id FROM assignments WHERE bus_id = 1").fetchall()[0][0] == 2
+
+    with pytest.raises(ValueError):
+        assign_bus_to_school(1, "BUS-999", transfer=True)
+    assert ASSIGNMENTS.schools_of_bus(1) == {2}
+
+
+def test_bulk_assign_is_all_or_nothing(db):
+    with pytest.raises(Exception):
+        assign_buses([(1, 9), (999, 10)])
+    assert ASSIGNMENTS.buses_of_school(1) == {1, 2}
+    assign_buses([(1, 9), (2, 10)])
+    assert ASSIGNMENTS.buses_of_school(1) == {1, 2, 9}
+    assert ASSIGNMENTS.is_assigned(10, 2)
+
+
+def test_index_follows_removals_and_deletes(db):
+    remove_bus_from_school(1, "BUS-002")
+    assert ASSIGNMENTS.buses_of_school(1) == {1}
+    with transaction():
+        db.execute("DELETE FROM buses WHERE id = 1")
+        publish('bus', 1, DELETE)
+    assert ASSIGNMENTS.buses_of_school(1) == frozenset()
+    assert ASSIGNMENTS.bus_id("BUS-001") is None
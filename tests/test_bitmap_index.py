@@ -0,0 +1,56 @@
+import random
+
+from models.bitmap_index import BitmapIndex, bitmap_of, has, ids
+from models.buses import BUS_INDEX, fetch_buses, set_bus_status
+
+
+def test_bitmap_of_matches_ids():
+    row_ids = random.Random(7).sample(range(1, 100_000), 5_000)
+    bitmap = bitmap_of(row_ids)
+    assert ids(bitmap) == sorted(row_ids)
+    assert bitmap == sum(1 << row_id for row_id in row_ids)
+    assert bitmap_of([]) == 0
+    assert bitmap_of(iter([0, 8, 9])) == 0b1100000001
+
+
+def test_add_many_builds_the_same_index_as_add():
+    rows = [(i, {'status': ['Active', 'Inactive'][i % 2], 'type': 'AC' if i % 3 else 'Mini'})
+            for i in range(1, 500)]
+    one_by_one = BitmapIndex(['status', 'type'])
+    for row_id, values in rows:
+        one_by_one.add(row_id, values)
+    bulk = BitmapIndex(['status', 'type'])
+    bulk.add_many(rows)
+
+    assert bulk.all == one_by_one.all
+    for criteria in ({'status': 'Active'}, {'type': ['AC', 'Mini']},
+                     {'status': 'Inactive', 'type': 'Mini'}):
+        assert bulk.match(**criteria) == one_by_one.match(**criteria)
+
+
+def test_add_many_replaces_existing_rows():
+    index = BitmapIndex(['status'])
+    index.add(3, {'status': 'Active'})
+    index.add_many([(3, {'status': 'Inactive'}), (4, {'status': 'Active'})])
+    assert ids(index.match(status='Active')) == [4]
+    assert ids(index.match(status='Inactive')) == [3]
+    assert len(index) == 2
+
+
+def test_match_ignores_inactive_criteria():
+    index = BitmapIndex(['status'])
+    index.add_many([(1, {'status': 'Active'}), (2, {'status': 'Inactive'})])
+    assert ids(index.match(status='All')) == [1, 2]
+    assert ids(index.match(status='')) == [1, 2]
+    assert has(index.match(status='Active'), 1)
+    index.remove(1)
+    assert index.match(status='Active') == 0
+    assert index.values('status') == ['Inactive']
+
+
+def test_table_index_follows_change_events(db):
+    assert [bus['bus_number'] for bus in fetch_buses(status='Maintenance')] == ['BUS-003', 'BUS-010']
+    set_bus_status([1], 'Maintenance')
+    assert ids(BUS_INDEX.match(status='Maintenance')) == [1, 3, 10]
+    assert BUS_INDEX.filter_ids([1, 2, 3], status='Maintenance') == [1, 3]
+    assert BUS_INDEX.filter_ids([1, 2], status='All') == [1, 2]
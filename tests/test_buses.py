@@ -0,0 +1,43 @@
+import datetime
+
+from models.buses import renew_policies
+from models.db_connection import transaction
+
+
+def _policies(conn, bus_id):
+    return [tuple(row) for row in conn.execute(
+        "SELECT policy_number, start_date, expiry_date, status FROM insurance_policies"
+        " WHERE bus_id = ? ORDER BY id", (bus_id,)
+    )]
+
+
+def test_renewal_starts_today_for_a_lapsed_policy(db):
+    today = datetime.date.today()
+    assert renew_policies([1]) == 1
+    old, new = _policies(db, 1)
+    assert old[3] == 'Renewed'
+    assert new[0] == f"INS-2023-001-R{today.year}"
+    assert new[1] == today.isoformat()
+    assert new[3] == 'Current'
+
+
+def test_renewed_policies_are_skipped(db):
+    assert renew_policies([1]) == 1
+    assert renew_policies([1, 2]) == 1
+    assert len(_policies(db, 1)) == 2
+
+
+def test_renewal_numbers_do_not_collide(db):
+    year = datetime.date.today().year
+    with transaction():
+        db.execute(
+            "INSERT INTO insurance_policies (bus_id, policy_number, start_date, expiry_date)"
+            " VALUES (5, ?, '2020-01-01', '2020-12-31')", (f"INS-2023-002-R{year}",)
+        )
+    assert renew_policies([2]) == 1
+    assert _policies(db, 2)[-1][0] == f"INS-2023-002-R{year}-2"
+
+    # Renewing the renewal keeps the original number as the base
+    renewal_id = db.execute("SELECT MAX(id) FROM insurance_policies").fetchone()[0]
+    assert renew_policies([renewal_id]) == 1
+    assert _policies(db, 2)[-1][0] == f"INS-2023-002-R{year + 1}"
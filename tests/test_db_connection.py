@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+
+import pytest
+
+from models.db_connection import (
+    backup_database, get_connection, initialize_once, on_commit, transaction
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    with transaction(db_path) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT)")
+    return db_path
+
+
+def _values(db_path):
+    return [row[0] for row in get_connection(db_path).execute("SELECT value FROM t ORDER BY id")]
+
+
+def test_one_connection_per_thread_and_file(path, tmp_path):
+    conn = get_connection(path)
+    assert get_connection(path) is conn
+    assert get_connection(str(tmp_path / "." / "test.db")) is conn
+    assert get_connection(str(tmp_path / "other.db")) is not conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(get_connection(path)))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+
+def test_connections_are_configured(path):
+    conn = get_connection(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_nested_transaction_rolls_back_only_its_block(path):
+    with transaction(path) as conn:
+        conn.execute("INSERT INTO t (value) VALUES ('outer')")
+        with pytest.raises(sqlite3.IntegrityError):
+            with transaction(path):
+                conn.execute("INSERT INTO t (value) VALUES ('inner')")
+                conn.execute("INSERT INTO t (id, value) VALUES (1, 'duplicate')")
+    assert _values(path) == ['outer']
+
+
+def test_failed_transaction_rolls_back(path):
+    with pytest.raises(RuntimeError):
+        with transaction(path) as conn:
+            conn.execute("INSERT INTO t (value) VALUES ('lost')")
+            raise RuntimeError
+    assert _values(path) == []
+
+
+def test_commit_callbacks_skip_rolled_back_blocks(path):
+    ran = []
+    with transaction(path):
+        on_commit(lambda: ran.append('outer'), path)
+        try:
+            with transaction(path):
+                on_commit(lambda: ran.append('inner'), path)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        assert ran == []
+    assert ran == ['outer']
+
+    on_commit(lambda: ran.append('now'), path)
+    assert ran == ['outer', 'now']
+
+
+def test_initialize_once_runs_once_per_file(path):
+    calls = []
+
+    def initializer(conn):
+        calls.append(conn)
+    initialize_once(initializer, path)
+    initialize_once(initializer, path)
+    assert len(calls) == 1
+
+
+def test_backup_copies_the_database(path, tmp_path):
+    with transaction(path) as conn:
+        conn.executemany("INSERT INTO t (value) VALUES (?)", [(str(i),) for i in range(100)])
+    steps = []
+    dest = str(tmp_path / "backup" / "copy.db")
+    backup_database(dest, path, pages=1, progress=lambda copied, total: steps.append(copied))
+
+    copy = sqlite3.connect(dest)
+    try:
+        assert copy.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 100
+    finally:
+        copy.close()
+    assert steps and steps == sorted(steps)
@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def dashboard(qapp, monkeypatch):
+    from PyQt5.QtWidgets import QMessageBox
+    from reports_dashboard import ReportsDashboard
+    monkeypatch.setattr(QMessageBox, "question", lambda *args, **kwargs: QMessageBox.Yes)
+    monkeypatch.setattr(QMessageBox, "information", lambda *args, **kwargs: None)
+    page = ReportsDashboard()
+    page.resize(1400, 800)
+    page.show()
+    qapp.processEvents()
+    yield page
+    page.close()
+    page.deleteLater()
+
+
+def _button_center(table, row, action):
+    """Viewport position of an action button in the Actions column"""
+    column = 5
+    delegate = table.itemDelegateForColumn(column)
+    option = table.viewOptions()
+    option.rect = table.visualRect(table.model().index(row, column))
+    return dict(delegate._button_rects(option))[action].center()
+
+
+def _click(table, pos, release_pos=None):
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtTest import QTest
+    QTest.mousePress(table.viewport(), Qt.LeftButton, pos=pos)
+    QTest.mouseRelease(table.viewport(), Qt.LeftButton, pos=release_pos or pos)
+
+
+def test_clicks_are_hit_tested_per_button(dashboard):
+    table = dashboard.reports_table
+    clicks = []
+    table.itemDelegateForColumn(5).clicked.connect(lambda action, report_id: clicks.append((action, report_id)))
+
+    _click(table, _button_center(table, 2, "Export"))
+    assert clicks == [("Export", 3)]
+
+    # Pressing one button and releasing on another does nothing, nor does the cell margin
+    _click(table, _button_center(table, 1, "View"), _button_center(table, 1, "Export"))
+    _click(table, table.visualRect(table.model().index(1, 5)).bottomRight())
+    assert clicks == [("Export", 3)]
+
+
+def test_actions_follow_the_record_after_rows_are_removed(dashboard, monkeypatch):
+    table = dashboard.reports_table
+    viewed = []
+    monkeypatch.setattr(dashboard, "view_report_details", viewed.append)
+    name = dashboard.recent_reports[3]['name']
+
+    _click(table, _button_center(table, 0, "Delete"))
+    assert table.rowCount() == 4 and 1 not in dashboard.recent_reports
+
+    # What was row 2 is now row 1; its button still acts on report 3
+    _click(table, _button_center(table, 1, "View"))
+    assert viewed == [3]
+    assert dashboard.recent_reports[viewed[0]]['name'] == name
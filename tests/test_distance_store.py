@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+
+from models import distance_store
+from models.db_connection import transaction
+from models.distance_store import (
+    AVERAGE_SPEED_KMPH, DISTANCES, DistanceStore, haversine, node_key
+)
+from models.events import DELETE, UPDATE, publish
+
+
+def test_haversine_broadcasts():
+    # One degree of latitude is about 111.2 km anywhere
+    assert haversine(28.0, 77.0, 29.0, 77.0) == pytest.approx(111.19, abs=0.01)
+    distances = haversine(28.6, 77.2, [28.6, 28.4], [77.2, 77.0])
+    assert distances.shape == (2,)
+    assert distances[0] == 0
+
+
+def test_matrix_covers_every_location(db):
+    keys = [node_key('depot', 1), node_key('school', 1), node_key('stop', 1), node_key('stop', 2)]
+    matrix = DISTANCES.matrix(keys)
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix, matrix.T)
+    assert not matrix.diagonal().any()
+    assert np.allclose(DISTANCES.legs(keys), [matrix[0, 1], matrix[1, 2], matrix[2, 3]])
+    assert np.allclose(DISTANCES.between(keys[:1], keys[1:]), matrix[:1, 1:])
+    assert len(DISTANCES) == 1 + 5 + 40
+    with pytest.raises(KeyError):
+        DISTANCES.index([node_key('stop', 999)])
+
+
+def test_store_grows_and_persists(db, monkeypatch):
+    monkeypatch.setattr(distance_store, "INITIAL_CAPACITY", 8)
+    keys = [node_key('stop', n) for n in range(1, 41)]
+    matrix = DISTANCES.matrix(keys)
+    assert DISTANCES._capacity == 64
+
+    reopened = DistanceStore(path=DISTANCES.path)
+    try:
+        assert np.array_equal(reopened.matrix(keys), matrix)
+        assert reopened._capacity == 64
+    finally:
+        distance_store.events.unsubscribe(reopened._on_change)
+
+
+def test_moved_locations_are_recomputed(db):
+    depot, stop = node_key('depot', 1), node_key('stop', 1)
+    before = DISTANCES.between([depot], [stop])[0, 0]
+    with transaction():
+        db.execute("UPDATE stops SET latitude = latitude + 1 WHERE id = 1")
+        publish('stop', 1, UPDATE)
+    after = DISTANCES.between([depot], [stop])[0, 0]
+    assert after != before
+    assert DISTANCES.between([stop], [depot])[0, 0] == after
+
+
+def test_travel_times_follow_the_distances(db):
+    keys = [node_key('depot', 1), node_key('school', 1), node_key('stop', 1)]
+    km = DISTANCES.matrix(keys)
+    assert np.allclose(DISTANCES.matrix(keys, minutes=True), km * 60 / AVERAGE_SPEED_KMPH)
+    assert np.allclose(DISTANCES.legs(keys, minutes=True), DISTANCES.legs(keys) * 60 / AVERAGE_SPEED_KMPH)
+    assert DISTANCES.between(keys[:1], keys[1:], minutes=True).shape == (1, 2)
+
+
+def test_deleted_locations_are_compacted_away(db):
+    depot, last = node_key('depot', 1), node_key('stop', 40)
+    before = DISTANCES.between([depot], [last], minutes=True)[0, 0]
+    with transaction():
+        db.execute("DELETE FROM stops WHERE id <= 10")
+        publish('stop', 1, DELETE)
+    assert len(DISTANCES) == 1 + 5 + 30
+    assert not DISTANCES.has(node_key('stop', 1))
+    assert DISTANCES.between([depot], [last], minutes=True)[0, 0] == before
+
+    with open(DISTANCES.path + ".json", encoding="utf-8") as f:
+        assert len(json.load(f)['keys']) == 36
+    reopened = DistanceStore(path=DISTANCES.path)
+    try:
+        assert np.array_equal(reopened.matrix([depot, last]), DISTANCES.matrix([depot, last]))
+    finally:
+        distance_store.events.unsubscribe(reopened._on_change)
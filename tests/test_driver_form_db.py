@@ -0,0 +1,108 @@
+from models.db_connection import transaction
+
+
+def _add_drivers(database, count):
+    with transaction(database.DB_NAME) as conn:
+        conn.executemany(database.INSERT_DRIVER_SQL, [
+            (f"Driver {i}", "01-01-1990", 36, "Male", f"9{i:09d}", f"d{i}@example.com")
+            for i in range(count)
+        ])
+
+
+def test_pages_follow_driver_id(driver_form_db):
+    _add_drivers(driver_form_db, 450)
+    with transaction(driver_form_db.DB_NAME) as conn:
+        conn.execute("DELETE FROM drivers WHERE driver_id % 7 = 0")
+
+    first = driver_form_db.fetch_drivers_page(0, 100)
+    assert len(first) == 100
+    second = driver_form_db.fetch_drivers_page(first[-1][0], 100)
+    assert second[0][0] > first[-1][0]
+
+    every = [row[0] for row in driver_form_db.iter_drivers(page_size=64)]
+    assert every == sorted(every)
+    assert len(every) == 450 - 450 // 7
+    assert driver_form_db.fetch_drivers_page(every[-1], 100) == []
+
+
+def test_page_by_ids(driver_form_db):
+    _add_drivers(driver_form_db, 10)
+    rows = driver_form_db.fetch_drivers_page(ids=[7, 3, 99])
+    assert [row[0] for row in rows] == [3, 7]
+    assert driver_form_db.fetch_drivers_page(ids=[]) == []
+
+
+def _rows(start, count):
+    return [(f"Bulk {i}", "02-02-1992", 34, "Female", f"8{i:09d}", f"b{i}@example.com")
+            for i in range(start, start + count)]
+
+
+def test_bulk_insert_in_chunks(driver_form_db):
+    inserted, errors = driver_form_db.bulk_insert_drivers(_rows(0, 1234), chunk_size=500)
+    assert (inserted, errors) == (1234, [])
+    assert len(list(driver_form_db.iter_drivers())) == 1234
+
+
+def test_duplicate_rows_are_replayed_one_by_one(driver_form_db):
+    driver_form_db.bulk_insert_drivers(_rows(0, 5))
+    rows = _rows(3, 10)
+    # A phone used twice within the batch, and two rows already saved
+    rows[6] = rows[6][:4] + (rows[5][4],) + rows[6][5:]
+
+    inserted, errors = driver_form_db.bulk_insert_drivers(rows, chunk_size=4)
+    assert [index for index, _message in errors] == [0, 1, 6]
+    assert all("UNIQUE" in message for _index, message in errors)
+    assert inserted == 7
+    assert len(list(driver_form_db.iter_drivers())) == 12
+
+
+def test_csv_import_reports_lines(driver_form_db, tmp_path):
+    from driver_import import import_drivers_csv
+
+    path = tmp_path / "drivers.csv"
+    path.write_text(
+        "name,dob,gender,phone,email\n"
+        "Ravi Kumar,01-01-1990,male,9876500001,ravi@gmail.com\n"
+        "Bad Date,31-02-1990,male,9876500002,bad@gmail.com\n"
+        "Ravi Again,01-01-1991,male,9876500001,again@gmail.com\n"
+    )
+    inserted, errors = import_drivers_csv(str(path))
+    assert inserted == 1
+    assert [line for line, _message in errors] == [3, 4]
+
+
+def test_id_blocks_do_not_overlap(driver_form_db):
+    first = driver_form_db.reserve_driver_ids(20)
+    second = driver_form_db.reserve_driver_ids(5)
+    assert list(first) == list(range(1, 21))
+    assert list(second) == list(range(21, 26))
+
+
+def test_reserved_ids_are_shared_across_threads(driver_form_db):
+    import threading
+
+    blocks = []
+    threads = [threading.Thread(target=lambda: blocks.append(driver_form_db.reserve_driver_ids(10)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = sorted(i for block in blocks for i in block)
+    assert ids == list(range(1, 81))
+
+
+def test_insert_uses_the_shown_id_and_keeps_it_on_failure(driver_form_db):
+    shown = driver_form_db.get_next_driver_id()
+    assert driver_form_db.insert_driver("A", "01-01-1990", 36, "Male", "9000000001", "a@gmail.com") == (True, None)
+    assert driver_form_db.fetch_drivers_page(ids=[shown])[0]['name'] == "A"
+
+    following = driver_form_db.get_next_driver_id()
+    assert following == shown + 1
+    ok, message = driver_form_db.insert_driver("B", "01-01-1990", 36, "Male", "9000000001", "b@gmail.com")
+    assert not ok and "UNIQUE" in message
+    assert driver_form_db.get_next_driver_id() == following
+
+    # Plain AUTOINCREMENT inserts skip past the reserved block
+    driver_form_db.bulk_insert_drivers(_rows(0, 1))
+    assert max(row[0] for row in driver_form_db.iter_drivers()) > following
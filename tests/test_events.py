@@ -0,0 +1,65 @@
+from models import events
+from models.db_connection import on_commit, transaction
+
+
+def test_events_are_delivered_after_commit(db):
+    seen = []
+    listener = lambda *event: seen.append(event)
+    events.subscribe(listener)
+    try:
+        with transaction():
+            events.publish('bus', 1, events.UPDATE)
+            assert seen == []
+        assert seen == [('bus', 1, events.UPDATE)]
+    finally:
+        events.unsubscribe(listener)
+
+
+def test_events_are_dropped_on_rollback(db):
+    seen = []
+    listener = lambda *event: seen.append(event)
+    events.subscribe(listener)
+    try:
+        try:
+            with transaction():
+                events.publish('bus', 1, events.UPDATE)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        assert seen == []
+    finally:
+        events.unsubscribe(listener)
+
+
+def test_failing_listener_does_not_stop_the_others(db):
+    seen = []
+
+    def broken(*_event):
+        raise ValueError("listener bug")
+
+    listener = lambda *event: seen.append(event)
+    events.subscribe(broken)
+    events.subscribe(listener)
+    try:
+        with transaction() as conn:
+            conn.execute("UPDATE buses SET color = 'Red' WHERE id = 1")
+            events.publish('bus', 1, events.UPDATE)
+        assert seen == [('bus', 1, events.UPDATE)]
+        assert db.execute("SELECT color FROM buses WHERE id = 1").fetchone()[0] == 'Red'
+    finally:
+        events.unsubscribe(broken)
+        events.unsubscribe(listener)
+
+
+def test_failing_commit_callback_does_not_fail_the_write(db):
+    ran = []
+
+    def broken():
+        raise ValueError("callback bug")
+
+    with transaction() as conn:
+        conn.execute("UPDATE buses SET color = 'Blue' WHERE id = 1")
+        on_commit(broken)
+        on_commit(lambda: ran.append(True))
+    assert ran == [True]
+    assert db.execute("SELECT color FROM buses WHERE id = 1").fetchone()[0] == 'Blue'
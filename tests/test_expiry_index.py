@@ -0,0 +1,41 @@
+import datetime
+
+from models.buses import POLICY_EXPIRY, fetch_buses, renew_policies
+from models.db_connection import transaction
+from models.drivers import LICENSE_EXPIRY, fetch_drivers
+from models.events import UPDATE, publish
+from models.schools import CONTRACT_EXPIRY, fetch_schools
+
+
+def test_range_queries_on_licences(db):
+    assert LICENSE_EXPIRY.between("2024-01-01", "2024-12-31") == [5, 1]
+    assert LICENSE_EXPIRY.between(end="2023-12-31") == [4, 2]
+    assert LICENSE_EXPIRY.between(start="2025-01-01") == [3]
+    # Both bounds are inclusive
+    assert LICENSE_EXPIRY.between("2024-12-31", "2024-12-31") == [1]
+    assert LICENSE_EXPIRY.expired_as_of(datetime.date(2024, 9, 1)) == [4, 2, 5]
+    assert LICENSE_EXPIRY.next_to_expire(2, as_of="2024-01-01") == [5, 1]
+    assert len(LICENSE_EXPIRY) == 5
+
+
+def test_filter_ids_feeds_the_list_queries(db):
+    assert LICENSE_EXPIRY.filter_ids([1, 2, 3]) == [1, 2, 3]
+    assert LICENSE_EXPIRY.filter_ids([1, 2, 5], "2024-01-01", None) == [5, 1]
+    assert [d['id'] for d in fetch_drivers(expiring_from="2024-01-01", expiring_to="2024-12-31")] == [5, 1]
+    assert [s['id'] for s in fetch_schools(expiring_to="2024-01-01")] == [5, 4]
+    assert [b['id'] for b in fetch_buses(expiring_from="2024-01-01", expiring_to="2024-06-30")] == [1, 2]
+    assert CONTRACT_EXPIRY.expiry_of(2) == "2025-02-28"
+
+
+def test_index_follows_change_events(db):
+    POLICY_EXPIRY.ensure_built()
+    renew_policies([1])
+    expiry = POLICY_EXPIRY.expiry_of(1)
+    assert expiry > "2026-01-01"
+    assert POLICY_EXPIRY.between(start=expiry) == [1]
+
+    with transaction():
+        db.execute("UPDATE drivers SET license_expiry = '2030-05-05' WHERE id = 4")
+        publish('driver', 4, UPDATE)
+    assert LICENSE_EXPIRY.between(start="2030-01-01") == [4]
+    assert 4 not in LICENSE_EXPIRY.expired_as_of("2026-01-01")
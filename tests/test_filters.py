@@ -0,0 +1,45 @@
+from models.drivers import fetch_drivers
+from models.filters import ALL, MAX_INLINE_VALUES, Filter
+from models.schools import fetch_schools
+from models.users import fetch_users
+
+
+def test_empty_and_all_values_add_nothing():
+    query = Filter("id").equals("status", ALL).equals("city", "").equals("type", None)
+    assert query.sql("SELECT * FROM t") == "SELECT * FROM t ORDER BY id"
+    assert query.params == []
+
+
+def test_conditions_are_bound_parameters():
+    query = (Filter("name").equals("status", "Active").one_of("id", [3, 1])
+             .condition("joined >= ?", "2024-01-01").page(10, 20))
+    assert query.sql("SELECT * FROM t") == (
+        "SELECT * FROM t WHERE status = ? AND id IN (?, ?) AND joined >= ?"
+        " ORDER BY name LIMIT ? OFFSET ?")
+    assert query.params == ["Active", 3, 1, "2024-01-01", 10, 20]
+
+
+def test_one_of_handles_empty_and_long_lists(db):
+    assert "IN (NULL)" in Filter("id").one_of("id", []).sql("SELECT * FROM t")
+
+    values = list(range(MAX_INLINE_VALUES + 1))
+    query = Filter("id").one_of("id", values)
+    assert "json_each(?)" in query.sql("SELECT * FROM t")
+    assert len(query.params) == 1
+    rows = db.execute(query.sql("SELECT id FROM buses"), query.params).fetchall()
+    assert [row[0] for row in rows] == list(range(1, 11))
+
+
+def test_contains_escapes_like_wildcards(db):
+    assert [u['username'] for u in fetch_users(search="manager")] == ['manager1', 'manager2']
+    assert fetch_users(search="%") == []
+    assert fetch_users(search="_") == []
+
+
+def test_list_filters_run_in_sql(db):
+    assert [d['name'] for d in fetch_drivers(status="Inactive")] == ['Vikram Singh']
+    assert [d['name'] for d in fetch_drivers(bus_number="BUS-003")] == ['Amit Sharma']
+    assert [s['id'] for s in fetch_schools(city="Delhi")] == [1, 2]
+    assert [s['id'] for s in fetch_schools(school_type="Government", city="Faridabad")] == [5]
+    assert [s['id'] for s in fetch_schools(contract_status=ALL)] == [1, 5, 2, 4, 3]
+    assert [u['username'] for u in fetch_users(role="Manager", status="Active")] == ['manager1', 'manager2']
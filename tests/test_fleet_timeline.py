@@ -0,0 +1,87 @@
+import datetime
+
+from models.buses import schedule_maintenance
+from models.timetable import (
+    DAY_MINUTES, DROP_RUN, MAINTENANCE, PICKUP_RUN, SCHOOL_DAYS, _overlaps,
+    ensure_horizon, fetch_fleet_timeline, horizon, refresh_stale
+)
+
+
+def _school_day():
+    return next(day for day in horizon() if day.weekday() in SCHOOL_DAYS)
+
+
+def test_overlaps_need_a_run():
+    blocks = [(0, 60, MAINTENANCE), (30, 90, MAINTENANCE), (80, 120, PICKUP_RUN),
+              (100, 110, PICKUP_RUN), (200, 260, DROP_RUN), (260, 300, MAINTENANCE)]
+    # Two maintenance windows may overlap and touching blocks do not conflict
+    assert _overlaps(blocks) == [(80, 90), (100, 110)]
+    assert _overlaps([]) == []
+
+
+def test_timeline_lays_days_end_to_end(db):
+    ensure_horizon()
+    days = horizon()
+    timeline = fetch_fleet_timeline(days)
+    assert [number for _bus_id, number in timeline['buses']] == [f"BUS-{n:03d}" for n in range(1, 11)]
+    # Bus 3 is in the workshop all week
+    assert timeline['entries'][3][0] == (0, DAY_MINUTES, MAINTENANCE, "In the workshop")
+    assert timeline['entries'][3][-1][1] == len(days) * DAY_MINUTES
+
+    offset = (_school_day() - days[0]).days * DAY_MINUTES
+    runs = [e for e in timeline['entries'][1] if e[2] == PICKUP_RUN and offset <= e[0] < offset + DAY_MINUTES]
+    assert len(runs) == 1
+    assert timeline['conflicts'] == {}
+
+
+def test_maintenance_over_a_run_is_a_conflict(db):
+    ensure_horizon()
+    day = _school_day()
+    start = datetime.datetime.combine(day, datetime.time(6))
+    schedule_maintenance(1, f"{start:%Y-%m-%d %H:%M}",
+                         f"{start + datetime.timedelta(hours=3):%Y-%m-%d %H:%M}")
+    refresh_stale()
+
+    timeline = fetch_fleet_timeline([day], bus_ids=[1, 2])
+    assert [bus_id for bus_id, _number in timeline['buses']] == [1, 2]
+    assert list(timeline['conflicts']) == [1]
+    (conflict_start, conflict_end), = timeline['conflicts'][1]
+    assert 6 * 60 <= conflict_start < conflict_end <= 9 * 60
+
+
+def test_tab_reloads_only_the_edited_bus(db, settle, monkeypatch):
+    import fleet_timeline
+    from models.db_connection import transaction
+    from models.events import DELETE, UPDATE
+    fetched = []
+    original = fleet_timeline.fetch_fleet_timeline
+    monkeypatch.setattr(fleet_timeline, 'fetch_fleet_timeline', lambda days, bus_ids=None: (
+        fetched.append(bus_ids) or original(days, bus_ids)))
+    tab = fleet_timeline.FleetTimelineTab()
+    settle()
+    assert fetched == [None] and len(tab.view.buses) == 10
+
+    # Maintenance, renewals and status changes publish bus updates
+    for bus_id in (4, 6):
+        tab.on_data_changed('bus', bus_id, UPDATE)
+    tab.reload_timer.stop()
+    tab.reload_pending()
+    settle()
+    assert fetched == [None, [4, 6]]
+
+    # A renumbered bus may move rows, and a deleted one leaves them
+    with transaction():
+        db.execute("UPDATE buses SET bus_number = 'BUS-000' WHERE id = 4")
+    tab.on_data_changed('bus', 4, UPDATE)
+    tab.reload_timer.stop()
+    tab.reload_pending()
+    settle()
+    assert fetched[2:] == [[4], None]
+    assert tab.view.buses[0] == (4, 'BUS-000')
+
+    tab.on_data_changed('bus', 9, DELETE)
+    tab.reload_timer.stop()
+    tab.reload_pending()
+    settle()
+    assert fetched[-1] is None
+    tab.deleteLater()
@@ -0,0 +1,42 @@
+import datetime
+
+from models import insurance_snapshot
+from models.buses import fetch_insurance_counts, renew_policies
+from models.insurance_snapshot import (
+    ACTIVE, EXPIRED, EXPIRING_SOON, NOT_INSURED, InsuranceSnapshot, snapshot
+)
+
+
+def test_status_boundaries():
+    as_of = datetime.date(2026, 1, 1)
+    snap = InsuranceSnapshot(as_of, [1, 2, 3, 4, 5, 6],
+                             ["2025-12-31", "2026-01-01", "2026-01-31", "2026-02-01", None, ""])
+    assert [snap.days_remaining(i) for i in range(1, 7)] == [-1, 0, 30, 31, None, None]
+    assert [snap.status_of(i) for i in range(1, 7)] == [
+        EXPIRED, EXPIRING_SOON, EXPIRING_SOON, ACTIVE, NOT_INSURED, NOT_INSURED]
+    assert snap.ids_with_status(EXPIRING_SOON) == [2, 3]
+    assert snap.counts() == {EXPIRED: 1, EXPIRING_SOON: 2, ACTIVE: 1, 'total': 4}
+    assert snap.status_of(99) == NOT_INSURED
+
+
+def test_snapshots_are_cached_per_day(db):
+    today = snapshot()
+    assert snapshot() is today
+    earlier = snapshot(datetime.date(2024, 1, 1))
+    assert earlier is not today
+    assert earlier.status_of(1) == EXPIRING_SOON
+    assert today.status_of(1) == EXPIRED
+    assert today.status_of(5) == NOT_INSURED
+
+    for day in range(1, insurance_snapshot.CACHE_SIZE + 2):
+        snapshot(datetime.date(2025, 1, day))
+    assert len(insurance_snapshot._cache) == insurance_snapshot.CACHE_SIZE
+
+
+def test_renewal_patches_cached_snapshots(db):
+    today = snapshot()
+    assert fetch_insurance_counts()[EXPIRED] == 4
+    renew_policies([1])
+    assert today.status_of(1) == ACTIVE
+    assert today.days_remaining(1) in (364, 365)
+    assert fetch_insurance_counts() == {EXPIRED: 3, EXPIRING_SOON: 0, ACTIVE: 1, 'total': 4}
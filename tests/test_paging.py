@@ -0,0 +1,74 @@
+import pytest
+
+from models.db_connection import transaction
+from models.drivers import fetch_drivers
+from models.filters import Filter
+from models.users import fetch_activity_logs
+
+
+@pytest.fixture
+def many_drivers(db):
+    # Repeated names, so pages must break ties on id
+    with transaction():
+        db.executemany(
+            "INSERT INTO drivers (name, phone, license_number, license_expiry) VALUES (?, ?, ?, ?)",
+            [(f"Driver {i % 37:02d}", f"9{i:09d}", f"LIC-{i:06d}", "2030-01-01")
+             for i in range(500)]
+        )
+    return db
+
+
+def _pages(fetch, limit, **filters):
+    rows, after = [], None
+    while True:
+        page = fetch(limit=limit, after=after, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = page[-1]
+
+
+def test_seek_condition_follows_the_sort_direction():
+    query = Filter("d.name, d.id").page(10, after=("Ravi", 4))
+    assert "(d.name, d.id) > (?, ?)" in query.sql("SELECT * FROM drivers d")
+    assert query.params == ["Ravi", 4, 10]
+
+    query = Filter("timestamp DESC, id DESC").page(10, after=("2026-01-01", 9))
+    assert query.sql("SELECT * FROM logs").endswith(
+        "WHERE (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT ?")
+
+
+def test_first_page_and_offset_paging_are_unchanged():
+    query = Filter("id").page(10)
+    assert query.sql("SELECT * FROM t").endswith("LIMIT ? OFFSET ?")
+    assert query.params == [10, 0]
+
+
+def test_keyset_pages_match_the_full_query(many_drivers):
+    everything = fetch_drivers()
+    paged = _pages(fetch_drivers, 40)
+    assert [d['id'] for d in paged] == [d['id'] for d in everything]
+
+
+def test_keyset_pages_keep_filters(many_drivers):
+    everything = fetch_drivers(status='Active')
+    paged = _pages(fetch_drivers, 25, status='Active')
+    assert [d['id'] for d in paged] == [d['id'] for d in everything]
+
+
+def test_ranked_search_falls_back_to_offset(many_drivers):
+    query = Filter("d.name, d.id").search("drivers_fts", "d.id", "Driver").page(10, 20, ("x", 1))
+    assert query.sql("SELECT * FROM drivers d").endswith("LIMIT ? OFFSET ?")
+    assert query.params[-2:] == [10, 20]
+
+
+def test_activity_log_pages_newest_first(db):
+    with transaction():
+        db.executemany(
+            "INSERT INTO activity_logs (timestamp, username, action, module) VALUES (?, ?, ?, ?)",
+            [("2026-10-01 09:00", "admin", f"Action {i}", "Test") for i in range(30)]
+        )
+    everything = fetch_activity_logs()
+    paged = _pages(fetch_activity_logs, 7)
+    assert [e['id'] for e in paged] == [e['id'] for e in everything]
+    assert [e['id'] for e in fetch_activity_logs(ids=[everything[3]['id']])] == [everything[3]['id']]
@@ -0,0 +1,102 @@
+import datetime
+
+import pytest
+
+from models.db_connection import transaction
+from models.roster import (
+    CHANGEOVER_MINUTES, MAX_DAY_MINUTES, MIN_REST_MINUTES, Shift, apply_roster,
+    propose_roster, solve_roster
+)
+from models.timetable import DAY_MINUTES, ensure_horizon, refresh_stale
+
+MONDAY = datetime.date(2030, 1, 7)
+
+
+def _driver(driver_id, status='Active', expiry='2099-12-31', bus_id=None):
+    return {'id': driver_id, 'status': status, 'license_expiry': expiry, 'bus_id': bus_id}
+
+
+def _shift(bus_id, day, start, end):
+    offset = day * DAY_MINUTES
+    return Shift(bus_id, f"BUS-{bus_id:03d}", day, offset + start, offset + end)
+
+
+@pytest.fixture
+def fleet(db):
+    """The sample fleet with licensed drivers and generated timetables"""
+    with transaction():
+        db.execute("UPDATE drivers SET license_expiry = '2099-12-31'")
+    ensure_horizon()
+    return db
+
+
+def test_only_active_licensed_drivers_are_rostered():
+    shifts = [_shift(1, 0, 420, 540), _shift(1, 2, 420, 540)]
+    drivers = [_driver(1, status='Inactive'), _driver(2, expiry=MONDAY.isoformat()),
+               _driver(3, expiry='not a date')]
+    # Driver 2's licence covers Monday only
+    assert solve_roster(shifts, drivers, MONDAY) == [1, None]
+    assert solve_roster(shifts, [], MONDAY) == [None, None]
+
+
+def test_changeover_rest_and_hour_limits():
+    driver = [_driver(1)]
+    gap = CHANGEOVER_MINUTES - 5
+    # The same bus needs no changeover, another bus does
+    assert solve_roster([_shift(1, 0, 400, 500), _shift(1, 0, 500 + gap, 600)], driver, MONDAY) == [0, 0]
+    assert solve_roster([_shift(1, 0, 400, 500), _shift(2, 0, 500 + gap, 600)], driver, MONDAY) == [0, None]
+
+    late = _shift(1, 0, 1000, 1300)
+    assert solve_roster([late, _shift(1, 1, 1300 + MIN_REST_MINUTES - DAY_MINUTES - 1, 600)],
+                        driver, MONDAY) == [0, None]
+    assert solve_roster([late, _shift(1, 1, 1300 + MIN_REST_MINUTES - DAY_MINUTES, 600)],
+                        driver, MONDAY) == [0, 0]
+
+    long_day = [_shift(1, 0, 0, MAX_DAY_MINUTES - 60), _shift(1, 0, MAX_DAY_MINUTES, MAX_DAY_MINUTES + 61)]
+    assert solve_roster(long_day, driver, MONDAY) == [0, None]
+    # Six nine-hour days are more than a 48 hour week
+    week = [_shift(1, day, 300, 300 + MAX_DAY_MINUTES) for day in range(6)]
+    assert solve_roster(week, driver, MONDAY) == [0, 0, 0, 0, 0, None]
+
+
+def test_repair_hands_a_shift_to_another_driver():
+    # Driver 1 takes the late shift on their own bus, leaving too little rest
+    # for the early one, which only they are licensed for
+    shifts = [_shift(1, 0, 1000, 1300), _shift(2, 1, 300, 400)]
+    drivers = [_driver(1, bus_id=1), _driver(2, expiry=MONDAY.isoformat())]
+    assert solve_roster(shifts, drivers, MONDAY) == [1, 0]
+
+
+def _roster_rows(conn, driver_ids):
+    placeholders = ", ".join("?" * len(driver_ids))
+    return conn.execute(
+        f"SELECT bus_id, day, start_time, end_time, driver_id FROM driver_roster"
+        f" WHERE driver_id IN ({placeholders}) ORDER BY bus_id, day, start_time",
+        list(driver_ids)
+    ).fetchall()
+
+
+def test_rostering_some_drivers_keeps_the_others_shifts(fleet):
+    apply_roster(propose_roster([1, 2, 3, 5]))
+    refresh_stale()
+    others = [tuple(row) for row in _roster_rows(fleet, [2, 3, 5])]
+    assert others and _roster_rows(fleet, [1])
+
+    roster = propose_roster([1])
+    held = {(bus_id, day, start_time) for bus_id, day, start_time, *_ in others}
+    assert not any(row[:3] in held for row in roster.rows())
+    apply_roster(roster)
+
+    assert [tuple(row) for row in _roster_rows(fleet, [2, 3, 5])] == others
+    assert [tuple(row) for row in _roster_rows(fleet, [1])] == sorted(roster.rows())
+
+
+def test_rostering_everyone_replaces_the_whole_roster(fleet):
+    apply_roster(propose_roster([1, 2]))
+    roster = propose_roster()
+    apply_roster(roster)
+    rows = fleet.execute(
+        "SELECT bus_id, day, start_time, end_time, driver_id FROM driver_roster"
+        " ORDER BY bus_id, day, start_time"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == sorted(roster.rows())
@@ -0,0 +1,52 @@
+import numpy as np
+
+from models.routing import (
+    distance_matrix, plan_school_routes, route_length, savings_routes, two_opt
+)
+
+SCHOOL = {'latitude': 28.60, 'longitude': 77.20}
+
+
+def _stop(stop_id, latitude, longitude, students):
+    return {'id': stop_id, 'latitude': latitude, 'longitude': longitude, 'students': students}
+
+
+def test_savings_routes_respect_capacity():
+    rng = np.random.default_rng(1)
+    lat = np.concatenate([[28.6], 28.6 + rng.uniform(-0.1, 0.1, 30)])
+    lon = np.concatenate([[77.2], 77.2 + rng.uniform(-0.1, 0.1, 30)])
+    dist = distance_matrix(lat, lon)
+    demand = [0] + list(rng.integers(1, 15, 30))
+
+    runs = savings_routes(dist, demand, 40)
+    assert sorted(i for run in runs for i in run) == list(range(1, 31))
+    assert all(sum(demand[i] for i in run) <= 40 for run in runs)
+    for run in runs:
+        assert route_length(two_opt(run, dist), dist) <= route_length(run, dist) + 1e-9
+
+
+def test_every_stop_gets_one_bus_when_there_are_enough():
+    stops = [_stop(10 + i, 28.60 + 0.01 * i, 77.20 + 0.005 * (i % 3), 8) for i in range(1, 9)]
+    buses = [{'id': 1, 'capacity': 30}, {'id': 2, 'capacity': 40}]
+
+    routes, unserved = plan_school_routes(SCHOOL, stops, buses)
+    assert unserved == []
+    assert sorted(stop for route in routes for stop in route['stops']) == [s['id'] for s in stops]
+    capacity = {bus['id']: bus['capacity'] for bus in buses}
+    for route in routes:
+        assert route['students'] <= capacity[route['bus_id']]
+        assert len(route['legs']) == len(route['stops']) + 1
+        assert abs(route['distance_km'] - sum(route['legs'])) < 1e-9
+
+
+def test_a_stop_too_big_for_any_bus_does_not_use_up_a_bus():
+    stops = [
+        _stop(1, 28.70, 77.20, 60),
+        _stop(2, 28.62, 77.25, 20),
+        _stop(3, 28.63, 77.26, 25),
+    ]
+    buses = [{'id': 1, 'capacity': 30}, {'id': 2, 'capacity': 50}]
+
+    routes, unserved = plan_school_routes(SCHOOL, stops, buses)
+    assert unserved == [1]
+    assert sorted(stop for route in routes for stop in route['stops']) == [2, 3]
@@ -0,0 +1,79 @@
+from models.assignments import assign_bus_to_school
+from models.db_connection import transaction
+from models.events import DELETE, UPDATE, publish
+from models.schedule_conflicts import SCHEDULE, BusSchedule, Run, describe, sweep
+
+
+def _run(start, end, school_id=1):
+    return Run(start, end, 'Morning', school_id, f"School {school_id}", None)
+
+
+def test_bus_schedule_overlap_is_half_open():
+    schedule = BusSchedule([_run(450, 495), _run(600, 900), _run(620, 640)])
+    assert schedule.overlaps(480, 500)
+    assert not schedule.overlaps(495, 540)
+    assert not schedule.overlaps(400, 450)
+    # A short run nested in a long one is still found through the running maximum
+    assert [run.start for run in schedule.overlapping(700, 710)] == [600]
+
+
+def test_sweep_reports_each_overlapping_pair():
+    runs = [(1, _run(450, 495, 1)), (1, _run(480, 525, 2)), (1, _run(490, 500, 3)),
+            (2, _run(450, 495, 4)), (2, _run(495, 540, 5))]
+    pairs = {(c.first.school_id, c.second.school_id) for c in sweep(runs, {1: "BUS-001"})}
+    assert pairs == {(1, 2), (1, 3), (2, 3)}
+    assert describe(_run(450, 495)) == "School 1 morning run 07:30-08:15"
+
+
+def test_proposed_assignments_are_checked_against_the_bus(db):
+    school_3 = {'id': 3, 'name': "School 3", 'pickup_time': "07:45", 'drop_time': "14:45"}
+    school_4 = {'id': 4, 'name': "School 4", 'pickup_time': "08:15", 'drop_time': "15:15"}
+    assert len(SCHEDULE.overlapping(1, school_3)) == 2
+    assert SCHEDULE.overlapping(1, school_4) == []
+    assert SCHEDULE.find_conflicts() == []
+
+
+def test_conflicts_follow_change_events(db):
+    assign_bus_to_school(3, "BUS-001")
+    conflicts = SCHEDULE.find_conflicts()
+    assert {(c.bus_id, c.first.school_id, c.second.school_id) for c in conflicts} == {(1, 1, 3)}
+    assert len(conflicts) == 2
+
+    with transaction():
+        db.execute("UPDATE schools SET pickup_time = '09:00', drop_time = '16:00' WHERE id = 3")
+        publish('school', 3, UPDATE)
+    assert SCHEDULE.find_conflicts() == []
+
+
+def test_events_touch_only_the_buses_concerned(db, monkeypatch):
+    SCHEDULE.ensure_built()
+    touched = []
+    original = SCHEDULE._remove
+    monkeypatch.setattr(SCHEDULE, '_remove', lambda bus_ids, predicate: (
+        touched.extend(bus_ids) or original(bus_ids, predicate)))
+    with transaction():
+        db.execute("UPDATE schools SET pickup_time = '09:00' WHERE id = 5")
+        publish('school', 5, UPDATE)
+    # School 5 is served by buses 7 and 8
+    assert sorted(touched) == [7, 8]
+    assert [run.start for run in SCHEDULE.runs_of_bus(7)][0] == 9 * 60
+
+    touched.clear()
+    assign_bus_to_school(3, "BUS-001", transfer=True)
+    # The moved assignment, then schools 1 (buses 1 and 2) and 3 (now bus 1, and bus 5)
+    assert set(touched) == {1, 2, 5}
+    assert {run.school_id for run in SCHEDULE.runs_of_bus(1)} == {3}
+
+
+def test_bus_renames_and_deletes_reach_the_reports(db):
+    assign_bus_to_school(3, "BUS-001")
+    with transaction():
+        db.execute("UPDATE buses SET bus_number = 'BUS-101' WHERE id = 1")
+        publish('bus', 1, UPDATE)
+    assert {c.bus_number for c in SCHEDULE.find_conflicts()} == {"BUS-101"}
+
+    with transaction():
+        db.execute("DELETE FROM buses WHERE id = 1")
+        publish('bus', 1, DELETE)
+    assert SCHEDULE.find_conflicts() == []
+    assert 1 not in SCHEDULE._bus_numbers and SCHEDULE.runs_of_bus(1) == []
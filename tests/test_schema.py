@@ -0,0 +1,68 @@
+import pytest
+
+from models.db_connection import get_connection, transaction
+from models.schema import MIGRATIONS, get_schema_version, migrate
+
+LATEST = MIGRATIONS[-1][0]
+
+
+def _tables(conn):
+    return {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_%'"
+    )}
+
+
+def _migrate_to(conn, target):
+    for version, _description, steps in MIGRATIONS:
+        if version > target:
+            break
+        if callable(steps):
+            steps(conn)
+        else:
+            for statement in steps:
+                conn.execute(statement)
+        conn.execute(f"PRAGMA user_version = {version}")
+
+
+def test_migrations_are_numbered_in_order():
+    assert [version for version, _description, _steps in MIGRATIONS] == list(range(1, LATEST + 1))
+
+
+def test_new_database_reaches_the_latest_version(db):
+    assert get_schema_version(db) == LATEST == 10
+    tables = _tables(db)
+    for table in ('buses', 'drivers', 'schools', 'insurance_policies', 'assignments', 'users',
+                  'activity_logs', 'drivers_fts', 'stops', 'bus_routes', 'route_stops',
+                  'depots', 'maintenance_windows', 'bus_timetable', 'timetable_days',
+                  'driver_roster'):
+        assert table in tables
+    counts = {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('buses', 'drivers', 'schools', 'stops', 'depots')}
+    assert counts['buses'] == 10 and counts['drivers'] == 5 and counts['schools'] == 5
+    assert counts['stops'] > 0 and counts['depots'] > 0
+
+
+def test_migrate_twice_changes_nothing(db):
+    before = _tables(db)
+    with transaction() as conn:
+        assert migrate(conn) == LATEST
+    assert _tables(db) == before
+    assert db.execute("SELECT COUNT(*) FROM buses").fetchone()[0] == 10
+
+
+@pytest.mark.parametrize("version", range(1, LATEST))
+def test_older_databases_upgrade_to_the_same_schema(tmp_path, db, version):
+    conn = get_connection(str(tmp_path / f"v{version}.db"))
+    with transaction(str(tmp_path / f"v{version}.db")):
+        _migrate_to(conn, version)
+    assert get_schema_version(conn) == version
+    with transaction(str(tmp_path / f"v{version}.db")):
+        assert migrate(conn) == LATEST
+    assert _tables(conn) == _tables(db)
+
+
+def test_deleting_a_bus_cascades(db):
+    with transaction():
+        db.execute("DELETE FROM buses WHERE id = 1")
+    for table in ('assignments', 'insurance_policies'):
+        assert db.execute(f"SELECT COUNT(*) FROM {table} WHERE bus_id = 1").fetchone()[0] == 0
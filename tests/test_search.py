@@ -0,0 +1,36 @@
+from models.buses import fetch_buses
+from models.db_connection import transaction
+from models.drivers import fetch_drivers
+from models.search import build_match_query, search
+
+
+def test_match_query_building():
+    assert build_match_query("") is None
+    assert build_match_query("  -- ") is None
+    assert build_match_query("ravi") == '"ravi"*'
+    assert build_match_query("MH-01 AB") == '("MH"* AND "01"* AND "AB"*) OR key : "MH01AB"*'
+    # Quotes and FTS operators in the input cannot break the expression
+    assert build_match_query('ab" OR x') == '("ab"* AND "OR"* AND "x"*) OR key : "abORx"*'
+
+
+def test_prefix_search_across_entities(db):
+    results = search("raj")
+    assert ('driver', 1) in {(r['entity'], r['id']) for r in results}
+    assert [r['id'] for r in search("BUS-004", entities=['bus'])][0] == 4
+    assert [r['entity'] for r in search("delhi public", entities=['school'])] == ['school']
+    assert search("zzzz") == []
+
+
+def test_identifiers_match_without_separators(db):
+    assert [b['bus_number'] for b in fetch_buses(search="MH01AB")] == ['BUS-001']
+    assert [b['bus_number'] for b in fetch_buses(search="mh 01 ab 1234")] == ['BUS-001']
+
+
+def test_index_follows_writes(db):
+    with transaction():
+        db.execute("UPDATE drivers SET name = 'Ravindra Jadeja' WHERE id = 2")
+    assert [d['id'] for d in fetch_drivers(search="ravindra")] == [2]
+    assert fetch_drivers(search="suresh") == []
+    with transaction():
+        db.execute("DELETE FROM drivers WHERE id = 2")
+    assert fetch_drivers(search="ravindra") == []
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+NAMES = ["Rajesh Kumar", "Ravi Verma", "Ravindra Singh", "Amit Sharma", "Suresh Patel"]
+
+
+@pytest.fixture
+def line_edit(qapp):
+    from PyQt5.QtWidgets import QLineEdit
+    edit = QLineEdit()
+    yield edit
+    edit.deleteLater()
+
+
+def _type(line_edit, text):
+    for end in range(1, len(text) + 1):
+        line_edit.setText(text[:end])
+
+
+def test_one_search_runs_after_typing_pauses(line_edit):
+    from PyQt5.QtTest import QTest
+    from search_controller import SearchController
+    searches = []
+    SearchController(line_edit, lambda text, narrow: searches.append((text, narrow)), delay_ms=30)
+
+    _type(line_edit, "ravi")
+    assert searches == []
+    QTest.qWait(100)
+    assert searches == [("ravi", False)]
+
+    # Pressing Enter searches at once; unchanged text is not searched again
+    line_edit.returnPressed.emit()
+    assert searches == [("ravi", False)]
+
+
+def test_superseded_search_result_is_dropped(line_edit, settle):
+    from search_controller import SearchController
+    from workers import submit
+    release = threading.Event()
+    results = []
+
+    def search(text, narrow):
+        task = submit(lambda: release.wait(5) and text)
+        task.finished.connect(results.append)
+        task.cancelled.connect(lambda: results.append(f"cancelled {text}"))
+        return task
+    controller = SearchController(line_edit, search)
+
+    line_edit.setText("ra")
+    controller.search_now()
+    line_edit.setText("sur")
+    controller.search_now()
+    release.set()
+    settle()
+    assert results == ["cancelled ra", "sur"]
+
+
+def test_extended_text_narrows_the_loaded_rows(line_edit, settle):
+    from search_controller import SearchController
+    from table_models import Column, RecordTableModel
+    calls = []
+
+    def fetch_drivers(limit=None, offset=0, after=None, ids=None, search=""):
+        calls.append('ids' if ids is not None else 'query')
+        rows = [{'id': n, 'name': name} for n, name in enumerate(NAMES, 1)
+                if search.lower() in name.lower()]
+        return [r for r in rows if ids is None or r['id'] in ids][:limit]
+    model = RecordTableModel([Column("Name", 'name')], fetch_drivers)
+
+    def search(text, narrow):
+        if narrow:
+            model.narrow(search=text)
+        else:
+            model.set_filters(search=text)
+    controller = SearchController(line_edit, search)
+
+    line_edit.setText("ra")
+    controller.search_now()
+    settle()
+    assert model.rowCount() == 3 and calls == ['query']
+
+    line_edit.setText("ravi")
+    controller.search_now()
+    settle()
+    # Only the three loaded rows were checked again
+    assert calls == ['query', 'ids']
+    assert [model.record(row)['name'] for row in range(model.rowCount())] == NAMES[1:3]
+
+    line_edit.setText("amit")
+    controller.search_now()
+    settle()
+    assert calls[-1] == 'query' and model.rowCount() == 1
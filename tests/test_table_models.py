@@ -0,0 +1,115 @@
+import pytest
+
+
+@pytest.fixture
+def buses():
+    return [{'id': n, 'bus_number': f"BUS-{n:03d}", 'status': 'Active'} for n in range(1, 51)]
+
+
+@pytest.fixture
+def fetch(buses):
+    calls = []
+
+    def fetch_buses(limit=None, offset=0, after=None, ids=None, status=None):
+        calls.append({'limit': limit, 'after': after and after['id'], 'ids': ids})
+        rows = [b for b in buses if status is None or b['status'] == status]
+        if ids is not None:
+            return [dict(b) for b in rows if b['id'] in ids]
+        if after is not None:
+            rows = [b for b in rows if b['id'] > after['id']]
+        return [dict(b) for b in rows[:limit]]
+    fetch_buses.calls = calls
+    return fetch_buses
+
+
+@pytest.fixture
+def model(qapp, fetch):
+    from table_models import Column, RecordTableModel
+    columns = [Column("Bus No.", 'bus_number'), Column("Status", 'status')]
+    return RecordTableModel(columns, fetch, page_size=10, cache_size=20)
+
+
+@pytest.fixture
+def view(model):
+    from PyQt5.QtWidgets import QAbstractItemView, QTableView
+    table = QTableView()
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+    table.setModel(model)
+    yield table
+    table.deleteLater()
+
+
+def _load_all(model, settle):
+    model.set_filters(status='Active')
+    settle()
+    while model.canFetchMore():
+        model.fetchMore()
+        settle()
+
+
+def test_pages_seek_past_the_last_record(model, fetch, settle):
+    model.set_filters(status='Active')
+    settle()
+    assert model.rowCount() == 10
+    model.fetchMore()
+    settle()
+    assert model.rowCount() == 20
+    assert [call['after'] for call in fetch.calls] == [None, 10]
+    _load_all(model, settle)
+    assert model.rowCount() == 50
+    assert not model.canFetchMore()
+    assert model.index(49, 0).data() == "BUS-050"
+
+
+def test_refresh_patches_only_the_changed_rows(model, buses, fetch, settle):
+    _load_all(model, settle)
+    buses[2]['bus_number'] = "BUS-903"
+    buses[4]['status'] = 'Inactive'
+    buses.append({'id': 51, 'bus_number': "BUS-051", 'status': 'Active'})
+    calls = len(fetch.calls)
+    for bus_id in (3, 5, 51):
+        model.refresh(bus_id)
+    settle()
+
+    # One query for the three ids, batched in one event loop pass
+    assert [call['ids'] for call in fetch.calls[calls:]] == [[3, 5, 51]]
+    assert model.index(2, 0).data() == "BUS-903"
+    assert model.row_of(5) is None
+    assert model.row_of(6) == 4
+    assert model.ids[-1] == 51 and model.rowCount() == 50
+
+
+def test_selection_follows_ids_when_rows_move(model, view, buses, settle):
+    from PyQt5.QtCore import QItemSelectionModel
+    from table_models import selected_ids, selected_record
+    _load_all(model, settle)
+    selection = view.selectionModel()
+    for row in (2, 4):
+        selection.select(model.index(row, 0), QItemSelectionModel.Select | QItemSelectionModel.Rows)
+    assert selected_ids(view) == [3, 5]
+
+    buses[0]['status'] = 'Inactive'
+    model.refresh(1)
+    settle()
+    assert selected_ids(view) == [3, 5]
+    view.setCurrentIndex(model.index(model.row_of(5), 0))
+    assert selected_record(view)['bus_number'] == "BUS-005"
+
+
+def test_selected_record_survives_eviction(model, view, fetch, settle):
+    from table_models import selected_record
+    _load_all(model, settle)
+    view.selectRow(0)
+    # Scroll the rest of the table through the cache
+    for row in range(10, 50):
+        model.record(row)
+    assert 1 not in model._cache
+
+    assert selected_record(view)['bus_number'] == "BUS-001"
+    assert fetch.calls[-1]['ids'] == [1]
+
+    # Evicted rows the view reaches are read back in the background
+    assert model.record(10) is None
+    settle()
+    assert model.record(10)['bus_number'] == "BUS-011"
@@ -0,0 +1,92 @@
+import datetime
+
+import pytest
+
+from models import events, timetable
+from models.assignments import remove_bus_from_school
+from models.buses import renew_policies, schedule_maintenance
+from models.db_connection import transaction
+from models.timetable import (
+    MAINTENANCE, PICKUP_RUN, ensure_horizon, fetch_timetable, has_stale, horizon,
+    refresh_stale, regenerate
+)
+
+
+def _timetable_events():
+    seen = []
+    listener = lambda entity, entity_id, _op: entity == 'timetable' and seen.append(entity_id)
+    events.subscribe(listener)
+    return seen, listener
+
+
+def test_ensure_horizon_generates_every_bus_once(db):
+    assert ensure_horizon() == 10
+    days = db.execute("SELECT bus_id, COUNT(*) FROM timetable_days GROUP BY bus_id").fetchall()
+    assert {tuple(row) for row in days} == {(bus_id, len(horizon())) for bus_id in range(1, 11)}
+    assert ensure_horizon() == 0
+
+
+def test_events_only_mark_buses_stale(db):
+    ensure_horizon()
+    day = horizon()[1]
+    remove_bus_from_school(1, 'BUS-001')
+    assert has_stale()
+    # Nothing is rewritten until refresh_stale() runs
+    assert any(entry['kind'] == PICKUP_RUN for entry in fetch_timetable(1, day))
+
+    assert refresh_stale() == 1
+    assert not has_stale()
+    assert not any(entry['kind'] == PICKUP_RUN for entry in fetch_timetable(1, day))
+
+
+def test_refresh_batches_changes_into_one_regeneration(db, monkeypatch):
+    ensure_horizon()
+    calls = []
+    original = timetable.regenerate
+    monkeypatch.setattr(timetable, 'regenerate',
+                        lambda bus_ids, days=None: calls.append(bus_ids) or original(bus_ids, days))
+    start = datetime.datetime.combine(horizon()[2], datetime.time(6))
+    for bus_id in (4, 5, 6):
+        schedule_maintenance(bus_id, f"{start:%Y-%m-%d %H:%M}",
+                             f"{start + datetime.timedelta(hours=10):%Y-%m-%d %H:%M}")
+
+    assert refresh_stale() == 3
+    assert calls == [[4, 5, 6]]
+    for bus_id in (4, 5, 6):
+        assert any(entry['kind'] == MAINTENANCE for entry in fetch_timetable(bus_id, horizon()[2]))
+
+
+def test_unchanged_timetables_are_not_rewritten(db):
+    ensure_horizon()
+    seen, listener = _timetable_events()
+    try:
+        # An insurance renewal publishes a bus event but changes no timetable input
+        renew_policies([1])
+        assert has_stale()
+        assert refresh_stale() == 0
+        assert regenerate([1, 2, 3]) == 0
+        assert seen == []
+    finally:
+        events.unsubscribe(listener)
+
+
+def test_unrelated_events_are_ignored(db):
+    with transaction():
+        events.publish('timetable', 1, events.UPDATE)
+    assert not has_stale()
+
+
+def test_failed_refresh_keeps_the_changes(db, monkeypatch):
+    ensure_horizon()
+    remove_bus_from_school(1, 'BUS-001')
+
+    def locked(bus_ids, days=None):
+        raise RuntimeError("database is locked")
+    original = timetable.regenerate
+    monkeypatch.setattr(timetable, 'regenerate', locked)
+    with pytest.raises(RuntimeError):
+        refresh_stale()
+    assert has_stale()
+
+    monkeypatch.setattr(timetable, 'regenerate', original)
+    assert refresh_stale() == 1
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def workers(qapp):
+    import workers
+    return workers
+
+
+def _record(task):
+    seen = []
+    task.finished.connect(lambda result: seen.append(('finished', result)))
+    task.failed.connect(lambda message: seen.append(('failed', message)))
+    task.cancelled.connect(lambda: seen.append(('cancelled', None)))
+    return seen
+
+
+def test_result_is_delivered_through_finished(workers, settle):
+    seen = _record(workers.submit(lambda a, b=0: a + b, 40, b=2))
+    settle()
+    assert seen == [('finished', 42)]
+
+
+def test_exception_reaches_failed(workers, settle):
+    def job():
+        raise ValueError("bus BUS-999 does not exist")
+    seen = _record(workers.submit(job))
+    settle()
+    assert seen == [('failed', "bus BUS-999 does not exist")]
+
+
+def test_cancelled_job_stops_at_its_next_check(workers, settle):
+    started = threading.Event()
+    checks = []
+
+    def job(token):
+        started.set()
+        while True:
+            checks.append(1)
+            token.check()
+            time.sleep(0.005)
+    task = workers.submit_job(job)
+    seen = _record(task)
+    assert started.wait(5)
+    task.cancel()
+    settle()
+    assert seen == [('cancelled', None)]
+    stopped_at = len(checks)
+    time.sleep(0.05)
+    assert len(checks) == stopped_at
+
+
+def test_result_of_a_cancelled_task_is_dropped(workers, settle):
+    release = threading.Event()
+    task = workers.submit(release.wait, 5)
+    seen = _record(task)
+    task.cancel()
+    release.set()
+    settle()
+    assert seen == [('cancelled', None)]
+
+
+def test_progress_is_reported(workers, settle):
+    def job(token, steps):
+        for step in range(1, steps + 1):
+            token.report_progress(step * 100 / steps, f"step {step}")
+        return steps
+    task = workers.submit_job(job, 4)
+    progress = []
+    task.progress.connect(lambda percent, message: progress.append((percent, message)))
+    seen = _record(task)
+    settle()
+    assert progress == [(25, "step 1"), (50, "step 2"), (75, "step 3"), (100, "step 4")]
+    assert seen == [('finished', 4)]